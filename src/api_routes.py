@@ -6,7 +6,7 @@ from typing import Optional
 from fastapi import APIRouter, Request, HTTPException
 from fastapi.responses import JSONResponse
 
-from kospex_query import KospexQuery
+from kweb_db_executor import cached, db_route, request_query
 import kospex_web as KospexWeb
 import kospex_utils as KospexUtils
 
@@ -18,12 +18,13 @@ router = APIRouter(prefix="/api", tags=["api"])
 
 @router.get("/servers/", response_class=JSONResponse)
 @router.get("/servers/{id}", response_class=JSONResponse)
-async def api_servers(request: Request, id: Optional[str] = None):
+@db_route
+def api_servers(request: Request, id: Optional[str] = None):
     """API endpoint for server information"""
     try:
         logger.info(f"API servers endpoint requested with id: {id}")
 
-        kquery = KospexQuery()
+        kquery = request_query()
 
         if id:
             # Get specific server data
@@ -44,7 +45,8 @@ async def api_servers(request: Request, id: Optional[str] = None):
 
 @router.get("/developers/", response_class=JSONResponse)
 @router.get("/developers/{id}", response_class=JSONResponse)
-async def api_developers(request: Request, id: Optional[str] = None):
+@db_route
+def api_developers(request: Request, id: Optional[str] = None):
     """API endpoint for developers information"""
     try:
         logger.info(f"API developers endpoint requested with id: {id}")
@@ -52,28 +54,15 @@ async def api_developers(request: Request, id: Optional[str] = None):
         days = request.query_params.get('days')
         org_key = request.query_params.get('org_key')
 
-        kquery = KospexQuery()
-
         if id:
             # Get specific developer data using base64 decoded ID
-            author_email = KospexUtils.decode_base64(id)
-            if author_email:
-                author_email = author_email.replace(" ", "+")
-
-            repo_list = kquery.repos_by_author(author_email)
-            techs = kquery.author_tech(author_email=author_email)
-            github_handle = KospexUtils.extract_github_username(author_email)
-
-            data = {
-                "developer_id": id,
-                "author_email": author_email,
-                "github_handle": github_handle,
-                "repositories": repo_list,
-                "technologies": techs
-            }
+            data = cached("api:developer", {"id": id}, lambda: _developer_data(id))
         else:
             # Get all developers
-            data = kquery.authors(days=days, org_key=org_key)
+            data = cached(
+                "api:developers", {"days": days, "org_key": org_key},
+                lambda: request_query().authors(days=days, org_key=org_key),
+            )
 
         return JSONResponse(content={
             "status": "success",
@@ -86,18 +75,13 @@ async def api_developers(request: Request, id: Optional[str] = None):
 
 
 @router.get("/orgs/", response_class=JSONResponse)
-async def api_orgs(request: Request):
+@db_route
+def api_orgs(request: Request):
     """API endpoint for organizations information"""
     try:
         logger.info("API orgs endpoint requested")
 
-        kquery = KospexQuery()
-        git_orgs = kquery.orgs()
-        active_devs = kquery.active_devs(org=True)
-
-        # Enhance org data with active developer counts
-        for row in git_orgs:
-            row['active_devs'] = active_devs.get(row['org_key'], 0)
+        git_orgs = cached("orgs", {}, lambda: request_query().orgs_with_active_devs())
 
         return JSONResponse(content={
             "status": "success",
@@ -110,12 +94,13 @@ async def api_orgs(request: Request):
 
 @router.get("/repos/", response_class=JSONResponse)
 @router.get("/repos/{id}", response_class=JSONResponse)
-async def api_repos(request: Request, id: Optional[str] = None):
+@db_route
+def api_repos(request: Request, id: Optional[str] = None):
     """API endpoint for repositories information"""
     try:
         logger.info(f"API repos endpoint requested with id: {id}")
 
-        kquery = KospexQuery()
+        kquery = request_query()
 
         if id:
             # Get specific repository data
@@ -159,32 +144,13 @@ async def api_repos(request: Request, id: Optional[str] = None):
 
 
 @router.get("/developer/{id}", response_class=JSONResponse)
-async def api_developer(request: Request, id: str):
+@db_route
+def api_developer(request: Request, id: str):
     """API endpoint for individual developer information (ID required)"""
     try:
         logger.info(f"API developer endpoint requested with id: {id}")
 
-        # Decode the base64 ID to get author email
-        author_email = KospexUtils.decode_base64(id)
-
-        # Handle GitHub + signs in URLs
-        if author_email:
-            author_email = author_email.replace(" ", "+")
-
-        kquery = KospexQuery()
-        repo_list = kquery.repos_by_author(author_email)
-        techs = kquery.author_tech(author_email=author_email)
-
-        # Extract GitHub username if possible
-        github_handle = KospexUtils.extract_github_username(author_email)
-
-        data = {
-            "developer_id": id,
-            "author_email": author_email,
-            "github_handle": github_handle,
-            "repositories": repo_list,
-            "technologies": techs
-        }
+        data = cached("api:developer", {"id": id}, lambda: _developer_data(id))
 
         return JSONResponse(content={
             "status": "success",
@@ -195,6 +161,23 @@ async def api_developer(request: Request, id: str):
         raise HTTPException(status_code=500, detail="Internal server error")
 
 
+def _developer_data(id):
+    """Repositories and technologies for the developer with base64 ID id."""
+    author_email = KospexUtils.decode_base64(id)
+    # Handle GitHub + signs in URLs
+    if author_email:
+        author_email = author_email.replace(" ", "+")
+
+    kquery = request_query()
+    return {
+        "developer_id": id,
+        "author_email": author_email,
+        "github_handle": KospexUtils.extract_github_username(author_email),
+        "repositories": kquery.repos_by_author(author_email),
+        "technologies": kquery.author_tech(author_email=author_email)
+    }
+
+
 # Additional API endpoints for completeness
 @router.get("/health", response_class=JSONResponse)
 async def api_health():
@@ -207,7 +190,8 @@ async def api_health():
 
 
 @router.get("/summary", response_class=JSONResponse)
-async def api_summary(request: Request):
+@db_route
+def api_summary(request: Request):
     """API endpoint for summary information"""
     try:
         logger.info("API summary endpoint requested")
@@ -215,8 +199,10 @@ async def api_summary(request: Request):
         days = request.query_params.get('days')
         org_key = request.query_params.get('org_key')
 
-        kquery = KospexQuery()
-        data = kquery.summary(days=days, org_key=org_key)
+        data = cached(
+            "api:summary", {"days": days, "org_key": org_key},
+            lambda: request_query().summary(days=days, org_key=org_key),
+        )
 
         return JSONResponse(content={
             "status": "success",
@@ -228,7 +214,8 @@ async def api_summary(request: Request):
 
 
 @router.get("/tech-landscape", response_class=JSONResponse)
-async def api_tech_landscape(request: Request):
+@db_route
+def api_tech_landscape(request: Request):
     """API endpoint for technology landscape"""
     try:
         logger.info("API tech landscape endpoint requested")
@@ -236,8 +223,10 @@ async def api_tech_landscape(request: Request):
         repo_id = request.query_params.get('repo_id')
         org_key = request.query_params.get('org_key')
 
-        kquery = KospexQuery()
-        data = kquery.tech_landscape(org_key=org_key, repo_id=repo_id)
+        data = cached(
+            "api:tech-landscape", {"org_key": org_key, "repo_id": repo_id},
+            lambda: request_query().tech_landscape(org_key=org_key, repo_id=repo_id),
+        )
 
         return JSONResponse(content={
             "status": "success",
@@ -2,6 +2,7 @@
 """
 The kospex git CLI helper tool.
 """
+import functools
 import time
 import os
 import json
@@ -12,6 +13,7 @@ from kospex_core import GitRepo, Kospex, RepoPathConflict, repo_path_conflict
 from rich.console import Console
 import kospex_utils as KospexUtils
 from kospex.db.migrator import warn_if_behind
+from kospex.parallel_sync import FAIL, SKIP, ParallelSync
 from kospex_git import KospexGit
 from kospex_github import KospexGithub
 from kospex_bitbucket import (
@@ -375,8 +377,8 @@ def sync(org, sync_db, url):
             console.print(f"[bold red]Error:[/bold red] Failed to clone {url}")
             return
         log.info(f"Syncing repository {url} to path: {repo_path}")
-        commits = kospex.sync_repo(repo_path)
-        console.print(f"Synced {len(commits)} commits")
+        synced = kospex.sync_repo(repo_path)
+        console.print(f"Synced {synced} commits")
 
 
 def _git_pull(path, no_prompt=False):
@@ -422,8 +424,10 @@ def _git_pull(path, no_prompt=False):
               help="Offline staleness report; no pull, no network")
 @click.option("--no-prompt", "no_prompt", is_flag=True, default=False,
               help="Non-interactive auth (fail fast) for unattended runs")
+@click.option("--workers", type=click.IntRange(min=1), default=1,
+              help="Repos to pull and extract in parallel (DB writes stay serial)")
 @click.argument("repo_id", required=False, type=click.STRING)
-def pull(all_flag, org, server, check, no_prompt, repo_id):
+def pull(all_flag, org, server, check, no_prompt, workers, repo_id):
     """Refresh the local clones kospex already knows about (git pull + sync).
 
     Scope is required - a REPO_ID or one of --all / --org / --server.
@@ -449,27 +453,60 @@ def pull(all_flag, org, server, check, no_prompt, repo_id):
         return
 
     updated = current = skipped = failed = 0
-    for r in repos:
-        rid = r.get("_repo_id")
-        path = r.get("file_path")
-        ok, detail, commits = _git_pull(path, no_prompt=no_prompt)
-        if not ok:
-            console.print(f"SKIP {rid}: {detail}", style="yellow")
-            skipped += 1
-            continue
-        kospex.kospex_query.set_repo_last_fetch(rid)
-        try:
-            kospex.sync_repo(path)
-        except Exception as e:  # never let one repo kill the run
-            log.error(f"sync failed for {rid}: {e}")
-            console.print(f"FAIL {rid}: sync error: {e}", style="red")
-            failed += 1
-            continue
-        if commits:
-            console.print(f"OK   {rid}: {detail}", style="green")
-            updated += 1
-        else:
-            current += 1
+    if workers > 1:
+        # git pull, git log (spooled to a temp file) and the file scanners run
+        # in worker processes; this process does every DB write as each repo's
+        # extract comes back.
+        by_path = {}
+        for r in repos:
+            path = r.get("file_path")
+            if path is None or not os.path.isdir(path):
+                _, detail, _ = _git_pull(path)
+                console.print(f"SKIP {r.get('_repo_id')}: {detail}", style="yellow")
+                skipped += 1
+                continue
+            by_path[path] = r.get("_repo_id")
+
+        scheduler = ParallelSync(kospex, workers,
+                                 pull=functools.partial(_git_pull, no_prompt=no_prompt))
+        for result in scheduler.run(list(by_path)):
+            rid = by_path[result.directory]
+            pulled = result.pull_result
+            if pulled and pulled[0]:
+                kospex.kospex_query.set_repo_last_fetch(rid)
+            if result.status == SKIP:
+                console.print(f"SKIP {rid}: {result.detail}", style="yellow")
+                skipped += 1
+            elif result.status == FAIL:
+                console.print(f"FAIL {rid}: sync error: {result.detail}", style="red")
+                failed += 1
+            elif pulled[2]:
+                console.print(f"OK   {rid}: {pulled[1]}", style="green")
+                updated += 1
+            else:
+                current += 1
+    else:
+        for r in repos:
+            rid = r.get("_repo_id")
+            path = r.get("file_path")
+            ok, detail, commits = _git_pull(path, no_prompt=no_prompt)
+            if not ok:
+                console.print(f"SKIP {rid}: {detail}", style="yellow")
+                skipped += 1
+                continue
+            kospex.kospex_query.set_repo_last_fetch(rid)
+            try:
+                kospex.sync_repo(path)
+            except Exception as e:  # never let one repo kill the run
+                log.error(f"sync failed for {rid}: {e}")
+                console.print(f"FAIL {rid}: sync error: {e}", style="red")
+                failed += 1
+                continue
+            if commits:
+                console.print(f"OK   {rid}: {detail}", style="green")
+                updated += 1
+            else:
+                current += 1
     console.print(
         f"\nDone. updated={updated} up-to-date={current} skipped={skipped} failed={failed}"
     )
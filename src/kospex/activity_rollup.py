@@ -0,0 +1,220 @@
+"""The activity_daily rollup: commits per repo, author, committer and UTC day.
+
+KospexQuery.summary, repos, repos2, orgs, developers, authors and
+get_activity_stats used to aggregate the raw commits table on every call, and
+kweb calls several of them per page. They read activity_daily instead, so
+their cost follows authors x days rather than the number of commits.
+
+Each row holds the day's commits, lines added and deleted, files changed (the
+sum of commits._files) and the first and last author_when and committer_when.
+Alongside it, developer_files keeps the last day each author changed each
+file, for developer_stats (see kospex/developer_stats.py).
+
+Kospex.write_commits collects a CommitActivity from the commits it writes that
+were not already in the database (a resync re-reads a few), and
+ActivityRollup.fold adds it to both tables. Migration 0013 backfilled them from
+commits, and rebuild() does the same for one repo, or all of them.
+
+Days are UTC dates of committer_when, as SQLite's date() gives them, so a
+window over the rollup covers whole days.
+"""
+from __future__ import annotations
+
+from datetime import datetime, timedelta, timezone
+
+import kospex_schema as KospexSchema
+
+# Hashes per existence query, under SQLite's bound parameter limit
+HASH_BATCH_SIZE = 500
+
+COUNTERS = ("commits", "additions", "deletions", "files",
+            "first_authored", "last_authored", "first_committed", "last_committed")
+
+
+def utc_day(when):
+    """The UTC date (YYYY-MM-DD) of an ISO 8601 timestamp, as SQLite's date() gives it."""
+    try:
+        parsed = datetime.fromisoformat(when)
+    except (TypeError, ValueError):
+        return (when or "")[:10]
+    if parsed.tzinfo is None:
+        return parsed.date().isoformat()
+    return parsed.astimezone(timezone.utc).date().isoformat()
+
+
+def window_cutoff(days, now=None):
+    """The UTC day a window of the last days starts after: rollup rows with day > it."""
+    now = now or datetime.now(timezone.utc)
+    return (now - timedelta(days=int(days))).date().isoformat()
+
+
+def existing_hashes(kospex_db, repo_id, hashes):
+    """The subset of hashes already in the commits table for the repo."""
+    hashes = list(hashes)
+    found = set()
+    for start in range(0, len(hashes), HASH_BATCH_SIZE):
+        batch = hashes[start:start + HASH_BATCH_SIZE]
+        rows = kospex_db.execute(
+            f"SELECT hash FROM {KospexSchema.TBL_COMMITS} "
+            f"WHERE _repo_id = ? AND hash IN ({', '.join('?' * len(batch))})",
+            [repo_id, *batch],
+        ).fetchall()
+        found.update(row[0] for row in rows)
+    return found
+
+
+class CommitActivity:
+    """What a set of new kospex.git_log CommitRecords adds to the rollup."""
+
+    def __init__(self, git_details=None):
+        # _git_server, _git_owner, _git_repo of the repo, set by write_commits
+        self.git_details = git_details or {}
+        self.commits = 0
+        # (author_email, committer_email, day): [COUNTERS]
+        self.days = {}
+        # (author_email, file_path): last day
+        self.files = {}
+
+    def add(self, commit):
+        """Count one commit. Only pass commits not yet in the database."""
+        self.commits += 1
+        day = utc_day(commit.committer_when)
+        key = (commit.author_email or "", commit.committer_email or "", day)
+        additions = sum(change.additions or 0 for change in commit.files)
+        deletions = sum(change.deletions or 0 for change in commit.files)
+        counters = self.days.get(key)
+        if counters is None:
+            self.days[key] = [1, additions, deletions, len(commit.files),
+                              commit.author_when, commit.author_when,
+                              commit.committer_when, commit.committer_when]
+        else:
+            counters[0] += 1
+            counters[1] += additions
+            counters[2] += deletions
+            counters[3] += len(commit.files)
+            counters[4] = min(counters[4], commit.author_when)
+            counters[5] = max(counters[5], commit.author_when)
+            counters[6] = min(counters[6], commit.committer_when)
+            counters[7] = max(counters[7], commit.committer_when)
+
+        for change in commit.files:
+            key = (commit.author_email or "", change.file_path)
+            if day > self.files.get(key, ""):
+                self.files[key] = day
+
+
+def _earliest(column):
+    return f"{column} = MIN(COALESCE({column}, excluded.{column}), " \
+           f"COALESCE(excluded.{column}, {column}))"
+
+
+def _latest(column):
+    return f"{column} = MAX(COALESCE({column}, excluded.{column}), " \
+           f"COALESCE(excluded.{column}, {column}))"
+
+
+class ActivityRollup:
+    """The activity_daily and developer_files tables of a kospex database."""
+
+    def __init__(self, kospex_db):
+        self.kospex_db = kospex_db
+
+    def update(self, repo_id, activity=None):
+        """Fold in the activity of a sync, or rebuild the repo without one."""
+        if activity is None or self.drifted(repo_id, activity):
+            self.rebuild(repo_id)
+        else:
+            self.fold(repo_id, activity)
+
+    def drifted(self, repo_id, activity=None):
+        """True if the repo's commits are not the rollup's plus the activity's.
+
+        write_commits commits its rows before the rollup is folded, so a sync
+        interrupted in between leaves commits the rollup never counted, and a
+        repo synced before the rollup existed has none of them counted. Either
+        way folding would keep the gap, so the repo is rebuilt instead.
+        """
+        counted = self.kospex_db.execute(
+            f"SELECT COALESCE(SUM(commits), 0) FROM {KospexSchema.TBL_ACTIVITY_DAILY} "
+            "WHERE _repo_id = ?",
+            [repo_id],
+        ).fetchone()[0]
+        total = self.kospex_db.execute(
+            f"SELECT COUNT(*) FROM {KospexSchema.TBL_COMMITS} WHERE _repo_id = ?", [repo_id]
+        ).fetchone()[0]
+        return total != counted + (activity.commits if activity else 0)
+
+    def fold(self, repo_id, activity):
+        """Add the activity's counters to the rollup."""
+        git = activity.git_details
+        parts = repo_id.split("~", 2)
+        server, owner, repo = (git.get("_git_server", parts[0]), git.get("_git_owner", parts[-2]),
+                               git.get("_git_repo", parts[-1]))
+        days = [(repo_id, server, owner, repo, author, committer, day, *counters)
+                for (author, committer, day), counters in activity.days.items()]
+        files = [(repo_id, author, path, day) for (author, path), day in activity.files.items()]
+        with self.kospex_db.conn:
+            self.kospex_db.conn.executemany(
+                f"""INSERT INTO {KospexSchema.TBL_ACTIVITY_DAILY}
+                    (_repo_id, _git_server, _git_owner, _git_repo, author_email,
+                     committer_email, day, {', '.join(COUNTERS)})
+                VALUES ({', '.join('?' * (7 + len(COUNTERS)))})
+                ON CONFLICT (_repo_id, author_email, committer_email, day) DO UPDATE SET
+                    commits = commits + excluded.commits,
+                    additions = additions + excluded.additions,
+                    deletions = deletions + excluded.deletions,
+                    files = files + excluded.files,
+                    {_earliest("first_authored")}, {_latest("last_authored")},
+                    {_earliest("first_committed")}, {_latest("last_committed")}""",
+                days,
+            )
+            self.kospex_db.conn.executemany(
+                f"""INSERT INTO {KospexSchema.TBL_DEVELOPER_FILES}
+                    (_repo_id, author_email, file_path, last_day)
+                VALUES (?, ?, ?, ?)
+                ON CONFLICT (_repo_id, author_email, file_path) DO UPDATE SET
+                    last_day = MAX(last_day, excluded.last_day)""",
+                files,
+            )
+
+    def rebuild(self, repo_id=None):
+        """Recreate the rollup of a repo, or of every repo, from commits and commit_files."""
+        where, params = ("WHERE c._repo_id = ?", [repo_id]) if repo_id else ("", [])
+        files_where = "WHERE _repo_id = ?" if repo_id else ""
+        with self.kospex_db.conn:
+            for table in (KospexSchema.TBL_ACTIVITY_DAILY, KospexSchema.TBL_DEVELOPER_FILES):
+                self.kospex_db.execute(f"DELETE FROM {table} {files_where}", params)
+            self.kospex_db.execute(
+                f"""INSERT INTO {KospexSchema.TBL_ACTIVITY_DAILY}
+                    (_repo_id, _git_server, _git_owner, _git_repo, author_email,
+                     committer_email, day, {', '.join(COUNTERS)})
+                SELECT c._repo_id, MAX(c._git_server), MAX(c._git_owner), MAX(c._git_repo),
+                    COALESCE(c.author_email, ''), COALESCE(c.committer_email, ''),
+                    date(c.committer_when), COUNT(*),
+                    COALESCE(SUM(f.additions), 0), COALESCE(SUM(f.deletions), 0),
+                    COALESCE(SUM(c._files), 0), MIN(c.author_when), MAX(c.author_when),
+                    MIN(c.committer_when), MAX(c.committer_when)
+                FROM {KospexSchema.TBL_COMMITS} c
+                LEFT JOIN (
+                    SELECT _repo_id, hash, SUM(additions) AS additions,
+                        SUM(deletions) AS deletions
+                    FROM {KospexSchema.TBL_COMMIT_FILES} {files_where}
+                    GROUP BY _repo_id, hash
+                ) f ON f._repo_id = c._repo_id AND f.hash = c.hash
+                {where}
+                GROUP BY c._repo_id, COALESCE(c.author_email, ''),
+                    COALESCE(c.committer_email, ''), date(c.committer_when)""",
+                params * 2,
+            )
+            self.kospex_db.execute(
+                f"""INSERT INTO {KospexSchema.TBL_DEVELOPER_FILES}
+                    (_repo_id, author_email, file_path, last_day)
+                SELECT c._repo_id, COALESCE(c.author_email, ''), cf.file_path,
+                    MAX(date(c.committer_when))
+                FROM {KospexSchema.TBL_COMMITS} c
+                JOIN {KospexSchema.TBL_COMMIT_FILES} cf
+                    ON cf.hash = c.hash AND cf._repo_id = c._repo_id
+                {where}
+                GROUP BY c._repo_id, COALESCE(c.author_email, ''), cf.file_path""",
+                params,
+            )
@@ -0,0 +1,116 @@
+"""Batched, transactional row writer for bulk ingestion into the kospex DB.
+
+`Kospex.sync_repo` used to upsert every commit and every commit_files row as
+its own statement, each in its own implicit transaction. On a first sync of a
+large repo that is millions of round trips and fsyncs. BulkWriter buffers rows
+per table and writes each full batch with `upsert_all()` inside one explicit
+`Database.atomic()` transaction.
+"""
+from __future__ import annotations
+
+import time
+from typing import Optional
+
+DEFAULT_BATCH_SIZE = 5000
+
+
+class BulkWriter:
+    """Buffer rows per table and flush them in batched transactions.
+
+    Register each table with its primary key, then `add()` rows. When any
+    table's buffer reaches `batch_size`, every buffered table is flushed
+    together in a single transaction, so a commit and its file rows land in
+    the same transaction when they share a batch. Call `flush()` (or use the
+    writer as a context manager) to write whatever is left at the end.
+
+    A failed flush rolls the whole batch back and re-raises; rows from earlier
+    flushes stay committed.
+    """
+
+    def __init__(self, db, batch_size: Optional[int] = None):
+        batch_size = DEFAULT_BATCH_SIZE if batch_size is None else batch_size
+        if batch_size < 1:
+            raise ValueError(f"batch_size must be a positive integer, got {batch_size}")
+        self.db = db
+        self.batch_size = batch_size
+        self._pks: dict[str, list[str]] = {}
+        self._buffers: dict[str, list[dict]] = {}
+        self.rows_written: dict[str, int] = {}
+        self.batches = 0
+        self._started = time.perf_counter()
+        self._write_seconds = 0.0
+
+    def register(self, table: str, pk: list[str]) -> None:
+        """Declare a table to buffer rows for, with its upsert primary key."""
+        self._pks[table] = list(pk)
+        self._buffers.setdefault(table, [])
+        self.rows_written.setdefault(table, 0)
+
+    def add(self, table: str, row: dict) -> None:
+        """Buffer one row, flushing every table when this one's batch is full."""
+        if table not in self._pks:
+            raise KeyError(f"Table {table} has not been registered with BulkWriter")
+        buffer = self._buffers[table]
+        buffer.append(row)
+        if len(buffer) >= self.batch_size:
+            self.flush()
+
+    def pending(self) -> int:
+        """Number of rows buffered but not yet written."""
+        return sum(len(rows) for rows in self._buffers.values())
+
+    def flush(self) -> int:
+        """Write all buffered rows in one transaction. Returns rows written."""
+        if not self.pending():
+            return 0
+
+        start = time.perf_counter()
+        written = 0
+        with self.db.atomic():
+            for table, rows in self._buffers.items():
+                if not rows:
+                    continue
+                self.db.table(table).upsert_all(
+                    rows, pk=self._pks[table], batch_size=self.batch_size
+                )
+                written += len(rows)
+
+        # Only count and clear once the transaction has committed: a failed
+        # flush leaves the buffers intact for the caller to inspect.
+        for table, rows in self._buffers.items():
+            self.rows_written[table] += len(rows)
+            rows.clear()
+        self.batches += 1
+        self._write_seconds += time.perf_counter() - start
+        return written
+
+    def total_rows(self) -> int:
+        """Rows written across every table so far."""
+        return sum(self.rows_written.values())
+
+    def elapsed(self) -> float:
+        """Seconds since the writer was created."""
+        return time.perf_counter() - self._started
+
+    def rows_per_second(self) -> float:
+        """Overall write throughput, measured from creation to now."""
+        elapsed = self.elapsed()
+        return self.total_rows() / elapsed if elapsed > 0 else 0.0
+
+    def summary(self) -> str:
+        """One-line throughput report for the end of a sync."""
+        per_table = ", ".join(f"{t}: {n}" for t, n in self.rows_written.items())
+        return (
+            f"Wrote {self.total_rows()} rows ({per_table}) in {self.batches} batch(es), "
+            f"{self.elapsed():.1f}s at {self.rows_per_second():.0f} rows/sec "
+            f"({self._write_seconds:.1f}s in DB writes)"
+        )
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        # Don't write a partial batch on the way out of an exception.
+        if exc_type is None:
+            self.flush()
+        return False
@@ -0,0 +1,126 @@
+"""Secondary indexes in the kospex database, and which queries use them.
+
+The indexes themselves are created by migrations (see
+migrations/0006_hot_query_indexes.sql and 0014_commit_epochs.sql); this module reads them back and
+explains the hot queries against them, for ``kospex db-indexes``.
+
+HOT_QUERIES are representative shapes of the filters kospex_query.py runs on
+every kweb page and CLI report. Each is run through EXPLAIN QUERY PLAN, so the
+report reflects what SQLite would actually do against this database - a query
+that shows a full SCAN is a candidate for a new index migration.
+"""
+import re
+from typing import NamedTuple
+
+
+class HotQuery(NamedTuple):
+    name: str
+    sql: str
+
+
+class IndexInfo(NamedTuple):
+    table: str
+    name: str
+    columns: list
+
+
+class QueryPlan(NamedTuple):
+    name: str
+    sql: str
+    details: list   # EXPLAIN QUERY PLAN detail lines, outermost first
+    indexes: list   # indexes (or "PRIMARY KEY") the plan uses
+    scans: list     # tables read by a full scan
+
+
+HOT_QUERIES = [
+    HotQuery(
+        "repo activity since a date",
+        "SELECT author_email, COUNT(*) FROM commits "
+        "WHERE _repo_id = ? AND _committer_epoch > ? GROUP BY author_email",
+    ),
+    HotQuery(
+        "active developers since a date",
+        "SELECT COUNT(DISTINCT author_email) FROM commits WHERE _author_epoch > ?",
+    ),
+    HotQuery(
+        "commits by author",
+        "SELECT _repo_id, COUNT(*), MAX(committer_when) FROM commits "
+        "WHERE author_email = ? GROUP BY _repo_id",
+    ),
+    HotQuery(
+        "org commits",
+        "SELECT _repo_id, COUNT(*) FROM commits "
+        "WHERE _git_server = ? AND _git_owner = ? GROUP BY _repo_id",
+    ),
+    HotQuery(
+        "file history",
+        "SELECT hash, committer_when FROM commit_files "
+        "WHERE _repo_id = ? AND file_path = ? ORDER BY committer_when DESC",
+    ),
+    HotQuery(
+        "recently changed files",
+        "SELECT _repo_id, file_path, COUNT(*) FROM commit_files "
+        "WHERE _committer_epoch > ? GROUP BY _repo_id, file_path",
+    ),
+    HotQuery(
+        "repo file metadata",
+        "SELECT Provider, Language, Code FROM file_metadata "
+        "WHERE _repo_id = ? AND latest = 1",
+    ),
+    HotQuery(
+        "repo dependencies",
+        "SELECT package_type, package_name, package_version FROM dependency_data "
+        "WHERE _repo_id = ? AND latest = 1",
+    ),
+    HotQuery(
+        "manifest dependencies",
+        "SELECT package_name, latest FROM dependency_data "
+        "WHERE _repo_id = ? AND file_path = ?",
+    ),
+    HotQuery(
+        "last sync",
+        "SELECT last_sync FROM repos ORDER BY last_sync DESC LIMIT 1",
+    ),
+]
+
+_USING_INDEX = re.compile(r"USING (?:COVERING )?INDEX (\S+)")
+_FULL_SCAN = re.compile(r"^SCAN (\S+)(?!.* USING )")
+
+
+def list_indexes(db) -> list:
+    """Explicitly created indexes (not primary key autoindexes), by table then name."""
+    rows = db.execute(
+        "SELECT tbl_name, name FROM sqlite_master "
+        "WHERE type = 'index' AND sql IS NOT NULL ORDER BY tbl_name, name"
+    ).fetchall()
+    indexes = []
+    for table, name in rows:
+        columns = [
+            col[2] if col[2] is not None else "<expr>"
+            for col in db.execute(f"PRAGMA index_info([{name}])").fetchall()
+        ]
+        indexes.append(IndexInfo(table, name, columns))
+    return indexes
+
+
+def explain(db, name, sql) -> QueryPlan:
+    """EXPLAIN QUERY PLAN for ``sql`` (any ? parameters bound to NULL)."""
+    params = [None] * sql.count("?")
+    rows = db.execute(f"EXPLAIN QUERY PLAN {sql}", params).fetchall()
+    details = [row[-1] for row in rows]
+    indexes, scans = [], []
+    for detail in details:
+        match = _USING_INDEX.search(detail)
+        if match:
+            indexes.append(match.group(1))
+        elif "PRIMARY KEY" in detail:
+            indexes.append("PRIMARY KEY")
+        scan = _FULL_SCAN.match(detail)
+        if scan:
+            scans.append(scan.group(1))
+    return QueryPlan(name, sql, details, indexes, scans)
+
+
+def explain_hot_queries(db, queries=HOT_QUERIES) -> list:
+    """A QueryPlan for each hot query."""
+    return [explain(db, query.name, query.sql) for query in queries]
@@ -0,0 +1,28 @@
+-- 0006_hot_query_indexes.sql
+--
+-- Secondary indexes for the filters and groupings kospex_query.py uses on
+-- almost every page: time windows on committer_when, per-repo and per-org
+-- scoping, per-author lookups, and the latest=1 snapshots in file_metadata
+-- and dependency_data. Until now the only indexes were the primary keys, so
+-- most of these were full table scans (krunner copied tables into memory and
+-- indexed them ad hoc to cope).
+--
+-- Composite indexes put the equality column first and the range/sort column
+-- second, so "WHERE _repo_id = ? AND committer_when > ?" is one index range.
+--
+-- `kospex db-indexes -explain` shows which hot query uses which index (the
+-- query list lives in kospex/db/indexes.py). Building these on a large existing
+-- DB takes a while and grows the file - run upgrade-db when kweb is stopped.
+
+CREATE INDEX IF NOT EXISTS idx_commits_repo_when ON commits(_repo_id, committer_when);
+CREATE INDEX IF NOT EXISTS idx_commits_when ON commits(committer_when);
+CREATE INDEX IF NOT EXISTS idx_commits_author ON commits(author_email, committer_when);
+CREATE INDEX IF NOT EXISTS idx_commits_org ON commits(_git_server, _git_owner);
+
+CREATE INDEX IF NOT EXISTS idx_commit_files_repo_path_when ON commit_files(_repo_id, file_path, committer_when);
+CREATE INDEX IF NOT EXISTS idx_commit_files_when ON commit_files(committer_when);
+
+CREATE INDEX IF NOT EXISTS idx_file_metadata_repo_latest ON file_metadata(_repo_id, latest);
+CREATE INDEX IF NOT EXISTS idx_dependency_data_repo_latest ON dependency_data(_repo_id, latest);
+
+CREATE INDEX IF NOT EXISTS idx_repos_last_sync ON repos(last_sync);
@@ -0,0 +1,28 @@
+"""Backfill commit_files.language for rows synced before the column existed.
+
+Resolves each distinct file_path once into a temp table, then fills every
+commit_files row from it with one UPDATE.
+"""
+from kospex.languages import file_language
+
+
+def up(db):
+    paths = [row[0] for row in db.execute(
+        "SELECT DISTINCT file_path FROM commit_files WHERE language IS NULL"
+    ).fetchall()]
+    if not paths:
+        return
+
+    db.execute(
+        "CREATE TEMP TABLE _file_language (file_path TEXT PRIMARY KEY, language TEXT)"
+    )
+    db.conn.executemany(
+        "INSERT INTO _file_language (file_path, language) VALUES (?, ?)",
+        ((path, file_language(path)) for path in paths),
+    )
+    db.execute(
+        "UPDATE commit_files SET language = "
+        "(SELECT language FROM _file_language f WHERE f.file_path = commit_files.file_path) "
+        "WHERE language IS NULL"
+    )
+    db.execute("DROP TABLE _file_language")
@@ -0,0 +1,8 @@
+-- 0007_commit_files_language.sql
+--
+-- The language of each changed file, resolved once at ingest (by basename,
+-- see kospex/languages.py) instead of calling Panopticas.get_language for every
+-- row each time developer_tech runs. "Unknown" for unrecognised files. NULL
+-- only before the backfill in 0007_commit_files_language.py has run.
+
+ALTER TABLE commit_files ADD COLUMN language TEXT;
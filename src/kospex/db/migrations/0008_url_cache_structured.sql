@@ -0,0 +1,16 @@
+-- 0008_url_cache_structured.sql
+--
+-- url_cache keeps more than the raw body of a 200 (see kospex/url_cache.py):
+--   status    the HTTP status. 404/410 are cached as negative entries with
+--             their own TTL. NULL on older rows, which were all 200s.
+--   encoding  'zlib' when content holds a compressed body, NULL for plain text
+--   size      length of the uncompressed body
+--   hits      times the entry was served from the cache
+--   fetches   times the URL was fetched and stored
+-- `kospex cache stats` reports these, and `kospex cache prune` removes expired rows.
+
+ALTER TABLE url_cache ADD COLUMN status INTEGER;
+ALTER TABLE url_cache ADD COLUMN encoding TEXT;
+ALTER TABLE url_cache ADD COLUMN size INTEGER;
+ALTER TABLE url_cache ADD COLUMN hits INTEGER NOT NULL DEFAULT 0;
+ALTER TABLE url_cache ADD COLUMN fetches INTEGER NOT NULL DEFAULT 1;
@@ -0,0 +1,31 @@
+-- 0009_depsdev_snapshot.sql
+--
+-- A local copy of deps.dev data for hosts without network access, loaded by
+-- `kospex depsdev-import` (see kospex/depsdev_snapshot.py). KospexDependencies
+-- looks here before calling deps.dev.
+--
+-- depsdev_snapshot holds one zlib-compressed deps.dev JSON document per key.
+-- kind is version, package or dependencies. system is lower case (npm, pypi,
+-- go ...). version is '' for package documents.
+-- depsdev_snapshot_advisories holds advisory ids from OSV records, by version.
+
+CREATE TABLE IF NOT EXISTS depsdev_snapshot (
+    kind TEXT NOT NULL,
+    system TEXT NOT NULL,
+    name TEXT NOT NULL,
+    version TEXT NOT NULL DEFAULT '',
+    content BLOB,
+    source TEXT,
+    imported_at TEXT,
+    PRIMARY KEY (kind, system, name, version)
+);
+
+CREATE TABLE IF NOT EXISTS depsdev_snapshot_advisories (
+    system TEXT NOT NULL,
+    name TEXT NOT NULL,
+    version TEXT NOT NULL,
+    advisory_id TEXT NOT NULL,
+    source TEXT,
+    imported_at TEXT,
+    PRIMARY KEY (system, name, version, advisory_id)
+);
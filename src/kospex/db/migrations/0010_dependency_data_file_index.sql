@@ -0,0 +1,9 @@
+-- 0010_dependency_data_file_index.sql
+--
+-- save_dependencies demotes every row of each manifest it rewrites
+-- (WHERE _repo_id = ? AND file_path = ?) in one UPDATE joined to a temp table
+-- of the files. The primary key starts (_repo_id, hash, ...) and
+-- idx_dependency_data_repo_latest is (_repo_id, latest), so without this index
+-- each file's rows are found by scanning all of its repo's rows.
+
+CREATE INDEX IF NOT EXISTS idx_dependency_data_repo_file ON dependency_data(_repo_id, file_path);
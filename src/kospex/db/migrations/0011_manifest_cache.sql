@@ -0,0 +1,22 @@
+-- 0011_manifest_cache.sql
+--
+-- Parsed dependency manifests, kept between `krunner osi` runs (see
+-- kospex/manifest_parsing.py). A manifest whose file_metadata hash has not
+-- changed since it was parsed is not read or parsed again.
+--
+-- One row per (_repo_id, file_path): storing a new hash replaces the old row.
+-- records is the zlib-compressed JSON list of parsed records.
+-- parser_version is bumped in code when a parser's output changes, and rows
+-- from another version are ignored.
+
+CREATE TABLE IF NOT EXISTS manifest_cache (
+    _repo_id TEXT NOT NULL,
+    file_path TEXT NOT NULL,
+    hash TEXT NOT NULL,
+    parser_version INTEGER NOT NULL,
+    extractor TEXT,
+    records BLOB,
+    record_count INTEGER,
+    parsed_at TEXT,
+    PRIMARY KEY (_repo_id, file_path)
+);
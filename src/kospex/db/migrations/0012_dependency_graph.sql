@@ -0,0 +1,34 @@
+-- 0012_dependency_graph.sql
+--
+-- A persisted store for the /supply-chain/ view (see kospex/dependency_graph.py).
+--
+-- dependency_graphs holds each root package version's resolved graph, the
+-- deps.dev :dependencies document with its nodes and edges, zlib-compressed.
+-- dependency_graph_nodes holds the enrichment of each node (publish date,
+-- advisory count, versions behind) once per version key, so graphs that
+-- share packages share the work.
+-- id is 'system:name:version', lower case, as versionKey_id() builds it.
+-- fetched_at and enriched_at are epoch seconds.
+
+CREATE TABLE IF NOT EXISTS dependency_graphs (
+    id TEXT PRIMARY KEY,
+    system TEXT,
+    name TEXT,
+    version TEXT,
+    document BLOB,
+    node_count INTEGER,
+    edge_count INTEGER,
+    fetched_at INTEGER
+);
+
+CREATE TABLE IF NOT EXISTS dependency_graph_nodes (
+    id TEXT PRIMARY KEY,
+    system TEXT,
+    name TEXT,
+    version TEXT,
+    published_at TEXT,
+    advisories INTEGER,
+    versions_behind INTEGER,
+    resolution TEXT,
+    enriched_at INTEGER
+);
@@ -0,0 +1,69 @@
+-- 0013_activity_rollup.sql
+--
+-- The activity_daily rollup (see kospex/activity_rollup.py): commits per
+-- repo, author, committer and UTC day of committer_when, with lines added and
+-- deleted, files changed (the sum of commits._files) and the first and last
+-- author_when and committer_when. summary, repos, repos2, orgs, developers
+-- and authors in KospexQuery aggregate it instead of the raw commits table.
+--
+-- developer_stats is derived from it and from developer_files, which holds
+-- the last UTC day each author changed each file and gives unique_files and
+-- unique_files_90_days (see kospex/developer_stats.py).
+--
+-- Both are backfilled from commits here, and each sync folds in only the
+-- commits it wrote instead of re-aggregating the repo's history.
+
+CREATE TABLE IF NOT EXISTS activity_daily (
+    _repo_id TEXT,
+    _git_server TEXT,
+    _git_owner TEXT,
+    _git_repo TEXT,
+    author_email TEXT,
+    committer_email TEXT,
+    day TEXT,
+    commits INTEGER,
+    additions INTEGER,
+    deletions INTEGER,
+    files INTEGER,
+    first_authored TEXT,
+    last_authored TEXT,
+    first_committed TEXT,
+    last_committed TEXT,
+    PRIMARY KEY (_repo_id, author_email, committer_email, day)
+);
+
+CREATE INDEX IF NOT EXISTS idx_activity_daily_day ON activity_daily(day);
+CREATE INDEX IF NOT EXISTS idx_activity_daily_org ON activity_daily(_git_server, _git_owner, day);
+
+CREATE TABLE IF NOT EXISTS developer_files (
+    _repo_id TEXT,
+    author_email TEXT,
+    file_path TEXT,
+    last_day TEXT,
+    PRIMARY KEY (_repo_id, author_email, file_path)
+);
+
+INSERT OR REPLACE INTO activity_daily
+    (_repo_id, _git_server, _git_owner, _git_repo, author_email, committer_email, day,
+     commits, additions, deletions, files, first_authored, last_authored,
+     first_committed, last_committed)
+SELECT c._repo_id, MAX(c._git_server), MAX(c._git_owner), MAX(c._git_repo),
+    COALESCE(c.author_email, ''), COALESCE(c.committer_email, ''),
+    date(c.committer_when), COUNT(*),
+    COALESCE(SUM(f.additions), 0), COALESCE(SUM(f.deletions), 0),
+    COALESCE(SUM(c._files), 0), MIN(c.author_when), MAX(c.author_when),
+    MIN(c.committer_when), MAX(c.committer_when)
+FROM commits c
+LEFT JOIN (
+    SELECT _repo_id, hash, SUM(additions) AS additions, SUM(deletions) AS deletions
+    FROM commit_files
+    GROUP BY _repo_id, hash
+) f ON f._repo_id = c._repo_id AND f.hash = c.hash
+GROUP BY c._repo_id, COALESCE(c.author_email, ''), COALESCE(c.committer_email, ''),
+    date(c.committer_when);
+
+INSERT INTO developer_files (_repo_id, author_email, file_path, last_day)
+SELECT c._repo_id, COALESCE(c.author_email, ''), cf.file_path, MAX(date(c.committer_when))
+FROM commits c
+JOIN commit_files cf ON cf.hash = c.hash AND cf._repo_id = c._repo_id
+GROUP BY c._repo_id, COALESCE(c.author_email, ''), cf.file_path;
@@ -0,0 +1,27 @@
+-- 0014_commit_epochs.sql
+--
+-- Integer UTC epoch seconds alongside the ISO 8601 author_when and
+-- committer_when text in commits and commit_files.
+--
+-- The text columns keep each commit's own timezone offset, so comparing them
+-- as strings against a cutoff is off by up to a day, and the
+-- date(author_when) > date('now', ...) filters cannot use an index. The time
+-- windows in kospex_query.py and kospex_core.py compare these columns with an
+-- integer cutoff instead (see KospexUtils.days_ago_epoch), through the
+-- indexes below. Kospex.write_commits fills them at sync, and existing rows
+-- are backfilled here with strftime('%s'), which applies the offsets.
+
+ALTER TABLE commits ADD COLUMN _author_epoch INTEGER;
+ALTER TABLE commits ADD COLUMN _committer_epoch INTEGER;
+ALTER TABLE commit_files ADD COLUMN _committer_epoch INTEGER;
+
+UPDATE commits SET
+    _author_epoch = CAST(strftime('%s', author_when) AS INTEGER),
+    _committer_epoch = CAST(strftime('%s', committer_when) AS INTEGER);
+
+UPDATE commit_files SET _committer_epoch = CAST(strftime('%s', committer_when) AS INTEGER);
+
+CREATE INDEX IF NOT EXISTS idx_commits_repo_epoch ON commits(_repo_id, _committer_epoch);
+CREATE INDEX IF NOT EXISTS idx_commits_epoch ON commits(_committer_epoch);
+CREATE INDEX IF NOT EXISTS idx_commits_author_epoch ON commits(_author_epoch, author_email);
+CREATE INDEX IF NOT EXISTS idx_commit_files_epoch ON commit_files(_committer_epoch);
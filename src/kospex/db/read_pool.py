@@ -0,0 +1,120 @@
+"""A thread-safe pool of read-only SQLite connections for long-running readers.
+
+kweb used to open a fresh sqlite_utils.Database (and re-run
+KospexUtils.init()) for every KospexQuery, several times per request. The
+pool opens at most ``size`` connections once, tunes them for reading and hands
+them out one request at a time.
+
+Each connection is opened with ``check_same_thread=False`` so it may be used
+from whichever pool thread checks it out - but only ever by one thread at a
+time, which is what SQLite requires. Read pragmas:
+
+* ``query_only``   - any write through a pooled connection fails loudly
+* ``mmap_size``    - read pages through a memory map instead of read() calls
+* ``cache_size``   - a large per-connection page cache (negative = KiB)
+* ``temp_store``   - sorts and temp b-trees for GROUP BY/DISTINCT in memory
+"""
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+from sqlite_utils import Database
+
+DEFAULT_POOL_SIZE = 4
+DEFAULT_MMAP_SIZE = 256 * 1024 * 1024
+DEFAULT_CACHE_KIB = 64 * 1024
+DEFAULT_CHECKOUT_TIMEOUT = 30.0
+
+
+class PoolClosed(RuntimeError):
+    """A connection was requested from a pool that has been closed."""
+
+
+class ReadConnectionPool:
+    """Hand out read-only sqlite_utils Databases, at most ``size`` at once.
+
+    Connections are opened lazily, up to ``size``; after that, connection()
+    waits for one to be returned (up to ``checkout_timeout`` seconds, then
+    raises TimeoutError).
+    """
+
+    def __init__(
+        self,
+        path,
+        size=DEFAULT_POOL_SIZE,
+        mmap_size=DEFAULT_MMAP_SIZE,
+        cache_kib=DEFAULT_CACHE_KIB,
+        checkout_timeout=DEFAULT_CHECKOUT_TIMEOUT,
+    ):
+        if size < 1:
+            raise ValueError(f"size must be >= 1, got {size}")
+        self.path = str(path)
+        self.size = size
+        self.mmap_size = mmap_size
+        self.cache_kib = cache_kib
+        self.checkout_timeout = checkout_timeout
+        self._idle = queue.LifoQueue()
+        self._all = []
+        self._lock = threading.Lock()
+        self._closed = False
+        self.checkouts = 0
+
+    def _open(self):
+        conn = sqlite3.connect(self.path, check_same_thread=False)
+        conn.execute("PRAGMA query_only = ON")
+        conn.execute(f"PRAGMA mmap_size = {int(self.mmap_size)}")
+        conn.execute(f"PRAGMA cache_size = {-int(self.cache_kib)}")
+        conn.execute("PRAGMA temp_store = MEMORY")
+        return Database(conn)
+
+    def _acquire(self):
+        if self._closed:
+            raise PoolClosed("read connection pool is closed")
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            if len(self._all) < self.size:
+                db = self._open()
+                self._all.append(db)
+                return db
+        try:
+            return self._idle.get(timeout=self.checkout_timeout)
+        except queue.Empty:
+            raise TimeoutError(
+                f"no read connection free after {self.checkout_timeout}s "
+                f"({self.size} in use)"
+            ) from None
+
+    @contextmanager
+    def connection(self):
+        """Check out a connection for the duration of the with block."""
+        db = self._acquire()
+        self.checkouts += 1
+        try:
+            yield db
+        finally:
+            if self._closed:
+                db.conn.close()
+            else:
+                self._idle.put(db)
+
+    def stats(self):
+        """Pool size and usage counters."""
+        return {
+            "size": self.size,
+            "open": len(self._all),
+            "idle": self._idle.qsize(),
+            "checkouts": self.checkouts,
+        }
+
+    def close(self):
+        """Close idle connections now; checked-out ones close when returned."""
+        self._closed = True
+        while True:
+            try:
+                self._idle.get_nowait().conn.close()
+            except queue.Empty:
+                break
@@ -0,0 +1,125 @@
+"""A persisted store of resolved dependency graphs, for the /supply-chain/ view.
+
+KospexDependencies.package_dependencies() draws a package version's whole
+resolved graph, and every node needs its publish date, advisory count and
+versions behind. Done node by node over HTTP, a React-sized graph took minutes,
+and the same packages were enriched again for every root that pulls them in.
+
+The store (migration 0012) keeps:
+
+- dependency_graphs: each root's deps.dev :dependencies document, nodes and
+  edges, as deps.dev returned it, for GRAPH_TTL
+- dependency_graph_nodes: the enrichment of each node by version key, for
+  NODE_TTL, shared by every graph the version appears in
+
+so a graph that has been drawn before, or one whose packages have all been
+seen in other graphs, is served with two queries. Nodes that are missing or
+expired are enriched together, concurrently (KospexDependencies.resolve_records).
+"""
+import json
+import sqlite3
+import time
+import zlib
+
+import kospex_schema as KospexSchema
+
+DAY = 86400
+GRAPH_TTL = 7 * DAY  # resolved graphs move as new versions are published
+NODE_TTL = DAY  # advisories are published against old versions too
+
+# Node ids per query, under SQLite's bound parameter limit
+BATCH_SIZE = 500
+
+NODE_FIELDS = ("published_at", "advisories", "versions_behind", "resolution")
+
+
+def graph_id(system, name, version):
+    """The 'system:name:version' id of a version key, lower case."""
+    return ":".join(part.lower() for part in (system, name, version))
+
+
+class DependencyGraphStore:
+    """The dependency_graphs and dependency_graph_nodes tables of a kospex database."""
+
+    def __init__(self, kospex_db, graph_ttl=GRAPH_TTL, node_ttl=NODE_TTL, clock=time.time):
+        self.kospex_db = kospex_db
+        self.graph_ttl = graph_ttl
+        self.node_ttl = node_ttl
+        self._clock = clock
+        self._available = None
+
+    def available(self):
+        """False on a database from before migration 0012."""
+        if self._available is None:
+            try:
+                self.kospex_db.execute(
+                    f"SELECT 1 FROM {KospexSchema.TBL_DEPENDENCY_GRAPHS} LIMIT 1")
+                self._available = True
+            except sqlite3.OperationalError:  # no such table
+                self._available = False
+        return self._available
+
+    def graph(self, system, name, version):
+        """The stored :dependencies document, or None if missing or expired."""
+        if not self.available():
+            return None
+        row = self.kospex_db.execute(
+            f"SELECT document, fetched_at FROM {KospexSchema.TBL_DEPENDENCY_GRAPHS} WHERE id = ?",
+            [graph_id(system, name, version)],
+        ).fetchone()
+        if row is None or self._clock() - (row[1] or 0) >= self.graph_ttl:
+            return None
+        return json.loads(zlib.decompress(row[0]))
+
+    def put_graph(self, system, name, version, document):
+        """Keep a root's :dependencies document."""
+        if not self.available():
+            return
+        with self.kospex_db.conn:
+            self.kospex_db.execute(
+                f"""INSERT OR REPLACE INTO {KospexSchema.TBL_DEPENDENCY_GRAPHS}
+                    (id, system, name, version, document, node_count, edge_count, fetched_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)""",
+                [graph_id(system, name, version), system.lower(), name, version,
+                 zlib.compress(json.dumps(document).encode("utf-8")),
+                 len(document.get("nodes") or []), len(document.get("edges") or []),
+                 int(self._clock())],
+            )
+
+    def nodes(self, ids):
+        """{id: {published_at, advisories, versions_behind, resolution}} for the
+        ids with fresh enrichment."""
+        if not self.available():
+            return {}
+        ids = list(dict.fromkeys(ids))
+        oldest = int(self._clock() - self.node_ttl)
+        found = {}
+        for start in range(0, len(ids), BATCH_SIZE):
+            batch = ids[start:start + BATCH_SIZE]
+            rows = self.kospex_db.execute(
+                f"SELECT id, {', '.join(NODE_FIELDS)} "
+                f"FROM {KospexSchema.TBL_DEPENDENCY_GRAPH_NODES} "
+                f"WHERE id IN ({', '.join('?' * len(batch))}) AND enriched_at > ?",
+                [*batch, oldest],
+            ).fetchall()
+            for node_id, *values in rows:
+                found[node_id] = dict(zip(NODE_FIELDS, values))
+        return found
+
+    def put_nodes(self, nodes):
+        """Keep node enrichment, from {(system, name, version): {published_at,
+        advisories, versions_behind, resolution}}."""
+        if not self.available() or not nodes:
+            return
+        now = int(self._clock())
+        rows = [
+            (graph_id(*key), *key, *(fields.get(field) for field in NODE_FIELDS), now)
+            for key, fields in nodes.items()
+        ]
+        with self.kospex_db.conn:
+            self.kospex_db.conn.executemany(
+                f"""INSERT OR REPLACE INTO {KospexSchema.TBL_DEPENDENCY_GRAPH_NODES}
+                    (id, system, name, version, {', '.join(NODE_FIELDS)}, enriched_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+                rows,
+            )
@@ -0,0 +1,266 @@
+"""Resolve many dependencies against deps.dev concurrently.
+
+KospexDependencies.depsdev_record() makes up to three blocking HTTP calls per
+dependency (the exact version, the package's version history, and - on a
+miss - the package again), one dependency after another. A krunner osi run
+over an org has tens of thousands of dependency rows but far fewer distinct
+(package_type, name, version) keys, and fewer distinct packages still.
+
+DepsDevResolver:
+
+1. deduplicates the keys, and works out the distinct URLs they need
+2. serves what it can from url_cache, and fetches the rest on a thread pool,
+   with a per-host rate limit and retry with exponential backoff on 429/5xx
+   and network errors
+3. builds each record with the unchanged depsdev_record(), in the calling
+   thread, against the prefetched responses - so a record is identical to one
+   resolved serially, and every database read and write stays on the thread
+   that owns the connection.
+
+Worker threads only do HTTP; each has its own requests.Session.
+"""
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from urllib.parse import urlparse
+
+import requests
+
+import kospex_utils as KospexUtils
+from kospex.depsdev_snapshot import KIND_PACKAGE, KIND_VERSION
+
+log = KospexUtils.get_kospex_logger("deps_resolver")
+
+DEFAULT_WORKERS = 8
+DEFAULT_RATE_PER_HOST = 20.0  # requests per second
+DEFAULT_RETRIES = 3
+DEFAULT_BACKOFF = 0.5  # seconds, doubled on each retry
+DEFAULT_TIMEOUT = 10
+DEFAULT_CACHE_SECONDS = 3600  # url_request()'s default, for endpoints without their own TTL
+MAX_RETRY_AFTER = 60.0  # seconds; a longer Retry-After is capped
+
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+
+class HostRateLimiter:
+    """Space out requests to each host to at most ``rate`` per second."""
+
+    def __init__(self, rate=DEFAULT_RATE_PER_HOST, clock=time.monotonic, sleep=time.sleep):
+        if rate <= 0:
+            raise ValueError(f"rate must be > 0, got {rate}")
+        self.interval = 1.0 / rate
+        self._clock = clock
+        self._sleep = sleep
+        self._next = {}
+        self._lock = threading.Lock()
+
+    def wait(self, host):
+        """Block until the next request slot for ``host``."""
+        with self._lock:
+            now = self._clock()
+            slot = max(now, self._next.get(host, now))
+            self._next[host] = slot + self.interval
+        if slot > now:
+            self._sleep(slot - now)
+
+
+@dataclass
+class ResolverStats:
+    keys: int = 0           # (package_type, name, version) keys asked for
+    unique_keys: int = 0
+    urls: int = 0           # distinct deps.dev URLs those keys need
+    cache_hits: int = 0
+    fetched: int = 0
+    retries: int = 0
+    failures: int = 0       # URLs that did not end in a 200
+    seconds: float = 0.0
+
+    def summary(self):
+        return (
+            f"{self.keys} dependencies, {self.unique_keys} unique, {self.urls} URLs "
+            f"({self.cache_hits} cached, {self.fetched} fetched, {self.retries} retries, "
+            f"{self.failures} failed) in {self.seconds:.1f}s"
+        )
+
+
+class _PrefetchedQuery:
+    """A KospexQuery stand-in that answers URL requests from prefetched responses.
+
+    Anything else (authors_by_repo, ...) goes to the real KospexQuery.
+    """
+
+    def __init__(self, kospex_query, responses):
+        self._kospex_query = kospex_query
+        self._responses = responses
+
+    def url_request_with_status(self, url, cache=3600, timeout=10, headers=None):
+        if url in self._responses:
+            return self._responses[url]
+        return self._kospex_query.url_request_with_status(
+            url, cache=cache, timeout=timeout, headers=headers
+        )
+
+    def url_request(self, url, cache=3600, timeout=10, headers=None):
+        content, _status = self.url_request_with_status(
+            url, cache=cache, timeout=timeout, headers=headers
+        )
+        return content
+
+    def __getattr__(self, name):
+        return getattr(self._kospex_query, name)
+
+
+class DepsDevResolver:
+    """depsdev_record() for many keys, with the HTTP done concurrently."""
+
+    def __init__(
+        self,
+        kdeps,
+        workers=DEFAULT_WORKERS,
+        rate_per_host=DEFAULT_RATE_PER_HOST,
+        retries=DEFAULT_RETRIES,
+        backoff=DEFAULT_BACKOFF,
+        timeout=DEFAULT_TIMEOUT,
+        cache_seconds=DEFAULT_CACHE_SECONDS,
+        sleep=time.sleep,
+        progress=None,
+    ):
+        if workers < 1:
+            raise ValueError(f"workers must be >= 1, got {workers}")
+        self.kdeps = kdeps
+        self.workers = workers
+        self.retries = retries
+        self.backoff = backoff
+        self.timeout = timeout
+        self.cache_seconds = cache_seconds
+        self.limiter = HostRateLimiter(rate_per_host, sleep=sleep)
+        # progress(done, total): URLs answered so far, called on this thread
+        self.progress = progress
+        self._sleep = sleep
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self.stats = ResolverStats()
+
+    def urls_for(self, key):
+        """The deps.dev URLs depsdev_record() may request for ``key``, less any
+        answered by the offline snapshot (all of them, offline)."""
+        package_type, package_name, version = key
+        kdeps = self.kdeps
+        if kdeps.offline or not version or not kdeps.is_concrete_version(version):
+            return []
+        urls = []
+        if not kdeps.in_snapshot(KIND_VERSION, package_type, package_name, version):
+            urls.append(kdeps.deps_dev_version_url(package_type, package_name, version))
+        if not kdeps.in_snapshot(KIND_PACKAGE, package_type, package_name):
+            urls.append(kdeps.deps_dev_package_url(package_type, package_name))
+        return urls
+
+    def resolve(self, keys):
+        """Return {key: depsdev_record(*key)} for each distinct key in ``keys``."""
+        started = time.perf_counter()
+        keys = list(keys)
+        unique = list(dict.fromkeys(keys))
+        urls = list(dict.fromkeys(url for key in unique for url in self.urls_for(key)))
+        self.stats.keys += len(keys)
+        self.stats.unique_keys += len(unique)
+        self.stats.urls += len(urls)
+
+        responses = self.prefetch(urls)
+
+        assembler = type(self.kdeps)(
+            kospex_db=self.kdeps.kospex_db,
+            kospex_query=_PrefetchedQuery(self.kdeps.kospex_query, responses),
+        )
+        assembler.deps_dev_api = self.kdeps.deps_dev_api
+        assembler.snapshot = self.kdeps.snapshot
+        assembler.offline = self.kdeps.offline
+        # Each package's version history is indexed once, across resolve() calls
+        assembler._version_indexes = self.kdeps._version_indexes
+        records = {key: assembler.depsdev_record(*key) for key in unique}
+
+        self.stats.seconds += time.perf_counter() - started
+        log.info(f"deps.dev resolve: {self.stats.summary()}")
+        return records
+
+    def prefetch(self, urls):
+        """{url: (content, status)} for each URL, from url_cache or the network.
+
+        Cached 404s are served like any other entry. Stale entries are served
+        and refreshed in the background. Responses are written back to
+        url_cache on this thread.
+        """
+        url_cache = self.kdeps.kospex_query.url_cache
+        responses = {}
+        to_fetch = []
+        for url in urls:
+            entry = url_cache.lookup(url, max_age=self.cache_seconds)
+            if entry is None:
+                to_fetch.append(url)
+                continue
+            responses[url] = (entry.content, entry.status)
+            if entry.stale:
+                url_cache.revalidate(url, self.fetch)
+        self.stats.cache_hits += len(responses)
+        self._report(len(responses), len(urls))
+
+        if to_fetch:
+            with ThreadPoolExecutor(
+                max_workers=min(self.workers, len(to_fetch)), thread_name_prefix="deps-dev"
+            ) as pool:
+                for url, result in zip(to_fetch, pool.map(self.fetch, to_fetch)):
+                    responses[url] = result
+                    content, status = result
+                    url_cache.store(url, content, status)
+                    if status != 200:
+                        self.stats.failures += 1
+                    self._report(len(responses), len(urls))
+            self.stats.fetched += len(to_fetch)
+
+        return responses
+
+    def _report(self, done, total):
+        if self.progress and total:
+            self.progress(done, total)
+
+    def _session(self):
+        session = getattr(self._local, "session", None)
+        if session is None:
+            session = self._local.session = requests.Session()
+        return session
+
+    def fetch(self, url):
+        """GET ``url`` with rate limiting and retries. Returns (content, status).
+
+        status is None after a network error, as url_request_with_status().
+        """
+        host = urlparse(url).netloc
+        for attempt in range(self.retries + 1):
+            self.limiter.wait(host)
+            try:
+                response = self._session().get(url, timeout=self.timeout)
+            except requests.RequestException as exc:
+                result, delay = (None, None), None
+                log.info(f"deps.dev request failed ({exc}): {url}")
+            else:
+                if response.status_code == 200:
+                    return response.text, 200
+                result = (None, response.status_code)
+                if response.status_code not in RETRY_STATUSES:
+                    return result
+                delay = _retry_after(response)
+
+            if attempt < self.retries:
+                with self._lock:
+                    self.stats.retries += 1
+                self._sleep(delay if delay is not None else self.backoff * (2 ** attempt))
+        return result
+
+
+def _retry_after(response):
+    """Seconds from a numeric Retry-After header, or None."""
+    value = response.headers.get("Retry-After")
+    try:
+        return min(max(0.0, float(value)), MAX_RETRY_AFTER) if value is not None else None
+    except ValueError:
+        return None
@@ -0,0 +1,260 @@
+"""A local copy of deps.dev data, for scoring dependencies without network access.
+
+``kospex depsdev-import`` loads an export into the depsdev_snapshot tables
+(migration 0009), and KospexDependencies looks there before asking deps.dev.
+With offline mode on (``-offline`` or KOSPEX_DEPS_OFFLINE), anything the
+snapshot does not have is treated as not found, and no HTTP calls are made.
+
+An export is JSONL (one JSON document per line, optionally gzipped) or Parquet
+(read through DuckDB, either one JSON ``document`` column or structured columns
+with the same names). Each document is recognised by shape:
+
+- a deps.dev GetVersion response: has ``versionKey``
+- a deps.dev GetPackage response: has ``packageKey`` and ``versions``
+- a deps.dev GetDependencies response: has ``nodes``, the first node being
+  the version itself
+- an OSV record: has ``id`` and ``affected``. Its id is added to the
+  advisories of each version listed in ``affected[].versions``. Affected
+  ranges are not expanded.
+
+Documents are stored zlib-compressed and keyed by (kind, system, name, version),
+with the system lower case ("npm", "pypi", "go" ...) as kospex names them.
+"""
+import datetime
+import gzip
+import json
+import re
+import sqlite3
+import time
+import zlib
+from dataclasses import dataclass
+from pathlib import Path
+
+import kospex_schema as KospexSchema
+
+KIND_VERSION = "version"
+KIND_PACKAGE = "package"
+KIND_DEPENDENCIES = "dependencies"
+
+BATCH_SIZE = 5000
+
+# OSV ecosystem names to deps.dev systems
+OSV_ECOSYSTEMS = {
+    "pypi": "pypi",
+    "npm": "npm",
+    "go": "go",
+    "maven": "maven",
+    "nuget": "nuget",
+    "crates.io": "cargo",
+    "rubygems": "rubygems",
+}
+
+
+def normalise_name(system, name):
+    """Package names as deps.dev keys them: PyPI names are PEP 503 normalised."""
+    if system == "pypi":
+        return re.sub(r"[-_.]+", "-", name).lower()
+    return name
+
+
+def _jsonable(value):
+    """Parquet values (via DuckDB) as the JSON types deps.dev documents use."""
+    if isinstance(value, dict):
+        return {k: _jsonable(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_jsonable(v) for v in value]
+    if isinstance(value, datetime.datetime):
+        if value.tzinfo is None:
+            value = value.replace(tzinfo=datetime.timezone.utc)
+        return value.isoformat().replace("+00:00", "Z")
+    return value
+
+
+def read_documents(path):
+    """Yield the JSON documents in a JSONL (.jsonl, .ndjson, .json, optionally
+    .gz) or Parquet (.parquet) export."""
+    path = Path(path)
+    if path.suffix == ".parquet":
+        import duckdb  # deferred, like the other DuckDB commands
+
+        relation = duckdb.connect().execute("SELECT * FROM read_parquet(?)", [str(path)])
+        columns = [column[0] for column in relation.description]
+        while rows := relation.fetchmany(BATCH_SIZE):
+            for row in rows:
+                if columns == ["document"]:
+                    yield json.loads(row[0])
+                else:
+                    yield _jsonable(dict(zip(columns, row)))
+        return
+
+    opener = gzip.open if path.suffix == ".gz" else open
+    with opener(path, "rt", encoding="utf-8") as handle:
+        for line in handle:
+            line = line.strip()
+            if line:
+                yield json.loads(line)
+
+
+def _version_key(key):
+    system = (key.get("system") or "").lower()
+    return system, normalise_name(system, key.get("name") or ""), key.get("version") or ""
+
+
+def classify(document):
+    """(rows, advisories) for one export document.
+
+    rows are (kind, system, name, version, document) and advisories are
+    (system, name, version, advisory_id). Both are empty for an unrecognised
+    document.
+    """
+    if "nodes" in document:
+        nodes = document.get("nodes") or []
+        if nodes and nodes[0].get("versionKey"):
+            return [(KIND_DEPENDENCIES, *_version_key(nodes[0]["versionKey"]), document)], []
+    elif "versionKey" in document:
+        return [(KIND_VERSION, *_version_key(document["versionKey"]), document)], []
+    elif "packageKey" in document and "versions" in document:
+        system, name, _ = _version_key(document["packageKey"])
+        return [(KIND_PACKAGE, system, name, "", document)], []
+    elif "id" in document and "affected" in document:
+        advisories = []
+        for affected in document.get("affected") or []:
+            package = affected.get("package") or {}
+            system = OSV_ECOSYSTEMS.get((package.get("ecosystem") or "").lower())
+            if not system or not package.get("name"):
+                continue
+            name = normalise_name(system, package["name"])
+            advisories += [(system, name, version, document["id"])
+                           for version in affected.get("versions") or []]
+        return [], advisories
+    return [], []
+
+
+@dataclass
+class ImportStats:
+    documents: int = 0
+    versions: int = 0
+    packages: int = 0
+    dependencies: int = 0
+    advisories: int = 0
+    skipped: int = 0  # unrecognised documents
+    seconds: float = 0.0
+
+
+class DepsDevSnapshot:
+    """The depsdev_snapshot tables of a kospex database."""
+
+    def __init__(self, kospex_db):
+        self.kospex_db = kospex_db
+        self._available = None
+
+    def available(self):
+        """True if the database holds a snapshot. Checked once, so a DB with no
+        snapshot (or before migration 0009) costs one query, not one per lookup."""
+        if self._available is None:
+            try:
+                self._available = self.kospex_db.execute(
+                    f"SELECT 1 FROM {KospexSchema.TBL_DEPSDEV_SNAPSHOT} LIMIT 1"
+                ).fetchone() is not None
+            except sqlite3.OperationalError:  # no such table, before 0009
+                self._available = False
+        return self._available
+
+    def import_file(self, path, source=None):
+        """Load an export into the snapshot, replacing documents with the same key."""
+        started = time.perf_counter()
+        stats = ImportStats()
+        source = source or Path(path).name
+        imported_at = datetime.datetime.now(datetime.timezone.utc).isoformat()
+        rows, advisories = [], []
+        counters = {KIND_VERSION: "versions", KIND_PACKAGE: "packages",
+                    KIND_DEPENDENCIES: "dependencies"}
+
+        for document in read_documents(path):
+            stats.documents += 1
+            doc_rows, doc_advisories = classify(document)
+            if not doc_rows and not doc_advisories:
+                stats.skipped += 1
+            for kind, system, name, version, doc in doc_rows:
+                setattr(stats, counters[kind], getattr(stats, counters[kind]) + 1)
+                rows.append((kind, system, name, version,
+                             zlib.compress(json.dumps(doc).encode("utf-8")), source, imported_at))
+            advisories += [(*advisory, source, imported_at) for advisory in doc_advisories]
+            stats.advisories += len(doc_advisories)
+            if len(rows) + len(advisories) >= BATCH_SIZE:
+                self._write(rows, advisories)
+                rows, advisories = [], []
+        self._write(rows, advisories)
+
+        self._available = None
+        stats.seconds = time.perf_counter() - started
+        return stats
+
+    def _write(self, rows, advisories):
+        with self.kospex_db.conn:
+            self.kospex_db.conn.executemany(
+                f"INSERT OR REPLACE INTO {KospexSchema.TBL_DEPSDEV_SNAPSHOT} "
+                "(kind, system, name, version, content, source, imported_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+            self.kospex_db.conn.executemany(
+                f"INSERT OR REPLACE INTO {KospexSchema.TBL_DEPSDEV_ADVISORIES} "
+                "(system, name, version, advisory_id, source, imported_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                advisories,
+            )
+
+    def has(self, kind, system, name, version=""):
+        """True if the snapshot has the document."""
+        if not self.available():
+            return False
+        system = system.lower()
+        return self.kospex_db.execute(
+            f"SELECT 1 FROM {KospexSchema.TBL_DEPSDEV_SNAPSHOT} "
+            "WHERE kind = ? AND system = ? AND name = ? AND version = ?",
+            [kind, system, normalise_name(system, name), version or ""],
+        ).fetchone() is not None
+
+    def document(self, kind, system, name, version=""):
+        """The stored document, or None. Version documents also carry the OSV
+        advisories imported for that version in advisoryKeys."""
+        if not self.available():
+            return None
+        system = system.lower()
+        name = normalise_name(system, name)
+        row = self.kospex_db.execute(
+            f"SELECT content FROM {KospexSchema.TBL_DEPSDEV_SNAPSHOT} "
+            "WHERE kind = ? AND system = ? AND name = ? AND version = ?",
+            [kind, system, name, version or ""],
+        ).fetchone()
+        if row is None:
+            return None
+        document = json.loads(zlib.decompress(row[0]))
+        if kind == KIND_VERSION:
+            advisory_ids = [r[0] for r in self.kospex_db.execute(
+                f"SELECT advisory_id FROM {KospexSchema.TBL_DEPSDEV_ADVISORIES} "
+                "WHERE system = ? AND name = ? AND version = ? ORDER BY advisory_id",
+                [system, name, version],
+            ).fetchall()]
+            if advisory_ids:
+                keys = document.get("advisoryKeys") or []
+                known = {key.get("id") for key in keys}
+                document["advisoryKeys"] = keys + [
+                    {"id": advisory_id} for advisory_id in advisory_ids if advisory_id not in known
+                ]
+        return document
+
+    def counts(self):
+        """Documents per kind, and advisories, in the snapshot."""
+        counts = {KIND_VERSION: 0, KIND_PACKAGE: 0, KIND_DEPENDENCIES: 0, "advisories": 0}
+        if not self.available():
+            return counts
+        for kind, count in self.kospex_db.execute(
+            f"SELECT kind, COUNT(*) FROM {KospexSchema.TBL_DEPSDEV_SNAPSHOT} GROUP BY kind"
+        ).fetchall():
+            counts[kind] = count
+        counts["advisories"] = self.kospex_db.execute(
+            f"SELECT COUNT(*) FROM {KospexSchema.TBL_DEPSDEV_ADVISORIES}"
+        ).fetchone()[0]
+        return counts
@@ -0,0 +1,95 @@
+"""developer_stats, kept up to date from the commits each sync writes.
+
+KospexQuery.update_developer_stats and update_developer_file_stats used to
+rebuild a repo's developer_stats from its whole commits x commit_files history,
+one INSERT or UPDATE per developer, on every sync - even one that wrote five
+commits.
+
+Now the sync folds the commits it wrote into the activity_daily rollup
+and developer_files (see kospex/activity_rollup.py), and developer_stats is
+derived from those for the whole repo with one INSERT ... SELECT. The rolling
+90 day fields are sums over the rollup's recent days, so they move on even
+for developers who did not commit.
+"""
+from __future__ import annotations
+
+from datetime import datetime, timedelta, timezone
+
+import kospex_schema as KospexSchema
+from kospex.activity_rollup import ActivityRollup
+
+WINDOW_DAYS = 90
+
+
+class DeveloperStatsStore:
+    """The developer_stats table, derived from activity_daily and developer_files."""
+
+    def __init__(self, kospex_db, window_days=WINDOW_DAYS,
+                 clock=lambda: datetime.now(timezone.utc)):
+        self.kospex_db = kospex_db
+        self.window_days = window_days
+        self._clock = clock
+        self.rollup = ActivityRollup(kospex_db)
+
+    def update(self, repo_id, activity=None, repo=None):
+        """Fold the kospex.activity_rollup.CommitActivity of a sync into the
+        rollup, or rebuild the repo's rollup without one, then derive the
+        repo's developer_stats. Returns the number of developers."""
+        self.rollup.update(repo_id, activity)
+        return self.refresh(repo_id, repo)
+
+    def refresh(self, repo_id, repo=None):
+        """Derive the repo's ALL_TIME developer_stats rows from the side tables.
+        Returns the number of developers."""
+        repo = repo or {}
+        now = self._clock()
+        cutoff = (now - timedelta(days=self.window_days)).date().isoformat()
+        with self.kospex_db.conn:
+            self.kospex_db.execute(
+                f"""DELETE FROM {KospexSchema.TBL_DEVELOPER_STATS} WHERE _repo_id = ?
+                    AND (stat_type = 'ALL_TIME' OR stat_type IS NULL)""",
+                [repo_id],
+            )
+            count = self.kospex_db.execute(
+                f"""INSERT INTO {KospexSchema.TBL_DEVELOPER_STATS}
+                    (author_email, total_commits, additions, deletions, unique_files,
+                     first_commit, last_commit, commits_last_90_days, additions_90_days,
+                     deletions_90_days, unique_files_90_days, last_update, stat_type,
+                     _git_server, _git_owner, _git_repo, _repo_id)
+                SELECT d.author_email, SUM(d.commits), SUM(d.additions), SUM(d.deletions),
+                    COALESCE(f.files, 0), MIN(d.first_authored), MAX(d.last_authored),
+                    SUM(CASE WHEN d.day > :cutoff THEN d.commits ELSE 0 END),
+                    SUM(CASE WHEN d.day > :cutoff THEN d.additions ELSE 0 END),
+                    SUM(CASE WHEN d.day > :cutoff THEN d.deletions ELSE 0 END),
+                    COALESCE(f.files_90_days, 0), :now, 'ALL_TIME',
+                    :git_server, :git_owner, :git_repo, :repo_id
+                FROM {KospexSchema.TBL_ACTIVITY_DAILY} d
+                LEFT JOIN (
+                    SELECT author_email, COUNT(*) AS files,
+                        SUM(CASE WHEN last_day > :cutoff THEN 1 ELSE 0 END) AS files_90_days
+                    FROM {KospexSchema.TBL_DEVELOPER_FILES} WHERE _repo_id = :repo_id
+                    GROUP BY author_email
+                ) f ON f.author_email = d.author_email
+                WHERE d._repo_id = :repo_id
+                GROUP BY d.author_email""",
+                {"cutoff": cutoff, "now": now.strftime("%Y-%m-%d %H:%M:%S"),
+                 "git_server": repo.get("_git_server", ""), "git_owner": repo.get("_git_owner", ""),
+                 "git_repo": repo.get("_git_repo", ""), "repo_id": repo_id},
+            ).rowcount
+            all_time, last_90_days = self.kospex_db.execute(
+                f"""SELECT SUM(total_commits), SUM(commits_last_90_days)
+                FROM {KospexSchema.TBL_DEVELOPER_STATS}
+                WHERE _repo_id = ? AND stat_type = 'ALL_TIME'""",
+                [repo_id],
+            ).fetchone()
+            if all_time:
+                self.kospex_db.execute(
+                    f"""UPDATE {KospexSchema.TBL_DEVELOPER_STATS}
+                    SET pct_all_time = ROUND(100.0 * total_commits / ?, 2),
+                        pct_90_days = CASE WHEN ? > 0
+                            THEN ROUND(100.0 * commits_last_90_days / ?, 2)
+                            ELSE 0 END
+                    WHERE _repo_id = ? AND stat_type = 'ALL_TIME'""",
+                    [all_time, last_90_days, last_90_days, repo_id],
+                )
+        return count
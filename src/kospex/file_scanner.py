@@ -0,0 +1,155 @@
+"""One filesystem pass over many repos, for every kind of file kospex looks for.
+
+find_dependency_files, find_dockerfiles_in_repos and ``krunner find-js-src``
+each walked the same trees with os.walk, trying their patterns one by one on
+every file name. Over an org of 1,000 repos a summary that wants Dockerfiles
+and dependency files walked everything twice.
+
+scan() walks with os.scandir, never descends into PRUNE_DIRS (.git and
+vendored trees, whose manifests are not the repo's own), and tests each file
+name once against a single regex combining every requested pattern group.
+Only the few names that match are checked against the individual groups, and
+each is classified once against the extractor registry. Names repeat across
+repos (package.json, Dockerfile), so matching and classifying are memoised by
+name.
+
+Ask for several groups in one call and every consumer is served from the same
+pass.
+"""
+from __future__ import annotations
+
+import os
+import re
+from functools import lru_cache
+from typing import Iterable, Iterator, NamedTuple, Optional
+
+from kospex.extractors.registry import Classification, classify
+
+# Directories never worth descending into
+PRUNE_DIRS = frozenset({
+    ".git", "node_modules", "bower_components", "jspm_packages", "vendor",
+    ".venv", "venv", "__pycache__", ".tox", ".mypy_cache", ".pytest_cache",
+})
+
+# Pattern groups by name. Each is matched from the start of the file name,
+# like re.match, so a pattern that should stop at the end needs its own $.
+DEPENDENCY_PATTERNS = (
+    r"requirements.*.txt$",
+    r"Pipfile",
+    r"Pipfile.lock",
+    r"setup.py",
+    r"pyproject.toml",
+    r"Gemfile",
+    r"Gemfile.lock",
+    r"package.*.json",
+    r"yarn.lock",
+    r"composer.json",
+    r"composer.lock",
+    r"pom.xml",
+    r"build.gradle",
+    r"build.gradle.kts",
+    r"Cargo.toml",
+    r"Cargo.lock",
+    r"go.mod$",
+    r"go.sum",
+    r"Podfile",
+    r"Podfile.lock",
+    r"pnpm-lock\.yaml$",
+)
+
+PATTERNS = {
+    "dependencies": DEPENDENCY_PATTERNS,
+    "docker": (r"(?i:dockerfile$|docker-compose)",),
+    "html": (r".*\.html?$",),
+}
+
+
+class ScannedFile(NamedTuple):
+    """A file that matched at least one of the requested pattern groups."""
+
+    path: str                       # root joined with the path below it
+    root: str                       # the directory handed to scan()
+    groups: tuple                   # names of the groups it matched
+    classification: Classification  # its extractor registry entry
+
+
+@lru_cache(maxsize=64)
+def _matcher(groups: tuple):
+    """The combined regex and per-group regexes for a tuple of group names."""
+    unknown = [name for name in groups if name not in PATTERNS]
+    if unknown:
+        raise ValueError(f"Unknown file pattern group(s): {', '.join(unknown)}")
+    by_group = {name: re.compile("|".join(f"(?:{p})" for p in PATTERNS[name]))
+                for name in groups}
+    combined = re.compile("|".join(f"(?:{rx.pattern})" for rx in by_group.values()))
+
+    @lru_cache(maxsize=4096)
+    def match(name: str) -> tuple:
+        if not combined.match(name):
+            return ()
+        return tuple(group for group, rx in by_group.items() if rx.match(name))
+
+    return match
+
+
+_classify = lru_cache(maxsize=4096)(classify)
+
+
+def walk_files(root: str, prune: Iterable[str] = PRUNE_DIRS) -> Iterator[os.DirEntry]:
+    """Every file under root, as os.DirEntry, skipping directories in prune.
+
+    A directory's files come before its subdirectories. Symlinked directories
+    are not followed and unreadable directories are skipped, as os.walk does.
+    """
+    prune = frozenset(prune)
+    stack = [root]
+    while stack:
+        current = stack.pop()
+        try:
+            with os.scandir(current) as entries:
+                subdirs = []
+                for entry in entries:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            if entry.name not in prune:
+                                subdirs.append(entry.path)
+                        elif entry.is_file():
+                            yield entry
+                    except OSError:
+                        continue
+        except OSError:
+            continue
+        stack.extend(reversed(subdirs))
+
+
+def scan(roots: Iterable[str], groups: Iterable[str] = ("dependencies",),
+         prune: Iterable[str] = PRUNE_DIRS) -> Iterator[ScannedFile]:
+    """Walk every root once, yielding the files matching any of ``groups``."""
+    match = _matcher(tuple(dict.fromkeys(groups)))
+    for root in roots:
+        for entry in walk_files(root, prune):
+            matched = match(entry.name)
+            if matched:
+                yield ScannedFile(entry.path, root, matched, _classify(entry.name))
+
+
+def scan_groups(roots: Iterable[str], groups: Iterable[str],
+                prune: Iterable[str] = PRUNE_DIRS) -> dict:
+    """{group: [path, ...]} for every requested group, from one pass."""
+    groups = tuple(dict.fromkeys(groups))
+    found = {group: [] for group in groups}
+    for scanned in scan(roots, groups, prune):
+        for group in scanned.groups:
+            found[group].append(scanned.path)
+    return found
+
+
+def find_files(roots: Iterable[str], group: str,
+               prune: Iterable[str] = PRUNE_DIRS) -> list:
+    """The paths of the files matching one group."""
+    return scan_groups(roots, [group], prune)[group]
+
+
+def grep_exclude_args(prune: Optional[Iterable[str]] = None) -> list:
+    """``--exclude-dir`` arguments for grep -R, so it skips what scan() skips."""
+    return [f"--exclude-dir={name}" for name in sorted(prune or PRUNE_DIRS)]
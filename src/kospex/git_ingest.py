@@ -11,19 +11,96 @@ import time
 import subprocess
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, List, Tuple, Optional
+from typing import Dict, Iterable, List, Tuple, Optional
 
 # Add parent directory to path for legacy imports
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from kospex_git import KospexGit
 from kospex.git_duckdb import GitDuckDB, SyncProgressTracker
+from kospex.git_log import read_git_log
 from kospex_utils import get_kospex_logger
 
 # Module logger
 logger = get_kospex_logger('git_ingest')
 
 
+def file_extension(file_path: str) -> str:
+    """Extension without the dot, or "" if none - the DuckDB commit_files._ext convention."""
+    return Path(file_path).suffix.lstrip(".") if "." in file_path else ""
+
+
+def propagate_branch_bits(rev_list_lines: Iterable[str], tips: Dict[str, int]) -> Dict[str, int]:
+    """Compute each commit's branch bitset from `git rev-list --topo-order --parents`.
+
+    `tips` maps a branch tip commit to the bits of the branches pointing at it.
+    Topological order lists every child before its parents, so a commit's set
+    is complete when its line is read and can be OR-ed straight into its
+    parents - one pass, no per-branch walks. Most commits share a handful of
+    distinct sets, so equal masks are canonicalised to one int object.
+    """
+    bits: Dict[str, int] = {}
+    canonical: Dict[int, int] = {}
+
+    for line in rev_list_lines:
+        parts = line.split()
+        if not parts:
+            continue
+        commit = parts[0]
+        mask = bits.get(commit, 0) | tips.get(commit, 0)
+        mask = canonical.setdefault(mask, mask)
+        bits[commit] = mask
+        for parent in parts[1:]:
+            merged = bits.get(parent, 0) | mask
+            bits[parent] = canonical.setdefault(merged, merged)
+
+    return bits
+
+
+class BranchMembership:
+    """Which branches contain each commit, stored as bitsets.
+
+    Bit `n` of a commit's mask is set when branch `branches[n]` can reach it.
+    A mask is one Python int however many branches there are, where the old
+    representation held a list of branch-name references per commit.
+    """
+
+    def __init__(self, branches: List[str], bits: Dict[str, int]):
+        self.branches = branches
+        self.bits = bits
+
+    @property
+    def branch_count(self) -> int:
+        return len(self.branches)
+
+    def mask(self, commit_hash: str) -> int:
+        return self.bits.get(commit_hash, 0)
+
+    def branches_of(self, commit_hash: str) -> List[str]:
+        """Branch names containing the commit, in branch-list order."""
+        mask = self.bits.get(commit_hash, 0)
+        names = []
+        ordinal = 0
+        while mask:
+            if mask & 1:
+                names.append(self.branches[ordinal])
+            mask >>= 1
+            ordinal += 1
+        return names
+
+    def get(self, commit_hash: str, default=None):
+        """Dict-style lookup of a commit's branch names."""
+        if commit_hash not in self.bits:
+            return default
+        return self.branches_of(commit_hash)
+
+    def __contains__(self, commit_hash: str) -> bool:
+        return commit_hash in self.bits
+
+    def __len__(self) -> int:
+        return len(self.bits)
+
+
 # ============================================================================
 # GitIngest CLASS
 # ============================================================================
@@ -103,14 +180,20 @@ class GitIngest:
         except (ValueError, TypeError):
             return 0
 
-    def _get_branch_info(self, verbose: bool = False) -> Dict[str, List[str]]:
-        """Get branch information for all commits.
+    def _get_branch_info(self, verbose: bool = False) -> BranchMembership:
+        """Get branch information for all commits in one walk of the commit graph.
+
+        Lists every local and remote branch tip (the set `git branch -a`
+        shows), then streams a single `git rev-list --topo-order --parents`
+        over all of them and propagates reachability from children to
+        parents. This replaces one `git log <branch>` per branch, which was
+        O(branches x commits) subprocess work.
 
         Args:
             verbose: Enable verbose output
 
         Returns:
-            Dict mapping commit hash to list of branch names
+            BranchMembership mapping each commit hash to its branch set
         """
         if not self.repo_path:
             raise RuntimeError("Repository not set. Call _set_repo() first.")
@@ -118,49 +201,58 @@ class GitIngest:
         if verbose:
             print("Gathering branch information for all commits...")
 
-        # Get all branches (local and remote)
-        branches_cmd = ["git", "branch", "-a", "--format=%(refname:short)"]
+        refs_cmd = [
+            "git", "for-each-ref", "--format=%(objectname) %(refname:short)",
+            "refs/heads", "refs/remotes",
+        ]
         result = subprocess.run(
-            branches_cmd,
+            refs_cmd,
             capture_output=True,
             text=True,
             cwd=self.repo_path,
             check=True
         )
-        branches = [b.strip() for b in result.stdout.split("\n") if b.strip()]
-
-        commit_branches = {}
-        total_branches = len(branches)
-
-        for idx, branch in enumerate(branches, 1):
-            if verbose and idx % 10 == 0:
-                print(f"  Processing branch {idx}/{total_branches}...")
 
-            # Get all commits in this branch
-            commits_cmd = ["git", "log", branch, "--format=%H"]
-            result = subprocess.run(
-                commits_cmd,
-                capture_output=True,
+        branches = []
+        tips: Dict[str, int] = {}
+        for line in result.stdout.splitlines():
+            tip, _, name = line.strip().partition(" ")
+            if not name:
+                continue
+            tips[tip] = tips.get(tip, 0) | (1 << len(branches))
+            branches.append(name)
+
+        bits: Dict[str, int] = {}
+        if tips:
+            proc = subprocess.Popen(
+                ["git", "rev-list", "--topo-order", "--parents", "--stdin"],
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.DEVNULL,
                 text=True,
                 cwd=self.repo_path,
-                check=True
             )
-
-            for commit_hash in result.stdout.split("\n"):
-                commit_hash = commit_hash.strip()
-                if commit_hash:
-                    if commit_hash not in commit_branches:
-                        commit_branches[commit_hash] = []
-                    commit_branches[commit_hash].append(branch)
+            proc.stdin.write("\n".join(tips) + "\n")
+            proc.stdin.close()
+            try:
+                bits = propagate_branch_bits(proc.stdout, tips)
+            finally:
+                proc.stdout.close()
+                returncode = proc.wait()
+            if returncode != 0:
+                raise subprocess.CalledProcessError(returncode, "git rev-list")
+
+        membership = BranchMembership(branches, bits)
 
         if verbose:
-            print(f"✓ Gathered branch info for {len(commit_branches)} commits")
+            print(f"✓ Gathered branch info for {len(membership)} commits "
+                  f"across {membership.branch_count} branches")
 
-        return commit_branches
+        return membership
 
     def _extract_commits(
         self,
-        commit_branches: Dict,
+        commit_branches: BranchMembership,
         since_date: Optional[str] = None,
         verbose: bool = False,
         tracker: Optional[SyncProgressTracker] = None
@@ -168,7 +260,7 @@ class GitIngest:
         """Extract commit history with parent information.
 
         Args:
-            commit_branches: Dict mapping commit hash to list of branches
+            commit_branches: BranchMembership from _get_branch_info()
             since_date: Optional ISO datetime string - extract commits AFTER this date
             verbose: Enable verbose output
             tracker: Optional progress tracker for encoding error recording
@@ -185,30 +277,62 @@ class GitIngest:
             else:
                 print("Extracting commits from git repository...")
 
-        # Build git log command
-        cmd = [
-            "git", "log", "--all",
-            "--pretty=format:%H#%P#%aI#%cI#%aN#%aE#%cN#%cE#%s",
-            "--numstat"
-        ]
+        # Decoding problems are counted per token; report them once, as the
+        # whole-output decode used to.
+        decode_errors = []
 
-        # Add --since filter for incremental sync
-        if since_date:
-            cmd.extend(["--since", since_date])
+        commits = []
+        commit_files = []
 
-        result = subprocess.run(
-            cmd,
-            capture_output=True,
+        for record in read_git_log(
             cwd=self.repo_path,
-            check=True
-        )
+            on_decode_error=decode_errors.append,
+            ext_func=file_extension,
+            check=True,
+            since=since_date,
+            all_refs=True,
+        ):
+            commits.append({
+                "hash": record.hash,
+                "parents": ",".join(record.parents),
+                "parent_count": len(record.parents),
+                "author_when": record.author_when,
+                "committer_when": record.committer_when,
+                "author_name": record.author_name,
+                "author_email": record.author_email,
+                "committer_name": record.committer_name,
+                "committer_email": record.committer_email,
+                "message": record.message,
+                "_files": len(record.files),
+                "_git_server": "",
+                "_git_owner": "",
+                "_git_repo": "",
+                "_repo_id": "",
+                "_cycle_time": self._calculate_cycle_time(
+                    record.author_when, record.committer_when
+                ),
+            })
+
+            for change in record.files:
+                commit_files.append({
+                    "hash": record.hash,
+                    "file_path": change.file_path,
+                    "_ext": change.ext,
+                    "additions": change.additions,
+                    "deletions": change.deletions,
+                    "committer_when": record.committer_when,
+                    "path_change": change.path_change or "",
+                    "_git_server": "",
+                    "_git_owner": "",
+                    "_git_repo": "",
+                    "_repo_id": "",
+                })
 
-        # Decode with error handling for non-UTF-8 characters in old commits
-        # Some repositories (e.g., Linux kernel) have commits with Latin-1 or other encodings
-        try:
-            output = result.stdout.decode('utf-8')
-        except UnicodeDecodeError as e:
-            error_msg = str(e)
+            if verbose and len(commits) % 1000 == 0:
+                print(f"  Processed {len(commits)} commits...")
+
+        if decode_errors:
+            error_msg = f"{len(decode_errors)} undecodable field(s), first: {decode_errors[0]}"
             logger.warning(
                 f"Encoding errors in git log output for {self.repo_id}: {error_msg}. "
                 "Some characters will be replaced. This is common in repositories "
@@ -217,127 +341,10 @@ class GitIngest:
             # Record encoding error to progress tracker
             if tracker:
                 tracker.record_encoding_error(error_msg)
-            output = result.stdout.decode('utf-8', errors='replace')
-
-        commits = []
-        commit_files = []
-        commit = {}
-
-        # Process commit
-        for line_num, line in enumerate(output.split("\n")):
-            if verbose and line_num % 1000 == 0 and line_num > 0:
-                print(f"  Processed {line_num} lines...")
-
-            if line:
-                if "\t" in line and len(line.split("\t")) == 3:
-                    # File stats line: additions, deletions, filename
-                    additions, deletions, filename = line.split("\t")
-
-                    if "filenames" in commit:
-                        # Handle git rename events (old_filename => new_filename)
-                        if "=>" in filename:
-                            path_change = filename
-                            # Extract the new filename from rename event
-                            if "{" in filename and "}" in filename:
-                                parts = filename.split("{")
-                                prefix = parts[0]
-                                rest = parts[1]
-                                rename_parts = rest.split("}")
-                                old_new = rename_parts[0]
-                                suffix = rename_parts[1] if len(rename_parts) > 1 else ""
-                                new_name = old_new.split("=>")[1].strip()
-                                filename = prefix + new_name + suffix
-                            else:
-                                filename = filename.split("=>")[1].strip()
-                        else:
-                            path_change = None
-
-                        # Extract file extension
-                        ext = Path(filename).suffix.lstrip(".") if "." in filename else ""
-
-                        commit["filenames"].append({
-                            "file_path": filename,
-                            "path_change": path_change,
-                            "additions": int(additions) if additions != "-" else 0,
-                            "deletions": int(deletions) if deletions != "-" else 0,
-                            "_ext": ext
-                        })
-
-                elif "#" in line:
-                    # This is a new commit line
-                    if commit:  # Save the previous commit
-                        commits.append(commit)
-
-                    parts = line.split("#", 8)
-                    if len(parts) >= 8:
-                        (hash_value, parents, author_datetime, committer_datetime,
-                         author_name, author_email, committer_name, committer_email) = parts[0:8]
-
-                        message = parts[8] if len(parts) > 8 else ""
-
-                        # Parse parent hashes (space-separated, can be 0, 1, or more)
-                        parent_list = parents.split() if parents else []
-                        parent_count = len(parent_list)
-
-                        # Get branches for this commit
-                        branches = commit_branches.get(hash_value, [])
-
-                        commit = {
-                            "hash": hash_value,
-                            "parents": ",".join(parent_list),
-                            "parent_count": parent_count,
-                            #"branches": "|".join(branches),
-                            #"branch_count": len(branches),
-                            "author_when": author_datetime,
-                            "committer_when": committer_datetime,
-                            "author_name": author_name,
-                            "author_email": author_email.lower(),
-                            "committer_name": committer_name,
-                            "committer_email": committer_email.lower(),
-                            "message": message,
-                            "filenames": [],
-                            "_git_server": "",
-                            "_git_owner": "",
-                            "_git_repo": "",
-                            "_repo_id": "",
-                            "_cycle_time": self._calculate_cycle_time(author_datetime, committer_datetime)
-                        }
-            else:
-                # Empty line - end of a commit block
-                if commit:
-                    commits.append(commit)
-                commit = {}
-
-        # Don't forget the last commit
-        if commit:
-            commits.append(commit)
 
         if verbose:
             print(f"✓ Extracted {len(commits)} commits")
 
-        # Process commits into commit_files
-        if verbose:
-            print("Processing file changes...")
-
-        for commit in commits:
-            commit["_files"] = len(commit["filenames"])
-
-            # Process file changes for this commit
-            for file_info in commit["filenames"]:
-                commit_files.append({
-                    "hash": commit["hash"],
-                    "file_path": file_info["file_path"],
-                    "_ext": file_info["_ext"],
-                    "additions": file_info["additions"],
-                    "deletions": file_info["deletions"],
-                    "committer_when": commit["committer_when"],
-                    "path_change": file_info.get("path_change") or "",
-                    "_git_server": commit["_git_server"],
-                    "_git_owner": commit["_git_owner"],
-                    "_git_repo": commit["_git_repo"],
-                    "_repo_id": commit["_repo_id"]
-                })
-
         if verbose:
             print(f"✓ Extracted {len(commit_files)} file changes")
 
@@ -412,7 +419,7 @@ class GitIngest:
             if tracker:
                 tracker.update_phase('branches')
             commit_branches = self._get_branch_info(verbose)
-            branch_count = len(set(b for branches in commit_branches.values() for b in branches))
+            branch_count = commit_branches.branch_count
 
             if tracker:
                 tracker.update_phase('extraction')
@@ -56,6 +56,13 @@ class HabitatConfig:
         'KOSPEX_KRUNNER_DIRNAME': 'krunner',
         'KOSPEX_STAGING_DIRNAME': '_sync-staging',
         'KOSPEX_ASSESSMENTS_DIRNAME': 'assessments',
+        'KOSPEX_WEB_DB_WORKERS': '4',
+        'KOSPEX_WEB_QUERY_TIMEOUT': '30',
+        'KOSPEX_WEB_CACHE_ENTRIES': '256',
+        'KOSPEX_WEB_CACHE_TTL': '300',
+        'KOSPEX_URL_CACHE_NEGATIVE_TTL': '86400',
+        'KOSPEX_URL_CACHE_STALE': '86400',
+        'KOSPEX_DEPS_OFFLINE': 'false',
     }
 
     def __init__(self) -> None:
@@ -363,6 +370,86 @@ class HabitatConfig:
 
         return self.home / self._get_value('KOSPEX_ASSESSMENTS_DIRNAME')
 
+    # =========================================================================
+    # Web Server Settings
+    # =========================================================================
+
+    def _get_positive_number(self, key: str, cast):
+        """A numeric setting, falling back to the default if unset or invalid."""
+        value = self._get_value(key)
+        try:
+            number = cast(value)
+        except (TypeError, ValueError):
+            number = None
+        if number is None or number <= 0:
+            number = cast(self.DEFAULTS[key])
+        return number
+
+    @property
+    def web_db_workers(self) -> int:
+        """Threads kweb runs database queries on.
+
+        Default: 4
+        Override: Set KOSPEX_WEB_DB_WORKERS environment variable or in config file.
+        """
+        return self._get_positive_number('KOSPEX_WEB_DB_WORKERS', int)
+
+    @property
+    def web_query_timeout(self) -> float:
+        """Seconds a kweb request may wait on its database work before a 504.
+
+        Default: 30
+        Override: Set KOSPEX_WEB_QUERY_TIMEOUT environment variable or in config file.
+        """
+        return self._get_positive_number('KOSPEX_WEB_QUERY_TIMEOUT', float)
+
+    @property
+    def web_cache_entries(self) -> int:
+        """Maximum number of results kweb keeps in its result cache.
+
+        Default: 256
+        Override: Set KOSPEX_WEB_CACHE_ENTRIES environment variable or in config file.
+        """
+        return self._get_positive_number('KOSPEX_WEB_CACHE_ENTRIES', int)
+
+    @property
+    def web_cache_ttl(self) -> float:
+        """Seconds a cached kweb result is served before it is recomputed.
+
+        Default: 300
+        Override: Set KOSPEX_WEB_CACHE_TTL environment variable or in config file.
+        """
+        return self._get_positive_number('KOSPEX_WEB_CACHE_TTL', float)
+
+    @property
+    def url_cache_negative_ttl(self) -> float:
+        """Seconds a cached 404/410 response is trusted before the URL is retried.
+
+        Default: 86400 (a day)
+        Override: Set KOSPEX_URL_CACHE_NEGATIVE_TTL environment variable or in config file.
+        """
+        return self._get_positive_number('KOSPEX_URL_CACHE_NEGATIVE_TTL', float)
+
+    @property
+    def url_cache_stale(self) -> float:
+        """Seconds past its TTL a cached response is still served while it is
+        refreshed in the background.
+
+        Default: 86400 (a day)
+        Override: Set KOSPEX_URL_CACHE_STALE environment variable or in config file.
+        """
+        return self._get_positive_number('KOSPEX_URL_CACHE_STALE', float)
+
+    @property
+    def deps_offline(self) -> bool:
+        """Resolve dependencies only from the imported deps.dev snapshot, with
+        no HTTP calls (see `kospex depsdev-import`).
+
+        Default: false
+        Override: Set KOSPEX_DEPS_OFFLINE=true environment variable or in config file.
+        """
+        return str(self._get_value('KOSPEX_DEPS_OFFLINE')).strip().lower() in ('1', 'true', 'yes', 'on')
+
     # =========================================================================
     # Validation and Directory Management
     # =========================================================================
@@ -0,0 +1,22 @@
+"""Map file paths to languages once per basename, for commit_files.language.
+
+Panopticas.get_language with skip_shebang=True only looks at the file's
+basename (its special-case names, then its extension), so the answer for
+"src/a/util.py" and "tests/util.py" is the same and can be memoised on the
+basename. A repo's history has millions of file changes but only thousands of
+distinct basenames.
+"""
+import functools
+import os
+
+import panopticas as Panopticas
+
+
+@functools.lru_cache(maxsize=65536)
+def _basename_language(basename: str) -> str:
+    return Panopticas.get_language(basename, skip_shebang=True)
+
+
+def file_language(file_path: str) -> str:
+    """The language of ``file_path`` by name alone ("Unknown" if unrecognised)."""
+    return _basename_language(os.path.basename(file_path))
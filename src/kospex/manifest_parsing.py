@@ -0,0 +1,215 @@
+"""Parse dependency manifests in a process pool, for ``krunner osi``.
+
+Parsing is CPU bound - a large pnpm-lock.yaml is mostly YAML loading - and
+needs nothing but the file, so each manifest is a ManifestTask handed to a
+worker process. The worker picks the parser with the extractor registry
+(registry.classify, then the entry's parse_ref) and returns a ParsedManifest
+holding plain dict records. Workers never touch the database.
+
+Results come back in task order as they finish, so output and CSV rows are the
+same whatever the number of workers. With one worker, or one task, the
+manifests are parsed in the calling process.
+
+A ManifestCache (the manifest_cache table, migration 0011) keeps the records
+of each manifest by its file_metadata hash. Tasks whose hash is unchanged are
+answered from the cache and never reach a worker, so re-running on an
+unchanged org parses nothing.
+"""
+from __future__ import annotations
+
+import datetime
+import importlib
+import json
+import os
+import sqlite3
+import time
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing import Iterable, Iterator, Optional
+
+import kospex_schema as KospexSchema
+from kospex.extractors.registry import classify
+
+DEFAULT_PARSE_WORKERS = min(4, os.cpu_count() or 1)
+
+SCANNER = "osi"
+
+# Bump when a parser's output changes, so cached records are parsed again
+PARSER_VERSION = 1
+
+# Fields krunner osi sets on every record, by registry entry
+RECORD_DEFAULTS = {
+    "pypi-requirements": {"ecosystem": "PyPi", "requirements_type": "direct", "extras": ""},
+    "pyproject": {"ecosystem": "PyPi"},
+    "npm-packagejson": {"ecosystem": "NPM"},
+    "pnpm-lock": {"ecosystem": "NPM"},
+}
+
+# One instance per process of each class a parse_ref method belongs to
+_instances = {}
+
+
+@dataclass
+class ManifestTask:
+    """One dependency file to parse. Must stay picklable."""
+
+    repo_id: str
+    repo_path: str
+    file_path: str                  # relative to repo_path
+    hash: Optional[str] = None
+
+
+@dataclass
+class ParsedManifest:
+    """What a worker hands back for one ManifestTask."""
+
+    task: ManifestTask
+    extractor: Optional[str] = None  # registry entry name, None if unsupported
+    records: list = field(default_factory=list)
+    error: str = ""
+    seconds: float = 0.0
+    cached: bool = False
+
+
+def resolve_parser(parse_ref):
+    """The callable a registry parse_ref ("module:Class.method" or
+    "module:function") names. Methods are bound to a per-process instance."""
+    module_name, qualname = parse_ref.split(":")
+    owner = importlib.import_module(module_name)
+    *path, name = qualname.split(".")
+    for part in path:
+        owner = getattr(owner, part)
+    if isinstance(owner, type):
+        if owner not in _instances:
+            _instances[owner] = owner()
+        owner = _instances[owner]
+    return getattr(owner, name)
+
+
+def parse_manifest(task: ManifestTask) -> ParsedManifest:
+    """Worker: parse one manifest into krunner osi records. Never raises, a
+    file that fails to parse comes back with ``error`` set."""
+    start = time.perf_counter()
+    parsed = ParsedManifest(task=task)
+    entry = classify(task.file_path).extractor
+    if entry is None or SCANNER not in entry.scanners:
+        parsed.seconds = time.perf_counter() - start
+        return parsed
+
+    parsed.extractor = entry.name
+    try:
+        records = resolve_parser(entry.parse_ref)(os.path.join(task.repo_path, task.file_path))
+    except Exception as e:  # one bad file must not stop the run
+        parsed.error = f"{type(e).__name__}: {e}"
+        records = []
+
+    for record in records:
+        record["_repo_id"] = task.repo_id
+        record["hash"] = task.hash
+        record["file_path"] = task.file_path
+        record.update(RECORD_DEFAULTS.get(entry.name, {}))
+    parsed.records = records
+    parsed.seconds = time.perf_counter() - start
+    return parsed
+
+
+class ManifestCache:
+    """Parsed records by (_repo_id, file_path, hash), in the manifest_cache table.
+
+    Only manifests that parsed cleanly and have a hash are kept. With
+    ``refresh``, every lookup misses and the new records replace the old.
+    Reads and writes happen in the process that owns the database connection.
+    """
+
+    def __init__(self, kospex_db, refresh=False):
+        self.kospex_db = kospex_db
+        self.refresh = refresh
+        self.hits = 0
+        self.misses = 0
+        self._available = None
+
+    def available(self):
+        """False on a database from before migration 0011."""
+        if self._available is None:
+            try:
+                self.kospex_db.execute(f"SELECT 1 FROM {KospexSchema.TBL_MANIFEST_CACHE} LIMIT 1")
+                self._available = True
+            except sqlite3.OperationalError:  # no such table
+                self._available = False
+        return self._available
+
+    def get(self, task: ManifestTask) -> Optional[ParsedManifest]:
+        """The cached ParsedManifest for the task, or None."""
+        row = None
+        if task.hash and not self.refresh and self.available():
+            row = self.kospex_db.execute(
+                f"SELECT extractor, records FROM {KospexSchema.TBL_MANIFEST_CACHE} "
+                "WHERE _repo_id = ? AND file_path = ? AND hash = ? AND parser_version = ?",
+                [task.repo_id, task.file_path, task.hash, PARSER_VERSION],
+            ).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        records = json.loads(zlib.decompress(row[1]))
+        for record in records:
+            record["hash"] = task.hash
+        return ParsedManifest(task=task, extractor=row[0], records=records, cached=True)
+
+    def put(self, parsed: ParsedManifest):
+        """Keep a freshly parsed manifest. Returns True if it was stored."""
+        task = parsed.task
+        if parsed.cached or parsed.error or not parsed.extractor or not task.hash:
+            return False
+        if not self.available():
+            return False
+        with self.kospex_db.conn:
+            self.kospex_db.execute(
+                f"""INSERT OR REPLACE INTO {KospexSchema.TBL_MANIFEST_CACHE}
+                    (_repo_id, file_path, hash, parser_version, extractor, records,
+                     record_count, parsed_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)""",
+                [task.repo_id, task.file_path, task.hash, PARSER_VERSION, parsed.extractor,
+                 zlib.compress(json.dumps(parsed.records).encode("utf-8")),
+                 len(parsed.records), datetime.datetime.now(datetime.timezone.utc).isoformat()],
+            )
+        return True
+
+
+def parse_manifests(tasks: Iterable[ManifestTask], workers: int = DEFAULT_PARSE_WORKERS,
+                    cache: Optional[ManifestCache] = None) -> Iterator[ParsedManifest]:
+    """Parse every task, yielding a ParsedManifest for each, in task order.
+
+    With a cache, unchanged manifests come from it and only the rest are
+    parsed, then stored.
+    """
+    if workers < 1:
+        raise ValueError(f"workers must be >= 1, got {workers}")
+    tasks = list(tasks)
+    cached = [cache.get(task) if cache else None for task in tasks]
+    misses = [task for task, hit in zip(tasks, cached) if hit is None]
+
+    parsed = _parse(misses, workers)
+    try:
+        for hit in cached:
+            if hit is not None:
+                yield hit
+                continue
+            result = next(parsed)
+            if cache:
+                cache.put(result)
+            yield result
+    finally:
+        parsed.close()  # shuts the pool down
+
+
+def _parse(tasks, workers):
+    if workers == 1 or len(tasks) < 2:
+        yield from map(parse_manifest, tasks)
+        return
+
+    workers = min(workers, len(tasks))
+    chunksize = max(1, len(tasks) // (workers * 4))
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        yield from pool.map(parse_manifest, tasks, chunksize=chunksize)
@@ -0,0 +1,257 @@
+"""Sync many repos at once: git and scanners in a process pool, one DB writer.
+
+A repo sync is mostly waiting on subprocesses - `git pull`, `git log`, scc and
+panopticas' file walk - none of which needs the database. This module runs
+that part of each repo's sync (extract_repo) in a ProcessPoolExecutor and
+keeps every database read and write in the calling process, so SQLite only
+ever sees one writer and no connection crosses a process boundary.
+
+Per repo, the calling process:
+
+1. plans the sync (Kospex.plan_sync: path-conflict check, incremental since
+   date) and reads the recorded file_metadata provenance,
+2. submits an extract_repo() task to the pool,
+3. as each task completes, parses the commits the worker spooled and writes
+   them, the returned file_metadata and the developer stats.
+
+Workers write the raw `git log -z` output to a temporary file
+(kospex.git_log.spool_git_log) instead of returning the commits, so a repo's
+history is never held in memory or pickled between processes. The writer
+parses the spool in a stream, so its memory stays bounded by the batch size.
+At most ``workers * 2`` repos are in flight, so finished-but-unwritten results
+don't pile up when the writer is the bottleneck.
+"""
+from __future__ import annotations
+
+import os
+import tempfile
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import Callable, Iterable, Iterator, Optional
+
+from kospex.activity_rollup import CommitActivity
+from kospex.git_log import read_spooled_git_log, spool_git_log
+from kospex_utils import get_kospex_logger
+
+log = get_kospex_logger("parallel_sync")
+
+OK = "OK"
+SKIP = "SKIP"
+FAIL = "FAIL"
+
+
+@dataclass
+class SyncTask:
+    """Everything a worker needs to extract one repo. Must stay picklable."""
+
+    directory: str
+    log_args: dict = field(default_factory=dict)
+    scan_metadata: bool = True
+    recorded_provenance: dict = field(default_factory=dict)
+    # Optional module-level callable run first, e.g. kgit's _git_pull:
+    # pull(directory) -> (ok, detail, commits). Not ok skips the repo.
+    pull: Optional[Callable] = None
+
+
+@dataclass
+class RepoExtract:
+    """What a worker hands back to the writer for one repo."""
+
+    directory: str
+    log_path: Optional[str] = None                   # spool_git_log() output
+    metadata: Optional[tuple] = None                 # (provenance, files, scc_metrics)
+    metadata_reason: str = ""
+    pull_result: Optional[tuple] = None              # (ok, detail, commits)
+    seconds: float = 0.0
+
+
+@dataclass
+class RepoResult:
+    """The outcome of one repo, as reported to the caller."""
+
+    directory: str
+    status: str                     # OK, SKIP or FAIL
+    detail: str = ""
+    commits: int = 0                # commits written to the DB
+    pull_result: Optional[tuple] = None
+    error: Optional[BaseException] = None
+
+
+def extract_repo(task: SyncTask) -> RepoExtract:
+    """Worker: run a repo's git and scanner work. Never touches the database."""
+    # Imported here so spawn/forkserver workers pay for the heavy modules only
+    # when they run a task, and module import never opens a DB.
+    from kospex_core import current_sync_provenance, needs_metadata_rebuild, scan_repo_metadata
+    from kospex_git import KospexGit
+
+    start = time.perf_counter()
+    extract = RepoExtract(directory=task.directory)
+
+    if task.pull:
+        extract.pull_result = task.pull(task.directory)
+        if not extract.pull_result[0]:
+            extract.seconds = time.perf_counter() - start
+            return extract
+
+    fd, extract.log_path = tempfile.mkstemp(prefix="kospex-git-log-")
+    os.close(fd)
+    try:
+        spool_git_log(extract.log_path, cwd=task.directory, **task.log_args)
+
+        if task.scan_metadata:
+            git = KospexGit()
+            git.set_repo(os.path.abspath(task.directory))
+            current = current_sync_provenance(git)
+            rebuild, extract.metadata_reason = needs_metadata_rebuild(
+                task.recorded_provenance, current
+            )
+            if rebuild:
+                files, scc_metrics = scan_repo_metadata(git, skip_last_commit=True)
+                extract.metadata = (current, files, scc_metrics)
+    except BaseException:
+        _discard(extract)
+        raise
+
+    extract.seconds = time.perf_counter() - start
+    return extract
+
+
+def _discard(extract: RepoExtract) -> None:
+    """Remove the extract's git log spool, if it has one."""
+    if extract.log_path:
+        try:
+            os.unlink(extract.log_path)
+        except FileNotFoundError:
+            pass
+        extract.log_path = None
+
+
+class ParallelSync:
+    """Schedule repo syncs across a process pool, writing through one Kospex.
+
+    ``kospex`` is the calling process's Kospex instance and the only thing
+    that touches the database. ``classify`` maps an exception raised while
+    planning or writing a repo to SKIP or FAIL (default FAIL).
+    """
+
+    def __init__(
+        self,
+        kospex,
+        workers: int,
+        force: bool = False,
+        batch_size: Optional[int] = None,
+        no_scc: bool = False,
+        pull: Optional[Callable] = None,
+        classify: Optional[Callable[[BaseException], str]] = None,
+    ):
+        if workers < 1:
+            raise ValueError(f"workers must be >= 1, got {workers}")
+        self.kospex = kospex
+        self.workers = workers
+        self.force = force
+        self.batch_size = batch_size
+        self.no_scc = no_scc
+        self.pull = pull
+        self.classify = classify or (lambda exc: FAIL)
+
+    def _plan(self, directory) -> SyncTask:
+        kospex = self.kospex
+        try:
+            log_args = kospex.plan_sync(directory, force=self.force)
+            recorded = kospex._recorded_sync_provenance(kospex.git.get_repo_id())
+        finally:
+            if kospex.original_cwd:
+                kospex.chdir_original()
+        return SyncTask(
+            directory=directory,
+            log_args=log_args,
+            scan_metadata=not self.no_scc,
+            recorded_provenance=recorded,
+            pull=self.pull,
+        )
+
+    def _write(self, extract: RepoExtract) -> RepoResult:
+        kospex = self.kospex
+        if extract.pull_result and not extract.pull_result[0]:
+            return RepoResult(extract.directory, SKIP, extract.pull_result[1],
+                              pull_result=extract.pull_result)
+
+        try:
+            kospex.set_repo_dir(extract.directory)
+            try:
+                activity = CommitActivity()
+                count = kospex.write_commits(
+                    read_spooled_git_log(extract.log_path), batch_size=self.batch_size,
+                    progress=False, activity=activity,
+                )
+                kospex.record_sync_time(display_progress=False)
+
+                repo_id = kospex.git.get_repo_id()
+                if extract.metadata:
+                    current, files, scc_metrics = extract.metadata
+                    kospex.write_file_metadata(repo_id, current, files, scc_metrics)
+                if repo_id:
+                    kospex.kospex_query.sync_developer_stats(repo_id, activity)
+                kospex.kospex_query.bump_data_generation()
+            finally:
+                kospex.chdir_original()
+        finally:
+            _discard(extract)
+
+        return RepoResult(extract.directory, OK, f"{count} commits in {extract.seconds:.1f}s",
+                          commits=count, pull_result=extract.pull_result)
+
+    def _failed(self, directory, exc, pull_result=None) -> RepoResult:
+        log.error(f"sync failed for {directory}: {exc}")
+        return RepoResult(directory, self.classify(exc), str(exc),
+                          pull_result=pull_result, error=exc)
+
+    def run(self, directories: Iterable[str]) -> Iterator[RepoResult]:
+        """Sync every directory, yielding a RepoResult as each one is written.
+
+        Results arrive in completion order, not input order. A failure in one
+        repo is reported and never stops the others.
+        """
+        pending_dirs = iter(directories)
+        in_flight = {}
+        window = self.workers * 2
+
+        pool = ProcessPoolExecutor(max_workers=self.workers)
+        try:
+            while True:
+                # Plan and submit until the window is full. Planning reads the
+                # DB, so it happens here rather than in a worker.
+                while len(in_flight) < window:
+                    directory = next(pending_dirs, None)
+                    if directory is None:
+                        break
+                    try:
+                        task = self._plan(directory)
+                    except Exception as exc:  # never let one repo kill the run
+                        yield self._failed(directory, exc)
+                        continue
+                    in_flight[pool.submit(extract_repo, task)] = directory
+
+                if not in_flight:
+                    return
+
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    directory = in_flight.pop(future)
+                    try:
+                        extract = future.result()
+                    except Exception as exc:
+                        yield self._failed(directory, exc)
+                        continue
+                    try:
+                        yield self._write(extract)
+                    except Exception as exc:
+                        yield self._failed(directory, exc, extract.pull_result)
+        finally:
+            # Unwritten extracts are left only when the caller stops early:
+            # drop their spools along with the tasks that have not started
+            pool.shutdown(cancel_futures=True)
+            for future in in_flight:
+                if not future.cancelled() and future.exception() is None:
+                    _discard(future.result())
@@ -0,0 +1,46 @@
+"""Recency fields - days ago, development status, tenure - as SQL expressions.
+
+developers, repos, repos2, orgs, authors, active_devs_by_repo, author_tech and
+get_repo_sync_data in KospexQuery used to derive these for each row in Python,
+with KospexUtils.days_ago, development_status and days_between_datetimes: a
+datetime parse or two per row, tens of thousands on an org-wide developer
+list. These build the same values as SQL over julianday(), which applies each
+timestamp's offset, so SQLite computes them in the projection of the query
+that produced the timestamps.
+
+Each takes an SQL expression - a column, or an aggregate such as
+MAX(committer_when) - written by the caller, never user input.
+tests/benchmarks/bench_recency.py compares the two approaches.
+"""
+
+# The development_status buckets, in days since the last commit
+ACTIVE_DAYS = 90
+AGING_DAYS = 180
+STALE_DAYS = 365
+
+
+def _days_ago(expr):
+    return f"ROUND(julianday('now') - julianday({expr}), 2)"
+
+
+def days_ago_sql(expr):
+    """Days from expr to now, to two places, as KospexUtils.days_ago (0.0 for NULL)."""
+    return f"COALESCE({_days_ago(expr)}, 0.0)"
+
+
+def status_sql(expr, active_limit=ACTIVE_DAYS, aging_limit=AGING_DAYS, stale_limit=STALE_DAYS):
+    """KospexUtils.development_status of the timestamp expr, as a CASE."""
+    days = _days_ago(expr)
+    return (
+        f"CASE WHEN {days} IS NULL THEN 'Unknown' "
+        f"WHEN {days} <= {int(active_limit)} THEN 'Active' "
+        f"WHEN {days} <= {int(aging_limit)} THEN 'Aging' "
+        f"WHEN {days} <= {int(stale_limit)} THEN 'Stale' "
+        f"ELSE 'Unmaintained' END"
+    )
+
+
+def days_between_sql(first, last, min_one=False):
+    """KospexUtils.days_between_datetimes of two timestamp expressions, to one place."""
+    days = f"ROUND(ABS(julianday({last}) - julianday({first})), 1)"
+    return f"MAX({days}, 1)" if min_one else days
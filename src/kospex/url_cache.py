@@ -0,0 +1,246 @@
+"""HTTP responses kept between runs in the url_cache table.
+
+Each row holds one URL's last response. Since migration 0008:
+
+- bodies of 1 KB or more are stored zlib-compressed (``encoding = 'zlib'``),
+  because deps.dev package documents list every version ever published
+- the HTTP status is stored, so a 404/410 is cached too (a negative entry),
+  with its own TTL, and a yanked or mistyped package is not re-requested
+  on every run
+- the TTL depends on the kind of endpoint (ENDPOINT_CLASSES): a deps.dev or
+  PyPI document for one version is effectively immutable and kept for a week,
+  anything else keeps the caller's TTL (an hour by default)
+- an entry up to ``stale_seconds`` past its TTL is still served, marked stale,
+  and the caller can revalidate() it in the background (stale-while-revalidate)
+- hits and fetches are counted per row, for ``kospex cache stats``
+
+Reads and writes happen on the thread that owns the database connection.
+revalidate() only does the HTTP on a worker thread, and flush() writes the
+results back.
+"""
+import re
+import threading
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from typing import NamedTuple, Optional
+
+import kospex_schema as KospexSchema
+
+ENCODING_ZLIB = "zlib"
+COMPRESS_MIN_BYTES = 1024
+DEFAULT_TTL = 3600
+DAY = 86400
+
+# Statuses that say the URL does not exist, cached as negative entries
+NEGATIVE_STATUSES = frozenset({404, 410})
+
+
+class EndpointClass(NamedTuple):
+    name: str
+    pattern: re.Pattern
+    ttl: Optional[int]  # seconds, or None for the caller's TTL
+
+
+ENDPOINT_CLASSES = [
+    EndpointClass("deps.dev version", re.compile(r"/systems/[^/]+/packages/[^/]+/versions/[^/]+$"), 7 * DAY),
+    EndpointClass("deps.dev package", re.compile(r"/systems/[^/]+/packages/[^/]+$"), None),
+    EndpointClass("pypi release", re.compile(r"^https://pypi\.org/pypi/[^/]+/[^/]+/json$"), 7 * DAY),
+    EndpointClass("pypi project", re.compile(r"^https://pypi\.org/pypi/[^/]+/json$"), None),
+    EndpointClass("github", re.compile(r"^https://api\.github\.com/"), None),
+]
+OTHER = "other"
+
+
+def endpoint_class(url):
+    """The ENDPOINT_CLASSES entry ``url`` belongs to, or None."""
+    return next((cls for cls in ENDPOINT_CLASSES if cls.pattern.search(url)), None)
+
+
+def encode(content):
+    """(stored value, encoding) for a response body."""
+    if content is not None and len(content) >= COMPRESS_MIN_BYTES:
+        return zlib.compress(content.encode("utf-8")), ENCODING_ZLIB
+    return content, None
+
+
+def decode(value, encoding):
+    """The response body from a stored value."""
+    if encoding == ENCODING_ZLIB:
+        return zlib.decompress(value).decode("utf-8")
+    return value
+
+
+class CacheEntry(NamedTuple):
+    content: Optional[str]  # None for a negative entry
+    status: int
+    age: float  # seconds
+    stale: bool
+
+
+class UrlCache:
+    """The url_cache table, with per-endpoint TTLs and background revalidation."""
+
+    def __init__(self, kospex_db, negative_ttl=DAY, stale_seconds=DAY, workers=2, clock=time.time):
+        self.kospex_db = kospex_db
+        self.negative_ttl = negative_ttl
+        self.stale_seconds = stale_seconds
+        self.workers = workers
+        self._clock = clock
+        self._pending_hits = {}
+        self._inflight = {}
+        self._done = []
+        self._lock = threading.Lock()
+        self._pool = None
+
+    def ttl(self, url, status, default=DEFAULT_TTL):
+        """Seconds a response with ``status`` from ``url`` stays fresh."""
+        if status in NEGATIVE_STATUSES:
+            return self.negative_ttl
+        cls = endpoint_class(url)
+        return cls.ttl if cls and cls.ttl is not None else default
+
+    def lookup(self, url, max_age=DEFAULT_TTL):
+        """The CacheEntry for ``url`` if fresh or within the stale window, else None.
+
+        max_age is the TTL for endpoints without a class TTL of their own.
+        """
+        if self._done:
+            self.flush()
+        row = self.kospex_db.execute(
+            f"SELECT content, timestamp, status, encoding FROM {KospexSchema.TBL_URL_CACHE} "
+            "WHERE url = ?",
+            [url],
+        ).fetchone()
+        if row is None:
+            return None
+        value, timestamp, status, encoding = row
+        status = status or 200  # rows from before 0008 were all successes
+        age = self._clock() - (timestamp or 0)
+        ttl = self.ttl(url, status, default=max_age)
+        if age >= ttl + self.stale_seconds:
+            return None
+        self._pending_hits[url] = self._pending_hits.get(url, 0) + 1
+        return CacheEntry(decode(value, encoding), status, age, age >= ttl)
+
+    def store(self, url, content, status):
+        """Save a response. Only 200s and NEGATIVE_STATUSES are cached.
+
+        Returns True if it was saved.
+        """
+        if status != 200 and status not in NEGATIVE_STATUSES:
+            return False
+        value, encoding = encode(content if status == 200 else None)
+        size = len(content) if status == 200 and content is not None else 0
+        with self.kospex_db.conn:
+            self.kospex_db.execute(
+                f"""INSERT INTO {KospexSchema.TBL_URL_CACHE}
+                    (url, content, timestamp, status, encoding, size, hits, fetches)
+                VALUES (?, ?, ?, ?, ?, ?, 0, 1)
+                ON CONFLICT(url) DO UPDATE SET
+                    content = excluded.content, timestamp = excluded.timestamp,
+                    status = excluded.status, encoding = excluded.encoding,
+                    size = excluded.size, fetches = fetches + 1""",
+                [url, value, int(self._clock()), status, encoding, size],
+            )
+            self._write_hits()
+        return True
+
+    def revalidate(self, url, fetch):
+        """Refresh a stale ``url`` in the background with ``fetch(url)``, which
+        returns (content, status) and must not touch the database. flush()
+        saves the result."""
+        with self._lock:
+            if url in self._inflight:
+                return
+            if self._pool is None:
+                self._pool = ThreadPoolExecutor(
+                    max_workers=self.workers, thread_name_prefix="url-cache"
+                )
+            self._inflight[url] = self._pool.submit(self._revalidate, url, fetch)
+
+    def _revalidate(self, url, fetch):
+        try:
+            content, status = fetch(url)
+        except Exception:  # a failed refresh leaves the stale entry in place
+            content, status = None, None
+        with self._lock:
+            self._done.append((url, content, status))
+            self._inflight.pop(url, None)
+
+    def flush(self, wait=False):
+        """Save finished revalidations and the hit counts. With ``wait``, first
+        wait for the revalidations still running."""
+        if wait:
+            with self._lock:
+                futures = list(self._inflight.values())
+            for future in futures:
+                future.result()
+        with self._lock:
+            done, self._done = self._done, []
+        for url, content, status in done:
+            self.store(url, content, status)
+        if self._pending_hits:
+            with self.kospex_db.conn:
+                self._write_hits()
+
+    def _write_hits(self):
+        hits, self._pending_hits = self._pending_hits, {}
+        self.kospex_db.conn.executemany(
+            f"UPDATE {KospexSchema.TBL_URL_CACHE} SET hits = hits + ? WHERE url = ?",
+            [(count, url) for url, count in hits.items()],
+        )
+
+    def _rows(self):
+        return self.kospex_db.execute(
+            f"SELECT url, timestamp, status, length(content), size, hits, fetches "
+            f"FROM {KospexSchema.TBL_URL_CACHE}"
+        ).fetchall()
+
+    def stats(self, max_age=DEFAULT_TTL):
+        """Per endpoint class: entries, stored and uncompressed bytes, negative,
+        stale and expired entries, hits, fetches and hit rate."""
+        self.flush()
+        now = self._clock()
+        classes = {}
+        for url, timestamp, status, stored, size, hits, fetches in self._rows():
+            cls = endpoint_class(url)
+            name = cls.name if cls else OTHER
+            s = classes.setdefault(name, {
+                "endpoint": name, "entries": 0, "stored_bytes": 0, "content_bytes": 0,
+                "negative": 0, "stale": 0, "expired": 0, "hits": 0, "fetches": 0,
+            })
+            status = status or 200
+            age = now - (timestamp or 0)
+            ttl = self.ttl(url, status, default=max_age)
+            s["entries"] += 1
+            s["stored_bytes"] += stored or 0
+            s["content_bytes"] += size if size is not None else (stored or 0)
+            s["negative"] += status in NEGATIVE_STATUSES
+            s["stale"] += ttl <= age < ttl + self.stale_seconds
+            s["expired"] += age >= ttl + self.stale_seconds
+            s["hits"] += hits or 0
+            s["fetches"] += fetches or 0
+        for s in classes.values():
+            lookups = s["hits"] + s["fetches"]
+            s["hit_rate"] = s["hits"] / lookups if lookups else 0.0
+        return sorted(classes.values(), key=lambda s: s["endpoint"])
+
+    def prune(self, everything=False, max_age=DEFAULT_TTL):
+        """Delete expired entries (past TTL and the stale window), or every
+        entry. Returns the number deleted."""
+        if everything:
+            urls = [row[0] for row in self.kospex_db.execute(
+                f"SELECT url FROM {KospexSchema.TBL_URL_CACHE}").fetchall()]
+        else:
+            now = self._clock()
+            urls = [
+                url for url, timestamp, status, *_ in self._rows()
+                if now - (timestamp or 0)
+                >= self.ttl(url, status or 200, default=max_age) + self.stale_seconds
+            ]
+        with self.kospex_db.conn:
+            self.kospex_db.conn.executemany(
+                f"DELETE FROM {KospexSchema.TBL_URL_CACHE} WHERE url = ?", [(url,) for url in urls]
+            )
+        return len(urls)
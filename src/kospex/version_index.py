@@ -0,0 +1,63 @@
+"""A package's deps.dev version history, indexed for versions_behind lookups.
+
+get_versions_behind() used to sort a package's whole version list by
+publishedAt and walk it with version_fuzzy_match() on every call, so checking
+one package at 30 pinned versions sorted the same list 30 times. A
+VersionIndex is built once per package. It sorts the list, records each version
+string's rank and where the default version sits, and then answers each
+lookup in O(1).
+"""
+
+
+def fuzzy_version_forms(version: str) -> list:
+    """The deps.dev version strings KospexDependencies.version_fuzzy_match()
+    accepts for ``version`` from a manifest, e.g. "2022.07.13" also matches
+    "2022.7.13", and "3.4" also matches "3.4.0"."""
+    parts = version.split(".")
+    cleaned = ".".join(part.lstrip("0") for part in parts)
+    forms = [version, cleaned]
+    if len(parts) == 2:
+        forms.append(f"{cleaned}.0")
+    return forms
+
+
+class VersionIndex:
+    """The versions of one package, newest first, with their ranks."""
+
+    def __init__(self, versions):
+        # Newest first by publishedAt (missing dates sort last); the sort is
+        # stable, so ties keep deps.dev's order
+        ordered = sorted(versions or [], key=lambda v: v.get("publishedAt") or "", reverse=True)
+        self.count = len(ordered)
+        self.default_rank = next(
+            (rank for rank, v in enumerate(ordered) if v.get("isDefault")), self.count
+        )
+        self.ranks = {}
+        for rank, v in enumerate(ordered):
+            self.ranks.setdefault(v["versionKey"]["version"], rank)
+
+    @classmethod
+    def from_package(cls, data):
+        """Build from a deps.dev /packages/{name} response (None for no data)."""
+        return cls((data or {}).get("versions"))
+
+    def rank(self, version):
+        """Position of ``version`` (newest is 0), or the version count if unknown."""
+        return min(
+            (self.ranks[form] for form in fuzzy_version_forms(version) if form in self.ranks),
+            default=self.count,
+        )
+
+    def versions_behind(self, version):
+        """The get_versions_behind() details for ``version``.
+
+        versions_before_default counts the releases newer than ``version`` that
+        are also newer than the default one (pre-releases). versions_behind
+        counts the rest of the newer releases, from the default down.
+        """
+        rank = self.rank(version)
+        return {
+            "versions": self.count,
+            "versions_before_default": min(rank, self.default_rank),
+            "versions_behind": max(0, rank - self.default_rank),
+        }
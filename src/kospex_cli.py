@@ -8,7 +8,7 @@ import os
 import os.path
 import socket
 import ssl
-from datetime import datetime, timedelta, timezone
+from datetime import datetime, timezone
 from shutil import which
 
 import click
@@ -18,9 +18,10 @@ from rich.table import Table
 
 import kospex_schema as KospexSchema
 import kospex_utils as KospexUtils
-import krunner_utils as KrunnerUtils
 from kospex.db import Migrator
 from kospex.db.migrator import warn_if_behind
+from kospex.file_scanner import scan_groups
+from kospex.parallel_sync import FAIL, OK, SKIP, ParallelSync
 from kospex_core import GitRepo, Kospex, RepoPathConflict
 from kospex_dependencies import KospexDependencies
 from kospex_git import KospexGit
@@ -370,28 +371,20 @@ def summary(
                         print(f"Unknown repo:\n{r}\n")
                     unknown += 1
 
+        # One pass over the repos finds the files for both summaries
+        wanted = [group for group, on in (("docker", docker), ("dependencies", dependencies)) if on]
+        found = scan_groups(repo_dirs, wanted) if wanted else {}
+
         if docker:
             print("Docker file summary")
-            # docker = KospexUtils.count_key_occurrences(results, "docker")
-            # docker_table = KospexUtils.get_status_table(docker)
-            # print(docker_table)
-            # docker_files = KrunnerUtils.find_dockerfiles_in_repos(dirs)
-
-            docker_files = KrunnerUtils.find_dockerfiles_in_repos(repo_dirs)
-            records = KospexUtils.get_git_metadata(docker_files)
+            records = KospexUtils.get_git_metadata(found["docker"])
             # print(records)
             docker_status = KospexUtils.count_key_occurrences(records, "status")
             docker_status_table = KospexUtils.get_status_table(docker_status)
             console.print(docker_status_table)
 
         if dependencies:
-            kdeps = KospexDependencies(kospex_db=kospex.kospex_db, kospex_query=kospex.kospex_query)
-            deps = []
-            for d in repo_dirs:
-                results = kdeps.find_dependency_files(d)
-                deps.extend(results)
-            # results = kdeps.find_dependency_files(directory)
-            records = KospexUtils.get_all_last_commit_info(deps)
+            records = KospexUtils.get_all_last_commit_info(found["dependencies"])
             dep_stats = KospexUtils.repo_stats(records, "author_date")
             deps_status_table = KospexUtils.get_status_table(dep_stats)
             console.print("\nDependencies summary")
@@ -452,21 +445,42 @@ def summary(
 @cli.command("sync-directory")
 @click.option("-force", is_flag=True, default=False,
               help="Sync repos already synced from another directory, repointing them.")
+@click.option("-batch-size", type=click.IntRange(min=1), default=None,
+              help="Rows buffered per table before each batched DB write.")
+@click.option("-workers", type=click.IntRange(min=1), default=1,
+              help="Repos to extract in parallel (git + scc in worker processes).")
 @click.argument("directory", type=click.Path(exists=True))
-def sync_directory(force, directory):
+def sync_directory(force, batch_size, workers, directory):
     """Sync all Git repos found in the data directory to the kospex DB."""
     # Find all the repos in the directory
     repos = KospexUtils.find_repos(directory)
     skipped = 0
-    for repo in repos:
-        print(f"\nSyncing {repo}")
-        try:
-            kospex.sync_repo(repo, force=force)
-        except RepoPathConflict as exc:
-            # A second copy of a tree would otherwise repoint many rows at once.
-            log.error(str(exc))
-            print(f"SKIPPED: {exc}")
-            skipped += 1
+
+    if workers > 1:
+        # git and scanner work runs in worker processes; this process stays
+        # the only DB writer.
+        scheduler = ParallelSync(
+            kospex, workers, force=force, batch_size=batch_size,
+            classify=lambda exc: SKIP if isinstance(exc, RepoPathConflict) else FAIL,
+        )
+        for result in scheduler.run(repos):
+            if result.status == OK:
+                print(f"Synced {result.directory}: {result.detail}")
+            elif result.status == SKIP:
+                print(f"SKIPPED: {result.detail}")
+                skipped += 1
+            else:
+                print(f"FAILED: {result.directory}: {result.detail}")
+    else:
+        for repo in repos:
+            print(f"\nSyncing {repo}")
+            try:
+                kospex.sync_repo(repo, force=force, batch_size=batch_size)
+            except RepoPathConflict as exc:
+                # A second copy of a tree would otherwise repoint many rows at once.
+                log.error(str(exc))
+                print(f"SKIPPED: {exc}")
+                skipped += 1
 
     if skipped:
         print(f"\nSkipped {skipped} repo(s) already synced from another directory. "
@@ -779,8 +793,12 @@ def deps(repo, file, directory, out, dev):
 @click.option("-save", is_flag=False, default=True, help="Save results to kospex DB.")
 @click.option("-malware", is_flag=True, default=False, help="Check for malware in dependencies.")
 @click.option("-out", type=click.STRING, help="filename to write CSV results to.")
+@click.option(
+    "-offline", is_flag=True, default=False,
+    help="Resolve only from the imported deps.dev snapshot, no HTTP (see depsdev-import).",
+)
 @click.argument("file_path", required=False, type=click.Path(exists=True))
-def sca(repo, dev, save, malware, out, file_path):
+def sca(repo, dev, save, malware, out, offline, file_path):
     """
     Run a lightweight software composition analysis (SCA) task
     optionally run the maliciouspackages.com analysis of the dependencies
@@ -789,6 +807,8 @@ def sca(repo, dev, save, malware, out, file_path):
     """
     params = locals()
     api_mat = os.environ.get("API_MAT")
+    if offline:
+        kospex.dependencies.offline = True
 
     if repo:
         print("NOT implemented")
@@ -830,6 +850,7 @@ def sca(repo, dev, save, malware, out, file_path):
                     )
 
         kospex.dependencies.print_dependencies_table(results, malware=True)
+        kospex.kospex_query.url_cache.flush(wait=True)
 
     else:
         print("Either -repo REPO or file_path is required.\n")
@@ -1149,14 +1170,12 @@ def orphans(days, window, server, target_list, csv_path):
 
     """
     print("Experimental - Work in Progress.")
-    params = {k: v for k, v in locals().items() if k != "csv_path"}
 
-    active_devs = kospex.active_developers(**params)
-    active_set = set(map(lambda item: item["author"], active_devs))
+    # committers in the window, and how many are still active, for every repo
+    counts = kospex.kospex_query.orphan_counts(window=window, days=days, server=server)
 
     # repos will contain an array of dicts, we need the _repo_id
     repos = []
-
     if target_list:
         # Process the file
         with open(target_list, "r") as file:
@@ -1172,51 +1191,29 @@ def orphans(days, window, server, target_list, csv_path):
         # Find all the repos in the database
         repos = kospex.kospex_query.repos(server=server)
 
-    now_utc = datetime.now(timezone.utc)
-    from_date = now_utc - timedelta(days=window)
-
     table = KospexUtils.orphan_prettytable()
     csv_headers = ["_repo_id", "committers", "active", "Orphaned", "% Here"]
     csv_rows = []
     orphaned = 0
     working_knowledge = 0
 
-    # Loop through every repo
     for r in repos:
-        # find all the authors in the last 'window' days
-        row = []
-        row.append(r["_repo_id"])
-        print(f"repo_id: {r['_repo_id']}")
-        commits = kospex.kospex_query.commits(
-            repo_id=r["_repo_id"], after=from_date.strftime("%Y-%m-%dT%H:%M:%S%z")
-        )
-
-        committers = set([c["committer_email"] for c in commits])
-        row.append(len(committers))
-
-        intersection_count = len(committers.intersection(active_set))
-
-        row.append(intersection_count)
-
-        print(f"Present: {intersection_count}, Total: {len(committers)} in 12 months.")
-
-        # if all the authors are not in the active_devs_emails list
-        # then print the repo status of orphaned
+        committers, intersection_count = counts.get(r["_repo_id"], (0, 0))
+        row = [r["_repo_id"], committers, intersection_count]
 
+        # if none of the committers in the window are still active
+        # then the repo is orphaned
         if intersection_count == 0:
-            print("Orphaned")
             row.append(True)
             row.append("0%")
             orphaned += 1
         else:
-            print("Working knowledge exists")
             row.append(False)
-            row.append(f"{intersection_count / len(committers) * 100:.2f}%")
+            row.append(f"{intersection_count / committers * 100:.2f}%")
             working_knowledge += 1
 
         table.add_row(row)
         csv_rows.append(row)
-        print()
 
     print()
     print(table)
@@ -1297,6 +1294,143 @@ def upgrade_db(apply):
         migrator.print_status()
 
 
+@cli.command("db-indexes")
+@click.option(
+    "-explain", "--explain", is_flag=True, default=False,
+    help="Show the query plan of each hot query and the index it uses."
+)
+def db_indexes(explain):
+    """
+    List the secondary indexes in the kospex DB.
+
+    With -explain: run EXPLAIN QUERY PLAN on the hot kospex queries and show
+    which index each one uses, or the tables it reads with a full scan.
+    Indexes are added by migrations; run 'kospex upgrade-db -apply' first.
+    """
+    from kospex.db.indexes import explain_hot_queries, list_indexes
+
+    indexes = list_indexes(kospex.kospex_db)
+    table = Table(title="Indexes")
+    table.add_column("table", style="cyan")
+    table.add_column("index")
+    table.add_column("columns")
+    for index in indexes:
+        table.add_row(index.table, index.name, ", ".join(index.columns))
+    console.print()
+    console.print(table)
+    if not indexes:
+        console.print("No secondary indexes. Run 'kospex upgrade-db -apply' to add them.")
+
+    if explain:
+        table = Table(title="Hot query plans")
+        table.add_column("query", style="cyan")
+        table.add_column("uses")
+        table.add_column("plan")
+        for plan in explain_hot_queries(kospex.kospex_db):
+            uses = ", ".join(plan.indexes)
+            if plan.scans:
+                uses = ", ".join(filter(None, [uses, f"[red]FULL SCAN {', '.join(plan.scans)}[/red]"]))
+            table.add_row(plan.name, uses, "\n".join(plan.details))
+        console.print()
+        console.print(table)
+    console.print()
+
+
+@cli.command("rebuild-rollup")
+@click.option(
+    "-repo_id", type=click.STRING, help="Rebuild one repo, in the format SERVER~ORG~REPO."
+)
+def rebuild_rollup(repo_id):
+    """
+    Rebuild the activity_daily rollup and developer_stats from commits.
+
+    Each sync folds the commits it wrote into the rollup, and rebuilds a repo
+    whose rollup no longer adds up to its commits. This rebuilds every repo,
+    or just -repo_id, on demand.
+    """
+    count = kospex.kospex_query.rebuild_developer_stats(repo_id)
+    kospex.kospex_query.bump_data_generation()
+    click.echo(f"Rebuilt the activity rollup and developer stats of {count} repo(s).")
+
+
+@cli.group("cache")
+def cache():
+    """
+    Inspect and prune the url_cache of deps.dev, PyPI and GitHub responses.
+    """
+
+
+@cache.command("stats")
+def cache_stats():
+    """
+    Show url_cache size and hit rate by endpoint.
+
+    Stale entries are past their TTL but still served while they are
+    refreshed. Expired entries are no longer used; 'kospex cache prune'
+    deletes them.
+    """
+    stats = kospex.kospex_query.url_cache.stats()
+    table = Table(title="url_cache")
+    table.add_column("endpoint", style="cyan")
+    for column in ["entries", "stored bytes", "body bytes", "negative", "stale", "expired",
+                   "hits", "fetches", "hit rate"]:
+        table.add_column(column, justify="right")
+    for s in stats:
+        table.add_row(
+            s["endpoint"], str(s["entries"]),
+            f"{s['stored_bytes']:,}", f"{s['content_bytes']:,}",
+            str(s["negative"]), str(s["stale"]), str(s["expired"]),
+            str(s["hits"]), str(s["fetches"]), f"{s['hit_rate']:.0%}",
+        )
+    console.print()
+    console.print(table)
+    if not stats:
+        console.print("The url_cache is empty.")
+    console.print()
+
+
+@cache.command("prune")
+@click.option("-all", "everything", is_flag=True, default=False,
+              help="Delete every entry, not just the expired ones.")
+def cache_prune(everything):
+    """
+    Delete expired url_cache entries (or all of them with -all).
+    """
+    deleted = kospex.kospex_query.url_cache.prune(everything=everything)
+    console.print(f"Deleted {deleted} url_cache entries.")
+
+
+@cli.command("depsdev-import")
+@click.option("-source", type=click.STRING, help="Name to record for this snapshot (default: the file name).")
+@click.argument("file_path", type=click.Path(exists=True, dir_okay=False))
+def depsdev_import(source, file_path):
+    """
+    Import a deps.dev snapshot for offline dependency scoring.
+
+    FILE_PATH is a JSONL (optionally .gz) or Parquet export of deps.dev
+    version, package and dependency documents, and OSV advisories. kospex sca
+    and krunner osi resolve from the snapshot first; with -offline (or
+    KOSPEX_DEPS_OFFLINE=true) they make no HTTP calls at all.
+    """
+    from kospex.depsdev_snapshot import DepsDevSnapshot
+
+    snapshot = DepsDevSnapshot(kospex.kospex_db)
+    stats = snapshot.import_file(file_path, source=source)
+    console.print(
+        f"Imported {stats.documents} documents from {file_path} in {stats.seconds:.1f}s: "
+        f"{stats.versions} versions, {stats.packages} packages, "
+        f"{stats.dependencies} dependency graphs, {stats.advisories} advisories "
+        f"({stats.skipped} unrecognised)"
+    )
+    counts = snapshot.counts()
+    table = Table(title="deps.dev snapshot")
+    table.add_column("documents", style="cyan")
+    table.add_column("count", justify="right")
+    for kind, count in counts.items():
+        table.add_row(kind, str(count))
+    console.print(table)
+
+
 @cli.command("advisory-history")
 @click.option("-ecosystem", type=click.STRING, help="E.g. npm, pypi")
 @click.option("-package", type=click.STRING, help="Name of package")
@@ -8,6 +8,7 @@ import subprocess
 import sys
 import time
 from datetime import datetime, timezone
+from itertools import batched
 from importlib.metadata import PackageNotFoundError, version
 from shutil import which
 
@@ -21,7 +22,11 @@ from rich.table import Table as RichTable
 
 import kospex_schema as KospexSchema
 import kospex_utils as KospexUtils
+from kospex.db.bulk_writer import BulkWriter
 from kospex.db.introspect import get_kospex_tables
+from kospex.activity_rollup import HASH_BATCH_SIZE, CommitActivity, existing_hashes
+from kospex.git_log import read_git_log
+from kospex.languages import file_language
 from kospex_dependencies import KospexDependencies
 from kospex_git import KospexGit, MissingGitDirectory
 from kospex_query import KospexData, KospexQuery
@@ -130,6 +135,56 @@ def scc_version():
         return None
 
 
+def current_sync_provenance(git):
+    """The provenance a file_metadata rebuild would be based on now: the HEAD
+    of the repo ``git`` is set to, plus the installed panopticas/scc versions."""
+    return {
+        "hash": git.get_current_hash(),
+        "panopticas_version": panopticas_version(),
+        "scc_version": scc_version(),
+    }
+
+
+def scan_repo_metadata(git, skip_last_commit=None):
+    """Scan the repo ``git`` is set to for file_metadata, without touching the DB.
+
+    Returns ``(files, scc_metrics)``: panopticas' view of every repo file (from
+    KospexGit.get_repo_files) and scc's metrics keyed by file path, for the
+    files scc can analyse. Safe to run in a worker process.
+    """
+    # scc wont' analyse everything, so we need to do a file find for items not analysed
+    start = time.perf_counter()
+    print("Finding repo files ...")
+    files = git.get_repo_files(skip_last_commit=skip_last_commit)
+    end = time.perf_counter()
+    print(f"get_repo_files executed in {(end - start) * 1000:.2f}ms")
+
+    # scc metrics (Lines/Code/Complexity/...) keyed by file path, for the
+    # files scc can analyse. panopticas (via get_repo_files) covers the
+    # rest, including its UNKNOWN default.
+    scc_metrics = {}
+    if which("scc"):
+        metadata = subprocess.run(
+            ["scc", "--by-file", "-f", "csv"],
+            cwd=git.repo_dir,
+            stdout=subprocess.PIPE,
+            text=True,
+            check=False,
+        )
+        # scc columns: Language,Provider,Filename,Lines,Code,Comments,
+        # Blanks,Complexity,Bytes[,ULOC] — Provider is the file path.
+        scc_cols = ("Lines", "Code", "Comments", "Blanks", "Complexity", "Bytes")
+        for scc_row in csv.DictReader(metadata.stdout.splitlines()):
+            provider = scc_row.get("Provider")
+            if provider:
+                scc_metrics[provider] = {c: scc_row[c] for c in scc_cols if c in scc_row}
+    else:
+        print("""WARNING: scc is not installed.
+                 Please install scc from https://github.com/boyter/scc""")
+
+    return files, scc_metrics
+
+
 class GitRepo(click.ParamType):
     """Custom click param type for git repos"""
 
@@ -301,22 +356,76 @@ class Kospex:
 
     # def sync_repo2(self, directory, **kwargs):
     def sync_repo(
-        self, directory, limit=None, from_date=None, to_date=None, no_scc=None, force=False
+        self,
+        directory,
+        limit=None,
+        from_date=None,
+        to_date=None,
+        no_scc=None,
+        force=False,
+        batch_size=None,
     ):
         """Sync the commit data (authors, commmitters, files, etc) for the given directory
 
         Raises RepoPathConflict if this repo is already synced from a different
         clone that still exists on disk; pass force=True to repoint it.
+
+        Returns the number of commits synced.
+
+        batch_size: rows buffered per table before a batched write (default
+        BulkWriter's DEFAULT_BATCH_SIZE).
         """
-        # def sync_commits(conn, git_dir, limit=None, from_date=None, to_date=None):
+        use_scc = not no_scc
 
-        results = []
+        log_args = self.plan_sync(
+            directory, limit=limit, from_date=from_date, to_date=to_date, force=force
+        )
+        if log_args.get("until"):
+            print(f"Syncing commits from {log_args['since']} to {log_args['until']}...")
+        elif log_args.get("since"):
+            print(f"Syncing commits from {log_args['since']}...")
+        elif log_args.get("limit"):
+            print(f"Syncing {limit} commits...")
+        else:
+            print("Syncing all commits...")
 
-        use_scc = True
-        if no_scc:
-            use_scc = False
-        # See at the bottom for file metadata
+        # git log is streamed and each commit is written as soon as it is
+        # parsed, so peak memory is bounded by the writer's batch size rather
+        # than by the length of the repo's history.
+        activity = CommitActivity()
+        counter = self.write_commits(
+            read_git_log(**log_args), batch_size=batch_size, activity=activity
+        )
+
+        self.record_sync_time()
 
+        print("Processing file metadata...")
+
+        # We should process the metadata after the commits, so we can query the last date time from the database
+        if use_scc:
+            self.file_metadata(directory, skip_last_commit=True)
+
+        # Update developer stats for key person analysis
+        repo_id = self.git.get_repo_id()
+        if repo_id:
+            print("Updating developer stats...")
+            self.kospex_query.sync_developer_stats(repo_id, activity)
+
+        # Tell readers (e.g. kweb's result cache) that the data has changed
+        self.kospex_query.bump_data_generation()
+
+        self.chdir_original()
+
+        return counter
+
+    def plan_sync(self, directory, limit=None, from_date=None, to_date=None, force=False):
+        """Select the repo and work out which commits a sync of it should read.
+
+        Returns the read_git_log() arguments (since/until/limit). Without a
+        from_date the sync is incremental from the newest commit already in the
+        DB. Raises RepoPathConflict like sync_repo(). Leaves the process in the
+        repo directory; call chdir_original() when done.
+        """
         self.set_repo_dir(directory)
 
         # Check before ingesting anything: commits are upserted well before
@@ -326,147 +435,96 @@ class Kospex:
 
         # If we don't have a from date from the use, get the last commit date from DB
         if not from_date:
-            latest_datetime = self.get_latest_commit_datetime(self.git.get_repo_id())
-            if latest_datetime:
-                from_date = latest_datetime
-
-        # Use hash (#) as a delimeter as names can contain spaces
-        cmd = ["git", "log", "--pretty=format:%H#%aI#%cI#%aN#%aE#%cN#%cE", "--numstat"]
+            from_date = self.get_latest_commit_datetime(self.git.get_repo_id())
 
         if from_date and to_date:
-            cmd += ["--since={}".format(from_date), "--until={}".format(to_date)]
-            print(f"Syncing commits from {from_date} to {to_date}...")
-        elif from_date:
-            cmd += ["--since={}".format(from_date)]
-            # print("Syncing commits from {}...".format(from_date))
-            print(f"Syncing commits from {from_date}...")
-        elif limit:
-            cmd += ["-n", str(limit)]
-            print(f"Syncing {limit} commits...")
-        else:
-            print("Syncing all commits...")
+            return {"since": from_date, "until": to_date}
+        if from_date:
+            return {"since": from_date}
+        if limit:
+            return {"limit": limit}
+        return {}
+
+    def write_commits(self, commits, batch_size=None, progress=True, activity=None):
+        """Write kospex.git_log CommitRecords for the current repo to the DB.
+
+        Returns the number of commits written. With progress, prints a + per
+        commit and the writer's throughput at the end. With a
+        kospex.activity_rollup.CommitActivity, the commits that were not
+        already in the DB are added to it (a resync can re-read a few).
+        """
+        counter = 0
+        repo_id = self.git.get_repo_id()
 
-        result = subprocess.run(cmd, capture_output=True, text=True).stdout.split("\n")
-
-        commits = []
-        commit = {}
-
-        for line in result:
-            if line:
-                if "\t" in line and len(line.split("\t")) == 3:
-                    # Check if the line represents file stats
-                    additions, deletions, filename = line.split("\t")
-                    if "filenames" in commit:
-                        # The following checks for git rename events which change the filename
-                        # With a git rename event, the filename will be in the format of
-                        # old_filename => new_filename
-                        if "=>" in filename:
-                            fpath = KospexUtils.parse_git_rename_event(filename)
-                            path_change = filename
-                        else:
-                            fpath = filename
-                            path_change = None
-
-                        commit["filenames"].append(
-                            {
-                                "file_path": fpath,
-                                "path_change": path_change,
-                                "additions": int(additions) if additions != "-" else 0,
-                                "deletions": int(deletions) if deletions != "-" else 0,
-                            }
-                        )
-                elif "#" in line:
-                    if commit:  # Save the previous commit
-                        commits.append(commit)
-
-                    (
-                        hash_value,
-                        author_datetime,
-                        committer_datetime,
-                        author_name,
-                        author_email,
-                        committer_name,
-                        committer_email,
-                    ) = line.split("#", 6)
-
-                    commit = {
-                        "hash": hash_value,
-                        "author_when": author_datetime,
-                        "committer_when": committer_datetime,
-                        "author_name": author_name,
-                        "author_email": author_email.lower(),
-                        "committer_name": committer_name,
-                        "committer_email": committer_email.lower(),
-                        "filenames": [],
+        # Commits and their files are buffered and written in batched
+        # transactions rather than one upsert (and one commit) per row.
+        writer = BulkWriter(self.kospex_db, batch_size=batch_size)
+        writer.register(KospexSchema.TBL_COMMITS, pk=["_repo_id", "hash"])
+        writer.register(KospexSchema.TBL_COMMIT_FILES, pk=["file_path", "_repo_id", "hash"])
+
+        if activity is not None and not activity.git_details:
+            activity.git_details = self.git.add_git_to_dict({})
+
+        for chunk in batched(commits, HASH_BATCH_SIZE):
+            if activity is not None:
+                # Checked before the chunk is buffered, so only earlier syncs count
+                known = existing_hashes(self.kospex_db, repo_id, (c.hash for c in chunk))
+                for commit in chunk:
+                    if commit.hash not in known:
+                        activity.add(commit)
+
+            for commit in chunk:
+                counter += 1
+                committer_epoch = KospexUtils.epoch_seconds(commit.committer_when)
+                row = {
+                    "hash": commit.hash,
+                    "author_when": commit.author_when,
+                    "committer_when": commit.committer_when,
+                    "_author_epoch": KospexUtils.epoch_seconds(commit.author_when),
+                    "_committer_epoch": committer_epoch,
+                    "author_name": commit.author_name,
+                    "author_email": commit.author_email,
+                    "committer_name": commit.committer_name,
+                    "committer_email": commit.committer_email,
+                    "_files": len(commit.files),
+                }
+                writer.add(KospexSchema.TBL_COMMITS, self.git.add_git_to_dict(row))
+
+                for change in commit.files:
+                    file_info = {
+                        "hash": commit.hash,
+                        "file_path": change.file_path,
+                        "path_change": change.path_change,
+                        "additions": change.additions,
+                        "deletions": change.deletions,
+                        "_ext": change.ext,
+                        "language": file_language(change.file_path),
+                        "committer_when": commit.committer_when,
+                        "_committer_epoch": committer_epoch,
                     }
+                    writer.add(KospexSchema.TBL_COMMIT_FILES, self.git.add_git_to_dict(file_info))
 
-                else:
-                    commit["filenames"].append({"filename": line, "additions": 0, "deletions": 0})
+                if progress:
+                    # we'll print a + for each commit and a newline every 80 commits
+                    print("+", end="")
+                    if (counter % 80) == 0:
+                        print()
+                    if (counter % 500) == 0:
+                        print(f"\nSynced {counter} commits so far ...\n")
 
-            else:
-                if commit:  # Save the last commit
-                    commits.append(commit)
-                commit = {}
+        writer.flush()
 
-        # cursor = conn.cursor()
+        if progress:
+            print()
+            print(f"Synced {counter} total commits")
+            print(writer.summary())
 
-        counter = 0
-        print("About to insert commits into the database...")
-
-        # Insert the commits to the database
-        for commit in commits:
-            counter += 1
-            # Insert the commit to the database
-            files = len(commit["filenames"])
-            commit["_files"] = files
-            commit = self.git.add_git_to_dict(commit)
-            commit_files = commit["filenames"]
-            # Need to copy as we
-            results.append(commit.copy())
-            del commit["filenames"]
-            self.kospex_db.table(KospexSchema.TBL_COMMITS).upsert(commit, pk=["_repo_id", "hash"])
-
-            # Insert the filenames to the database
-            for file_info in commit_files:
-                file_info = self.git.add_git_to_dict(file_info)
-                file_info["hash"] = commit["hash"]
-                file_info["_ext"] = KospexUtils.get_extension(file_info["file_path"])
-                file_info["committer_when"] = commit["committer_when"]
-                self.kospex_db.table(KospexSchema.TBL_COMMIT_FILES).upsert(
-                    file_info, pk=["file_path", "_repo_id", "hash"]
-                )
-
-            # we'll print a + for each commit and a newline every 80 commits
-            print("+", end="")
-            if (counter % 80) == 0:
-                print()
-            if (counter % 500) == 0:
-                print(f"\nSynced {counter} commits so far ...\n")
-
-        print()
-        print(f"Synced {len(commits)} total commits")
+        return counter
 
-        # Update the repos table with the last sync time
+    def record_sync_time(self, display_progress=True):
+        """Stamp the current repo's repos row with the sync time (now)."""
         last_sync = datetime.now(timezone.utc).astimezone().replace(microsecond=0).isoformat()
-        self.update_repo_status(last_sync=last_sync)
-
-        print("Processing file metadata...")
-
-        # We should process the metadata after the commits, so we can query the last date time from the database
-        # if not no_scc:
-        if use_scc:
-            metadata_files = self.file_metadata(directory, skip_last_commit=True)
-
-        # Update developer stats for key person analysis
-        repo_id = self.git.get_repo_id()
-        if repo_id:
-            print("Updating developer stats...")
-            self.kospex_query.update_developer_stats(repo_id)
-            self.kospex_query.update_developer_file_stats(repo_id)
-
-        self.chdir_original()
-
-        return results
+        self.update_repo_status(last_sync=last_sync, display_progress=display_progress)
 
     def get_one(self, query, table, params=None):
         """helper function to return a single value from a query"""
@@ -493,7 +551,7 @@ class Kospex:
                 kd.group_name_where_subselect(group)
 
             if active := params.get("active"):
-                kd.where("committer_when", ">=", KospexUtils.days_ago_iso_date(90))
+                kd.where("_committer_epoch", ">=", KospexUtils.days_ago_epoch(90))
 
         results = kd.execute()
 
@@ -604,7 +662,7 @@ class Kospex:
         if active:
             # Only show repos with commits in the last 90 days
             # TODO  : think about changing this to a better parameter
-            kd.where("committer_when", ">=", KospexUtils.days_ago_iso_date(90))
+            kd.where("_committer_epoch", ">=", KospexUtils.days_ago_epoch(90))
 
         if group:
             # kd.where_subselect("_repo_id", "IN", f"SELECT _repo_id FROM {KospexSchema.TBL_REPOS} WHERE _group = ?", [group])
@@ -691,8 +749,9 @@ class Kospex:
         FROM commits"""
 
         if not all_history:
-            where = f"WHERE date(author_when) > date('now','-{days} day')"
-            date_where = f"AND date(author_when) > date('now','-{days} day')"
+            # An indexed range on the UTC epoch, bound last in params below
+            where = "WHERE _author_epoch > ?"
+            date_where = "AND _author_epoch > ?"
 
         group_by = """GROUP BY author_email ORDER BY commits DESC"""
 
@@ -729,6 +788,9 @@ class Kospex:
             where = f"WHERE _repo_id = ? {date_where}"
             params.append(kwargs["repo_id"])
 
+        if not all_history:
+            params.append(KospexUtils.days_ago_epoch(days))
+
         sql_query = f"{sql} {where} {group_by}"
 
         table = PrettyTable()
@@ -1062,17 +1124,12 @@ class Kospex:
 
         """
         self.set_repo_dir(repo_directory)
-        git_hash = self.git.get_current_hash()
         repo_id = self.git.get_repo_id()
 
         # Version-aware skip-guard: rebuild file_metadata only when the HEAD
         # moved or panopticas/scc changed version since the last successful sync
         # (recorded on the repos row). See needs_metadata_rebuild().
-        current = {
-            "hash": git_hash,
-            "panopticas_version": panopticas_version(),
-            "scc_version": scc_version(),
-        }
+        current = current_sync_provenance(self.git)
         recorded = self._recorded_sync_provenance(repo_id)
         rebuild, reason = needs_metadata_rebuild(recorded, current, force=force)
 
@@ -1082,66 +1139,44 @@ class Kospex:
             print(f"file_metadata up to date for {repo_id} ({reason})")
         else:
             log.info(f"file_metadata rebuild for {repo_id}: {reason}")
-            # scc wont' analyse everything, so we need to do a file find for items not analysed
-            # files = self.git.get_repo_files(skip_last_commit=skip_last_commit)
-            start = time.perf_counter()
-            print("Finding repo files ...")
-            files = self.git.get_repo_files(skip_last_commit=skip_last_commit)
-            end = time.perf_counter()
-            print(f"get_repo_files executed in {(end - start) * 1000:.2f}ms")
-            # This will be a dict of file paths and their metadata
-
-            # Each file's last commit (hash + date) in a single pass over
-            # commit_files — the source of each row's per-file hash + date.
-            latest_commit = self.kospex_query.latest_commit_file_map(repo_id)
-
-            # scc metrics (Lines/Code/Complexity/...) keyed by file path, for the
-            # files scc can analyse. panopticas (via get_repo_files) covers the
-            # rest, including its UNKNOWN default.
-            scc_metrics = {}
-            if which("scc"):
-                metadata = subprocess.run(
-                    ["scc", "--by-file", "-f", "csv"],
-                    stdout=subprocess.PIPE,
-                    text=True,
-                    check=False,
-                )
-                # scc columns: Language,Provider,Filename,Lines,Code,Comments,
-                # Blanks,Complexity,Bytes[,ULOC] — Provider is the file path.
-                scc_cols = ("Lines", "Code", "Comments", "Blanks", "Complexity", "Bytes")
-                for scc_row in csv.DictReader(metadata.stdout.splitlines()):
-                    provider = scc_row.get("Provider")
-                    if provider:
-                        scc_metrics[provider] = {
-                            c: scc_row[c] for c in scc_cols if c in scc_row
-                        }
-            else:
-                print("""WARNING: scc is not installed.
-                         Please install scc from https://github.com/boyter/scc""")
-
-            # One current-state row per file: panopticas (all files, incl UNKNOWN)
-            # + scc metrics (where known) + last commit, keyed by the per-file
-            # last-commit hash (falls back to HEAD only for uncommitted files).
-            data_rows = KospexSchema.build_file_metadata_rows(
-                files, latest_commit, scc_metrics=scc_metrics, git_hash=git_hash
-            )
+            files, scc_metrics = scan_repo_metadata(self.git, skip_last_commit=skip_last_commit)
+            data_rows = self.write_file_metadata(repo_id, current, files, scc_metrics)
+            print(f"Wrote {len(data_rows)} file_metadata rows for repo_id {repo_id}")
 
-            # Reset "latest" flags for the repo, then write the current rows.
-            # Files no longer present stay at latest=0 (soft-delete tombstones).
-            reset_last_sql = f"""UPDATE {KospexSchema.TBL_FILE_METADATA} SET LATEST = 0
-            WHERE _repo_id = ?"""
-            self.kospex_db.execute(reset_last_sql, [repo_id])
+        self.chdir_original()
+        return data_rows
 
-            self.kospex_db.table(KospexSchema.TBL_FILE_METADATA).upsert_all(
-                data_rows, pk=["Provider", "hash", "_repo_id"]
-            )
+    def write_file_metadata(self, repo_id, current, files, scc_metrics):
+        """Replace the repo's current file_metadata with a scan_repo_metadata() result.
 
-            # Record what this rebuild was based on, for the next sync's guard.
-            self._record_sync_provenance(repo_id, current)
+        ``current`` is the provenance (hash + tool versions) the scan was taken
+        at; it is recorded on the repos row for the next sync's skip-guard.
+        Returns the rows written.
+        """
+        # Each file's last commit (hash + date) in a single pass over
+        # commit_files — the source of each row's per-file hash + date.
+        latest_commit = self.kospex_query.latest_commit_file_map(repo_id)
+
+        # One current-state row per file: panopticas (all files, incl UNKNOWN)
+        # + scc metrics (where known) + last commit, keyed by the per-file
+        # last-commit hash (falls back to HEAD only for uncommitted files).
+        data_rows = KospexSchema.build_file_metadata_rows(
+            files, latest_commit, scc_metrics=scc_metrics, git_hash=current["hash"]
+        )
 
-            print(f"Wrote {len(data_rows)} file_metadata rows for repo_id {repo_id}")
+        # Reset "latest" flags for the repo, then write the current rows.
+        # Files no longer present stay at latest=0 (soft-delete tombstones).
+        reset_last_sql = f"""UPDATE {KospexSchema.TBL_FILE_METADATA} SET LATEST = 0
+        WHERE _repo_id = ?"""
+        self.kospex_db.execute(reset_last_sql, [repo_id])
+
+        self.kospex_db.table(KospexSchema.TBL_FILE_METADATA).upsert_all(
+            data_rows, pk=["Provider", "hash", "_repo_id"]
+        )
+
+        # Record what this rebuild was based on, for the next sync's guard.
+        self._record_sync_provenance(repo_id, current)
 
-        self.chdir_original()
         return data_rows
 
     def _recorded_sync_provenance(self, repo_id):
@@ -24,6 +24,17 @@ from prettytable import PrettyTable
 
 import kospex_schema as KospexSchema
 import kospex_utils as KospexUtils
+from kospex.dependency_graph import NODE_FIELDS, DependencyGraphStore
+from kospex.depsdev_snapshot import (
+    KIND_DEPENDENCIES,
+    KIND_PACKAGE,
+    KIND_VERSION,
+    DepsDevSnapshot,
+)
+from kospex.deps_resolver import DEFAULT_WORKERS, DepsDevResolver
+from kospex.file_scanner import find_files
+from kospex.habitat_config import HabitatConfig
+from kospex.version_index import VersionIndex
 from kospex_git import KospexGit
 
 log = KospexUtils.get_kospex_logger("kospex_dependencies")
@@ -36,14 +47,32 @@ class KospexDependencies:
     _SPEC_MARKERS = ("^", "~", ">", "<", "=", "*", "|", " - ", "://", "workspace:",
                      "file:", "link:", "git+", "portal:")
 
-    def __init__(self, kospex_db=None, kospex_query=None):
+    # Base URL of the deps.dev REST API; override per instance to point at a mirror
+    DEPS_DEV_API = "https://api.deps.dev/v3alpha/systems"
+
+    def __init__(self, kospex_db=None, kospex_query=None, offline=None):
         # Initialize the kospex environment
         self.kospex_db = kospex_db
         self.kospex_query = kospex_query
+        # deps.dev documents imported with `kospex depsdev-import` are used first.
+        # Offline, anything not in the snapshot is not found, with no HTTP calls.
+        self.snapshot = DepsDevSnapshot(kospex_db) if kospex_db is not None else None
+        self.offline = HabitatConfig.get_instance().deps_offline if offline is None else offline
         self.git = KospexGit()
+        self.deps_dev_api = self.DEPS_DEV_API
         # self.kospex_db = Database(KospexUtils.get_kospex_db_path())
         # The following will be the results from the list of dependencies from the assess command
         self.dependencies = []
+        # depsdev_record() results resolved in bulk by resolve_records(), by
+        # (package_type, package_name, package_version)
+        self._resolved = {}
+        # VersionIndex by (package_type, package_name), see package_version_index()
+        self._version_indexes = {}
+        self._graph_store = None
+        # Called as progress(done, total) while resolve_records() fetches URLs
+        self.progress = None
+        # kospex.deps_resolver.ResolverStats of the last resolve_records() call
+        self.resolver_stats = None
 
     def is_concrete_version(self, version):
         """True if `version` is a single concrete version (e.g. 1.2.3), not a
@@ -79,11 +108,34 @@ class KospexDependencies:
             "package_version": version,
         }
 
+    def deps_dev_package_url(self, package_type, package_name):
+        """deps.dev URL for a package and its version history"""
+        encoded_name = urllib.parse.quote(package_name, safe="")
+        return f"{self.deps_dev_api}/{package_type}/packages/{encoded_name}"
+
+    def deps_dev_version_url(self, package_type, package_name, version):
+        """deps.dev URL for one version of a package"""
+        return f"{self.deps_dev_package_url(package_type, package_name)}/versions/{version}"
+
+    def snapshot_document(self, kind, package_type, package_name, version=""):
+        """A deps.dev document from the offline snapshot, or None."""
+        if self.snapshot is None:
+            return None
+        return self.snapshot.document(kind, package_type, package_name, version)
+
+    def in_snapshot(self, kind, package_type, package_name, version=""):
+        """True if the offline snapshot has the deps.dev document."""
+        return self.snapshot is not None and self.snapshot.has(
+            kind, package_type, package_name, version
+        )
+
     def deps_dev(self, package_type, package_name, version):
         """Query the Deps.dev API for a package and version"""
-        base_url = "https://api.deps.dev/v3alpha/systems"
-        encoded_name = urllib.parse.quote(package_name, safe="")
-        url = f"{base_url}/{package_type}/packages/{encoded_name}/versions/{version}"
+        data = self.snapshot_document(KIND_VERSION, package_type, package_name, version)
+        if data is not None or self.offline:
+            return data
+
+        url = self.deps_dev_version_url(package_type, package_name, version)
         # /v3alpha/systems/{versionKey.system}/packages/{versionKey.name}/versions/{versionKey.version}
         # https://api.deps.dev/v3alpha/systems/pypi/packages/requests/versions/2.31.0
         # links -> which has a SOURCE_REPO label should be the git
@@ -105,9 +157,13 @@ class KospexDependencies:
 
     def deps_dev_status(self, package_type, package_name, version):
         """Exact-version deps.dev lookup returning (data|None, status)."""
-        encoded = urllib.parse.quote(package_name, safe="")
-        url = (f"https://api.deps.dev/v3alpha/systems/{package_type}"
-               f"/packages/{encoded}/versions/{version}")
+        data = self.snapshot_document(KIND_VERSION, package_type, package_name, version)
+        if data is not None:
+            return data, 200
+        if self.offline:
+            return None, 404
+
+        url = self.deps_dev_version_url(package_type, package_name, version)
         content, status = self.kospex_query.url_request_with_status(url)
         data = json.loads(content) if content else None
         return data, status
@@ -127,9 +183,11 @@ class KospexDependencies:
         """
         Query the deps.dev API for a package and get all version history
         """
-        base_url = "https://api.deps.dev/v3alpha/systems"
-        encoded_name = urllib.parse.quote(package_name, safe="")
-        url = f"{base_url}/{package_type}/packages/{encoded_name}"
+        data = self.snapshot_document(KIND_PACKAGE, package_type, package_name)
+        if data is not None or self.offline:
+            return data
+
+        url = self.deps_dev_package_url(package_type, package_name)
         # links -> which has a SOURCE_REPO label should be the git
 
         data = None
@@ -175,6 +233,8 @@ class KospexDependencies:
 
     def get_pypi_package_info(self, package, version: Optional[str] = None):
         """Get the latest version of a package from PyPI"""
+        if self.offline:
+            return None
         url = f"https://pypi.org/pypi/{package}/json"
 
         data = None
@@ -407,6 +467,10 @@ class KospexDependencies:
                 "resolved": KospexSchema.PACKAGE_USE_TRANSITIVE,
             }
             packages = extract_pnpm_lock(filename)
+            self._prefetch_records(
+                ("npm", pkg["package_name"], pkg["package_version"]) for pkg in packages
+                if pkg.get("requirements_type") in ("direct", "dev")
+            )
             for pkg in packages:
                 pkg["package_use"] = _req_to_use.get(pkg.get("requirements_type", ""), "")
                 # Only enrich declared deps — lockfile closures can have thousands of
@@ -551,12 +615,7 @@ class KospexDependencies:
         # explicit BEGIN, and nests via savepoints if a caller already has a
         # transaction open.
         with self.kospex_db.atomic():
-            for repo_id, file_path in demote_keys:
-                self.kospex_db.execute(
-                    f"UPDATE {KospexSchema.TBL_DEPENDENCY_DATA} SET latest = 0 "
-                    "WHERE _repo_id = ? AND file_path = ?",
-                    [repo_id, file_path],
-                )
+            self._demote_files(demote_keys)
 
             self.kospex_db.table(KospexSchema.TBL_DEPENDENCY_DATA).upsert_all(
                 cleaned,
@@ -568,6 +627,31 @@ class KospexDependencies:
 
         return len(cleaned)
 
+    def _demote_files(self, keys):
+        """Set latest = 0 on every dependency_data row of the (_repo_id, file_path)
+        keys, in one statement.
+
+        The keys go into a temp table and a single UPDATE joins against it, on
+        idx_dependency_data_repo_file. One UPDATE per key meant tens of
+        thousands of statements on an org-wide krunner osi.
+        """
+        db = self.kospex_db
+        db.execute(
+            "CREATE TEMP TABLE IF NOT EXISTS _demote_files "
+            "(_repo_id TEXT, file_path TEXT, PRIMARY KEY (_repo_id, file_path))"
+        )
+        db.execute("DELETE FROM temp._demote_files")
+        db.conn.executemany(
+            "INSERT OR IGNORE INTO temp._demote_files (_repo_id, file_path) VALUES (?, ?)", keys
+        )
+        # Rows already at latest = 0 are left alone, so they are not rewritten
+        db.execute(
+            f"UPDATE {KospexSchema.TBL_DEPENDENCY_DATA} SET latest = 0 "
+            "WHERE latest IS NOT 0 "
+            "AND (_repo_id, file_path) IN (SELECT _repo_id, file_path FROM temp._demote_files)"
+        )
+        db.execute("DELETE FROM temp._demote_files")
+
     def get_values_array(self, input_dict, keys, default_value):
         """return an array of values from a dictionary, using the keys provided"""
         return [input_dict.get(key, default_value) for key in keys]
@@ -651,9 +735,35 @@ class KospexDependencies:
         # return details
         return record
 
+    def resolve_records(self, keys, workers=DEFAULT_WORKERS):
+        """Resolve many (package_type, package_name, package_version) keys at once.
+
+        Each distinct key is looked up once, with the deps.dev requests made
+        concurrently (see kospex.deps_resolver). Returns {key: record}; later
+        depsdev_record() calls for these keys on this instance are answered
+        from memory. Needs a kospex_query for url_cache.
+        """
+        resolver = DepsDevResolver(self, workers=workers, progress=self.progress)
+        records = resolver.resolve(keys)
+        self._resolved.update(records)
+        self.kospex_query.url_cache.flush()
+        self.resolver_stats = resolver.stats
+        log.info(f"deps.dev: {resolver.stats.summary()}")
+        return records
+
+    def _prefetch_records(self, keys):
+        """resolve_records() ahead of a serial depsdev_record() loop, when there
+        is a kospex_query (and so a url_cache) to resolve through."""
+        if self.kospex_query:
+            self.resolve_records(keys)
+
     def depsdev_record(self, package_type, package_name, package_version):
         """Convert a deps.dev package info record into a dictionary with other
         metadata, including a `resolution` category and int-or-None versions_behind."""
+        resolved = self._resolved.get((package_type, package_name, package_version))
+        if resolved is not None:
+            return dict(resolved)
+
         details = {"package_name": package_name, "package_version": package_version,
                    "package_type": package_type, "versions_behind": None}
         today = datetime.datetime.now(datetime.timezone.utc)
@@ -715,6 +825,12 @@ class KospexDependencies:
         npm_file = open(filename)
         data = json.load(npm_file)
 
+        dependency_keys = ["dependencies", "devDependencies"] if dev_deps else ["dependencies"]
+        self._prefetch_records(
+            ("npm", item, data[key][item].replace("~", "").replace("^", ""))
+            for key in dependency_keys for item in data.get(key) or {}
+        )
+
         # for item in data.get('dependencies'):
         if "dependencies" in data:
             for item in data.get("dependencies"):
@@ -750,6 +866,8 @@ class KospexDependencies:
 
     def get_pypi_source_repo(self, package_name):
         """Get the source repo for a PyPi package"""
+        if self.offline:
+            return None
         url = f"https://pypi.org/pypi/{package_name}/json"
 
         data = None
@@ -1016,6 +1134,10 @@ class KospexDependencies:
         """
 
         dependencies = []
+        self._prefetch_records(
+            ("pypi", r.get("package_name"), self.clean_version_spec(r.get("package_version")))
+            for r in results
+        )
 
         for r in results:
             print(r)
@@ -1048,83 +1170,93 @@ class KospexDependencies:
         # results_file = results_file if results_file else None
         # (e.g. requirements.txt, pom.xml, package.json, etc.)
         with open(filename, "r", encoding="utf-8") as pmf:
-            for line in pmf.readlines():
-                print(f"Checking {line.strip()}")
-                row = {}
-                if repo_info:
-                    row = repo_info.copy()
-                row["package_type"] = "PyPi"
-
-                # Skip comments
-                if line.startswith("#"):
-                    continue
+            lines = pmf.readlines()
 
-                # Skip blank lines
-                if line.strip() == "":
-                    continue
+        declarations = [
+            self.parse_pypi_package_declaration(line.strip()) for line in lines
+            if line.strip() and not line.startswith("#")
+        ]
+        self._prefetch_records(
+            ("pypi", d["package_name"], d["package_version"]) for d in declarations if d
+        )
+
+        for line in lines:
+            print(f"Checking {line.strip()}")
+            row = {}
+            if repo_info:
+                row = repo_info.copy()
+            row["package_type"] = "PyPi"
+
+            # Skip comments
+            if line.startswith("#"):
+                continue
 
-                # Skip lines that don't follow the pattern <package_name>==<version_number>
-                # Or other valid PyPi version specifiers (e.g. >=, ~=, etc.)
-                package_declaration = self.parse_pypi_package_declaration(line.strip())
-                if not package_declaration:
-                    # if not self.is_valid_pypi_package_declaration(line.strip()):
-                    url = self.extract_github_url(line.strip())
-                    repo_path = self.extract_repo_path(url) if url else None
-                    if url:
-                        if repo_path:
-                            row["package_name"] = repo_path
-                        else:
-                            row["package_name"] = repo_path
-                    else:
-                        row["package_name"] = line.strip()
-
-                    row["package_version"] = "Unknown"
-                    row["days_ago"] = "Unknown"
-                    row["published_at"] = "Unknown"
-                    row["source_repo"] = url
-                    row["advisories"] = "unknown"
-                    row["default"] = "unknown"
-                    records.append(row)
-                    continue
+            # Skip blank lines
+            if line.strip() == "":
+                continue
 
-                # Looks like a valid line, let's continue and parse it
-
-                # package = line.split('==')[0]
-                # version = line.split('==')[1].strip()
-                package = package_declaration["package_name"]
-                version = package_declaration["package_version"]
-                row["package_name"] = package
-                row["package_version"] = version
-
-                # A multiple-specifier line (e.g. requests>=1.0,<2.0) isn't a
-                # concrete version, so it routes through depsdev_record like any
-                # other non-concrete version: the declared spec is retained as
-                # package_version and it classifies as unresolved_spec without a
-                # deps.dev call. We skip the source-repo lookup (there's no
-                # concrete version to attribute it to).
-                if package_declaration.get("version_type") == "multiple":
-                    record = self.depsdev_record("pypi", package, version)
+            # Skip lines that don't follow the pattern <package_name>==<version_number>
+            # Or other valid PyPi version specifiers (e.g. >=, ~=, etc.)
+            package_declaration = self.parse_pypi_package_declaration(line.strip())
+            if not package_declaration:
+                # if not self.is_valid_pypi_package_declaration(line.strip()):
+                url = self.extract_github_url(line.strip())
+                repo_path = self.extract_repo_path(url) if url else None
+                if url:
+                    if repo_path:
+                        row["package_name"] = repo_path
+                    else:
+                        row["package_name"] = repo_path
                 else:
-                    record = self.depsdev_record("pypi", package, version)
-                    if not record.get("source_repo"):
-                        record["source_repo"] = self.get_pypi_source_repo(package)
-
-                # record['authors'] = 0
-
-                # if record["source_repo"] and dependency_authors:
-                #    parts = self.git.extract_git_url_parts(record["source_repo"])
-                #    if parts:
-                #        repo_id = self.git.repo_id_from_url_parts(parts)
-                # TODO - Possibly need to query # of authors
-                # before this version publish date
-                #        authors = self.kospex_query.authors_by_repo(repo_id)
-                #        if authors:
-                #            record['authors'] = len(authors)
-                # record['authors'] = self.get_repo_authors(record["source_repo"])
-                table_rows.append(self.get_values_array(record, self.get_table_field_names(), "-"))
+                    row["package_name"] = line.strip()
+
+                row["package_version"] = "Unknown"
+                row["days_ago"] = "Unknown"
+                row["published_at"] = "Unknown"
+                row["source_repo"] = url
+                row["advisories"] = "unknown"
+                row["default"] = "unknown"
+                records.append(row)
+                continue
 
-                # records.append(row)
-                records.append(record)
+            # Looks like a valid line, let's continue and parse it
+
+            # package = line.split('==')[0]
+            # version = line.split('==')[1].strip()
+            package = package_declaration["package_name"]
+            version = package_declaration["package_version"]
+            row["package_name"] = package
+            row["package_version"] = version
+
+            # A multiple-specifier line (e.g. requests>=1.0,<2.0) isn't a
+            # concrete version, so it routes through depsdev_record like any
+            # other non-concrete version: the declared spec is retained as
+            # package_version and it classifies as unresolved_spec without a
+            # deps.dev call. We skip the source-repo lookup (there's no
+            # concrete version to attribute it to).
+            if package_declaration.get("version_type") == "multiple":
+                record = self.depsdev_record("pypi", package, version)
+            else:
+                record = self.depsdev_record("pypi", package, version)
+                if not record.get("source_repo"):
+                    record["source_repo"] = self.get_pypi_source_repo(package)
+
+            # record['authors'] = 0
+
+            # if record["source_repo"] and dependency_authors:
+            #    parts = self.git.extract_git_url_parts(record["source_repo"])
+            #    if parts:
+            #        repo_id = self.git.repo_id_from_url_parts(parts)
+            # TODO - Possibly need to query # of authors
+            # before this version publish date
+            #        authors = self.kospex_query.authors_by_repo(repo_id)
+            #        if authors:
+            #            record['authors'] = len(authors)
+            # record['authors'] = self.get_repo_authors(record["source_repo"])
+            table_rows.append(self.get_values_array(record, self.get_table_field_names(), "-"))
+
+            # records.append(row)
+            records.append(record)
 
         table.add_rows(table_rows)
 
@@ -1212,6 +1344,9 @@ class KospexDependencies:
             print(f"Error parsing {filename}: {e}")
             return False
 
+        self._prefetch_records(
+            ("NuGet", pkg["package_name"], pkg["package_version"]) for pkg in result
+        )
         for pkg in result:
             # print(f"Checking {pkg['package_name']} version {pkg['package_version']}")
             rec = self.depsdev_record("NuGet", pkg["package_name"], pkg["package_version"])
@@ -1222,56 +1357,12 @@ class KospexDependencies:
         # table_rows.append(self.get_values_array(details, self.get_table_field_names(), '-'))
 
     def find_dependency_files(self, directory):
-        """Find all dependency files (package managers) in a directory and its subdirectories."""
-        # Map of filename to its package manager
-        package_files = {
-            "requirements.*.txt$": "PyPi",
-            "Pipfile": "PyPi (Pipenv)",
-            "Pipfile.lock": "PyPi (Pipenv)",
-            "setup.py": "PyPi",
-            "pyproject.toml": "PyPi (Poetry/Flit/etc.)",
-            "Gemfile": "RubyGems",
-            "Gemfile.lock": "RubyGems",
-            "package.*.json": "npm",
-            "yarn.lock": "Yarn",
-            "composer.json": "Composer",
-            "composer.lock": "Composer",
-            "pom.xml": "Maven",
-            "build.gradle": "Gradle",
-            "build.gradle.kts": "Gradle",
-            "Cargo.toml": "Cargo (Rust)",
-            "Cargo.lock": "Cargo (Rust)",
-            "go.mod$": "Go Modules",
-            "go.sum": "Go Modules",
-            "Podfile": "CocoaPods",
-            "Podfile.lock": "CocoaPods",
-            "pnpm-lock\\.yaml$": "pnpm",
-        }
-
-        detected_files = []
+        """Find all dependency files (package managers) in a directory and its subdirectories.
 
-        regex_patterns = [re.compile(pattern) for pattern in package_files.keys()]
-
-        # Use os.walk() to recursively search through directory and its subdirectories
-        for root, dirs, files in os.walk(directory):
-            # Exclude .git directory
-            if ".git" in dirs:
-                dirs.remove(".git")
-
-            for filename in files:
-                for pattern in regex_patterns:
-                    if pattern.match(filename):
-                        # Add matching file path to the list
-                        # TODO - considering logging for debugging purposes
-                        # print(f"Found package file {filename} in {root}")
-                        detected_files.append(os.path.join(root, filename))
-                        break  # No need to match other patterns if one has matched
-                # if filename in package_files:
-                #    # Append the full path to the file, and its type
-                #    detected_files.append((os.path.join(root, filename), package_files[filename]))
-                # Check each file against the pattern
-
-        return detected_files
+        Skips .git and vendored directories (node_modules, vendor, ...), see
+        kospex.file_scanner, which also serves scans wanting other files too.
+        """
+        return find_files([directory], "dependencies")
 
     def get_depsdev_info(self, package_manager, package_name, version):
         """Query deps.dev API for package details."""
@@ -1316,62 +1407,24 @@ class KospexDependencies:
 
     def get_versions_behind(self, package_manager, package_name, version):
         """Use Deps.Dev API to get the versions behing the used version"""
-        # Define the base URL for deps.dev API
-        base_url = "https://api.deps.dev/v3alpha/systems"
-        encoded_name = urllib.parse.quote(package_name, safe="")
-        # url = f"{base_url}/{package_manager}/packages/{encoded_name}/versions/{version}"
-        # The following is the correct URL to get all versions
-        url = f"{base_url}/{package_manager}/packages/{encoded_name}"
-        # package_url = f"https://deps.dev/_/s/{package_manager}/p/{encoded_name}/v/{version}"
-
-        data = self.get_url_json(url)
-        versions = data.get("versions", [])
-        # We will need to sort the list, since the API returns the versions in a weird order
-        # print(json.dumps(versions, indent=2))
-        # print(len(versions))
-
-        # Handle the case where there is no publishedAt key, we need this key to sort later
-        for v in versions:
-            if not v.get("publishedAt"):
-                v["publishedAt"] = ""
-                # TODO - log when we have a missing publishedAt
-                # Perhaps track this metadata
-                # print(f"missing publishedAt for {v['versionKey']['version']}")
-            # print(v['versionKey']['version'])
-            # print(v.get("publishedAt"))
-
-        sorted_list = sorted(versions, key=lambda x: x["publishedAt"], reverse=True)
-        # Find the 'default' install version
-        # default_version = data.get("defaultVersion")
-        # print(json.dumps(sorted_list, indent=2))
-
-        details = {}
-        details["versions"] = len(sorted_list)
-
-        keys_before_default = 0
-        versions_behind = 0
-        found_default = False
-
-        for release in sorted_list:
-            if release["isDefault"]:
-                # print(f"default {release['versionKey']['version']}")
-                found_default = True
-
-            if self.version_fuzzy_match(version, release["versionKey"]["version"]):
-                # print(f"Found version {version}")
-                break
-
-            if not found_default:
-                keys_before_default += 1
-            else:
-                versions_behind += 1
-
-        # print(f"Keys before default: {keys_before_default}")
-        # print(f"Versions between: {versions_behind}")
-        details["versions_before_default"] = keys_before_default
-        details["versions_behind"] = versions_behind
-
-        return details
+        return self.package_version_index(package_manager, package_name).versions_behind(version)
+
+    def package_version_index(self, package_manager, package_name):
+        """The VersionIndex of a package's deps.dev version history, fetched and
+        built once per package for the life of this instance."""
+        key = (package_manager, package_name)
+        index = self._version_indexes.get(key)
+        if index is None:
+            data = self.snapshot_document(KIND_PACKAGE, package_manager, package_name)
+            if data is None and not self.offline:
+                # The package URL (not the version one) lists all versions
+                url = self.deps_dev_package_url(package_manager, package_name)
+                data = self.get_url_json(url)
+            index = VersionIndex.from_package(data)
+            if data is not None:
+                # A failed fetch is retried on the next call, not remembered
+                self._version_indexes[key] = index
+        return index
 
     def gomod_assess(self, filename, results_file=None, repo_info=None):
         """Using deps.dev to assess and provide a summary of a
@@ -1385,6 +1438,9 @@ class KospexDependencies:
         records = []
 
         deps = self.parse_go_mod_from_file(filename)
+        self._prefetch_records(
+            ("go", item["module"], item["version"]) for item in deps if item["indirect"] is False
+        )
 
         for item in deps:
             if item["indirect"] is False:
@@ -1503,18 +1559,23 @@ class KospexDependencies:
         else:
             return "utf-8"
 
-    def package_dependencies(self, package: str, version: str, ecosystem: str):
+    def package_dependencies(self, package: str, version: str, ecosystem: str,
+                             workers=DEFAULT_WORKERS):
         """
-        Lookup the package dependencies on deps.dev
+        Lookup the package dependencies on deps.dev, with each node's publish
+        date, advisory count and versions behind.
+
+        Graphs and node details are kept in the dependency graph store (see
+        kospex.dependency_graph), so a graph drawn before, or made of packages
+        seen in other graphs, needs no deps.dev calls. Nodes not in the store
+        are looked up together with resolve_records().
 
         Args:
             package: Package name to lookup.
             version: Package version to lookup.
             ecosystem: Package ecosystem to lookup.
+            workers: Concurrent deps.dev requests for nodes not in the store.
         """
-        package = package
-        version = version
-        ecosystem = ecosystem
         # GET /v3/systems/{versionKey.system}/packages/{versionKey.name}/versions/{versionKey.version}:dependencies
         base_url = "https://api.deps.dev/v3/systems"
         encoded_name = urllib.parse.quote(package, safe="")
@@ -1522,42 +1583,58 @@ class KospexDependencies:
         # https://api.deps.dev/v3alpha/systems/pypi/packages/requests/versions/2.31.0
         # links -> which has a SOURCE_REPO label should be the git
 
-        print(url)
-
-        data = self.get_url_json(url)
-        # req = requests.get(url, timeout=10)
-        # if req.status_code == 200:
-        #     data = req.json()
-        # # Need to handle HTTP error codes
+        store = self.graph_store
+        data = store.graph(ecosystem, package, version) if store else None
+        if data is None:
+            data = self.snapshot_document(KIND_DEPENDENCIES, ecosystem, package, version)
+            if data is None and not self.offline:
+                print(url)
+                data = self.get_url_json(url)
+                if data is not None and store:
+                    store.put_graph(ecosystem, package, version, data)
 
         if data is None:
             return None
 
-        nodes = data.get("nodes")
+        nodes = data.get("nodes") or []
+        keys = {}
         for node in nodes:
             node["id"] = self.versionKey_id(node["versionKey"])
-
             system = node["versionKey"].get("system").lower()
+            node["name"] = node["versionKey"].get("name").lower()
+            node["version"] = node["versionKey"].get("version").lower()
+            keys[node["id"]] = (system, node["name"], node["version"])
+
+        details = store.nodes(keys) if store else {}
+        missing = {node_id: key for node_id, key in keys.items() if node_id not in details}
+        if missing:
+            if self.kospex_query:
+                records = self.resolve_records(list(missing.values()), workers=workers)
+            else:
+                records = {key: self.depsdev_record(*key) for key in missing.values()}
+            enriched = {key: {field: record.get(field) for field in NODE_FIELDS}
+                        for key, record in records.items()}
+            if store:
+                # a failed lookup is tried again next time
+                store.put_nodes({key: fields for key, fields in enriched.items()
+                                 if fields["resolution"] != "lookup_error"})
+            details.update({node_id: enriched[key] for node_id, key in missing.items()})
 
-            name = node["versionKey"].get("name").lower()
-            node["name"] = name
-
-            version = node["versionKey"].get("version").lower()
-            node["version"] = version
-
-            dep = self.deps_dev(system, name, version)
-            node["publishedAt"] = dep.get("publishedAt")
-
-            advisories = dep.get("advisoryKeys")
-            num_advisories = len(advisories) if advisories else 0
-            node["advisories"] = num_advisories
-
-            versions = self.get_versions_behind(system, name, version)
-            if versions:
-                node["versions_behind"] = versions.get("versions_behind")
+        for node in nodes:
+            node_details = details[node["id"]]
+            node["publishedAt"] = node_details["published_at"]
+            node["advisories"] = node_details["advisories"] or 0
+            node["versions_behind"] = node_details["versions_behind"]
 
         return data
 
+    @property
+    def graph_store(self):
+        """The DependencyGraphStore of the kospex DB, or None without one."""
+        if self._graph_store is None and self.kospex_db is not None:
+            self._graph_store = DependencyGraphStore(self.kospex_db)
+        return self._graph_store
+
     def versionKey_id(self, versionKey):
         """
         Convert a deps.dev version key to a string
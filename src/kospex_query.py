@@ -3,17 +3,20 @@
 import json
 import re
 import time
-from collections import defaultdict
 from datetime import datetime, timedelta, timezone
 from typing import Optional
 
-import panopticas as Panopticas
 import requests
 from sqlite_utils import Database
 
 import kospex_schema as KospexSchema
 import kospex_utils as KospexUtils
 from kospex.db.introspect import get_kospex_tables
+from kospex.activity_rollup import utc_day, window_cutoff
+from kospex.developer_stats import DeveloperStatsStore
+from kospex.recency import days_ago_sql, days_between_sql, status_sql
+from kospex.habitat_config import HabitatConfig
+from kospex.url_cache import UrlCache
 from kospex_observation import Observation
 from kospex_utils import KospexTimer
 
@@ -21,10 +24,15 @@ from kospex_utils import KospexTimer
 class KospexQuery:
     """kospex database query functionality"""
 
-    def __init__(self, kospex_db=None):
+    def __init__(self, kospex_db=None, init_env=True):
+        """kospex_db: an open Database to query (default: open the kospex DB).
+        init_env: run KospexUtils.init() first. Long-running callers that have
+        initialised once and pass a pooled connection (kweb) set it False."""
         # Initialize the kospex environment
-        KospexUtils.init()
+        if init_env:
+            KospexUtils.init()
         self.kospex_db = kospex_db or Database(KospexUtils.get_kospex_db_path())
+        self._url_cache = None
 
     def get_kospex_db_version(self):
         """
@@ -43,6 +51,34 @@ class KospexQuery:
 
         return version
 
+    def get_data_generation(self):
+        """
+        Return the data generation counter from KOSPEX_CONFIG (0 if never bumped).
+        Any change means data has been synced since the value was last read.
+        """
+        sql = f"SELECT value FROM {KospexSchema.TBL_KOSPEX_CONFIG} WHERE key = ? AND latest = 1"
+        data = next(self.kospex_db.query(sql, [KospexSchema.KOSPEX_DATA_GENERATION_KEY]), None)
+        try:
+            return int(data["value"]) if data else 0
+        except (ValueError, TypeError):
+            return 0
+
+    def bump_data_generation(self):
+        """
+        Increment the data generation counter, e.g. after a sync has written data.
+        Returns the new generation.
+        """
+        self.kospex_db.execute(
+            f"""INSERT INTO {KospexSchema.TBL_KOSPEX_CONFIG} (key, value, format, latest)
+            VALUES (?, '1', 'INTEGER', 1)
+            ON CONFLICT(key, latest) DO UPDATE SET
+                value = CAST(value AS INTEGER) + 1,
+                updated_at = CURRENT_TIMESTAMP""",
+            [KospexSchema.KOSPEX_DATA_GENERATION_KEY],
+        )
+        self.kospex_db.conn.commit()
+        return self.get_data_generation()
+
     def summary(self, days=None, repo_id=None, org_key=None):
         """
         Provide a summary of the known repositories.
@@ -52,16 +88,16 @@ class KospexQuery:
         data = {}  # Hold the data, should be a list of authors, commiters, total orgs
 
         kd = KospexData(self.kospex_db)
-        kd.from_table(KospexSchema.TBL_COMMITS)
+        kd.from_table(KospexSchema.TBL_ACTIVITY_DAILY)
         kd.select_raw("COUNT(DISTINCT(_repo_id)) as repos")
-        kd.select_as("count(*)", "commits")
+        kd.select_raw("COALESCE(SUM(commits), 0) as commits")
         kd.select_raw("COUNT(DISTINCT(LOWER(author_email))) as authors")
         kd.select_raw("COUNT(DISTINCT(LOWER(committer_email))) as committers")
         kd.select_raw("COUNT(DISTINCT(_git_server)) as servers")
 
         if days:
-            from_date = KospexUtils.days_ago_iso_date(days)
-            kd.where("committer_when", ">", from_date)
+            from_date = window_cutoff(days)
+            kd.where("day", ">", from_date)
 
         if repo_id:
             kd.where("_repo_id", "=", repo_id)
@@ -322,72 +358,66 @@ class KospexQuery:
 
         return results
 
-    def get_orphans(self, id=None):
-        """
-        Get the orphaned repos for the given scope.
+    def orphan_counts(self, window=365, days=90, server=None, email_column="committer_email"):
         """
+        Committers and active committers of every repo, in one aggregate query.
 
-        kd = KospexData(self.kospex_db)
-        kd.from_table(KospexSchema.TBL_DEPENDENCY_DATA)
-        kd.set_params_by_id(id)
-
-        active_devs = self.developers(days=90)
-        active_set = set(map(lambda item: item["author"], active_devs))
+        A repo's committers are the distinct email_column values of its commits
+        in the last 'window' days (by committer_when). They are active if they
+        authored a commit, in any repo, in the last 'days' days (by author_when),
+        on 'server' if given. Both windows are ranges on the UTC epoch columns.
 
-        print(active_set)
+        Returns {_repo_id: (committers, active)} for the repos with commits in
+        the window. A repo missing from it has no committers, so is orphaned.
+        """
+        if email_column not in ("committer_email", "author_email"):
+            raise ValueError(f"Unsupported email column '{email_column}'")
+        active_where = "_author_epoch > ?"
+        params = [KospexUtils.days_ago_epoch(days)]
+        if server:
+            active_where += " AND _git_server = ?"
+            params.append(server)
+        params.append(KospexUtils.days_ago_epoch(window))
+
+        sql = f"""WITH active AS (
+            SELECT DISTINCT author_email AS email FROM {KospexSchema.TBL_COMMITS}
+            WHERE {active_where}
+        ),
+        recent AS (
+            SELECT DISTINCT _repo_id, {email_column} AS email FROM {KospexSchema.TBL_COMMITS}
+            WHERE _committer_epoch > ?
+        )
+        SELECT recent._repo_id, COUNT(*) AS committers, COUNT(active.email) AS active
+        FROM recent LEFT JOIN active ON active.email = recent.email
+        GROUP BY recent._repo_id"""
 
-        repos = self.repos2(id=id)
+        return {
+            row[0]: (row[1], row[2]) for row in self.kospex_db.execute(sql, params).fetchall()
+        }
 
-        window = 365
-        now_utc = datetime.now(timezone.utc)
-        from_date = now_utc - timedelta(days=window)
+    def get_orphans(self, id=None):
+        """
+        Get the orphaned repos for the given scope.
+        """
+        counts = self.orphan_counts(window=365, days=90, email_column="author_email")
 
         results = []
-
-        # Loop through every repo
-        for r in repos:
-            # find all the authors in the last 'window' days
-            row = {}
-            row["_repo_id"] = r["_repo_id"]
-            row["_git_repo"] = r["_git_repo"]
-
-            commits = self.commits(
-                repo_id=r["_repo_id"], after=from_date.strftime("%Y-%m-%dT%H:%M:%S%z")
-            )
-
-            # commits = self.commits(
-            #    repo_id=r["_repo_id"] )
-
-            committers = set([c["author_email"] for c in commits])
-            row["committers"] = len(committers)
-            print("\n")
-            print(f"committers: {committers}\n\n")
-
-            intersection_count = len(committers.intersection(active_set))
-            row["intersection"] = intersection_count
-
-            print(f"Present: {intersection_count}, Total: {len(committers)} in 12 months.")
-
-            # if all the authors are not in the active_devs_emails list
-            # then print the repo status of orphaned
-
+        for r in self.repos2(id=id):
+            committers, intersection_count = counts.get(r["_repo_id"], (0, 0))
+            row = {
+                "_repo_id": r["_repo_id"],
+                "_git_repo": r["_git_repo"],
+                "committers": committers,
+                "intersection": intersection_count,
+            }
+            # if none of the committers in the window are active, it's orphaned
             if intersection_count == 0:
-                print("Orphaned")
                 row["orphaned"] = True
                 row["percentage"] = 0
-                # orphaned += 1
             else:
-                print("Working knowledge exists")
                 row["orphaned"] = False
-                row["percentage"] = f"{intersection_count / len(committers) * 100:.2f}"
-                # row.append(f"{intersection_count/len(committers)*100:.2f}%")
-                # working_knowledge += 1
-
+                row["percentage"] = f"{intersection_count / committers * 100:.2f}"
             results.append(row)
-            # table.add_row(row)
-            # print()
-
-        # results = kd.execute()
 
         return results
 
@@ -420,8 +450,11 @@ class KospexQuery:
         Get the sync and last commit data for repositories from the "repos" table.
         """
         kd = KospexData(self.kospex_db)
-        kd.from_table(KospexSchema.TBL_COMMITS)
+        kd.from_table(KospexSchema.TBL_REPOS)
         kd.select("*")
+        # last_seen is the date of the repo's last commit
+        kd.select_raw(f"{days_ago_sql('last_seen')} AS days_ago")
+        kd.select_raw(f"{status_sql('last_seen')} AS status")
         # kd.set_params_by_id(id)
         if limit:
             kd.limit(limit)
@@ -438,13 +471,7 @@ class KospexQuery:
         # [file_path] TEXT,  -- path to the repo on the local filesystem
         # PRIMARY KEY(_repo_id)
         #
-        results = kd.execute()
-
-        for row in results:
-            row["days_ago"] = KospexUtils.days_ago(row["last_commit"])
-            row["status"] = KospexUtils.development_status(row["last_commit"])
-
-        return results
+        return kd.execute()
 
     def repos2(self, id=None):
         """
@@ -452,29 +479,25 @@ class KospexQuery:
         """
 
         kd = KospexData(self.kospex_db)
-        kd.from_table(KospexSchema.TBL_COMMITS)
+        kd.from_table(KospexSchema.TBL_ACTIVITY_DAILY)
         kd.set_params_by_id(id)
 
-        kd.select_as("count(*)", "commits")
-        kd.select_as("MIN(committer_when)", "first_commit")
-        kd.select_as("MAX(committer_when)", "last_commit")
+        kd.select_as("SUM(commits)", "commits")
+        kd.select_as("MIN(first_committed)", "first_commit")
+        kd.select_as("MAX(last_committed)", "last_commit")
 
         # TODO = Fix this COUNT DISTINCT so it works as a "select_as"
         kd.select_raw("COUNT(DISTINCT(author_email)) as authors")
         kd.select_raw("COUNT(DISTINCT(committer_email)) as committers")
+        kd.select_raw(f"{days_ago_sql('MAX(last_committed)')} AS days_ago")
+        kd.select_raw(f"{status_sql('MAX(last_committed)')} AS status")
 
         kd.select_git_details()
 
         kd.group_by("_repo_id")
         kd.order_by("_repo_id")
 
-        results = kd.execute()
-
-        for row in results:
-            row["days_ago"] = KospexUtils.days_ago(row["last_commit"])
-            row["status"] = KospexUtils.development_status(row["last_commit"])
-
-        return results
+        return kd.execute()
 
     def repos(self, org_key=None, server=None, repo_id=None, id=None):
         """Provide a summary of the known repositories."""
@@ -496,41 +519,40 @@ class KospexQuery:
             where = "WHERE _git_server = ?"
             params.append(server)
 
-        summary_sql = f"""SELECT _repo_id, _git_server, _git_owner, _git_repo, count(*) 'commits',
+        summary_sql = f"""SELECT _repo_id, _git_server, _git_owner, _git_repo, SUM(commits) 'commits',
         count(distinct(author_email)) 'authors', count(distinct(committer_email)) 'committers',
-        MAX(committer_when) 'last_commit'
-        FROM commits {where}
+        MAX(last_committed) 'last_commit',
+        {days_ago_sql("MAX(last_committed)")} 'days_ago',
+        {status_sql("MAX(last_committed)")} 'status'
+        FROM {KospexSchema.TBL_ACTIVITY_DAILY} {where}
         GROUP BY _repo_id
         ORDER BY _repo_id
         """
 
-        data = []
-        for row in self.kospex_db.query(summary_sql, params):
-            data.append(row)
-
-        for row in data:
-            row["days_ago"] = KospexUtils.days_ago(row["last_commit"])
-            row["status"] = KospexUtils.development_status(row["last_commit"])
-
-        return data
+        return list(self.kospex_db.query(summary_sql, params))
 
     def orgs(self):
         """Provide a summary of the known orgs."""
-        summary_sql = """SELECT _git_server, _git_owner, count(*) 'commits',
+        summary_sql = f"""SELECT _git_server, _git_owner, SUM(commits) 'commits',
         COUNT(DISTINCT(_git_repo)) AS repos,
         COUNT(DISTINCT(LOWER(author_email))) 'authors', COUNT(DISTINCT(LOWER(committer_email))) 'committers',
-        MAX(committer_when) 'last_commit', _git_server || "~" || _git_owner AS org_key
-        FROM commits
+        MAX(last_committed) 'last_commit', _git_server || '~' || _git_owner AS org_key,
+        _git_owner AS org, {days_ago_sql("MAX(last_committed)")} AS days_ago
+        FROM {KospexSchema.TBL_ACTIVITY_DAILY}
         GROUP BY _git_server, _git_owner
         ORDER BY commits DESC
         """
-        data = []
-        for row in self.kospex_db.query(summary_sql):
-            row["org"] = row["_git_owner"]
-            row["days_ago"] = KospexUtils.days_ago(row["last_commit"])
-            data.append(row)
+        return list(self.kospex_db.query(summary_sql))
 
-        return data
+    def orgs_with_active_devs(self):
+        """orgs(), each with its count of active developers as active_devs."""
+        git_orgs = self.orgs()
+        active_devs = self.active_devs(org=True)
+
+        for row in git_orgs:
+            row["active_devs"] = active_devs.get(row["org_key"], 0)
+
+        return git_orgs
 
     def commit(self, repo_id, commit_hash):
         """Get a specific commit by repo_id and commit hash."""
@@ -680,12 +702,12 @@ class KospexQuery:
                 params.append(request_id)
 
         if before:
-            summary_sql += " AND committer_when < ?"
-            params.append(before)
+            summary_sql += " AND _committer_epoch < ?"
+            params.append(KospexUtils.epoch_seconds(before))
 
         if after:
-            summary_sql += " AND committer_when > ?"
-            params.append(after)
+            summary_sql += " AND _committer_epoch > ?"
+            params.append(KospexUtils.epoch_seconds(after))
 
         if hash:
             summary_sql += " AND hash = ?"
@@ -758,13 +780,13 @@ class KospexQuery:
 
     def active_devs(self, days=90, org=False, org_key=None):
         """Look for distinct developers in the last 'days'"""
-        from_date = KospexUtils.days_ago_iso_date(days)
+        from_date = KospexUtils.days_ago_epoch(days)
         repos = {}
         # TODO implement org_key
 
         summary_sql = """SELECT _repo_id, count(distinct(author_email)) 'devs'
         FROM commits
-        WHERE committer_when > ?
+        WHERE _committer_epoch > ?
         GROUP BY _repo_id
         """
 
@@ -772,7 +794,7 @@ class KospexQuery:
             summary_sql = """SELECT _git_server, _git_owner, count(distinct(author_email)) 'devs',
             _git_server || "~" || _git_owner AS org_key
             FROM commits
-            WHERE committer_when > ?
+            WHERE _committer_epoch > ?
             GROUP BY _git_server, _git_owner
             """
 
@@ -792,8 +814,8 @@ class KospexQuery:
         """
 
         days means commits in the last 'X' days, based on the committer_when
-        after_date means commits after 'X' date, based on the committer_when
-        before_date means commits before 'X' date, based on the committer_when
+        from_date means commits on or after the UTC day of 'X', based on the committer_when
+        to_date means commits before the UTC day of 'X', based on the committer_when
 
         Return a list of developers (based on author_email) with meta data
             author_email AS author
@@ -805,28 +827,30 @@ class KospexQuery:
         """
 
         kd = KospexData(self.kospex_db)
-        kd.from_table(KospexSchema.TBL_COMMITS)
-        # kd.select_as("DISTINCT(author_email)", "author")
-        # kd.select_as("DISTINCT(LOWER(author_email))", "author")
+        kd.from_table(KospexSchema.TBL_ACTIVITY_DAILY)
         kd.select_raw("DISTINCT(LOWER(author_email)) as author")
-        kd.select_as("MIN(committer_when)", "first_commit")
-        kd.select_as("MAX(committer_when)", "last_commit")
-        kd.select_as("count(*)", "commits")
+        kd.select_as("MIN(first_committed)", "first_commit")
+        kd.select_as("MAX(last_committed)", "last_commit")
+        kd.select_as("SUM(commits)", "commits")
+        kd.select_raw(f"{status_sql('MAX(last_committed)')} AS status")
+        tenure = days_between_sql("MIN(first_committed)", "MAX(last_committed)", min_one=True)
+        kd.select_raw(f"{tenure} AS tenure")
+        kd.select_raw(f"COALESCE(ROUND({tenure} / 365, 2), 0) AS years_active")
 
         kd.group_by("author")
 
         # TODO - Think if we want to sanity check
         # There should only be one of repo_id, org_key or server used
 
+        # The rollup is per UTC day, so dates select whole days
         if to_date:
-            kd.where("committer_when", "<", to_date)
+            kd.where("day", "<", utc_day(to_date))
 
         if from_date:
-            kd.where("committer_when", ">", from_date)
+            kd.where("day", ">=", utc_day(from_date))
 
         if days:
-            from_date = KospexUtils.days_ago_iso_date(days)
-            kd.where("committer_when", ">", from_date)
+            kd.where("day", ">", window_cutoff(days))
 
         if repo_id:
             kd.where("_repo_id", "=", repo_id)
@@ -838,24 +862,15 @@ class KospexQuery:
             print(f"Server: {server}")
             kd.where("_git_server", "=", server)
 
-        results = kd.execute()
-
-        for i in results:
-            i["status"] = KospexUtils.development_status(i["last_commit"])
-            i["tenure"] = KospexUtils.days_between_datetimes(
-                i["first_commit"], i["last_commit"], min_one=True
-            )
-            i["years_active"] = round(i["tenure"] / 365, 2) if i["tenure"] else 0
-
-        return results
+        return kd.execute()
 
     def active_developer_set(self, days=90):
         """Look for distinct developers in the last 'days'"""
-        from_date = KospexUtils.days_ago_iso_date(days)
+        from_date = KospexUtils.days_ago_epoch(days)
         devs = set()
         summary_sql = """SELECT distinct(author_email)
         FROM commits
-        WHERE committer_when > ?
+        WHERE _committer_epoch > ?
         """
         data = self.kospex_db.query(summary_sql, (from_date,))
         for row in data:
@@ -896,10 +911,10 @@ class KospexQuery:
         """
         print()
         kd = KospexData(self.kospex_db)
-        kd.from_table(KospexSchema.TBL_COMMITS)
-        kd.select_as("count(*)", "commits")
-        kd.select_as("MIN(committer_when)", "first_commit")
-        kd.select_as("MAX(committer_when)", "last_commit")
+        kd.from_table(KospexSchema.TBL_ACTIVITY_DAILY)
+        kd.select_as("SUM(commits)", "commits")
+        kd.select_as("MIN(first_committed)", "first_commit")
+        kd.select_as("MAX(last_committed)", "last_commit")
         kd.select_raw("COUNT(DISTINCT(_repo_id)) as repos")
         kd.select_raw("COUNT(DISTINCT(LOWER(author_email))) as authors")
 
@@ -933,46 +948,38 @@ class KospexQuery:
         from_date = None
 
         kd = KospexData(self.kospex_db)
-        kd.from_table(KospexSchema.TBL_COMMITS)
+        kd.from_table(KospexSchema.TBL_ACTIVITY_DAILY)
         kd.select_raw("DISTINCT(LOWER(author_email)) as author_email")
-        kd.select_as("count(*)", "commits")
+        kd.select_as("SUM(commits)", "commits")
         kd.select_raw("COUNT(DISTINCT(_repo_id)) as repos")
-        kd.select_as("MIN(committer_when)", "first_commit")
-        kd.select_as("MAX(committer_when)", "last_commit")
+        kd.select_as("MIN(first_committed)", "first_commit")
+        kd.select_as("MAX(last_committed)", "last_commit")
+        kd.select_raw(f"{days_ago_sql('MAX(last_committed)')} AS last_seen")
         # kd.group_by("author_email",lower=True)
         kd.group_by("author_email")
 
         if days:
-            from_date = KospexUtils.days_ago_iso_date(days)
-            kd.where("committer_when", ">", from_date)
+            from_date = window_cutoff(days)
+            kd.where("day", ">", from_date)
 
         if org_key:
             kd.where_org_key(org_key)
 
-        kresults = kd.execute()
-        for row in kresults:
-            row["last_seen"] = KospexUtils.days_ago(row["last_commit"])
-
-        return kresults
+        return kd.execute()
 
     def active_devs_by_repo(self, repo_id, days=90):
         """Look for distinct developers in the last X 'days'"""
-        from_date = KospexUtils.days_ago_iso_date(days)
-        summary_sql = """SELECT distinct(LOWER(author_email)) AS 'author_email', count(*) AS 'commits',
-        MAX(committer_when) AS 'last_commit', count(distinct(_repo_id)) AS 'repos'
+        from_date = KospexUtils.days_ago_epoch(days)
+        days_ago = days_ago_sql("MAX(committer_when)")
+        summary_sql = f"""SELECT distinct(LOWER(author_email)) AS 'author_email', count(*) AS 'commits',
+        MAX(committer_when) AS 'last_commit', count(distinct(_repo_id)) AS 'repos',
+        {days_ago} AS 'days_ago', {days_ago} AS 'last_seen'
         FROM commits
-        WHERE committer_when > ? AND _repo_id = ?
+        WHERE _committer_epoch > ? AND _repo_id = ?
         GROUP BY LOWER(author_email)
         ORDER BY commits DESC
         """
-        results = []
-        data = self.kospex_db.query(summary_sql, (from_date, repo_id))
-        for row in data:
-            row["days_ago"] = KospexUtils.days_ago(row["last_commit"])
-            row["last_seen"] = row["days_ago"]
-            results.append(row)
-        # return data[0]['devs']
-        return results
+        return list(self.kospex_db.query(summary_sql, (from_date, repo_id)))
 
     def authors_by_repo(self, repo_id):
         """Provide a summary of authors in the provided repo."""
@@ -1118,12 +1125,12 @@ class KospexQuery:
             params.append(repo_id)
 
         if days:
-            from_date = KospexUtils.days_ago_iso_date(days)
+            from_date = KospexUtils.days_ago_epoch(days)
             params.append(from_date)
             if repo_id:
-                where_clause += " AND committer_when >= ?"
+                where_clause += " AND _committer_epoch >= ?"
             else:
-                where_clause += " Where committer_when >= ?"
+                where_clause += " Where _committer_epoch >= ?"
 
         summary_sql = f"""SELECT substr(author_email, instr(author_email, '@') + 1) as domain,
         COUNT(DISTINCT author_email) 'addresses'
@@ -1194,34 +1201,46 @@ class KospexQuery:
 
         return results
 
+    @property
+    def url_cache(self):
+        """The UrlCache over this database's url_cache table."""
+        if self._url_cache is None:
+            config = HabitatConfig.get_instance()
+            self._url_cache = UrlCache(
+                self.kospex_db,
+                negative_ttl=config.url_cache_negative_ttl,
+                stale_seconds=config.url_cache_stale,
+            )
+        return self._url_cache
+
     def url_request_with_status(self, url, cache=3600, timeout=10, headers=None):
         """Make a request to a URL, and use the cached version if less than [cache] seconds.
 
         Returns a (content, status) tuple: status is 200 on a cache hit or fresh
         success, the HTTP status on an HTTP error, or None on a network/timeout
-        error. 200 responses are cached; failures are not."""
-        # Set default cache to 1 hour (60mins * 60secs)
-
-        # Check the cache first
-        cache_sql = f"""SELECT content, timestamp FROM {KospexSchema.TBL_URL_CACHE} WHERE url = ?"""
-        data = self.kospex_db.query(cache_sql, (url,))
-        result = next(data, None)
-
-        if result and (time.time() - result["timestamp"]) < cache:
-            # Cache is valid
-            return result["content"], 200
-
-        # Fetch new content and update the cache
+        error. 200s and 404/410s are cached, with TTLs per endpoint (see
+        kospex/url_cache.py); a stale entry is returned and refreshed in the
+        background."""
+        entry = self.url_cache.lookup(url, max_age=cache)
+        if entry is not None:
+            if entry.stale:
+                self.url_cache.revalidate(
+                    url, lambda u: self._http_get(u, timeout=timeout, headers=headers)
+                )
+            return entry.content, entry.status
+
+        content, status = self._http_get(url, timeout=timeout, headers=headers)
+        self.url_cache.store(url, content, status)
+        return content, status
+
+    @staticmethod
+    def _http_get(url, timeout=10, headers=None):
+        """GET url, returning (content, status) as url_request_with_status does.
+        No database access, so it is safe on a background thread."""
         try:
             response = requests.get(url, timeout=timeout, headers=headers)
             response.raise_for_status()  # Raise an exception for HTTP errors
-            content = response.text
-
-            # Insert or update the cache
-            url_cache = {"url": url, "content": content, "timestamp": int(time.time())}
-            self.kospex_db.table(KospexSchema.TBL_URL_CACHE).upsert(url_cache, pk=["url"])
-
-            return content, 200
+            return response.text, 200
 
         except requests.HTTPError as e:
             status = e.response.status_code if e.response is not None else None
@@ -1252,7 +1271,6 @@ class KospexQuery:
     def author_tech(self, author_email=None, repo_id=None):
         """Return the tech stack for an author"""
 
-        results = []
         params = []
 
         kd = KospexData(self.kospex_db)
@@ -1265,6 +1283,13 @@ class KospexQuery:
         kd.select_as("MIN(author_when)", "first_commit")
         # TODO - fix parsing of multiple SQL functions
         kd.select_raw("COUNT(DISTINCT(commits._repo_id)) as repos")
+        last_seen = days_ago_sql("MAX(author_when)")
+        first_seen = days_ago_sql("MIN(author_when)")
+        days_active = f"CAST({first_seen} AS INTEGER) - CAST({last_seen} AS INTEGER)"
+        kd.select_raw(f"{last_seen} AS last_seen")
+        kd.select_raw(f"{first_seen} AS first_seen")
+        kd.select_raw(f"{days_active} AS days_active")
+        kd.select_raw(f"printf('%.3f', ({days_active}) / 365.0) AS years_active")
 
         kd.where_join("commits", "hash", "commit_files", "hash")
         kd.where_join("commits", "_repo_id", "commit_files", "_repo_id")
@@ -1303,90 +1328,57 @@ class KospexQuery:
         # print(sql)
 
         # data = self.kospex_db.query(sql, params)
-        data = self.kospex_db.query(kd.generate_sql(), kd.params)
-        for row in data:
-            row["last_seen"] = KospexUtils.days_ago(row["last_commit"])
-            row["first_seen"] = KospexUtils.days_ago(row["first_commit"])
-            row["days_active"] = int(row.get("first_seen", 0)) - int(row.get("last_seen", 0))
-            # row['years_active'] = round(row['days_active'] / 365,2)
-            row["years_active"] = f"{row['days_active'] / 365:.3f}"
-            results.append(row)
+        return list(self.kospex_db.query(kd.generate_sql(), kd.params))
 
-        return results
+    def _developer_tech_filters(self, author_email=None, repo_id=None, year=None):
+        """WHERE clauses and params for the commit_files x commits language queries."""
+        clauses = ["commits.hash = commit_files.hash"]
+        params = []
 
-    # def summarise_dev_commits(self, commits):
-    #     """
-    #     Summarize commits by author_email and language.
+        if author_email:
+            clauses.append("commits.author_email = ?")
+            params.append(author_email)
 
-    #     Args:
-    #         commits: List of dicts with commit information
+        if repo_id:
+            clauses.append("commits._repo_id = ?")
+            params.append(repo_id)
 
-    #     Returns:
-    #         List of dicts with summarized information
-    #     """
-    #     # Group by (author_email, language)
-    #     grouped = defaultdict(lambda: {
-    #         'commits': [],
-    #         'repo_ids': set()
-    #     })
-
-    #     for commit in commits:
-    #         key = (commit['author_email'], commit['language'])
-    #         grouped[key]['commits'].append(commit['committer_when'])
-    #         if '_repo_id' in commit:
-    #             grouped[key]['repo_ids'].add(commit['_repo_id'])
-
-    #     # Build summary list
-    #     summary = []
-    #     for (author_email, language), data in grouped.items():
-    #         # Sort commits to get first and last
-    #         commit_dates = sorted(data['commits'])
-
-    #         summary.append({
-    #             'author_email': author_email,
-    #             'first_commit': commit_dates[0],
-    #             'last_commit': commit_dates[-1],
-    #             'language': language,
-    #             'commits': len(commit_dates),
-    #             'repos': len(data['repo_ids'])
-    #         })
-
-    #     # Sort by author_email, then language for consistent output
-    #     summary.sort(key=lambda x: (x['author_email'], x['language']))
-
-    #     return summary
-
-    def summarise_dev_commits(self, commits):
-        """
-        Summarize commits by author_email and language.
+        if year:
+            # The UTC year, as strftime('%Y', committer_when) groups it
+            start = int(datetime(year, 1, 1, tzinfo=timezone.utc).timestamp())
+            end = int(datetime(year + 1, 1, 1, tzinfo=timezone.utc).timestamp())
+            clauses.append("commits._committer_epoch >= ?")
+            clauses.append("commits._committer_epoch < ?")
+            params.extend([start, end])
 
-        Args:
-            commits: List of dicts with commit information
+        return " AND ".join(clauses), params
 
-        Returns:
-            List of dicts with summarized information
+    def _language_summary(self, group_by_author, author_email=None, repo_id=None, year=None):
         """
-        # Group by (author_email, language)
-        grouped = defaultdict(lambda: {"commits": [], "repo_ids": set(), "file_paths": set()})
+        Changed files grouped by language (and author), summarised in SQL.
 
-        for commit in commits:
-            key = (commit["author_email"], commit["language"])
-            grouped[key]["commits"].append(commit["committer_when"])
-            if "_repo_id" in commit:
-                grouped[key]["repo_ids"].add(commit["_repo_id"])
-            if "file_path" in commit:
-                grouped[key]["file_paths"].add(commit["file_path"])
+        "commits" counts commit_files rows, i.e. file changes, as it always has.
+        """
+        where, params = self._developer_tech_filters(author_email, repo_id, year)
+        author = "LOWER(commits.author_email) AS author_email," if group_by_author else ""
+        group_by = "LOWER(commits.author_email), language" if group_by_author else "language"
+        sql = f"""SELECT {author} commit_files.language AS language,
+            MIN(commits.committer_when) AS first_commit,
+            MAX(commits.committer_when) AS last_commit,
+            COUNT(*) AS commits,
+            COUNT(DISTINCT commits._repo_id) AS repos,
+            COUNT(DISTINCT commit_files.file_path) AS files
+        FROM {KospexSchema.TBL_COMMIT_FILES}, {KospexSchema.TBL_COMMITS}
+        WHERE {where}
+        GROUP BY {group_by}
+        ORDER BY {group_by}
+        """
 
-        # Build summary list
         summary = []
-        for (author_email, language), data in grouped.items():
-            # Sort commits to get first and last
-            commit_dates = sorted(data["commits"])
-
+        for row in self.kospex_db.query(sql, params):
             years_active = 0
-
-            last_seen = KospexUtils.days_ago(commit_dates[-1])
-            first_seen = KospexUtils.days_ago(commit_dates[0])
+            last_seen = KospexUtils.days_ago(row["last_commit"])
+            first_seen = KospexUtils.days_ago(row["first_commit"])
             if last_seen is not None and first_seen is not None:
                 days_active = first_seen - last_seen
             else:
@@ -1395,93 +1387,33 @@ class KospexQuery:
             if days_active:
                 years_active = f"{days_active / 365:.3f}"
 
-            first_commit = commit_dates[0]
-            last_commit = commit_dates[-1]
-            if "T" in first_commit:
-                first_commit = first_commit.split("T")[0]
-            if "T" in last_commit:
-                last_commit = last_commit.split("T")[0]
-
-            summary.append(
-                {
-                    "author_email": author_email,
-                    "first_commit": first_commit,
-                    "last_commit": last_commit,
-                    "language": language,
-                    "commits": len(commit_dates),
-                    "repos": len(data["repo_ids"]),
-                    "files": len(data["file_paths"]),
-                    "years_active": years_active,
-                }
-            )
-
-        # Sort by author_email, then language for consistent output
-        summary.sort(key=lambda x: (x["author_email"], x["language"]))
+            row["first_commit"] = row["first_commit"].split("T")[0]
+            row["last_commit"] = row["last_commit"].split("T")[0]
+            row["years_active"] = years_active
+            summary.append(row)
 
         return summary
 
-    @KospexUtils.timer()
-    def summarize_by_language(self, commits):
+    def summarise_dev_commits(self, author_email=None, repo_id=None, year=None):
         """
-        Summarize commits by language only (across all authors).
-
-        Args:
-            commits: List of dicts with commit information
+        Summarize changed files by author_email and language.
 
         Returns:
-            List of dicts with summarized information by language
+            List of dicts with author_email, language, first_commit, last_commit,
+            commits, repos, files and years_active, sorted by author then language
         """
-        # Group by language only
-        grouped = defaultdict(lambda: {"commits": [], "repo_ids": set(), "file_paths": set()})
-
-        for commit in commits:
-            language = commit["language"]
-            grouped[language]["commits"].append(commit["committer_when"])
-            if "_repo_id" in commit:
-                grouped[language]["repo_ids"].add(commit["_repo_id"])
-            if "file_path" in commit:
-                grouped[language]["file_paths"].add(commit["file_path"])
+        return self._language_summary(True, author_email, repo_id, year)
 
-        # Build summary list
-        summary = []
-        for language, data in grouped.items():
-            # Sort commits to get first and last
-            commit_dates = sorted(data["commits"])
-            years_active = 0
-
-            last_seen = KospexUtils.days_ago(commit_dates[-1])
-            first_seen = KospexUtils.days_ago(commit_dates[0])
-            if last_seen is not None and first_seen is not None:
-                days_active = first_seen - last_seen
-            else:
-                days_active = None
-
-            if days_active:
-                years_active = f"{days_active / 365:.3f}"
-
-            first_commit = commit_dates[0]
-            last_commit = commit_dates[-1]
-            if "T" in first_commit:
-                first_commit = first_commit.split("T")[0]
-            if "T" in last_commit:
-                last_commit = last_commit.split("T")[0]
-
-            summary.append(
-                {
-                    "language": language,
-                    "first_commit": first_commit,
-                    "last_commit": last_commit,
-                    "commits": len(commit_dates),
-                    "repos": len(data["repo_ids"]),
-                    "files": len(data["file_paths"]),
-                    "years_active": years_active,
-                }
-            )
-
-        # Sort by language for consistent output
-        summary.sort(key=lambda x: x["language"])
+    @KospexUtils.timer()
+    def summarize_by_language(self, repo_id=None, year=None):
+        """
+        Summarize changed files by language only (across all authors).
 
-        return summary
+        Returns:
+            List of dicts with language, first_commit, last_commit, commits,
+            repos, files and years_active, sorted by language
+        """
+        return self._language_summary(False, repo_id=repo_id, year=year)
 
     def get_last_sync_datetime(self):
         """
@@ -1528,77 +1460,13 @@ class KospexQuery:
         Return the tech stack for an author or repo
         This function is part of
         https://github.com/kospex/kospex/issues/63
-        """
-
-        results = []
-        params = []
-
-        kd = KospexData(self.kospex_db)
-        kd.from_table("commit_files", "commits")
-
-        # kd.select_raw("DISTINCT(LOWER(author_email)) as author_email")
-        kd.select_raw("LOWER(author_email) as author_email")
-        # kd.select_as("DISTINCT(author_email)", "author_email")
-        kd.select("_ext", "file_path", "commits.committer_when", "commits._repo_id")
-        # kd.select_as("count(*)", "commits")
 
-        # We need to do the following on the language when we've extracted it
-        # kd.select_as("MAX(author_when)", "last_commit")
-        # kd.select_as("MIN(author_when)", "first_commit")
-
-        # TODO - fix parsing of multiple SQL functions
-        # kd.select_raw("COUNT(DISTINCT(commits._repo_id)) as repos")
-
-        kd.where_join("commits", "hash", "commit_files", "hash")
-        # kd.where_join("commits", "_repo_id", "commit_files", "_repo_id")
-        # kd.where_join("commit_files", "file_path", "file_metadata", "Provider")
-        # kd.where_join("commit_files", "_repo_id", "file_metadata", "_repo_id")
-        # kd.where_join("commit_files", "hash", "file_metadata", "hash")
-
-        # kd.group_by("author_email")
-        # kd.group_by("author_email","_ext")
-        # kd.order_by("commits", "DESC")
-
-        if author_email:
-            params.append(author_email)
-            kd.where("author_email", "=", author_email)
-
-        if repo_id:
-            params.append(repo_id)
-            kd.where("commits._repo_id", "=", repo_id)
-
-        if year:
-            start_date = datetime(year, 1, 1)
-            start_iso = start_date.isoformat()  # "2023-01-01T00:00
-            print(f"Start date: {start_iso}")
-            end_date = datetime(year, 12, 31, 23, 59, 59)
-            end_iso = end_date.isoformat()  # "2023-01-01T00:00
-            print(f"End date: {end_iso}")
-            kd.where("commits.committer_when", ">=", start_iso)
-            kd.where("commits.committer_when", "<=", end_iso)
-
-        # We're going to need a few lookups
-        # Potentially we could do this in a nasty join, but it's easier to read this way
-
-        data = self.kospex_db.query(kd.generate_sql(), kd.params)
-        for row in data:
-            #     row['last_seen'] = KospexUtils.days_ago(row['last_commit'])
-            #     row['first_seen'] = KospexUtils.days_ago(row['first_commit'])
-            #     row['days_active'] = int(row.get('first_seen',0)) - int(row.get('last_seen',0))
-            #     row['years_active'] = f"{row['days_active'] / 365:.3f}"
-            row["language"] = Panopticas.get_language(row["file_path"], skip_shebang=True)
-            results.append(row)
-
-        # summarise the results
-        # summary = self.summarise_dev_commits2(results)
-        summary = []
+        Languages come from commit_files.language, resolved once at sync time,
+        so this is a single GROUP BY rather than a Python pass over every row.
+        """
         if developers or author_email:
-            summary = self.summarise_dev_commits(results)
-        else:
-            summary = self.summarize_by_language(results)
-
-        # return results
-        return summary
+            return self.summarise_dev_commits(author_email, repo_id, year)
+        return self.summarize_by_language(repo_id, year)
 
     def tech_commits(self, author_email=None, repo_id=None):
         """ " Return a KospexData object with tables joined"""
@@ -1834,8 +1702,7 @@ class KospexQuery:
             kd.where("_repo_id", "=", repo_id)
 
         if days:
-            from_date = KospexUtils.days_ago_iso_date(days)
-            kd.where("committer_when", ">", from_date)
+            kd.where("_committer_epoch", ">", KospexUtils.days_ago_epoch(days))
 
         return kd.execute()
 
@@ -1894,111 +1761,39 @@ class KospexQuery:
 
             return top_list
 
-    def update_developer_stats(self, repo_id):
-        """
-        Populate or refresh the developer_stats table for a given repo.
-        Aggregates commit data from the commits table to compute per-developer
-        stats for key person analysis. Sets stat_type to ALL_TIME.
+    def sync_developer_stats(self, repo_id, activity=None):
         """
-        now = datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S")
-        days_90_ago = KospexUtils.days_ago_iso_date(90)
-
-        # Get repo metadata for the git_server/owner/repo fields
-        repo = self.get_repo_by_id(repo_id)
-        git_server = repo.get("_git_server", "") if repo else ""
-        git_owner = repo.get("_git_owner", "") if repo else ""
-        git_repo = repo.get("_git_repo", "") if repo else ""
-
-        # Single query to get all developer stats including conditional 90-day count
-        sql = f"""
-            SELECT
-                author_email,
-                COUNT(*) as total_commits,
-                MIN(author_when) as first_commit,
-                MAX(author_when) as last_commit,
-                SUM(CASE WHEN committer_when > ? THEN 1 ELSE 0 END) as commits_last_90_days
-            FROM {KospexSchema.TBL_COMMITS}
-            WHERE _repo_id = ?
-            GROUP BY author_email
-        """
-        rows = list(self.kospex_db.execute(sql, [days_90_ago, repo_id]).fetchall())
-
-        # Delete existing ALL_TIME stats for this repo and insert fresh
-        self.kospex_db.execute(
-            f"DELETE FROM {KospexSchema.TBL_DEVELOPER_STATS} WHERE _repo_id = ? AND (stat_type = 'ALL_TIME' OR stat_type IS NULL)",
-            [repo_id]
-        )
+        Bring the developer_stats of a repo up to date after a sync.
 
-        for row in rows:
-            self.kospex_db.execute(
-                f"""INSERT INTO {KospexSchema.TBL_DEVELOPER_STATS}
-                    (author_email, total_commits, first_commit, last_commit,
-                     commits_last_90_days, last_update, stat_type,
-                     _git_server, _git_owner, _git_repo, _repo_id)
-                    VALUES (?, ?, ?, ?, ?, ?, 'ALL_TIME', ?, ?, ?, ?)""",
-                [row[0], row[1], row[2], row[3], row[4], now,
-                 git_server, git_owner, git_repo, repo_id]
-            )
+        activity is the kospex.activity_rollup.CommitActivity of the commits
+        the sync wrote. It is folded into the activity_daily rollup and
+        developer_files, and developer_stats derived from them, without
+        re-reading the repo's history. Without it, the repo's rollup is rebuilt
+        from commits.
 
-        # Calculate repo totals and update per-developer percentages
-        total_all_time = sum(row[1] for row in rows)
-        total_90_days = sum(row[4] for row in rows)
-
-        if total_all_time > 0:
-            pct_sql = f"""
-                UPDATE {KospexSchema.TBL_DEVELOPER_STATS}
-                SET pct_all_time = ROUND(100.0 * total_commits / ?, 2),
-                    pct_90_days = CASE WHEN ? > 0
-                        THEN ROUND(100.0 * commits_last_90_days / ?, 2)
-                        ELSE 0 END
-                WHERE _repo_id = ? AND stat_type = 'ALL_TIME'
-            """
-            self.kospex_db.execute(pct_sql, [total_all_time, total_90_days, total_90_days, repo_id])
+        Needs migration 0013. Like the rest of the sync write path it fails on
+        a database that is behind, and the CLI's out-of-date banner asks for
+        `kospex upgrade-db -apply` first.
 
-        self.kospex_db.conn.commit()
-        return len(rows)
-
-    def update_developer_file_stats(self, repo_id):
-        """
-        Update the developer_stats rows for a repo with file-level stats
-        (additions, deletions, unique_files) by joining commits to commit_files.
-        Must be called after update_developer_stats which creates the rows.
+        Returns the number of developers.
         """
-        days_90_ago = KospexUtils.days_ago_iso_date(90)
+        store = DeveloperStatsStore(self.kospex_db)
+        return store.update(repo_id, activity, self.get_repo_by_id(repo_id))
 
-        sql = f"""
-            SELECT
-                c.author_email,
-                SUM(cf.additions) as additions,
-                SUM(cf.deletions) as deletions,
-                COUNT(DISTINCT cf.file_path) as unique_files,
-                SUM(CASE WHEN c.committer_when > ? THEN cf.additions ELSE 0 END) as additions_90_days,
-                SUM(CASE WHEN c.committer_when > ? THEN cf.deletions ELSE 0 END) as deletions_90_days,
-                COUNT(DISTINCT CASE WHEN c.committer_when > ? THEN cf.file_path END) as unique_files_90_days
-            FROM {KospexSchema.TBL_COMMITS} c
-            JOIN {KospexSchema.TBL_COMMIT_FILES} cf
-                ON c.hash = cf.hash AND c._repo_id = cf._repo_id
-            WHERE c._repo_id = ?
-            GROUP BY c.author_email
-        """
-        rows = list(self.kospex_db.execute(
-            sql, [days_90_ago, days_90_ago, days_90_ago, repo_id]
-        ).fetchall())
-
-        update_sql = f"""
-            UPDATE {KospexSchema.TBL_DEVELOPER_STATS}
-            SET additions = ?, deletions = ?, unique_files = ?,
-                additions_90_days = ?, deletions_90_days = ?, unique_files_90_days = ?
-            WHERE _repo_id = ? AND author_email = ?
-        """
-        for row in rows:
-            self.kospex_db.execute(
-                update_sql,
-                [row[1], row[2], row[3], row[4], row[5], row[6], repo_id, row[0]]
-            )
+    def rebuild_developer_stats(self, repo_id=None):
+        """
+        Rebuild the activity_daily rollup and developer_files of a repo, or of
+        every repo, from commits and commit_files, and derive developer_stats
+        from them again. For a rollup that no longer matches commits.
 
-        self.kospex_db.conn.commit()
-        return len(rows)
+        Returns the number of repos rebuilt.
+        """
+        store = DeveloperStatsStore(self.kospex_db)
+        store.rollup.rebuild(repo_id)
+        repo_ids = [repo_id] if repo_id else self.get_repo_ids()
+        for rid in repo_ids:
+            store.refresh(rid, self.get_repo_by_id(rid))
+        return len(repo_ids)
 
     def has_developer_stats(self, repo_id):
         """Check if developer_stats exist for a given repo."""
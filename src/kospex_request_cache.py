@@ -1,32 +1,123 @@
 """
-Lightweight in memory cache for DB queries and calculations
-For use in kweb2.py for large or long execution queries
-Returns the value from the cache if it exists, otherwise None
-if a last_updated timestamp is provided, it will be compared to the cache_time
-if the cache_time is older than the last_updated timestamp, the result will return None
+In-memory result cache for kweb's expensive DB queries and calculations.
+
+Entries are keyed by route plus normalised parameters and stamped with the
+"data generation" they were computed at - a counter in kospex_config that
+every sync bumps when it finishes writing (see KospexQuery.bump_data_generation).
+An entry from an older generation is never served, so a sync invalidates
+everything at once without the cache having to know which rows changed.
+
+On top of that each entry has a TTL, and the cache holds at most max_entries,
+evicting the least recently used. Safe to share between kweb's DB threads.
+
+Cached values are shared between requests: treat them as read-only.
 """
-from datetime import datetime
+import threading
+import time
+from collections import OrderedDict
+from typing import NamedTuple
+
+DEFAULT_MAX_ENTRIES = 256
+DEFAULT_TTL = 300.0
+
+
+class CacheEntry(NamedTuple):
+    value: object
+    generation: object
+    expires_at: float
 
-class RequestCache:
-    """In Memory cache class"""
-    def __init__(self):
-        self.cache = {}
 
-    def get(self, key, last_updated):
+class ResultCache:
+    """A thread-safe LRU cache with per-entry TTLs and generation checks."""
 
-        if results := self.cache.get(key):
-            if last_updated and last_updated > results['cache_time']:
-                return None
-            return results['data']
+    def __init__(self, max_entries=DEFAULT_MAX_ENTRIES, ttl=DEFAULT_TTL, clock=time.monotonic):
+        if max_entries < 1:
+            raise ValueError(f"max_entries must be >= 1, got {max_entries}")
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._clock = clock
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
 
-        return None
+    @staticmethod
+    def make_key(route, params=None):
+        """A hashable key for ``route`` and its parameters.
 
-    def set(self, key, data):
-        entry = {
-            'data': data,
-            'cache_time': datetime.now().astimezone().strftime('%Y-%m-%dT%H:%M:%S%z')
-        }
-        self.cache[key] = entry
+        None-valued parameters are dropped and the rest sorted, so
+        {"days": None, "org_key": "x"} and {"org_key": "x"} share an entry.
+        """
+        items = tuple(sorted(
+            (str(name), str(value)) for name, value in (params or {}).items()
+            if value is not None
+        ))
+        return (route, items)
+
+    def get(self, key, generation, default=None):
+        """The cached value for ``key`` if it is from ``generation`` and unexpired."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+            if entry.generation != generation:
+                del self._entries[key]
+                self.invalidations += 1
+                self.misses += 1
+                return default
+            if entry.expires_at <= self._clock():
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry.value
+
+    def set(self, key, value, generation, ttl=None):
+        """Store ``value`` for ``key`` at ``generation``, evicting the LRU entry if full."""
+        expires_at = self._clock() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._entries[key] = CacheEntry(value, generation, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def get_or_compute(self, route, params, generation, compute, ttl=None):
+        """Return the cached result for route+params, or compute() and cache it.
+
+        Concurrent misses for the same key may each compute; the last one to
+        finish is cached. That costs a duplicate query, never a wrong answer.
+        """
+        key = self.make_key(route, params)
+        missing = object()
+        value = self.get(key, generation, default=missing)
+        if value is missing:
+            value = compute()
+            self.set(key, value, generation, ttl=ttl)
+        return value
 
     def clear(self):
-        self.cache.clear()
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        """Size and hit/miss/eviction counters, for the health endpoint."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else None,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "invalidations": self.invalidations,
+            }
@@ -19,6 +19,17 @@ TBL_REPO_HOTSPOTS = "repo_hotspots"
 TBL_FILE_HOTSPOTS = "file_hotspots"
 TBL_DEPENDENCY_DATA = "dependency_data"
 TBL_URL_CACHE = "url_cache"
+# Offline deps.dev data, created by migration 0009 (see kospex/depsdev_snapshot.py)
+TBL_DEPSDEV_SNAPSHOT = "depsdev_snapshot"
+TBL_DEPSDEV_ADVISORIES = "depsdev_snapshot_advisories"
+# Parsed dependency manifests, created by migration 0011 (see kospex/manifest_parsing.py)
+TBL_MANIFEST_CACHE = "manifest_cache"
+# The /supply-chain/ graph store, created by migration 0012 (see kospex/dependency_graph.py)
+TBL_DEPENDENCY_GRAPHS = "dependency_graphs"
+TBL_DEPENDENCY_GRAPH_NODES = "dependency_graph_nodes"
+# Activity rollups, created by migration 0013 (see kospex/activity_rollup.py)
+TBL_ACTIVITY_DAILY = "activity_daily"
+TBL_DEVELOPER_FILES = "developer_files"
 TBL_KRUNNER = "krunner"
 TBL_OBSERVATIONS = "observations"
 TBL_REPOS = "repos"
@@ -50,6 +61,9 @@ PACKAGE_USE_VALUES = frozenset({
 # KOSPEX_DB_VERSION will be updated every time we updated the schema
 KOSPEX_DB_VERSION=2
 KOSPEX_DB_VERSION_KEY = "KOSPEX_DB_VERSION_KEY"
+# Bumped by every sync that writes data; lets readers (kweb's result cache)
+# tell whether what they computed earlier is still current
+KOSPEX_DATA_GENERATION_KEY = "KOSPEX_DATA_GENERATION"
 # Version 1, we're drawing a line in the sand as of 2025-02-16
 
 # Table data structure inspired by Mergestat sync 'git-commits'
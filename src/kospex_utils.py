@@ -467,6 +467,24 @@ def days_ago_iso_date(days):
     start_date = (datetime.utcnow() - timedelta(days=days_ago)).isoformat()
     return start_date
 
+def epoch_seconds(when):
+    """
+    UTC epoch seconds of an ISO 8601 timestamp, as SQLite's strftime('%s') gives
+    it: the offset is applied, and a timestamp without one is taken as UTC.
+    None if when is empty or not a timestamp.
+    """
+    try:
+        parsed = datetime.fromisoformat(when)
+    except (TypeError, ValueError):
+        return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return int(parsed.timestamp())
+
+def days_ago_epoch(days):
+    """ Convert an integer 'days ago' to UTC epoch seconds, for the _*_epoch columns"""
+    return int(time.time()) - int(days) * 86400
+
 def date_days_ago(given_date, num_days):
     """
     This function takes a date and a number of days as input and returns the date
@@ -4,7 +4,6 @@ This is the kospex runner tool - run the same command or queries on all repos.
 """
 
 import glob
-import json
 import os
 import os.path
 import shlex
@@ -28,9 +27,13 @@ from kospex_dependencies import KospexDependencies
 from kospex_git import KospexGit
 from kospex_utils import KospexTimer
 from kospex.assessment_types import AssessmentTypes
+from kospex.deps_resolver import DEFAULT_WORKERS
 from kospex.db.migrator import warn_if_behind
 from kospex.extractors.workflows import extract_workflow_actions
-from kospex.extractors.pnpm import extract_pnpm_lock
+from kospex.file_scanner import find_files, grep_exclude_args
+from kospex.manifest_parsing import (
+    DEFAULT_PARSE_WORKERS, ManifestCache, ManifestTask, parse_manifests,
+)
 
 # Initialize Kospex environment with logging
 KospexUtils.init(create_directories=True, setup_logging=True, verbose=False)
@@ -585,11 +588,31 @@ def dependencies(csv):
 
 @cli.command("osi")
 @click.option("-all", is_flag=True, default=False, help="Show all opensource packages")
+@click.option(
+    "-workers", type=click.IntRange(min=1), default=DEFAULT_WORKERS,
+    help=f"Concurrent deps.dev requests. (Default: {DEFAULT_WORKERS})",
+)
+@click.option(
+    "-offline", is_flag=True, default=False,
+    help="Resolve only from the imported deps.dev snapshot, no HTTP. (See kospex depsdev-import)",
+)
+@click.option(
+    "-parse-workers", type=click.IntRange(min=1), default=DEFAULT_PARSE_WORKERS,
+    help=f"Processes parsing dependency files. (Default: {DEFAULT_PARSE_WORKERS})",
+)
+@click.option(
+    "-reparse", is_flag=True, default=False,
+    help="Parse every dependency file, ignoring the parsed-manifest cache. (Default: False)",
+)
+@click.option(
+    "-verbose", is_flag=True, default=False,
+    help="Print each parsed file's records, each deps.dev record and the lookup totals. "
+    "(Default: False)",
+)
 # @click.option('-save', is_flag=True, default=False, help="Save to kospex DB. (Default: False)")
 # @click.option('-csv', is_flag=True, default=False, help="Save to CSV file. (Default: False)")
-# @click.option('-verbose', is_flag=True, default=False, help="Verbose output. (Default: False)")
 @click.argument("request_id", required=False, type=click.STRING)
-def osi(all, request_id):
+def osi(all, workers, offline, parse_workers, reparse, verbose, request_id):
     """
     Run an opensource inventory process.
     Find all dependency files, extract their names and versions,
@@ -611,7 +634,8 @@ def osi(all, request_id):
 
     # Before we load all the data, let's check if the request_id is valid
     repos = KospexQuery().get_repos(request_id=request_id)
-    console.print(repos)
+    if verbose:
+        console.print(repos)
 
     # Check if the request_id is valid
     if not repos:
@@ -625,77 +649,44 @@ def osi(all, request_id):
     repos = memory_kq.get_repos(**params)
     results = []
 
-    kdeps = KospexDependencies(kospex_db=kospex.kospex_db, kospex_query=kospex.kospex_query)
+    kdeps = KospexDependencies(
+        kospex_db=kospex.kospex_db, kospex_query=kospex.kospex_query, offline=offline or None
+    )
 
+    # Collect every manifest first (DB reads stay in this process), then parse
+    # them in a process pool, streaming the records back in order. Manifests
+    # whose file_metadata hash is unchanged since the last run come from the
+    # manifest_cache and are not parsed again.
+    tasks = []
     for r in repos:
-        console.log(f"Running OSI on {r['_repo_id']} ...\n")
-        repo_req = {"repo_id": r["_repo_id"]}
-
-        # console.log(r)
-        deps = memory_kq.get_dependency_files(request_id=repo_req)
-
-        for d in deps:
-            console.print("tech_type:", d["tech_type"])
-            full_path = os.path.join(r["file_path"], d["Provider"])
-
-            if "requirements" in d["Provider"]:
-                console.print(f"Should parse requirements {d['Provider']}")
-                reqs = kdeps.parse_pip_requirements_file(full_path)
-                for req in reqs:
-                    req["_repo_id"] = r["_repo_id"]
-                    req["hash"] = d.get("hash")
-                    req["file_path"] = d["Provider"]
-                    req["requirements_type"] = "direct"
-                    req["extras"] = ""
-                    req["ecosystem"] = "PyPi"
-                    results.append(req)
-                console.log(reqs)
-
-            elif "pyproject" in d["Provider"]:
-                console.print(f"Should parse pyproject.toml {d['Provider']}")
-                reqs = kdeps.parse_pyproject_file(full_path)
-                for req in reqs:
-                    req["_repo_id"] = r["_repo_id"]
-                    req["hash"] = d.get("hash")
-                    req["file_path"] = d["Provider"]
-                    req["ecosystem"] = "PyPi"
-                    results.append(req)
-                console.log(reqs)
-
-            elif "package.json" in d["Provider"]:
-                console.print(f"Should parse package.json {d['Provider']}", style="blue")
-                try:
-                    reqs = kdeps.parse_package_json(file_path=full_path)
-                except (json.JSONDecodeError, OSError) as e:
-                    console.print(
-                        f"Skipping malformed package.json {d['Provider']}: {e}",
-                        style="yellow",
-                    )
-                    continue
-                for req in reqs:
-                    req["_repo_id"] = r["_repo_id"]
-                    req["hash"] = d.get("hash")
-                    req["file_path"] = d["Provider"]
-                    req["ecosystem"] = "NPM"
-                    results.append(req)
-                console.log(reqs)
-
-            elif "pnpm-lock.yaml" in d["Provider"]:
-                console.print(f"Should parse pnpm-lock.yaml {d['Provider']}", style="blue")
-                reqs = extract_pnpm_lock(full_path)
-                for req in reqs:
-                    req["_repo_id"] = r["_repo_id"]
-                    req["hash"] = d.get("hash")
-                    req["file_path"] = d["Provider"]
-                    req["ecosystem"] = "NPM"
-                    results.append(req)
-                console.log(reqs)
-
-            else:
-                console.print(f"Unsupported depdency {d['Provider']}", style="red")
+        deps = memory_kq.get_dependency_files(request_id={"repo_id": r["_repo_id"]})
+        if verbose:
+            console.log(f"{r['_repo_id']}: {len(deps)} dependency files")
+        tasks += [
+            ManifestTask(repo_id=r["_repo_id"], repo_path=r["file_path"],
+                         file_path=d["Provider"], hash=d.get("hash"))
+            for d in deps
+        ]
+
+    cache = ManifestCache(kospex.kospex_db, refresh=reparse)
+    console.log(f"Parsing {len(tasks)} dependency files ({parse_workers} workers)")
+    with KospexTimer("parsing dependency files") as parse_timer:
+        for parsed in parse_manifests(tasks, workers=parse_workers, cache=cache):
+            manifest = f"{parsed.task.repo_id} {parsed.task.file_path}"
+            if parsed.extractor is None:
+                console.print(f"Unsupported depdency {manifest}", style="red")
+            elif parsed.error:
+                console.print(f"Skipping malformed {manifest}: {parsed.error}", style="yellow")
+            elif verbose:
+                how = "Cached" if parsed.cached else f"Parsed in {parsed.seconds:.2f}s,"
+                console.print(f"{how} {parsed.extractor} {manifest}", style="blue")
+                console.log(parsed.records)
+            results.extend(parsed.records)
+    console.log(
+        f"{len(results)} dependencies from {cache.misses} parsed and {cache.hits} cached files, "
+        f"{parse_timer}"
+    )
 
-        # console.print(deps)
-        #
     # Canonical DB values, matching what `kospex sca`/assess() writes so
     # krunner osi rows reconcile with single-file scans rather than duplicating.
     eco_to_type = {"PyPi": "pypi", "NPM": "npm"}
@@ -705,14 +696,21 @@ def osi(all, request_id):
         "resolved": KospexSchema.PACKAGE_USE_TRANSITIVE,
     }
 
-    console.print(results)
-    for d in results:
-        deps_rec = kdeps.depsdev_record(
-            d["ecosystem"],
-            d["package_name"],
-            kdeps.clean_version_spec(d["package_version"]),
-        )
-        console.print(deps_rec)
+    # Look up each distinct (ecosystem, package, version) once, concurrently,
+    # then fan the records back out to every row that uses it.
+    keys = [
+        (d["ecosystem"], d["package_name"], kdeps.clean_version_spec(d["package_version"]))
+        for d in results
+    ]
+    console.log(f"Resolving {len(results)} dependencies with deps.dev ({workers} workers)")
+    records = kdeps.resolve_records(keys, workers=workers)
+    if verbose:
+        console.log(kdeps.resolver_stats.summary())
+
+    for d, key in zip(results, keys):
+        deps_rec = dict(records[key])
+        if verbose:
+            console.print(deps_rec)
         d["versions_behind"] = deps_rec.get("versions_behind")   # int or None, no "Unknown"
         d["advisories"] = deps_rec.get("advisories")
         d["resolution"] = deps_rec.get("resolution")
@@ -734,6 +732,8 @@ def osi(all, request_id):
     # repeat scans have current advisory data (not just the CSV exports below).
     written = kdeps.save_dependencies(results, source="krunner osi")
     console.log(f"Wrote {written} dependency rows to the kospex DB")
+    # Save any background url_cache refreshes before exiting
+    kospex.kospex_query.url_cache.flush(wait=True)
 
     # Determine scope based on -all flag or request_id
     if all:
@@ -853,25 +853,11 @@ def tenure(days, seen, csv):
     Show the tenure of developers
     """
 
-    results = []
-
-    # This will be the memory kospex query object
-    memory_kq = None
-
-    console.log("Loading data to in memory database ...")
-    with KospexTimer("Loading data to in memory database") as load_memory:
-        memory_kq = kospex.kospex_query.create_memory_kospex_query(["commits"])
-    console.log(f"Loaded tables to memory db {load_memory}")
-
-    console.log("Creating indexes ...")
-    with KospexTimer("creating indexes") as index_timer:
-        memory_kq.kospex_db["commits"].create_index(["committer_when"])
-    console.log(f"{index_timer}")
-
-    console.log("Creating indexes ...")
-    with KospexTimer("Calculating tenure") as memory_timer:
-        results = memory_kq.authors()
-    console.log(f"{memory_timer}")
+    # authors() reads the activity_daily rollup, so there is no need to copy
+    # the commits table to an in memory database first
+    with KospexTimer("Calculating tenure") as tenure_timer:
+        results = kospex.kospex_query.authors()
+    console.log(f"{tenure_timer}")
 
     # email, first_commit, last_commit, years_active, repos
 
@@ -1200,7 +1186,7 @@ def grep(keyword, directory):
     print("# repos: " + str(len(dirs)))
     for d in dirs:
         print("\nRepo: " + d)
-        _run_scanner(["grep", "-Rn", "-e", keyword, "."], cwd=d)
+        _run_scanner(["grep", "-Rn", *grep_exclude_args(), "-e", keyword, "."], cwd=d)
 
 
 @cli.command("todo")
@@ -1230,8 +1216,9 @@ def todo(save, directory):
         # means zero-or-more of the preceding space), and the missing path
         # operand relied on grep defaulting to '.' under -R. Excluding .git
         # keeps git's own shipped hook samples, which contain TODOs, out of the
-        # observations.
-        cmd = ["grep", "-Rn", "--exclude-dir=.git", "TODO", "."]
+        # observations, and the other directories file_scanner prunes keep
+        # vendored code's TODOs out too.
+        cmd = ["grep", "-Rn", *grep_exclude_args(), "TODO", "."]
         result = subprocess.run(
             cmd, cwd=d, capture_output=True, text=True
         ).stdout.split("\n")
@@ -1412,10 +1399,8 @@ def find_js_src():
     directory = "."
     print("\nDirectory: " + os.path.abspath(directory))
 
-    for root, _, files in os.walk(directory):
-        for file in files:
-            if file.endswith(".html") or file.endswith(".htm"):
-                KrunnerUtils.find_js_libraries(os.path.join(root, file))
+    for path in find_files([directory], "html"):
+        KrunnerUtils.find_js_libraries(path)
 
 
 if __name__ == "__main__":
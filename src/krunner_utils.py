@@ -9,6 +9,8 @@ import yaml
 from prettytable import PrettyTable
 from rich.table import Table
 
+from kospex.file_scanner import find_files
+
 # Error types recorded by RunErrors. Stable, kospex-level names - they appear in
 # the end-of-scan summary and in the krunner log, so keep them meaningful.
 MISSING_CLONE = "MISSING_CLONE"  # the repo's local clone is not on disk
@@ -103,25 +105,8 @@ def extract_grep_parameters(input_string):
 
 
 def find_dockerfiles_in_repos(repo_dirs):
-    """Find docker files in a list of repo directories"""
-
-    results_files = []
-
-    for rp in repo_dirs:
-        # Walk through the directory
-        for root, dirs, files in os.walk(rp):
-            for file in files:
-                # Check if the filename matches case insensitive options
-                lower_name = file.lower()
-                if lower_name == "dockerfile":
-                    # print("Dockerfile: " + os.path.join(d, file))
-                    results_files.append(os.path.join(root, file))
-
-                if lower_name.startswith("docker-compose"):
-                    # print("Dockerfile: " + os.path.join(d, file))
-                    results_files.append(os.path.join(root, file))
-
-    return results_files
+    """Find docker files (Dockerfile, docker-compose*) in a list of repo directories"""
+    return find_files(repo_dirs, "docker")
 
 
 def extract_js_version(url):
@@ -29,12 +29,21 @@ import kospex_utils as KospexUtils
 import kospex_web as KospexWeb
 from api_routes import router as api_router
 from kospex.db.migrator import warn_if_behind
+from kospex.db.read_pool import ReadConnectionPool
 from kospex_core import Kospex
-from kospex_query import KospexQuery
-from kospex_request_cache import RequestCache
 from kospex_utils import KospexTimer
+from kweb_db_executor import (
+    cached,
+    db_executor,
+    db_route,
+    network_executor,
+    network_route,
+    request_query,
+    result_cache,
+)
 from kweb_graph_service import GraphService
 from kweb_help_service import HelpService
+from kweb_package_jobs import PackageCheckJobs
 
 # Initialize Kospex environment
 KospexUtils.init(create_directories=True, setup_logging=True, verbose=False)
@@ -42,10 +51,6 @@ KospexUtils.init(create_directories=True, setup_logging=True, verbose=False)
 # Set up logging using centralized system
 logger = KospexUtils.get_kospex_logger("kweb2")
 
-# Used to cache DB results in memory
-request_cache = RequestCache()
-# structure
-# key: { data, last_updated}
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
@@ -58,6 +63,9 @@ async def lifespan(app: FastAPI):
 
     Once per server boot, not per request: the KospexQuery call sites would
     otherwise re-run ~19 CREATE TABLE IF NOT EXISTS statements each time.
+
+    With the schema in place, requests read through a pool of read-only
+    connections opened here, one per DB worker thread.
     """
     try:
         db = KospexSchema.connect_or_create_kospex_db()
@@ -67,11 +75,17 @@ async def lifespan(app: FastAPI):
                 "kospex DB is %s migration(s) behind - run `kospex upgrade-db -apply`",
                 pending,
             )
+        db_executor.attach_pool(
+            ReadConnectionPool(KospexUtils.get_kospex_db_path(), size=db_executor.max_workers)
+        )
     except Exception as exc:
         # Never prevent the server booting; the failure is visible in the log
         # and every request will report it anyway.
         logger.error("Could not initialise the kospex database at startup: %s", exc)
     yield
+    # Don't wait on a query that is still running past its timeout.
+    db_executor.shutdown(wait=False)
+    network_executor.shutdown(wait=False)
 
 
 # Initialize FastAPI app
@@ -101,7 +115,7 @@ templates = Jinja2Templates(directory=str(templates_dir))
 
 # Initialize services
 help_service = HelpService()
-graph_service = GraphService()
+graph_service = GraphService(query_factory=request_query)
 
 # Include API routes
 app.include_router(api_router)
@@ -173,16 +187,17 @@ async def custom_http_exception_handler(request: Request, exc: StarletteHTTPExce
 @app.get("/clear-cache")
 async def clear_cache(request: Request):
     """
-    Clear the cache the in-memory cache
+    Clear the in-memory result cache
     """
-    request_cache.clear()
+    result_cache.clear()
     return {"status": "ok"}
 
 
 @app.get("/", response_class=HTMLResponse)
 @app.get("/summary/", response_class=HTMLResponse)
 @app.get("/summary/{id}", response_class=HTMLResponse)
-async def summary(request: Request, id: Optional[str] = None):
+@db_route
+def summary(request: Request, id: Optional[str] = None):
     """Serve up the summary home page"""
     try:
         logger.info(f"Summary page requested with id: {id}")
@@ -191,14 +206,9 @@ async def summary(request: Request, id: Optional[str] = None):
 
         devs = None
         with KospexTimer("Loading load_developers") as dev_load:
-            if data := request_cache.get(
-                "summary:developers", KospexQuery().get_last_sync_datetime()
-            ):
-                print("Cache found")
-                devs = data
-            else:
-                devs = KospexQuery().developers(**params)
-                request_cache.set("summary:developers", devs)
+            devs = cached(
+                "summary:developers", params, lambda: request_query().developers(**params)
+            )
 
         print(dev_load)
 
@@ -214,7 +224,7 @@ async def summary(request: Request, id: Optional[str] = None):
                 dev_stats[f"{name}_percentage"] = round(percentage)
             result[name] = round(100 * (percentage / 100)) + 40
 
-        repos = KospexQuery().repos(**params)
+        repos = request_query().repos(**params)
         repo_stats = KospexUtils.count_key_occurrences(repos, "status")
 
         repo_sizes = {}
@@ -246,7 +256,8 @@ async def summary(request: Request, id: Optional[str] = None):
 
 @app.get("/summary2/", response_class=HTMLResponse)
 @app.get("/summary2/{id}", response_class=HTMLResponse)
-async def summary2(request: Request, id: Optional[str] = None):
+@db_route
+def summary2(request: Request, id: Optional[str] = None):
     """Serve up the summary home page with horizontal stacked bar visualization"""
     try:
         logger.info(f"Summary2 page requested with id: {id}")
@@ -255,14 +266,9 @@ async def summary2(request: Request, id: Optional[str] = None):
 
         devs = None
         with KospexTimer("Loading load_developers") as dev_load:
-            if data := request_cache.get(
-                "summary:developers", KospexQuery().get_last_sync_datetime()
-            ):
-                print("Cache found")
-                devs = data
-            else:
-                devs = KospexQuery().developers(**params)
-                request_cache.set("summary:developers", devs)
+            devs = cached(
+                "summary:developers", params, lambda: request_query().developers(**params)
+            )
 
         print(dev_load)
 
@@ -278,7 +284,7 @@ async def summary2(request: Request, id: Optional[str] = None):
                 dev_stats[f"{name}_percentage"] = round(percentage)
             result[name] = round(100 * (percentage / 100)) + 40
 
-        repos = KospexQuery().repos(**params)
+        repos = request_query().repos(**params)
         repo_stats = KospexUtils.count_key_occurrences(repos, "status")
 
         repo_sizes = {}
@@ -331,13 +337,14 @@ async def help_page(request: Request, id: Optional[str] = None):
 
 
 @app.get("/developers/active/{repo_id}", response_class=HTMLResponse)
-async def active_developers(request: Request, repo_id: str):
+@db_route
+def active_developers(request: Request, repo_id: str):
     """Developer info page."""
     try:
         logger.info(f"Active developers page requested for repo: {repo_id}")
 
-        data = KospexQuery().summary(days=90, repo_id=repo_id)
-        results = KospexQuery().active_devs_by_repo(repo_id)
+        data = request_query().summary(days=90, repo_id=repo_id)
+        results = request_query().active_devs_by_repo(repo_id)
 
         return templates.TemplateResponse(
             request, "developers.html", {"data": data, "authors": results}
@@ -351,7 +358,14 @@ async def active_developers(request: Request, repo_id: str):
 @app.get("/health")
 async def health_check():
     """Health check endpoint"""
-    return {"status": "healthy", "service": "kospex-web"}
+    return {
+        "status": "healthy",
+        "service": "kospex-web",
+        "db_executor": db_executor.stats(),
+        "network_executor": network_executor.stats(),
+        "result_cache": result_cache.stats(),
+        "package_jobs": package_jobs.stats(),
+    }
 
 
 @app.get("/generate-repo-id/")
@@ -372,12 +386,13 @@ async def generate_repo_id(url: str):
 
 
 @app.get("/servers/", response_class=HTMLResponse)
-async def servers(request: Request):
+@db_route
+def servers(request: Request):
     """Display Git server information."""
     try:
         logger.info("Servers page requested")
 
-        kquery = KospexQuery()
+        kquery = request_query()
         data = kquery.server_summary()
 
         return templates.TemplateResponse(request, "servers.html", {"data": data})
@@ -387,7 +402,8 @@ async def servers(request: Request):
 
 
 @app.get("/metadata/", response_class=HTMLResponse)
-async def metadata(request: Request):
+@db_route
+def metadata(request: Request):
     """Metadata about the kospex DB and repos."""
     try:
         logger.info("Metadata page requested")
@@ -395,17 +411,11 @@ async def metadata(request: Request):
         data = None
 
         with KospexTimer("Summary load") as summary_load:
-            if data := request_cache.get(
-                "metadata:summary", KospexQuery().get_last_sync_datetime()
-            ):
-                print("Cache found")
-            else:
-                data = KospexQuery().summary()
-                request_cache.set("metadata:summary", data)
+            data = cached("metadata:summary", {}, lambda: request_query().summary())
 
         print(summary_load)
 
-        # data = KospexQuery().summary()
+        # data = request_query().summary()
 
         return templates.TemplateResponse(request, "metadata.html", {**data})
     except Exception as e:
@@ -415,14 +425,15 @@ async def metadata(request: Request):
 
 @app.get("/metadata/repos/", response_class=HTMLResponse)
 @app.get("/metadata/repos/{id}", response_class=HTMLResponse)
-async def metadata_repos(request: Request, id: Optional[str] = None):
+@db_route
+def metadata_repos(request: Request, id: Optional[str] = None):
     """
     Display repository metadata information based on git commits and sync.
     """
     try:
         logger.info(f"Metadata repos page requested with id: {id}")
 
-        kquery = KospexQuery()
+        kquery = request_query()
         repos = kquery.get_repos()
 
         # import pprint as pp
@@ -442,13 +453,14 @@ async def metadata_repos(request: Request, id: Optional[str] = None):
 
 @app.get("/orphans/", response_class=HTMLResponse)
 @app.get("/orphans/{id}", response_class=HTMLResponse)
-async def orphans(request: Request, id: Optional[str] = None):
+@db_route
+def orphans(request: Request, id: Optional[str] = None):
     """Display orphan information"""
     try:
         logger.info(f"Orphans page requested with id: {id}")
 
         params = KospexWeb.get_id_params(id)
-        data = KospexQuery().get_orphans(id=params)
+        data = request_query().get_orphans(id=params)
 
         return templates.TemplateResponse(request, "orphans.html", {"data": data})
     except Exception as e:
@@ -506,19 +518,20 @@ async def bubble_treemap(request: Request, id: str):
 
 @app.get("/osi/", response_class=HTMLResponse)
 @app.get("/osi/{id}", response_class=HTMLResponse)
-async def osi(request: Request, id: Optional[str] = None):
+@db_route
+def osi(request: Request, id: Optional[str] = None):
     """Functions around an Open Source Inventory"""
     try:
         logger.info(f"OSI page requested with id: {id}")
 
         params = KospexWeb.get_id_params(id)
-        deps = KospexQuery().get_dependency_files(request_id=params)
+        deps = request_query().get_dependency_files(request_id=params)
 
         for file in deps:
             file["days_ago"] = KospexUtils.days_ago(file.get("committer_when"))
             file["status"] = KospexUtils.development_status(file.get("days_ago"))
 
-        extracted_keys = KospexQuery().extracted_dependency_file_keys(request_id=params)
+        extracted_keys = request_query().extracted_dependency_file_keys(request_id=params)
         deps, commentary = KospexWeb.osi_extraction_view(deps, extracted_keys)
 
         file_number = len(deps)
@@ -541,12 +554,13 @@ async def osi(request: Request, id: Optional[str] = None):
 
 
 @app.get("/collab/{repo_id}", response_class=HTMLResponse)
-async def collab(request: Request, repo_id: str):
+@db_route
+def collab(request: Request, repo_id: str):
     """Display repository collaboration information"""
     try:
         logger.info(f"Collaboration page requested for repo: {repo_id}")
 
-        kquery = KospexQuery()
+        kquery = request_query()
 
         collabs = kquery.get_collabs(repo_id=repo_id)
 
@@ -573,12 +587,13 @@ async def collab_graph(request: Request, repo_id: str):
 
 
 @app.get("/api/collab/graph/{repo_id}", response_class=JSONResponse)
-async def collab_graph_data(request: Request, repo_id: str):
+@db_route
+def collab_graph_data(request: Request, repo_id: str):
     """Return JSON data for collaboration network graph"""
     try:
         logger.info(f"Collaboration graph data requested for repo: {repo_id}")
 
-        kquery = KospexQuery()
+        kquery = request_query()
         collabs = kquery.get_collabs(repo_id=repo_id)
 
         return JSONResponse(content=collabs)
@@ -588,7 +603,8 @@ async def collab_graph_data(request: Request, repo_id: str):
 
 
 @app.get("/file-collab/{repo_id}/", response_class=HTMLResponse)
-async def file_collaboration(request: Request, repo_id: str):
+@db_route
+def file_collaboration(request: Request, repo_id: str):
     """Display file collaboration information"""
     try:
         logger.info(f"File collaboration page requested for repo: {repo_id}")
@@ -600,7 +616,7 @@ async def file_collaboration(request: Request, repo_id: str):
 
         logger.info(f"File collaboration requested for: {file_path}")
 
-        kquery = KospexQuery()
+        kquery = request_query()
         collaborators = kquery.get_file_collaborators(repo_id=repo_id, file_path=file_path)
 
         return templates.TemplateResponse(
@@ -618,7 +634,8 @@ async def file_collaboration(request: Request, repo_id: str):
 
 @app.get("/orgs/", response_class=HTMLResponse)
 @app.get("/orgs/{server}", response_class=HTMLResponse)
-async def orgs(request: Request, server: Optional[str] = None):
+@db_route
+def orgs(request: Request, server: Optional[str] = None):
     """Display organization information"""
     try:
         logger.info(f"Organizations page requested with server: {server}")
@@ -626,12 +643,7 @@ async def orgs(request: Request, server: Optional[str] = None):
         org = request.query_params.get("org")
         params = KospexWeb.get_id_params(server)
 
-        kospex = KospexQuery()
-        git_orgs = kospex.orgs()
-        active_devs = kospex.active_devs(org=True)
-
-        for row in git_orgs:
-            row["active_devs"] = active_devs.get(row["org_key"], 0)
+        git_orgs = cached("orgs", {}, lambda: request_query().orgs_with_active_devs())
 
         return templates.TemplateResponse(request, "orgs.html", {"data": git_orgs})
     except Exception as e:
@@ -640,11 +652,12 @@ async def orgs(request: Request, server: Optional[str] = None):
 
 
 @app.get("/recent/", response_class=HTMLResponse)
-async def recent_syncs(request: Request):
+@db_route
+def recent_syncs(request: Request):
     """Display recently synced repositories"""
     try:
         logger.info("Recent syncs view requested")
-        kospex = KospexQuery()
+        kospex = request_query()
 
         # TODO: Implement proper query for last 10 syncs
         # This is stubbed for now - will need to add database query for recent syncs
@@ -661,7 +674,8 @@ async def recent_syncs(request: Request):
 
 @app.get("/repos/", response_class=HTMLResponse)
 @app.get("/repos/{id}", response_class=HTMLResponse)
-async def repos(request: Request, id: Optional[str] = None):
+@db_route
+def repos(request: Request, id: Optional[str] = None):
     """Display repository information"""
     try:
         logger.info(f"Repositories page requested with id: {id}")
@@ -671,7 +685,7 @@ async def repos(request: Request, id: Optional[str] = None):
         org_key = request.query_params.get("org_key") or params.get("org_key")
         server = request.query_params.get("server") or params.get("server")
 
-        kospex = KospexQuery()
+        kospex = request_query()
 
         page = {}
         # TODO - validate params
@@ -725,7 +739,8 @@ async def repos(request: Request, id: Optional[str] = None):
 
 
 @app.get("/repo/{repo_id}", response_class=HTMLResponse)
-async def repo(request: Request, repo_id: str):
+@db_route
+def repo(request: Request, repo_id: str):
     """Display individual repository information"""
     try:
         logger.info(f"Repository view requested for repo: {repo_id}")
@@ -734,7 +749,7 @@ async def repo(request: Request, repo_id: str):
         if not parsed:
             raise HTTPException(status_code=404, detail="Repository not found")
 
-        kospex = KospexQuery()
+        kospex = request_query()
         commit_ranges = kospex.commit_ranges(repo_id)
         email_domains = kospex.email_domains(repo_id=repo_id)
         summary = kospex.author_summary(repo_id)
@@ -780,7 +795,8 @@ async def repo(request: Request, repo_id: str):
 
 
 @app.get("/org/{org_key}", response_class=HTMLResponse)
-async def org_view(request: Request, org_key: str):
+@db_route
+def org_view(request: Request, org_key: str):
     """Display individual organisation information (mirrors the repo view)."""
     try:
         logger.info(f"Organisation view requested for org_key: {org_key}")
@@ -789,7 +805,7 @@ async def org_view(request: Request, org_key: str):
         if not parsed:
             raise HTTPException(status_code=404, detail="Organisation not found")
 
-        kospex = KospexQuery()
+        kospex = request_query()
         commit_ranges = kospex.commit_ranges(org_key=org_key)
         techs = kospex.tech_landscape(org_key=org_key)
 
@@ -835,12 +851,13 @@ async def org_view(request: Request, org_key: str):
 
 
 @app.get("/key-person/{repo_id}", response_class=HTMLResponse)
-async def key_person(request: Request, repo_id: str):
+@db_route
+def key_person(request: Request, repo_id: str):
     """Display key person analysis for a repository"""
     try:
         logger.info(f"Key person view requested for repo: {repo_id}")
 
-        kospex = KospexQuery()
+        kospex = request_query()
 
         # Get commits summary data (same as repo view)
         commit_ranges = kospex.commit_ranges(repo_id)
@@ -868,17 +885,19 @@ async def key_person(request: Request, repo_id: str):
 
 @app.get("/landscape/", response_class=HTMLResponse)
 @app.get("/landscape/{id}", response_class=HTMLResponse)
-async def landscape(request: Request, id: Optional[str] = None):
+@db_route
+def landscape(request: Request, id: Optional[str] = None):
     """Serve up the technology landscape metadata"""
     try:
         logger.info(f"Technology landscape page requested with id: {id}")
 
-        kospex = KospexQuery()
-
         params = KospexWeb.get_id_params(id)
         repo_id = request.query_params.get("repo_id") or params.get("repo_id")
         org_key = request.query_params.get("org_key") or params.get("org_key")
-        data = kospex.tech_landscape(org_key=org_key, repo_id=repo_id)
+        data = cached(
+            "landscape", {"org_key": org_key, "repo_id": repo_id},
+            lambda: request_query().tech_landscape(org_key=org_key, repo_id=repo_id),
+        )
 
         download = request.query_params.get("download")
 
@@ -897,7 +916,8 @@ async def landscape(request: Request, id: Optional[str] = None):
 
 @app.get("/developers/", response_class=HTMLResponse)
 @app.get("/developers/{id}", response_class=HTMLResponse)
-async def developers(request: Request, id: Optional[str] = None):
+@db_route
+def developers(request: Request, id: Optional[str] = None):
     """Developer info page"""
     try:
         logger.info("Developers page requested")
@@ -909,14 +929,18 @@ async def developers(request: Request, id: Optional[str] = None):
         debug = locals()
         logger.info(debug)
 
-        devs = KospexQuery().authors(days=days, org_key=org_key)
+        filters = {"days": days, "org_key": org_key}
+        devs = cached(
+            "developers:authors", filters,
+            lambda: request_query().authors(days=days, org_key=org_key),
+        )
 
         if author_email:
             logger.info(f"Developer view requested for: {author_email}")
             # Github uses +, which get interpreted as a " " in the URL.
             author_email = author_email.replace(" ", "+")
-            repo_list = KospexQuery().repos_by_author(author_email)
-            techs = KospexQuery().author_tech(author_email=author_email)
+            repo_list = request_query().repos_by_author(author_email)
+            techs = request_query().author_tech(author_email=author_email)
             labels = []
             datapoints = []
 
@@ -945,7 +969,10 @@ async def developers(request: Request, id: Optional[str] = None):
         elif download:
             return download_csv_fastapi(devs, "developers.csv")
         else:
-            data = KospexQuery().summary(days=days, org_key=org_key)
+            data = cached(
+                "developers:summary", filters,
+                lambda: request_query().summary(days=days, org_key=org_key),
+            )
             return templates.TemplateResponse(
                 request, "developers.html", {"authors": devs, "data": data}
             )
@@ -986,90 +1013,102 @@ async def graph(request: Request, org_key: Optional[str] = None):
 @app.get("/org-graph/", response_class=JSONResponse)
 @app.get("/org-graph/{org_key}", response_class=JSONResponse)
 @app.get("/org-graph/{focus}/{org_key}", response_class=JSONResponse)
-async def org_graph(request: Request, org_key: Optional[str] = None, focus: Optional[str] = None):
+@db_route
+def org_graph(request: Request, org_key: Optional[str] = None, focus: Optional[str] = None):
     """Return JSON data for the force directed graph."""
     try:
         logger.info(f"Org graph data requested - focus: {focus}, org_key: {org_key}")
 
-        return graph_service.get_graph_data(focus, org_key, dict(request.query_params))
+        query_params = dict(request.query_params)
+        return cached(
+            "org-graph",
+            {"focus": focus, "org_key": org_key, "query": sorted(query_params.items())},
+            lambda: graph_service.get_graph_data(focus, org_key, query_params),
+        )
     except Exception as e:
         logger.error(f"Error in org_graph endpoint: {e}")
         raise HTTPException(status_code=500, detail="Internal server error")
 
 
-@app.get("/tenure/", response_class=HTMLResponse)
-@app.get("/tenure/{id}", response_class=HTMLResponse)
-async def tenure(request: Request, id: Optional[str] = None):
-    """
-    View developer tenure for all, a server, org or a repo
-    """
-    try:
-        logger.info(f"Tenure page requested with id: {id}")
+def _tenure_context(params):
+    """Tenure page data: developer counts, tenure stats and distributions."""
+    developers = request_query().developers(**params)
+    active_devs = []
+    dev_leavers = []
 
-        # TODO - CHECK THIS FOR SECURITY
-        params = KospexWeb.get_id_params(id)
-        developers = KospexQuery().developers(**params)
-        active_devs = []
-        dev_leavers = []
+    for entry in developers:
+        entry["tenure_status"] = KospexUtils.get_status(entry["tenure"])
+
+    for dev in developers:
+        if "Active" == dev.get("status"):
+            active_devs.append(dev)
+        else:
+            if KospexUtils.days_ago(dev["last_commit"]) < 365:
+                dev_leavers.append(dev)
 
-        for entry in developers:
-            entry["tenure_status"] = KospexUtils.get_status(entry["tenure"])
+    # Calculate developers who've left and the distribugion
+    for entry in dev_leavers:
+        entry["tenure_status"] = KospexUtils.get_status(entry["tenure"])
 
-        for dev in developers:
-            if "Active" == dev.get("status"):
-                active_devs.append(dev)
-            else:
-                if KospexUtils.days_ago(dev["last_commit"]) < 365:
-                    dev_leavers.append(dev)
+    leavers = KospexUtils.get_status_distribution(dev_leavers)
 
-        # Calculate developers who've left and the distribugion
-        for entry in dev_leavers:
-            entry["tenure_status"] = KospexUtils.get_status(entry["tenure"])
+    data = {}
 
-        leavers = KospexUtils.get_status_distribution(dev_leavers)
+    data["leavers"] = len(dev_leavers)
 
-        data = {}
+    data["developers"] = len(developers)
+    data["active_devs"] = len(active_devs)
 
-        data["leavers"] = len(dev_leavers)
+    days_values = [entry["tenure"] for entry in developers]
+    active_days_values = [entry["tenure"] for entry in active_devs]
 
-        data["developers"] = len(developers)
-        data["active_devs"] = len(active_devs)
+    commit_stats = request_query().get_activity_stats(params)
+    data["days_active"] = commit_stats.get("days_active")
+    data["years_active"] = commit_stats.get("years_active")
+    data["repos"] = commit_stats.get("repos")
+    data["commits"] = commit_stats.get("commits")
 
-        days_values = [entry["tenure"] for entry in developers]
-        active_days_values = [entry["tenure"] for entry in active_devs]
+    data |= KospexStats.tenure_stats(days_values)
 
-        commit_stats = KospexQuery().get_activity_stats(params)
-        data["days_active"] = commit_stats.get("days_active")
-        data["years_active"] = commit_stats.get("years_active")
-        data["repos"] = commit_stats.get("repos")
-        data["commits"] = commit_stats.get("commits")
+    # Holds the active stats
+    active_data = KospexStats.tenure_stats(active_days_values)
 
-        data |= KospexStats.tenure_stats(days_values)
+    distribution = KospexUtils.get_status_distribution(developers)
+    active_d = KospexUtils.get_status_distribution(active_devs)
 
-        # Holds the active stats
-        active_data = KospexStats.tenure_stats(active_days_values)
+    return {
+        "data": data,
+        "active_data": active_data,
+        "distribution": distribution,
+        "developers": developers,
+        "active_distribution": active_d,
+        "leavers": leavers,
+    }
 
-        distribution = KospexUtils.get_status_distribution(developers)
-        active_d = KospexUtils.get_status_distribution(active_devs)
 
-        return templates.TemplateResponse(
-            request, "tenure.html",
-            {
-                "data": data,
-                "active_data": active_data,
-                "distribution": distribution,
-                "developers": developers,
-                "active_distribution": active_d,
-                "leavers": leavers,
-            },
-        )
+@app.get("/tenure/", response_class=HTMLResponse)
+@app.get("/tenure/{id}", response_class=HTMLResponse)
+@db_route
+def tenure(request: Request, id: Optional[str] = None):
+    """
+    View developer tenure for all, a server, org or a repo
+    """
+    try:
+        logger.info(f"Tenure page requested with id: {id}")
+
+        # TODO - CHECK THIS FOR SECURITY
+        params = KospexWeb.get_id_params(id)
+        context = cached("tenure", params, lambda: _tenure_context(params))
+
+        return templates.TemplateResponse(request, "tenure.html", {**context})
     except Exception as e:
         logger.error(f"Error in tenure endpoint: {e}")
         raise HTTPException(status_code=500, detail="Internal server error")
 
 
 @app.get("/meta/author-domains", response_class=HTMLResponse)
-async def author_domains(request: Request):
+@db_route
+def author_domains(request: Request):
     """Display author email domain analysis"""
     try:
         logger.info("Author domains page requested")
@@ -1083,7 +1122,7 @@ async def author_domains(request: Request):
         else:
             days = None
 
-        kospex = KospexQuery()
+        kospex = request_query()
         email_domains = kospex.email_domains(days=days)
 
         return templates.TemplateResponse(
@@ -1112,13 +1151,14 @@ async def tech_change(request: Request):
 
 
 @app.get("/tech/{tech}", response_class=HTMLResponse)
-async def repo_with_tech(request: Request, tech: str):
+@db_route
+def repo_with_tech(request: Request, tech: str):
     """Show repositories with the given technology"""
     try:
         logger.info(f"Tech filtering page requested for technology: {tech}")
 
         repo_id = request.query_params.get("repo_id")
-        kospex = KospexQuery()
+        kospex = request_query()
         template = "repos-tech.html"
 
         if repo_id:
@@ -1138,7 +1178,8 @@ async def repo_with_tech(request: Request, tech: str):
 
 @app.get("/developer/", response_class=HTMLResponse)
 @app.get("/developer/{id}", response_class=HTMLResponse)
-async def developer_view(request: Request, id: Optional[str] = None):
+@db_route
+def developer_view(request: Request, id: Optional[str] = None):
     """
     View individual developer details
     """
@@ -1163,8 +1204,8 @@ async def developer_view(request: Request, id: Optional[str] = None):
         if author_email:
             author_email = author_email.replace(" ", "+")
 
-        repo_list = KospexQuery().repos_by_author(author_email)
-        techs = KospexQuery().author_tech(author_email=author_email)
+        repo_list = request_query().repos_by_author(author_email)
+        techs = request_query().author_tech(author_email=author_email)
         labels = []
         datapoints = []
 
@@ -1192,14 +1233,15 @@ async def developer_view(request: Request, id: Optional[str] = None):
 
 
 @app.get("/observation/{uuid}", response_class=HTMLResponse)
-async def observation(request: Request, uuid: str):
+@db_route
+def observation(request: Request, uuid: str):
     """
     Display observation information
     """
     try:
         logger.info(f"display single observations with uuid: {uuid}")
 
-        kquery = KospexQuery()
+        kquery = request_query()
 
         observation = kquery.get_single_observation(uuid=uuid)
 
@@ -1215,12 +1257,13 @@ async def observation(request: Request, uuid: str):
 
 
 @app.get("/observations/", response_class=HTMLResponse)
-async def observations(request: Request):
+@db_route
+def observations(request: Request):
     """Display observation information"""
     try:
         logger.info("Observations page requested")
 
-        kquery = KospexQuery()
+        kquery = request_query()
         repo_id = request.query_params.get("repo_id")
         observation_key = request.query_params.get("observation_key")
 
@@ -1259,7 +1302,8 @@ async def observations(request: Request):
 
 @app.get("/commits/", response_class=HTMLResponse)
 @app.get("/commits/{repo_id}", response_class=HTMLResponse)
-async def commits(request: Request, repo_id: Optional[str] = None):
+@db_route
+def commits(request: Request, repo_id: Optional[str] = None):
     """
     Display Git commit information
     """
@@ -1275,7 +1319,7 @@ async def commits(request: Request, repo_id: Optional[str] = None):
 
         logger.info(f"Author email: {author_email}")
 
-        data = KospexQuery().commits(
+        data = request_query().commits(
             limit=1000,
             repo_id=repo_id,
             author_email=author_email,
@@ -1291,20 +1335,21 @@ async def commits(request: Request, repo_id: Optional[str] = None):
 
 
 @app.get("/history/{repo_id}", response_class=HTMLResponse)
-async def commit_history(request: Request, repo_id: str):
+@db_route
+def commit_history(request: Request, repo_id: str):
     """Display commit history chart for a repository"""
     try:
         logger.info(f"Commit history page requested for repo: {repo_id}")
 
         # Get year data (always show)
-        year_data = KospexQuery().commit_history(repo_id, group_by='year')
+        year_data = request_query().commit_history(repo_id, group_by='year')
 
         # Get month data (optional, based on query param)
         show_monthly = request.query_params.get("monthly", "false") == "true"
-        month_data = KospexQuery().commit_history(repo_id, group_by='month') if show_monthly else []
+        month_data = request_query().commit_history(repo_id, group_by='month') if show_monthly else []
 
         # Get repo metadata for display
-        repo_info = KospexQuery().repos(repo_id=repo_id)
+        repo_info = request_query().repos(repo_id=repo_id)
         repo_name = repo_info[0].get('_git_repo', repo_id) if repo_info else repo_id
 
         return templates.TemplateResponse(
@@ -1324,13 +1369,14 @@ async def commit_history(request: Request, repo_id: str):
 
 @app.get("/dependencies/", response_class=HTMLResponse)
 @app.get("/dependencies/{id}", response_class=HTMLResponse)
-async def dependencies(request: Request, id: Optional[str] = None):
+@db_route
+def dependencies(request: Request, id: Optional[str] = None):
     """Display SCA (Software Composition Analysis) information"""
     try:
         logger.info(f"Dependencies page requested with id: {id}")
 
         params = KospexWeb.get_id_params(id)
-        data = KospexQuery().get_dependencies(request_id=params)
+        data = request_query().get_dependencies(request_id=params)
 
         return templates.TemplateResponse(request, "dependencies.html", {"data": data})
     except Exception as e:
@@ -1339,14 +1385,15 @@ async def dependencies(request: Request, id: Optional[str] = None):
 
 
 @app.get("/commit/{repo_id}/{commit_hash}", response_class=HTMLResponse)
-async def commit(request: Request, repo_id: str, commit_hash: str):
+@db_route
+def commit(request: Request, repo_id: str, commit_hash: str):
     """Display individual commit information"""
     try:
         logger.info(f"Commit page requested for repo: {repo_id}, hash: {commit_hash}")
 
-        data = KospexQuery().commit(repo_id=repo_id, commit_hash=commit_hash)
+        data = request_query().commit(repo_id=repo_id, commit_hash=commit_hash)
 
-        files = KospexQuery().commit_files(repo_id=repo_id, commit_hash=commit_hash)
+        files = request_query().commit_files(repo_id=repo_id, commit_hash=commit_hash)
 
         return templates.TemplateResponse(
             request, "commit.html",
@@ -1411,69 +1458,47 @@ async def package_check(request: Request):
         raise HTTPException(status_code=500, detail="Internal server error")
 
 
-@app.post("/package-check/upload", response_class=JSONResponse)
+def _assess_upload(path, progress):
+    """Runs as a package check job: assess the saved upload and label each item."""
+    dependencies = Kospex().dependencies
+    dependencies.progress = progress
+    results = dependencies.assess(path) or []
+    # Add status based on advisories, resolution and versions behind
+    for item in results:
+        item["status"] = _classify_upload_status(item)
+    return results
+
+
+package_jobs = PackageCheckJobs(_assess_upload)
+
+
+@app.post("/package-check/upload", response_class=JSONResponse, status_code=202)
 async def package_check_upload(file: UploadFile = File(...)):
-    """Handle file upload and analyze dependencies"""
-    try:
-        import os
-        import pprint
-        import tempfile
+    """Queue an uploaded dependency file for analysis and return the job.
 
+    Poll GET /package-check/jobs/{job_id} for progress and the results. The
+    same file uploaded again reuses its job (see kweb_package_jobs).
+    """
+    try:
         logger.info(f"Package upload requested for file: {file.filename}")
 
         if not file.filename:
             raise HTTPException(status_code=400, detail="No file selected")
 
         # Strip any directory components from the client-supplied filename before
-        # joining it onto our temp dir. os.path.join(dir, "/abs") discards dir and
-        # a "../" name traverses out, so the raw name is a path-traversal sink
-        # (CWE-22). basename keeps the meaningful part — assess() dispatches the
-        # parser off it (requirements.txt / package.json / pom.xml / ...).
+        # it is joined onto the job's temp dir. os.path.join(dir, "/abs") discards
+        # dir and a "../" name traverses out, so the raw name is a path-traversal
+        # sink (CWE-22). basename keeps the meaningful part — assess() dispatches
+        # the parser off it (requirements.txt / package.json / pom.xml / ...).
         safe_name = os.path.basename(file.filename)
         if not safe_name or safe_name in (".", ".."):
             raise HTTPException(status_code=400, detail="Invalid filename")
 
-        # Save the uploaded file temporarily
-        temp_dir = tempfile.mkdtemp()
-        temp_path = os.path.join(temp_dir, safe_name)
-
-        # Belt-and-braces: assert the destination stays under the temp dir, the
-        # same containment check clone_repo() uses for clone destinations.
-        if not Path(temp_path).resolve().is_relative_to(Path(temp_dir).resolve()):
-            raise HTTPException(status_code=400, detail="Invalid filename")
-
-        # Read and save file content
         content = await file.read()
-        with open(temp_path, "wb") as f:
-            f.write(content)
-
-        try:
-            # Analyze the file using KospexDependencies
-            kospex = Kospex()
-            results = kospex.dependencies.assess(temp_path)
-            print(results)
-
-            # Sort results by status
-            pprint.PrettyPrinter(indent=4).pprint(results)
+        job, reused = package_jobs.submit(safe_name, content)
+        logger.info(f"Package check job {job.id} for {safe_name} ({job.status}, reused={reused})")
 
-            # Clean up the temporary file
-            os.remove(temp_path)
-            os.rmdir(temp_dir)
-
-            # Add status based on advisories, resolution and versions behind
-            for item in results:
-                item["status"] = _classify_upload_status(item)
-
-            return JSONResponse(content=results)
-
-        except Exception as e:
-            # Clean up in case of error
-            if os.path.exists(temp_path):
-                os.remove(temp_path)
-            if os.path.exists(temp_dir):
-                os.rmdir(temp_dir)
-            logger.error(f"Error processing file: {e}")
-            raise HTTPException(status_code=500, detail=str(e))
+        return JSONResponse(status_code=202, content={**job.to_dict(), "reused": reused})
 
     except HTTPException:
         raise
@@ -1482,13 +1507,23 @@ async def package_check_upload(file: UploadFile = File(...)):
         raise HTTPException(status_code=500, detail="Internal server error")
 
 
+@app.get("/package-check/jobs/{job_id}", response_class=JSONResponse)
+async def package_check_job(job_id: str):
+    """A package check job's status and progress, and its results once done."""
+    job = package_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Unknown or expired job")
+    return JSONResponse(content=job.to_dict())
+
+
 @app.get("/hotspots/{repo_id}", response_class=HTMLResponse)
-async def hotspots(request: Request, repo_id: str):
+@db_route
+def hotspots(request: Request, repo_id: str):
     """Display code hotspots analysis for a repository"""
     try:
         logger.info(f"Hotspots page requested for repo: {repo_id}")
 
-        data = KospexQuery().hotspots(repo_id=repo_id)
+        data = request_query().hotspots(repo_id=repo_id)
 
         return templates.TemplateResponse(request, "hotspots.html", {"data": data})
     except Exception as e:
@@ -1498,14 +1533,15 @@ async def hotspots(request: Request, repo_id: str):
 
 @app.get("/files/repo/", response_class=HTMLResponse)
 @app.get("/files/repo/{repo_id}", response_class=HTMLResponse)
-async def repo_files(request: Request, repo_id: Optional[str] = None):
+@db_route
+def repo_files(request: Request, repo_id: Optional[str] = None):
     """Show file metadata for a repository"""
     try:
         logger.info(f"Repository files page requested for repo: {repo_id}")
 
         data = None
         if repo_id:
-            data = KospexQuery().repo_files(repo_id=repo_id)
+            data = request_query().repo_files(repo_id=repo_id)
 
         return templates.TemplateResponse(request, "files.html", {"data": data})
     except Exception as e:
@@ -1514,7 +1550,8 @@ async def repo_files(request: Request, repo_id: Optional[str] = None):
 
 
 @app.get("/supply-chain/", response_class=HTMLResponse)
-async def supply_chain(request: Request):
+@network_route
+def supply_chain(request: Request):
     """
     Display supply chain analysis - either a search form or visualization.
     If no package parameter is provided, shows a search form.
@@ -1526,8 +1563,6 @@ async def supply_chain(request: Request):
     - Red: Has malware or older than 2 years
     """
     try:
-        import json
-
         logger.info("Supply chain page requested")
 
         package = request.query_params.get("package")
@@ -1578,7 +1613,8 @@ async def supply_chain(request: Request):
                 ecosystem=ecosystem.strip(),
             )
             logger.info(
-                f"Retrieved data for {package}: {json.dumps(data, indent=3) if data else 'No data'}"
+                f"Retrieved data for {package}: "
+                f"{len(data.get('nodes') or []) if data else 'No data'} nodes"
             )
 
         except Exception as e:
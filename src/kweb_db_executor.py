@@ -0,0 +1,214 @@
+"""Run kweb's blocking database work off the asyncio event loop.
+
+kweb routes are ``async def`` but KospexQuery is synchronous sqlite3. Called
+directly from a route, one slow aggregation (``/developers/``, ``/tenure/``)
+blocks the event loop and every other request on the uvicorn worker waits
+behind it.
+
+DBExecutor runs that work on a small dedicated thread pool instead, with a
+per-request timeout. A request whose work overruns gets a 504; the loop is
+free the whole time. A connection is only ever used by the thread that
+checked it out.
+
+Usage - write the route body as a plain (sync) function::
+
+    @app.get("/developers/")
+    @db_route
+    def developers(request: Request, id: Optional[str] = None):
+        return templates.TemplateResponse(...)
+
+or, inside a route that must stay async (e.g. it awaits an upload)::
+
+    data = await db_executor.run(lambda: request_query().developers(**params))
+
+Pool size and timeout come from HabitatConfig (KOSPEX_WEB_DB_WORKERS,
+KOSPEX_WEB_QUERY_TIMEOUT).
+
+Routes that wait on the network rather than the database (the deps.dev graph
+behind ``/supply-chain/``) use ``@network_route`` instead: its own threads,
+with a longer timeout and no pooled read connection, so a cold, minutes-long
+graph build never holds one of the DB workers the SQL routes are queued for.
+
+Once a ReadConnectionPool is attached (kweb2's lifespan does this), each call
+checks out one read-only connection on its worker thread for its whole
+duration, and request_query() inside it returns a KospexQuery bound to that
+connection - no per-query connect or KospexUtils.init(). Without a pool,
+request_query() falls back to a plain KospexQuery().
+
+Expensive results can be memoised across requests with cached(), which keys
+them by route and parameters and drops them once a sync bumps the data
+generation (see kospex_request_cache.ResultCache)::
+
+    data = cached("landscape", {"org_key": org_key},
+                  lambda: request_query().tech_landscape(org_key=org_key))
+"""
+
+import asyncio
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from fastapi import HTTPException
+
+import kospex_utils as KospexUtils
+from kospex.habitat_config import HabitatConfig
+from kospex_query import KospexQuery
+from kospex_request_cache import ResultCache
+
+logger = KospexUtils.get_kospex_logger("kweb_db_executor")
+
+# The pooled connection checked out by the current worker thread, if any
+_checked_out = threading.local()
+
+
+class DBExecutor:
+    """A bounded thread pool for blocking database calls, with timeouts.
+
+    The pool is created on first use, so importing kweb never starts threads
+    and settings are read after KOSPEX_* environment overrides are in place.
+    """
+
+    def __init__(self, max_workers=None, timeout=None, name="kweb-db"):
+        self._max_workers = max_workers
+        self._timeout = timeout
+        self.name = name
+        self._pool = None
+        self._lock = threading.Lock()
+        self.read_pool = None
+        self.in_flight = 0
+        self.completed = 0
+        self.timeouts = 0
+
+    @property
+    def max_workers(self):
+        return self._max_workers or HabitatConfig.get_instance().web_db_workers
+
+    @property
+    def timeout(self):
+        return self._timeout or HabitatConfig.get_instance().web_query_timeout
+
+    def _executor(self):
+        with self._lock:
+            if self._pool is None:
+                self._pool = ThreadPoolExecutor(
+                    max_workers=self.max_workers, thread_name_prefix=self.name
+                )
+            return self._pool
+
+    async def run(self, func, *args, timeout=None, **kwargs):
+        """Await ``func(*args, **kwargs)`` run on the pool.
+
+        Raises HTTPException(504) if it has not finished within ``timeout``
+        seconds (default: the configured query timeout). A timed-out call
+        cannot be interrupted; its thread finishes the query and is then
+        reused, and the client is answered immediately.
+        """
+        timeout = timeout or self.timeout
+        loop = asyncio.get_running_loop()
+        call = functools.partial(self._call, func, args, kwargs)
+
+        self.in_flight += 1
+        try:
+            return await asyncio.wait_for(
+                loop.run_in_executor(self._executor(), call), timeout
+            )
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            name = getattr(func, "__qualname__", repr(func))
+            logger.error(f"{name} exceeded the {timeout}s {self.name} timeout")
+            raise HTTPException(status_code=504, detail="Request timed out") from None
+        finally:
+            self.in_flight -= 1
+            self.completed += 1
+
+    def _call(self, func, args, kwargs):
+        """Runs on a pool thread: bind a pooled connection, if any, for the call."""
+        if self.read_pool is None:
+            return func(*args, **kwargs)
+        with self.read_pool.connection() as db:
+            _checked_out.db = db
+            try:
+                return func(*args, **kwargs)
+            finally:
+                _checked_out.db = None
+
+    def attach_pool(self, read_pool):
+        """Serve request_query() from ``read_pool`` (a ReadConnectionPool)."""
+        self.read_pool = read_pool
+
+    def route(self, func):
+        """Decorator: turn a sync route function into an async one run on the pool.
+
+        The wrapper keeps the wrapped function's signature (via __wrapped__),
+        so FastAPI still sees its path, query and Request parameters.
+        """
+
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            return await self.run(func, *args, **kwargs)
+
+        return wrapper
+
+    def stats(self):
+        """Pool settings and counters, for the health endpoint."""
+        return {
+            "workers": self.max_workers,
+            "timeout_seconds": self.timeout,
+            "in_flight": self.in_flight,
+            "completed": self.completed,
+            "timeouts": self.timeouts,
+            "read_pool": self.read_pool.stats() if self.read_pool else None,
+        }
+
+    def shutdown(self, wait=True):
+        """Stop the pool and close the read pool, if attached; a later call
+        to run() starts a fresh thread pool."""
+        with self._lock:
+            pool, self._pool = self._pool, None
+            read_pool, self.read_pool = self.read_pool, None
+        if pool:
+            pool.shutdown(wait=wait, cancel_futures=True)
+        if read_pool:
+            read_pool.close()
+
+
+def request_query():
+    """A KospexQuery for the current request.
+
+    Inside db_executor work with a read pool attached, it uses the connection
+    checked out for this request and skips KospexUtils.init(); otherwise it is
+    a plain KospexQuery().
+    """
+    db = getattr(_checked_out, "db", None)
+    if db is None:
+        return KospexQuery()
+    return KospexQuery(kospex_db=db, init_env=False)
+
+
+def cached(route, params, compute, ttl=None):
+    """compute()'s result for route+params, from result_cache when still current.
+
+    Reads the data generation on every call (a primary key lookup), so results
+    computed before the latest sync are never served. The value is shared
+    between requests - do not mutate it.
+    """
+    generation = request_query().get_data_generation()
+    return result_cache.get_or_compute(route, params, generation, compute, ttl=ttl)
+
+
+def _new_result_cache():
+    config = HabitatConfig.get_instance()
+    return ResultCache(max_entries=config.web_cache_entries, ttl=config.web_cache_ttl)
+
+
+db_executor = DBExecutor()
+db_route = db_executor.route
+
+# Threads and timeout for routes bound on HTTP calls (see the module docstring)
+NETWORK_WORKERS = 2
+NETWORK_TIMEOUT = 300
+network_executor = DBExecutor(
+    max_workers=NETWORK_WORKERS, timeout=NETWORK_TIMEOUT, name="kweb-network"
+)
+network_route = network_executor.route
+result_cache = _new_result_cache()
@@ -11,8 +11,14 @@ import kospex_email as KospexEmail
 class GraphService:
     """Service class for generating graph data for visualizations."""
 
-    def __init__(self):
-        self.query = KospexQuery()
+    def __init__(self, query_factory=KospexQuery):
+        # A factory rather than one KospexQuery: kweb serves requests from
+        # several threads and a sqlite3 connection belongs to one of them.
+        self._query_factory = query_factory
+
+    @property
+    def query(self):
+        return self._query_factory()
 
     def get_graph_data(self, focus=None, org_key=None, request_args=None):
         """
@@ -0,0 +1,178 @@
+"""Background jobs for /package-check/ uploads.
+
+Assessing an uploaded manifest resolves every declared package against
+deps.dev, which can take minutes for a large package.json. The upload route
+therefore only queues a PackageCheckJob and returns its id. The job runs on a
+small thread pool of its own (not kweb's DB executor, whose timeout is sized
+for queries) and the page polls GET /package-check/jobs/{id} for progress and,
+once done, the results.
+
+Jobs are keyed by the upload's content hash and file name (the name picks the
+parser). Uploading the same file again while its job is queued or running
+returns that job, and once it is done returns the finished results for
+``ttl`` seconds without assessing it again. A failed job is not reused.
+
+Jobs live in memory, at most ``max_jobs`` of them, oldest finished first out.
+Safe to share between threads.
+"""
+import hashlib
+import os
+import shutil
+import tempfile
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Optional
+
+import kospex_utils as KospexUtils
+
+logger = KospexUtils.get_kospex_logger("kweb_package_jobs")
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+DEFAULT_WORKERS = 2
+DEFAULT_MAX_JOBS = 200
+DEFAULT_TTL = 3600.0  # as long as url_cache keeps a deps.dev package document
+
+
+@dataclass
+class PackageCheckJob:
+    """One upload being assessed."""
+
+    id: str
+    filename: str
+    content_hash: str
+    status: str = QUEUED
+    created_at: float = 0.0
+    finished_at: Optional[float] = None
+    done: int = 0  # deps.dev lookups answered
+    total: int = 0  # deps.dev lookups needed, 0 until known
+    results: list = field(default_factory=list)
+    error: str = ""
+
+    def progress(self, done, total):
+        """Progress callback for KospexDependencies.progress."""
+        self.done, self.total = done, total
+
+    def to_dict(self):
+        """The job as the JSON the page polls for. results only once done."""
+        data = {
+            "job_id": self.id,
+            "filename": self.filename,
+            "status": self.status,
+            "done": self.done,
+            "total": self.total,
+        }
+        if self.status == DONE:
+            data["results"] = self.results
+        if self.status == FAILED:
+            data["error"] = self.error
+        return data
+
+
+class PackageCheckJobs:
+    """Queue uploads for ``assess(path, progress)`` and keep the outcomes.
+
+    ``assess`` runs on a pool thread with the upload saved under its own name
+    in a temporary directory, and returns the list of result items.
+    """
+
+    def __init__(self, assess, workers=DEFAULT_WORKERS, max_jobs=DEFAULT_MAX_JOBS,
+                 ttl=DEFAULT_TTL, clock=time.monotonic):
+        if workers < 1:
+            raise ValueError(f"workers must be >= 1, got {workers}")
+        self.assess = assess
+        self.workers = workers
+        self.max_jobs = max_jobs
+        self.ttl = ttl
+        self._clock = clock
+        self._jobs = OrderedDict()
+        self._by_key = {}
+        self._lock = threading.Lock()
+        self._pool = None
+        self.reused = 0
+
+    @staticmethod
+    def key(filename, content):
+        """The reuse key of an upload: its file name and content hash."""
+        return filename, hashlib.sha256(content).hexdigest()
+
+    def submit(self, filename, content):
+        """Queue ``content`` (bytes) saved as ``filename``, a bare file name.
+
+        Returns (job, reused). A queued, running or fresh finished job for the
+        same file and content is returned instead of a new one.
+        """
+        key = self.key(filename, content)
+        with self._lock:
+            job = self._jobs.get(self._by_key.get(key))
+            if job is not None and self._reusable(job):
+                self.reused += 1
+                return job, True
+
+            job = PackageCheckJob(id=uuid.uuid4().hex, filename=filename,
+                                  content_hash=key[1], created_at=self._clock())
+            self._jobs[job.id] = job
+            self._by_key[key] = job.id
+            self._evict()
+            if self._pool is None:
+                self._pool = ThreadPoolExecutor(
+                    max_workers=self.workers, thread_name_prefix="kweb-package-check"
+                )
+            self._pool.submit(self._run, job, content)
+        return job, False
+
+    def get(self, job_id):
+        """The job, or None if unknown or evicted."""
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def _reusable(self, job):
+        if job.status in (QUEUED, RUNNING):
+            return True
+        return job.status == DONE and self._clock() - job.finished_at < self.ttl
+
+    def _evict(self):
+        """Drop the oldest finished jobs beyond max_jobs. Called with the lock held."""
+        finished = [job for job in self._jobs.values() if job.status in (DONE, FAILED)]
+        for job in finished[:max(0, len(self._jobs) - self.max_jobs)]:
+            del self._jobs[job.id]
+            key = (job.filename, job.content_hash)
+            if self._by_key.get(key) == job.id:
+                del self._by_key[key]
+
+    def _run(self, job, content):
+        job.status = RUNNING
+        temp_dir = tempfile.mkdtemp()
+        try:
+            path = os.path.join(temp_dir, job.filename)
+            # The route passes a bare file name, this keeps the write in temp_dir
+            if not Path(path).resolve().is_relative_to(Path(temp_dir).resolve()):
+                raise ValueError(f"Invalid filename {job.filename!r}")
+            with open(path, "wb") as f:
+                f.write(content)
+            results = self.assess(path, job.progress) or []
+        except Exception as e:
+            logger.error(f"package check job {job.id} ({job.filename}) failed: {e}")
+            job.error, status = str(e), FAILED
+        else:
+            job.results, status = results, DONE
+        finally:
+            shutil.rmtree(temp_dir, ignore_errors=True)
+        job.finished_at = self._clock()
+        job.status = status
+
+    def stats(self):
+        """Job counts by status, for the health endpoint."""
+        with self._lock:
+            counts = {status: 0 for status in (QUEUED, RUNNING, DONE, FAILED)}
+            for job in self._jobs.values():
+                counts[job.status] += 1
+        return {"workers": self.workers, "jobs": counts, "reused": self.reused}
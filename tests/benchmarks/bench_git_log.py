@@ -0,0 +1,104 @@
+"""Microbenchmark: kospex.git_log.parse_git_log versus the old line parser.
+
+Generates a synthetic history in memory (no git, no disk) in both output
+formats and times parsing each. The "legacy" parser is the line-based
+`--numstat` loop that Kospex.sync_repo and GitIngest._extract_commits each
+used to carry, reduced to its parsing work, kept here as the baseline.
+
+    python tests/benchmarks/bench_git_log.py [commits] [files_per_commit]
+"""
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "src"))
+
+import kospex_utils as KospexUtils  # noqa: E402
+from kospex.git_log import FIELD_SEP, RECORD_SEP, parse_git_log  # noqa: E402
+
+AUTHORS = [f"dev{n}@example.com" for n in range(50)]
+DIRS = ["src", "src/core", "tests", "docs", "web/static/js"]
+EXTS = [".py", ".js", ".md", ".html", ".json", ""]
+
+
+def synthetic_history(commits, files_per_commit, seed=1):
+    """Return (legacy_lines, z_tokens) describing the same history."""
+    rnd = random.Random(seed)
+    lines, tokens = [], []
+    for n in range(commits):
+        email = rnd.choice(AUTHORS)
+        when = f"2025-01-01T00:00:{n % 60:02d}+10:00"
+        fields = [f"{n:040x}", f"{n + 1:040x}", when, when, "Dev", email, "Dev", email, "msg"]
+        lines.append("#".join([fields[0], when, when, "Dev", email, "Dev", email]))
+        header = RECORD_SEP + FIELD_SEP.join(fields)
+        for i in range(files_per_commit):
+            path = f"{rnd.choice(DIRS)}/file{rnd.randrange(500)}{rnd.choice(EXTS)}"
+            entry = f"{rnd.randrange(50)}\t{rnd.randrange(50)}\t{path}"
+            lines.append(entry)
+            if i == 0:
+                tokens.append(header + "\n" + entry)
+            else:
+                tokens.append(entry)
+        if not files_per_commit:
+            tokens.append(header)
+        lines.append("")
+        tokens.append("")
+    return lines, tokens
+
+
+def legacy_parse(lines):
+    """The former per-sink line parser: split, detect renames, build dicts."""
+    commits = []
+    commit = {}
+    for line in lines:
+        if line:
+            if "\t" in line and len(line.split("\t")) == 3:
+                additions, deletions, filename = line.split("\t")
+                if "=>" in filename:
+                    fpath = KospexUtils.parse_git_rename_event(filename)
+                else:
+                    fpath = filename
+                commit["filenames"].append({
+                    "file_path": fpath,
+                    "additions": int(additions) if additions != "-" else 0,
+                    "deletions": int(deletions) if deletions != "-" else 0,
+                    "_ext": KospexUtils.get_extension(fpath),
+                })
+            elif "#" in line:
+                if commit:
+                    commits.append(commit)
+                parts = line.split("#", 6)
+                commit = {"hash": parts[0], "author_email": parts[4].lower(), "filenames": []}
+        else:
+            if commit:
+                commits.append(commit)
+            commit = {}
+    return commits
+
+
+def timed(label, func, commits, files):
+    start = time.perf_counter()
+    func()
+    elapsed = time.perf_counter() - start
+    print(f"{label:<24} {elapsed * 1000:9.1f} ms  "
+          f"{commits / elapsed:12,.0f} commits/s  {files / elapsed:12,.0f} files/s")
+    return elapsed
+
+
+def main():
+    commits = int(sys.argv[1]) if len(sys.argv) > 1 else 50_000
+    per_commit = int(sys.argv[2]) if len(sys.argv) > 2 else 8
+    files = commits * per_commit
+    lines, tokens = synthetic_history(commits, per_commit)
+
+    print(f"{commits:,} commits, {files:,} file changes")
+    legacy = timed("legacy line parser", lambda: legacy_parse(lines), commits, files)
+    # Drain the generator without keeping the records, as sync_repo does.
+    shared = timed("kospex.git_log -z", lambda: sum(1 for _ in parse_git_log(tokens)),
+                   commits, files)
+    print(f"speed-up: {legacy / shared:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
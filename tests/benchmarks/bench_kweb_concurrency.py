@@ -0,0 +1,143 @@
+"""Benchmark: kweb latency under concurrent load, DB work on the pool vs inline.
+
+Builds a synthetic kospex DB in a throwaway KOSPEX_HOME, then drives the
+heaviest pages (/developers/, /tenure/, /summary/, /repos/) concurrently
+through kweb2's ASGI app while a stream of light /health probes measures how
+responsive the event loop stays. It runs twice:
+
+* pool   - DB work on kweb_db_executor's thread pool (what kweb2 does)
+* inline - the same route bodies called directly on the event loop (before)
+
+and prints p50/p99 latency for each page and for the probes, plus the wall
+time for the whole run. Inline, the benchmark client shares the blocked event
+loop, so per-page timings there leave out queueing: compare wall time, and
+how many /health probes got answered at all.
+
+    python tests/benchmarks/bench_kweb_concurrency.py [commits] [concurrency]
+"""
+import asyncio
+import os
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "src"))
+
+HEAVY_PAGES = ["/developers/", "/tenure/", "/summary/", "/repos/"]
+ROUNDS = 5
+
+
+def build_db(commits, seed=1):
+    """Fill the kospex DB with a synthetic multi-repo history."""
+    import kospex_schema as KospexSchema
+
+    rnd = random.Random(seed)
+    db = KospexSchema.connect_or_create_kospex_db()
+    repos = [("github.com", f"org{n % 5}", f"repo{n}") for n in range(40)]
+    authors = [f"dev{n}@example.com" for n in range(300)]
+    commit_rows, file_rows = [], []
+    for n in range(commits):
+        server, owner, repo = rnd.choice(repos)
+        repo_id = f"{server}~{owner}~{repo}"
+        when = f"202{rnd.randrange(6)}-{rnd.randrange(1, 13):02d}-{rnd.randrange(1, 28):02d}T10:00:00+00:00"
+        email = rnd.choice(authors)
+        git = {"_git_server": server, "_git_owner": owner, "_git_repo": repo, "_repo_id": repo_id}
+        commit_rows.append({"hash": f"{n:040x}", "author_when": when, "committer_when": when,
+                            "author_email": email, "committer_email": email,
+                            "author_name": "Dev", "committer_name": "Dev", "_files": 2, **git})
+        for f in range(2):
+            file_rows.append({"hash": f"{n:040x}", "file_path": f"src/f{rnd.randrange(100)}_{f}.py",
+                              "additions": 3, "deletions": 1, "_ext": "py",
+                              "committer_when": when, **git})
+    db[KospexSchema.TBL_COMMITS].insert_all(commit_rows, batch_size=5000)
+    db[KospexSchema.TBL_COMMIT_FILES].insert_all(file_rows, batch_size=5000)
+    db[KospexSchema.TBL_REPOS].insert_all(
+        [{"_repo_id": f"{s}~{o}~{r}", "_git_server": s, "_git_owner": o, "_git_repo": r,
+          "file_path": f"/code/{r}", "last_sync": "2025-06-01T00:00:00+00:00"}
+         for s, o, r in repos], replace=True)
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+async def drive(app, concurrency):
+    import httpx
+
+    transport = httpx.ASGITransport(app=app)
+    latencies = {page: [] for page in HEAVY_PAGES + ["/health"]}
+    stop = asyncio.Event()
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=120) as client:
+        async def timed(page):
+            start = time.perf_counter()
+            response = await client.get(page)
+            latencies[page].append(time.perf_counter() - start)
+            if response.status_code != 200:
+                raise RuntimeError(f"{page} -> {response.status_code}")
+
+        async def heavy_worker(offset):
+            for n in range(ROUNDS):
+                await timed(HEAVY_PAGES[(offset + n) % len(HEAVY_PAGES)])
+
+        async def prober():
+            while not stop.is_set():
+                await timed("/health")
+                await asyncio.sleep(0.01)
+
+        start = time.perf_counter()
+        probe = asyncio.create_task(prober())
+        await asyncio.gather(*(heavy_worker(n) for n in range(concurrency)))
+        stop.set()
+        await probe
+        latencies["wall"] = [time.perf_counter() - start]
+    return latencies
+
+
+def report(label, latencies):
+    wall = latencies.pop("wall")[0]
+    heavy = sum(len(latencies[p]) for p in HEAVY_PAGES)
+    print(f"\n{label}: {wall:.2f}s wall, {heavy / wall:.1f} heavy pages/sec")
+    print(f"  {'page':<14}{'n':>5}{'p50 ms':>10}{'p99 ms':>10}")
+    for page, values in latencies.items():
+        if values:
+            print(f"  {page:<14}{len(values):>5}"
+                  f"{percentile(values, 50) * 1000:>10.1f}{percentile(values, 99) * 1000:>10.1f}")
+
+
+def main():
+    commits = int(sys.argv[1]) if len(sys.argv) > 1 else 50_000
+    concurrency = int(sys.argv[2]) if len(sys.argv) > 2 else 8
+
+    home = tempfile.mkdtemp(prefix="kweb-bench-")
+    os.environ["KOSPEX_HOME"] = home
+    os.environ.pop("KOSPEX_DB", None)
+    from kospex.habitat_config import HabitatConfig
+    HabitatConfig.reset_instance()
+
+    build_db(commits)
+    import kweb2
+
+    print(f"{commits} commits, {concurrency} concurrent clients x {ROUNDS} heavy pages each")
+
+    pool = asyncio.run(drive(kweb2.app, concurrency))
+    kweb2.db_executor.shutdown()
+
+    async def inline(func, *args, timeout=None, **kwargs):
+        return func(*args, **kwargs)
+
+    kweb2.db_executor.run = inline
+    blocking = asyncio.run(drive(kweb2.app, concurrency))
+
+    report("pool   (DB work on kweb_db_executor)", pool)
+    report("inline (DB work on the event loop)", blocking)
+    print(f"\n/health while loaded: pool answered {len(pool['/health'])} probes "
+          f"(p99 {percentile(pool['/health'], 99) * 1000:.1f} ms), "
+          f"inline answered {len(blocking['/health'])}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""Benchmark: developers() recency fields per row in Python versus in SQL.
+
+Builds an activity_daily rollup for [authors] authors (default 20,000) over
+[days] days each (default 5) in a throwaway SQLite file, then produces the
+developers() rows - status, tenure and years_active from each author's first
+and last commit - three ways:
+
+* per-row      - KospexUtils.development_status and days_between_datetimes
+                 for every row, as developers() used to
+* column pass  - the first and last commit columns parsed once each with
+                 datetime.fromisoformat, then the arithmetic over the arrays
+* sql          - kospex.recency expressions in the query's projection, as
+                 developers() does now
+
+    python tests/benchmarks/bench_recency.py [authors] [days]
+"""
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "src"))
+
+import sqlite_utils  # noqa: E402
+
+import kospex_schema as KospexSchema  # noqa: E402
+import kospex_utils as KospexUtils  # noqa: E402
+from kospex.recency import days_between_sql, status_sql  # noqa: E402
+
+MIGRATIONS = Path(__file__).resolve().parents[2] / "src" / "kospex" / "db" / "migrations"
+OFFSETS = [timezone(timedelta(hours=h)) for h in (-8, -5, 0, 1, 5, 10)]
+
+BASE_SQL = """SELECT LOWER(author_email) AS author, MIN(first_committed) AS first_commit,
+    MAX(last_committed) AS last_commit, SUM(commits) AS commits{extra}
+    FROM activity_daily GROUP BY author"""
+
+
+def build_db(path, authors, days, seed=1):
+    rnd = random.Random(seed)
+    db = sqlite_utils.Database(path)
+    for sql in (KospexSchema.SQL_CREATE_COMMITS, KospexSchema.SQL_CREATE_COMMIT_FILES):
+        db.execute(sql)
+    db.conn.executescript((MIGRATIONS / "0013_activity_rollup.sql").read_text())
+
+    now = datetime.now(timezone.utc)
+    rows = []
+    for n in range(authors):
+        for _ in range(days):
+            when = (now - timedelta(days=rnd.uniform(0, 2000))).astimezone(rnd.choice(OFFSETS))
+            stamp = when.replace(microsecond=0).isoformat()
+            rows.append((f"repo{n % 500}", f"dev{n}@example.com", "dev@example.com",
+                         when.date().isoformat(), rnd.randrange(1, 10), stamp, stamp))
+    with db.conn:
+        db.conn.executemany(
+            "INSERT OR IGNORE INTO activity_daily (_repo_id, author_email, committer_email, day, "
+            "commits, first_committed, last_committed) VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+    return db
+
+
+def per_row(db):
+    rows = [dict(row) for row in db.query(BASE_SQL.format(extra=""))]
+    for row in rows:
+        row["status"] = KospexUtils.development_status(row["last_commit"])
+        row["tenure"] = KospexUtils.days_between_datetimes(
+            row["first_commit"], row["last_commit"], min_one=True)
+        row["years_active"] = round(row["tenure"] / 365, 2) if row["tenure"] else 0
+    return rows
+
+
+def column_pass(db):
+    rows = [dict(row) for row in db.query(BASE_SQL.format(extra=""))]
+    now = datetime.now(timezone.utc)
+    firsts = [datetime.fromisoformat(row["first_commit"]) for row in rows]
+    lasts = [datetime.fromisoformat(row["last_commit"]) for row in rows]
+    for row, first, last in zip(rows, firsts, lasts):
+        days = round((now - last).total_seconds() / 86400, 2)
+        row["status"] = ("Active" if days <= 90 else "Aging" if days <= 180
+                         else "Stale" if days <= 365 else "Unmaintained")
+        row["tenure"] = max(round(abs((last - first).total_seconds()) / 86400, 1), 1)
+        row["years_active"] = round(row["tenure"] / 365, 2)
+    return rows
+
+
+def in_sql(db):
+    tenure = days_between_sql("MIN(first_committed)", "MAX(last_committed)", min_one=True)
+    extra = (f", {status_sql('MAX(last_committed)')} AS status, {tenure} AS tenure, "
+             f"COALESCE(ROUND({tenure} / 365, 2), 0) AS years_active")
+    return list(db.query(BASE_SQL.format(extra=extra)))
+
+
+def timed(label, func, db):
+    start = time.perf_counter()
+    rows = func(db)
+    elapsed = time.perf_counter() - start
+    print(f"{label:<14} {elapsed * 1000:9.1f} ms  {len(rows) / elapsed:12,.0f} developers/s")
+    return elapsed, rows
+
+
+def main():
+    authors = int(sys.argv[1]) if len(sys.argv) > 1 else 20_000
+    days = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = build_db(Path(tmp) / "kospex.db", authors, days)
+        print(f"{authors:,} authors, {db['activity_daily'].count:,} activity_daily rows")
+        legacy, expected = timed("per-row", per_row, db)
+        vector, _ = timed("column pass", column_pass, db)
+        sql, rows = timed("sql", in_sql, db)
+
+        fields = ("author", "status", "tenure", "years_active")
+        same = [tuple(r[f] for f in fields) for r in expected] == [
+            tuple(r[f] for f in fields) for r in rows]
+        print(f"speed-up: column pass {legacy / vector:.2f}x, sql {legacy / sql:.2f}x "
+              f"(sql rows match per-row: {same})")
+
+
+if __name__ == "__main__":
+    main()
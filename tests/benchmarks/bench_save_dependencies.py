@@ -0,0 +1,109 @@
+"""Benchmark: the dependency_data demote in save_dependencies, per file vs set-based.
+
+Builds a dependency_data table of [rows] rows (default 1,000,000) in a
+throwaway SQLite file, spread over 500 repos and 40 manifests each, then
+demotes [files] (repo, manifest) keys (default 20,000) three ways:
+
+* per-file      - one UPDATE per key, as save_dependencies used to, with only
+                  the indexes up to migration 0006
+* per-file+idx  - the same loop with idx_dependency_data_repo_file (0010)
+* set-based     - KospexDependencies._demote_files: the keys in a temp table
+                  and one joined UPDATE, with the index
+
+Each run is rolled back, so all three see the same table.
+
+    python tests/benchmarks/bench_save_dependencies.py [rows] [files]
+"""
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "src"))
+
+import sqlite_utils  # noqa: E402
+
+import kospex_schema as KospexSchema  # noqa: E402
+from kospex_dependencies import KospexDependencies  # noqa: E402
+
+REPOS = 500
+FILES_PER_REPO = 40
+MIGRATIONS = Path(__file__).resolve().parents[2] / "src" / "kospex" / "db" / "migrations"
+
+
+def build_db(path, rows, seed=1):
+    rnd = random.Random(seed)
+    db = sqlite_utils.Database(path)
+    db.execute(KospexSchema.SQL_CREATE_DEPENDENCY_DATA)
+    db.conn.executescript((MIGRATIONS / "0005_dependency_data_resolution.sql").read_text())
+    db.execute("CREATE INDEX idx_dependency_data_repo_latest ON dependency_data(_repo_id, latest)")
+
+    def generate():
+        for n in range(rows):
+            repo = n % REPOS
+            yield (f"github.com~org{repo % 20}~repo{repo}", f"{rnd.randrange(5):040x}",
+                   f"svc{(n // REPOS) % FILES_PER_REPO}/requirements.txt", "pypi",
+                   f"package{n}", "1.0.0", rnd.choice((0, 1)))
+
+    with db.conn:
+        db.conn.executemany(
+            "INSERT INTO dependency_data (_repo_id, hash, file_path, package_type, "
+            "package_name, package_version, latest) VALUES (?, ?, ?, ?, ?, ?, ?)",
+            generate(),
+        )
+    return db
+
+
+def per_file(db, keys):
+    for repo_id, file_path in keys:
+        db.execute(
+            "UPDATE dependency_data SET latest = 0 WHERE _repo_id = ? AND file_path = ?",
+            [repo_id, file_path],
+        )
+
+
+def timed(db, label, demote, keys):
+    db.execute("BEGIN")
+    started = time.perf_counter()
+    demote(keys)
+    elapsed = time.perf_counter() - started
+    demoted = db.execute("SELECT changes()").fetchone()[0]
+    db.execute("ROLLBACK")
+    print(f"{label:<14} {elapsed:8.2f}s  ({len(keys) / elapsed:,.0f} files/s, last statement changed {demoted:,} rows)")
+    return elapsed
+
+
+def plan(db, label):
+    detail = [row[3] for row in db.execute(
+        "EXPLAIN QUERY PLAN UPDATE dependency_data SET latest = 0 "
+        "WHERE _repo_id = ? AND file_path = ?", ["r", "f"]).fetchall()]
+    print(f"{'':14} plan ({label}): {'; '.join(detail)}")
+
+
+def main(rows=1_000_000, files=20_000):
+    with tempfile.TemporaryDirectory() as tmp:
+        started = time.perf_counter()
+        db = build_db(Path(tmp) / "deps.db", rows)
+        print(f"built {rows:,} dependency_data rows in {time.perf_counter() - started:.1f}s")
+
+        rnd = random.Random(2)
+        all_keys = [(f"github.com~org{r % 20}~repo{r}", f"svc{f}/requirements.txt")
+                    for r in range(REPOS) for f in range(FILES_PER_REPO)]
+        keys = rnd.sample(all_keys, min(files, len(all_keys)))
+        print(f"demoting {len(keys):,} (repo, manifest) keys\n")
+
+        legacy = timed(db, "per-file", lambda k: per_file(db, k), keys)
+        plan(db, "before 0010")
+        db.conn.executescript((MIGRATIONS / "0010_dependency_data_file_index.sql").read_text())
+        indexed = timed(db, "per-file+idx", lambda k: per_file(db, k), keys)
+        plan(db, "after 0010")
+        kdeps = KospexDependencies(kospex_db=db, offline=True)
+        set_based = timed(db, "set-based", kdeps._demote_files, keys)
+
+        print(f"\nset-based is {legacy / set_based:.1f}x the per-file loop, "
+              f"{indexed / set_based:.1f}x the indexed per-file loop")
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:3]))
@@ -0,0 +1,139 @@
+"""The activity_daily rollup behind summary(), repos(), orgs(), developers() and authors()."""
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from kospex.activity_rollup import ActivityRollup, CommitActivity, utc_day
+from kospex.git_log import CommitRecord, FileChange
+
+ROLLUP = ("_repo_id", "_git_server", "_git_owner", "_git_repo", "author_email",
+          "committer_email", "day", "commits", "additions", "deletions", "files",
+          "first_authored", "last_authored", "first_committed", "last_committed")
+
+
+def _commit(n, author, committer, days_ago, *files):
+    when = (datetime.now(timezone.utc) - timedelta(days=days_ago, hours=n)).replace(microsecond=0)
+    return CommitRecord(
+        hash=f"h{n}", parents=(), author_when=when.isoformat(), committer_when=when.isoformat(),
+        author_name=author, author_email=f"{author}@x.com", committer_name=committer,
+        committer_email=f"{committer}@x.com", message=f"c{n}",
+        files=[FileChange(path, None, adds, dels, "py") for path, adds, dels in files],
+    )
+
+
+APP = [
+    _commit(1, "ann", "ann", 400, ("a.py", 10, 0), ("b.py", 5, 0)),
+    _commit(2, "bob", "ann", 200, ("a.py", 3, 2)),
+    _commit(3, "ann", "ann", 30, ("a.py", 1, 1)),
+    _commit(4, "ann", "ann", 30, ("c.py", 2, 0)),
+]
+APP_LATER = [
+    _commit(5, "cat", "github", 2, ("a.py", 0, 4), ("img.png", 0, 0)),
+    _commit(6, "ann", "ann", 1, ("c.py", 7, 0)),
+]
+LIB = [
+    _commit(7, "bob", "bob", 100, ("lib.py", 4, 0)),
+    _commit(8, "dan", "bob", 5),
+]
+
+
+@pytest.fixture
+def kospex(tmp_path, monkeypatch):
+    from kospex.habitat_config import HabitatConfig
+    monkeypatch.setenv("KOSPEX_HOME", str(tmp_path))
+    HabitatConfig.reset_instance()
+    from kospex_core import Kospex
+    return Kospex()
+
+
+def _sync(kospex, url, commits):
+    kospex.git.set_remote_url(url)
+    activity = CommitActivity()
+    kospex.write_commits(commits, progress=False, activity=activity)
+    kospex.kospex_query.sync_developer_stats(kospex.git.get_repo_id(), activity)
+
+
+@pytest.fixture
+def synced(kospex):
+    _sync(kospex, "https://github.com/org/app.git", APP)
+    # a resync re-reads the last commit, which must not be counted twice
+    _sync(kospex, "https://github.com/org/app.git", APP[-1:] + APP_LATER)
+    _sync(kospex, "https://gitlab.com/other/lib.git", LIB)
+    return kospex
+
+
+def _rollup(kospex):
+    return kospex.kospex_db.execute(
+        f"SELECT {', '.join(ROLLUP)} FROM activity_daily ORDER BY 1, 5, 6, 7").fetchall()
+
+
+def _raw(kospex, group_by):
+    """The aggregate the query methods used to run over commits."""
+    return kospex.kospex_db.execute(
+        f"""SELECT {group_by}, COUNT(*), MIN(committer_when), MAX(committer_when),
+        COUNT(DISTINCT author_email), COUNT(DISTINCT committer_email)
+        FROM commits GROUP BY {group_by} ORDER BY 1""").fetchall()
+
+
+def test_folded_syncs_match_a_rebuild(synced):
+    folded = _rollup(synced)
+    assert sum(row[ROLLUP.index("commits")] for row in folded) == 8
+
+    ActivityRollup(synced.kospex_db).rebuild()
+    assert _rollup(synced) == folded
+
+    ActivityRollup(synced.kospex_db).rebuild("github.com~org~app")
+    assert _rollup(synced) == folded
+
+
+def test_repos_match_the_commits_aggregate(synced):
+    query = synced.kospex_query
+    expected = _raw(synced, "_repo_id")
+
+    assert [(r["_repo_id"], r["commits"], r["last_commit"], r["authors"], r["committers"])
+            for r in query.repos()] == [(e[0], e[1], e[3], e[4], e[5]) for e in expected]
+    assert sorted((r["_repo_id"], r["commits"], r["first_commit"], r["last_commit"],
+                   r["authors"], r["committers"]) for r in query.repos2()) == [
+        tuple(e) for e in expected]
+    assert [r["_repo_id"] for r in query.repos(org_key="github.com~org")] == ["github.com~org~app"]
+
+
+def test_orgs_and_summary_match_the_commits_aggregate(synced):
+    query = synced.kospex_query
+    orgs = {org["org_key"]: (org["commits"], org["repos"], org["authors"], org["committers"])
+            for org in query.orgs()}
+    assert orgs == {"github.com~org": (6, 1, 3, 2), "gitlab.com~other": (2, 1, 2, 1)}
+
+    assert query.summary() == {"repos": 2, "commits": 8, "authors": 4, "committers": 3,
+                               "servers": 2, "orgs": 2}
+    assert query.summary(days=90)["commits"] == 5
+    assert query.summary(org_key="gitlab.com~other")["authors"] == 2
+
+
+def test_developers_and_authors_match_the_commits_aggregate(synced):
+    query = synced.kospex_query
+    expected = {row[0]: row[1:4] for row in _raw(synced, "author_email")}
+
+    developers = {d["author"]: (d["commits"], d["first_commit"], d["last_commit"])
+                  for d in query.developers()}
+    assert developers == expected
+    authors = {a["author_email"]: (a["commits"], a["first_commit"], a["last_commit"])
+               for a in query.authors()}
+    assert authors == expected
+
+    recent = query.developers(days=90, repo_id="github.com~org~app")
+    assert {d["author"]: d["commits"] for d in recent} == {"ann@x.com": 3, "cat@x.com": 1}
+    stats = query.get_activity_stats({"server": "gitlab.com"})
+    assert (stats["commits"], stats["repos"], stats["authors"]) == (2, 1, 2)
+
+
+def test_empty_database(kospex):
+    assert kospex.kospex_query.summary()["commits"] == 0
+    assert kospex.kospex_query.repos() == []
+
+
+def test_utc_day_matches_sqlite(kospex):
+    for when in ("2024-03-01T23:30:00-05:00", "2024-03-01T00:30:00+10:00",
+                 "2024-03-01T12:00:00", "2024-03-01T12:00:00Z"):
+        expected = kospex.kospex_db.execute("SELECT date(?)", [when]).fetchone()[0]
+        assert utc_day(when) == expected, when
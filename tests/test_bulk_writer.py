@@ -0,0 +1,109 @@
+"""Tests for kospex.db.bulk_writer.BulkWriter — batched, transactional upserts."""
+import sqlite3
+
+import pytest
+from sqlite_utils import Database
+
+import kospex_schema as KospexSchema
+from kospex.db.bulk_writer import BulkWriter
+
+COMMIT_PK = ["_repo_id", "hash"]
+FILE_PK = ["file_path", "_repo_id", "hash"]
+
+
+def _db():
+    db = Database(memory=True)
+    db.execute(KospexSchema.SQL_CREATE_COMMITS)
+    db.execute(KospexSchema.SQL_CREATE_COMMIT_FILES)
+    return db
+
+
+def _writer(db, batch_size):
+    writer = BulkWriter(db, batch_size=batch_size)
+    writer.register(KospexSchema.TBL_COMMITS, pk=COMMIT_PK)
+    writer.register(KospexSchema.TBL_COMMIT_FILES, pk=FILE_PK)
+    return writer
+
+
+def _commit(n):
+    return {"_repo_id": "github.com~o~r", "hash": f"h{n}", "author_email": "a@example.com"}
+
+
+def _count(db, table):
+    return db.execute(f"SELECT COUNT(*) FROM [{table}]").fetchone()[0]
+
+
+def test_rows_are_buffered_until_a_batch_fills():
+    db = _db()
+    writer = _writer(db, batch_size=3)
+
+    writer.add(KospexSchema.TBL_COMMITS, _commit(1))
+    writer.add(KospexSchema.TBL_COMMITS, _commit(2))
+    assert _count(db, KospexSchema.TBL_COMMITS) == 0
+    assert writer.pending() == 2
+
+    writer.add(KospexSchema.TBL_COMMITS, _commit(3))
+    assert _count(db, KospexSchema.TBL_COMMITS) == 3
+    assert writer.pending() == 0
+    assert writer.batches == 1
+
+
+def test_a_full_batch_flushes_every_table_together():
+    db = _db()
+    writer = _writer(db, batch_size=2)
+    writer.add(KospexSchema.TBL_COMMIT_FILES, {"file_path": "a.py", "_repo_id": "r", "hash": "h1"})
+
+    writer.add(KospexSchema.TBL_COMMITS, _commit(1))
+    writer.add(KospexSchema.TBL_COMMITS, _commit(2))
+
+    assert _count(db, KospexSchema.TBL_COMMITS) == 2
+    assert _count(db, KospexSchema.TBL_COMMIT_FILES) == 1
+
+
+def test_context_manager_flushes_the_remainder():
+    db = _db()
+    with _writer(db, batch_size=100) as writer:
+        for n in range(7):
+            writer.add(KospexSchema.TBL_COMMITS, _commit(n))
+
+    assert _count(db, KospexSchema.TBL_COMMITS) == 7
+    assert writer.total_rows() == 7
+    assert "7 rows" in writer.summary()
+    assert "rows/sec" in writer.summary()
+
+
+def test_upserts_replace_rather_than_duplicate():
+    db = _db()
+    with _writer(db, batch_size=2) as writer:
+        for _ in range(3):
+            writer.add(KospexSchema.TBL_COMMITS, _commit(1))
+
+    assert _count(db, KospexSchema.TBL_COMMITS) == 1
+
+
+def test_a_failed_flush_rolls_the_whole_batch_back():
+    db = _db()
+    writer = _writer(db, batch_size=10)
+    writer.add(KospexSchema.TBL_COMMITS, _commit(1))
+    writer.add(
+        KospexSchema.TBL_COMMIT_FILES,
+        {"file_path": "a.py", "_repo_id": "r", "hash": "h1", "no_such_column": 1},
+    )
+
+    with pytest.raises(sqlite3.OperationalError):
+        writer.flush()
+
+    assert _count(db, KospexSchema.TBL_COMMITS) == 0
+    assert writer.pending() == 2
+    assert writer.total_rows() == 0
+
+
+def test_unregistered_table_is_rejected():
+    writer = BulkWriter(_db(), batch_size=10)
+    with pytest.raises(KeyError):
+        writer.add(KospexSchema.TBL_COMMITS, _commit(1))
+
+
+def test_batch_size_must_be_positive():
+    with pytest.raises(ValueError):
+        BulkWriter(_db(), batch_size=0)
@@ -0,0 +1,75 @@
+"""Time windows as integer ranges on the UTC epoch columns of commits and commit_files."""
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from kospex.git_log import CommitRecord, FileChange
+
+REPO_ID = "github.com~org~app"
+
+
+def _when(days_ago, hours=0, offset=0):
+    """An ISO timestamp days_ago (plus hours) before now, written in a +offset hours zone."""
+    when = datetime.now(timezone.utc) - timedelta(days=days_ago, hours=hours)
+    return when.astimezone(timezone(timedelta(hours=offset))).replace(microsecond=0).isoformat()
+
+
+def _commit(n, author, when, *paths):
+    return CommitRecord(
+        hash=f"h{n}", parents=(), author_when=when, committer_when=when,
+        author_name=author, author_email=f"{author}@x.com", committer_name=author,
+        committer_email=f"{author}@x.com", message=f"c{n}",
+        files=[FileChange(path, None, 1, 0, "py") for path in paths],
+    )
+
+
+COMMITS = [
+    _commit(1, "ann", _when(10, offset=-8), "a.py"),
+    # 90 days and 2 hours ago, so outside a 90 day window. In +05:00 its text
+    # sorts after a naive UTC cutoff, which the string comparison let through.
+    _commit(2, "bob", _when(90, hours=2, offset=5), "b.py"),
+    _commit(3, "cat", _when(200, offset=0), "c.py"),
+]
+
+
+@pytest.fixture
+def kospex(tmp_path, monkeypatch):
+    from kospex.habitat_config import HabitatConfig
+    monkeypatch.setenv("KOSPEX_HOME", str(tmp_path))
+    HabitatConfig.reset_instance()
+    from kospex_core import Kospex
+    kospex = Kospex()
+    kospex.git.set_remote_url("https://github.com/org/app.git")
+    kospex.write_commits(COMMITS, progress=False)
+    return kospex
+
+
+def test_ingest_matches_sqlite(kospex):
+    db = kospex.kospex_db
+    assert db.execute(
+        "SELECT COUNT(*) FROM commits WHERE _author_epoch = CAST(strftime('%s', author_when) "
+        "AS INTEGER) AND _committer_epoch = CAST(strftime('%s', committer_when) AS INTEGER)"
+    ).fetchone()[0] == 3
+    assert db.execute(
+        "SELECT COUNT(*) FROM commit_files "
+        "WHERE _committer_epoch = CAST(strftime('%s', committer_when) AS INTEGER)"
+    ).fetchone()[0] == 3
+
+
+def test_windows_apply_the_timezone_offset(kospex):
+    query = kospex.kospex_query
+
+    assert [d["author_email"] for d in query.active_devs_by_repo(REPO_ID, days=90)] == ["ann@x.com"]
+    assert query.active_developer_set(days=90) == {"ann@x.com"}
+    assert [d["author"] for d in kospex.active_developers(days=90)] == ["ann@x.com"]
+    assert {d["author"] for d in query.commit_stats(days=91)} == {"ann@x.com", "bob@x.com"}
+
+
+def test_commit_ranges_compare_instants(kospex):
+    query = kospex.kospex_query
+    # the same instant as bob's commit, written in another zone
+    bob_when = COMMITS[1].committer_when
+    as_utc = datetime.fromisoformat(bob_when).astimezone(timezone.utc).isoformat()
+
+    assert [c["hash"] for c in query.commits(repo_id=REPO_ID, after=as_utc)] == ["h1"]
+    assert [c["hash"] for c in query.commits(repo_id=REPO_ID, before=as_utc)] == ["h3"]
@@ -502,13 +502,17 @@ def test_shipped_0004_adds_repos_last_fetch(tmp_path):
     db = sqlite_utils.Database(tmp_path / "kospex.db")
     db.execute(KospexSchema.SQL_CREATE_REPOS)
     db.execute(KospexSchema.SQL_CREATE_DEPENDENCY_DATA)
+    db.execute(KospexSchema.SQL_CREATE_COMMITS)          # indexed by 0006
+    db.execute(KospexSchema.SQL_CREATE_COMMIT_FILES)
+    db.execute(KospexSchema.SQL_CREATE_FILE_METADATA)
+    db.execute(KospexSchema.SQL_CREATE_URL_CACHE)        # extended by 0008
     db.execute(
         "CREATE TABLE schema_migrations ("
         "id TEXT PRIMARY KEY, sequence INTEGER NOT NULL, checksum TEXT NOT NULL, "
         "applied_at TEXT NOT NULL, duration_ms INTEGER, has_python INTEGER NOT NULL)"
     )
 
-    Migrator(db).apply_pending()  # default dir = shipped migrations (incl 0003, 0004, 0005)
+    Migrator(db).apply_pending()  # default dir = shipped migrations (incl 0003 to 0006)
 
     cols = {r[1] for r in db.execute("PRAGMA table_info(repos)")}
     assert "last_fetch" in cols
@@ -521,6 +525,10 @@ def test_shipped_0005_adds_dependency_data_resolution(tmp_path):
     db = sqlite_utils.Database(tmp_path / "kospex.db")
     db.execute(KospexSchema.SQL_CREATE_REPOS)
     db.execute(KospexSchema.SQL_CREATE_DEPENDENCY_DATA)
+    db.execute(KospexSchema.SQL_CREATE_COMMITS)          # indexed by 0006
+    db.execute(KospexSchema.SQL_CREATE_COMMIT_FILES)
+    db.execute(KospexSchema.SQL_CREATE_FILE_METADATA)
+    db.execute(KospexSchema.SQL_CREATE_URL_CACHE)        # extended by 0008
     db.execute(
         "CREATE TABLE schema_migrations ("
         "id TEXT PRIMARY KEY, sequence INTEGER NOT NULL, checksum TEXT NOT NULL, "
@@ -531,6 +539,60 @@ def test_shipped_0005_adds_dependency_data_resolution(tmp_path):
     assert "resolution" in cols
 
 
+def test_shipped_0006_adds_hot_query_indexes(tmp_path):
+    import sqlite_utils
+    import kospex_schema as KospexSchema
+    from kospex.db.indexes import explain, list_indexes
+    from kospex.db.migrator import Migrator
+    db = sqlite_utils.Database(tmp_path / "kospex.db")
+    for sql in (KospexSchema.SQL_CREATE_REPOS, KospexSchema.SQL_CREATE_DEPENDENCY_DATA,
+                KospexSchema.SQL_CREATE_COMMITS, KospexSchema.SQL_CREATE_COMMIT_FILES,
+                KospexSchema.SQL_CREATE_FILE_METADATA, KospexSchema.SQL_CREATE_URL_CACHE):
+        db.execute(sql)
+    db.execute(
+        "CREATE TABLE schema_migrations ("
+        "id TEXT PRIMARY KEY, sequence INTEGER NOT NULL, checksum TEXT NOT NULL, "
+        "applied_at TEXT NOT NULL, duration_ms INTEGER, has_python INTEGER NOT NULL)"
+    )
+    Migrator(db).apply_pending()
+
+    names = {index.name for index in list_indexes(db)}
+    assert {"idx_commits_repo_when", "idx_commits_author",
+            "idx_file_metadata_repo_latest"} <= names
+    plan = explain(db, "by date", "SELECT COUNT(*) FROM commits WHERE _repo_id = ? AND committer_when > ?")
+    assert plan.indexes == ["idx_commits_repo_when"]
+
+
+def test_shipped_0014_backfills_commit_epochs(tmp_path):
+    import sqlite_utils
+    import kospex_schema as KospexSchema
+    from kospex.db.indexes import explain
+    from kospex.db.migrator import Migrator
+    db = sqlite_utils.Database(tmp_path / "kospex.db")
+    for sql in (KospexSchema.SQL_CREATE_REPOS, KospexSchema.SQL_CREATE_DEPENDENCY_DATA,
+                KospexSchema.SQL_CREATE_COMMITS, KospexSchema.SQL_CREATE_COMMIT_FILES,
+                KospexSchema.SQL_CREATE_FILE_METADATA, KospexSchema.SQL_CREATE_URL_CACHE):
+        db.execute(sql)
+    db.execute(
+        "CREATE TABLE schema_migrations ("
+        "id TEXT PRIMARY KEY, sequence INTEGER NOT NULL, checksum TEXT NOT NULL, "
+        "applied_at TEXT NOT NULL, duration_ms INTEGER, has_python INTEGER NOT NULL)"
+    )
+    db["commits"].insert({"hash": "h1", "_repo_id": "r", "author_when": "2024-03-01T23:30:00-05:00",
+                          "committer_when": "2024-03-02T00:30:00+10:00"})
+    db["commit_files"].insert({"hash": "h1", "_repo_id": "r", "file_path": "a.py",
+                               "committer_when": "2024-03-02T00:30:00+10:00"})
+    Migrator(db).apply_pending()
+
+    assert db.execute("SELECT _author_epoch, _committer_epoch FROM commits").fetchone() == (
+        1709353800, 1709303400)
+    assert db.execute("SELECT _committer_epoch FROM commit_files").fetchone() == (1709303400,)
+    plan = explain(db, "window", "SELECT COUNT(*) FROM commits WHERE _repo_id = ? AND _committer_epoch > ?")
+    assert plan.indexes == ["idx_commits_repo_epoch"]
+    plan = explain(db, "active", "SELECT COUNT(DISTINCT author_email) FROM commits WHERE _author_epoch > ?")
+    assert plan.indexes == ["idx_commits_author_epoch"]
+
+
 # --- behind-DB banner -------------------------------------------------------
 
 
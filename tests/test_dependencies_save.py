@@ -299,3 +299,33 @@ def test_upsert_failure_leaves_prior_rows_current():
         "the demote must roll back with the failed upsert, leaving the previous "
         "dependency set current"
     )
+
+
+def test_demote_is_one_statement_for_many_files():
+    """Demoting a whole org's manifests is one UPDATE, not one per file."""
+    db = _make_db()
+    kdeps = KospexDependencies(kospex_db=db)
+    for n in range(50):
+        _existing_row(db, file_path=f"app{n}/requirements.txt", package_name="requests")
+    _existing_row(db, file_path="untouched/requirements.txt", package_name="requests")
+
+    statements = []
+    db.conn.set_trace_callback(statements.append)
+    kdeps.save_dependencies([{
+        "_repo_id": "github.com~kospex~kospex",
+        "hash": "newhash",
+        "file_path": f"app{n}/requirements.txt",
+        "package_type": "pypi",
+        "package_name": "click",
+        "package_version": "8.1.0",
+    } for n in range(50)], source="krunner osi")
+    db.conn.set_trace_callback(None)
+
+    updates = [s for s in statements
+               if s.lstrip().startswith(f"UPDATE {KospexSchema.TBL_DEPENDENCY_DATA}")]
+    assert len(updates) == 1
+    latest = {(r["file_path"], r["package_name"]): r["latest"]
+              for r in db[KospexSchema.TBL_DEPENDENCY_DATA].rows}
+    assert latest[("app7/requirements.txt", "requests")] == 0
+    assert latest[("app7/requirements.txt", "click")] == 1
+    assert latest[("untouched/requirements.txt", "requests")] == 1
@@ -0,0 +1,128 @@
+"""The /supply-chain/ dependency graph store and package_dependencies() over it."""
+from pathlib import Path
+
+import pytest
+import sqlite_utils
+
+from kospex.dependency_graph import DAY, DependencyGraphStore
+
+MIGRATIONS = Path(__file__).resolve().parents[1] / "src" / "kospex" / "db" / "migrations"
+
+
+def _graph(root, *deps):
+    keys = [root, *deps]
+    return {
+        "nodes": [{"versionKey": {"system": "NPM", "name": name, "version": version},
+                   "relation": "SELF" if i == 0 else "DIRECT"}
+                  for i, (name, version) in enumerate(keys)],
+        "edges": [{"fromNode": 0, "toNode": i, "requirement": f"^{version}"}
+                  for i, (_, version) in enumerate(keys) if i],
+    }
+
+
+APP = _graph(("app", "1.0.0"), ("react", "18.2.0"), ("loose-envify", "1.4.0"))
+SITE = _graph(("site", "2.0.0"), ("react", "18.2.0"), ("scheduler", "0.23.0"))
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 1_000_000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def store():
+    db = sqlite_utils.Database(memory=True)
+    db.conn.executescript((MIGRATIONS / "0012_dependency_graph.sql").read_text())
+    return DependencyGraphStore(db, clock=_Clock())
+
+
+def test_graphs_and_nodes_expire(store):
+    store.put_graph("npm", "app", "1.0.0", APP)
+    store.put_nodes({("maven", "org.slf4j:slf4j-api", "2.0.9"): {"advisories": 1},
+                     ("npm", "react", "18.2.0"): {"versions_behind": 3}})
+
+    assert store.graph("NPM", "app", "1.0.0") == APP
+    assert store.nodes(["maven:org.slf4j:slf4j-api:2.0.9", "npm:left-pad:1.3.0"]) == {
+        "maven:org.slf4j:slf4j-api:2.0.9": {"published_at": None, "advisories": 1,
+                                            "versions_behind": None, "resolution": None}}
+
+    store._clock.now += DAY
+    assert store.nodes(["npm:react:18.2.0"]) == {}
+    assert store.graph("npm", "app", "1.0.0") == APP
+    store._clock.now += 6 * DAY
+    assert store.graph("npm", "app", "1.0.0") is None
+
+
+def test_store_is_skipped_before_migration_0012():
+    store = DependencyGraphStore(sqlite_utils.Database(memory=True))
+    store.put_graph("npm", "app", "1.0.0", APP)
+    assert store.graph("npm", "app", "1.0.0") is None
+    assert store.nodes(["npm:app:1.0.0"]) == {}
+
+
+@pytest.fixture
+def kospex(tmp_path, monkeypatch):
+    from kospex.habitat_config import HabitatConfig
+    monkeypatch.setenv("KOSPEX_HOME", str(tmp_path))
+    HabitatConfig.reset_instance()
+    from kospex_core import Kospex
+    return Kospex()
+
+
+@pytest.fixture
+def deps_dev(monkeypatch):
+    """deps.dev stand-in: records the graph fetches and the nodes resolved."""
+    from kospex_dependencies import KospexDependencies
+    calls = {"graphs": [], "resolved": []}
+    graphs = {"app": APP, "site": SITE}
+
+    def get_url_json(self, url):
+        name = url.split("/packages/")[1].split("/")[0]
+        calls["graphs"].append(name)
+        return graphs.get(name)
+
+    def resolve_records(self, keys, workers=8):
+        calls["resolved"].append(sorted(keys))
+        return {key: {"published_at": "2024-01-01T00:00:00Z", "advisories": 1,
+                      "versions_behind": 2,
+                      "resolution": "lookup_error" if key[1] == "scheduler" else "resolved"}
+                for key in keys}
+
+    monkeypatch.setattr(KospexDependencies, "get_url_json", get_url_json)
+    monkeypatch.setattr(KospexDependencies, "resolve_records", resolve_records)
+    return calls
+
+
+def _kdeps(kospex):
+    from kospex_dependencies import KospexDependencies
+    return KospexDependencies(kospex_db=kospex.kospex_db, kospex_query=kospex.kospex_query,
+                              offline=False)
+
+
+def test_a_graph_drawn_before_needs_no_lookups(kospex, deps_dev):
+    first = _kdeps(kospex).package_dependencies("app", "1.0.0", "npm")
+    assert deps_dev == {"graphs": ["app"], "resolved": [[
+        ("npm", "app", "1.0.0"), ("npm", "loose-envify", "1.4.0"), ("npm", "react", "18.2.0")]]}
+
+    again = _kdeps(kospex).package_dependencies("app", "1.0.0", "npm")
+
+    assert deps_dev["graphs"] == ["app"] and len(deps_dev["resolved"]) == 1
+    assert again == first
+    node = again["nodes"][1]
+    assert (node["id"], node["publishedAt"], node["advisories"], node["versions_behind"]) == (
+        "npm:react:18.2.0", "2024-01-01T00:00:00Z", 1, 2)
+
+
+def test_overlapping_graphs_share_node_details(kospex, deps_dev):
+    _kdeps(kospex).package_dependencies("app", "1.0.0", "npm")
+
+    _kdeps(kospex).package_dependencies("site", "2.0.0", "npm")
+    assert deps_dev["resolved"][-1] == [("npm", "scheduler", "0.23.0"), ("npm", "site", "2.0.0")]
+
+    # scheduler's lookup failed, so it is not stored and is looked up again
+    _kdeps(kospex).package_dependencies("site", "2.0.0", "npm")
+    assert deps_dev["resolved"][-1] == [("npm", "scheduler", "0.23.0")]
+    assert deps_dev["graphs"] == ["app", "site"]
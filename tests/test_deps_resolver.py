@@ -0,0 +1,184 @@
+"""Concurrent deps.dev resolution (kospex.deps_resolver) against a local stand-in."""
+import json
+import threading
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from kospex.deps_resolver import DepsDevResolver, HostRateLimiter
+
+VERSION_BODY = json.dumps({
+    "publishedAt": "2024-01-01T00:00:00Z",
+    "isDefault": False,
+    "links": [],
+    "advisoryKeys": [{"id": "GHSA-1"}],
+})
+PACKAGE_BODY = json.dumps({
+    "versions": [
+        {"isDefault": True, "publishedAt": "2024-03-01T00:00:00Z", "versionKey": {"version": "1.2.0"}},
+        {"isDefault": False, "publishedAt": "2024-02-01T00:00:00Z", "versionKey": {"version": "1.1.0"}},
+        {"isDefault": False, "publishedAt": "2024-01-01T00:00:00Z", "versionKey": {"version": "1.0.0"}},
+    ]
+})
+
+ROOT = "/v3alpha/systems/pypi/packages"
+ROUTES = {
+    f"{ROOT}/good": (200, PACKAGE_BODY),
+    f"{ROOT}/good/versions/1.0.0": (200, VERSION_BODY),
+    f"{ROOT}/yanked": (200, PACKAGE_BODY),
+    f"{ROOT}/yanked/versions/9.9.9": (404, ""),
+    f"{ROOT}/typo/versions/1.0.0": (404, ""),
+}
+
+
+class _DepsDev(BaseHTTPRequestHandler):
+    hits = Counter()
+    throttle = Counter()  # path -> 429s still to send
+    lock = threading.Lock()
+
+    def do_GET(self):
+        with self.lock:
+            self.hits[self.path] += 1
+            throttled = self.throttle[self.path] > 0
+            if throttled:
+                self.throttle[self.path] -= 1
+        status, body = (429, "") if throttled else ROUTES.get(self.path, (404, ""))
+        self.send_response(status)
+        if throttled:
+            self.send_header("Retry-After", "0")
+        self.end_headers()
+        self.wfile.write(body.encode())
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    _DepsDev.hits.clear()
+    _DepsDev.throttle.clear()
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), _DepsDev)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{httpd.server_address[1]}/v3alpha/systems"
+    httpd.shutdown()
+    httpd.server_close()
+
+
+@pytest.fixture
+def kdeps(tmp_path, monkeypatch, server):
+    from kospex.habitat_config import HabitatConfig
+    monkeypatch.setenv("KOSPEX_HOME", str(tmp_path))
+    HabitatConfig.reset_instance()
+    from kospex_core import Kospex
+    from kospex_dependencies import KospexDependencies
+    kospex = Kospex()
+    kd = KospexDependencies(kospex_db=kospex.kospex_db, kospex_query=kospex.kospex_query)
+    kd.deps_dev_api = server
+    return kd
+
+
+KEYS = [
+    ("pypi", "good", "1.0.0"),
+    ("pypi", "yanked", "9.9.9"),
+    ("pypi", "typo", "1.0.0"),
+    ("pypi", "good", ">=1.0"),
+    ("pypi", "good", "1.0.0"),
+]
+
+
+def _no_sleep(seconds):
+    pass
+
+
+def test_resolve_matches_serial_records_and_fetches_each_url_once(kdeps):
+    resolver = DepsDevResolver(kdeps, workers=4, sleep=_no_sleep)
+    records = resolver.resolve(KEYS)
+
+    assert set(records) == set(KEYS)
+    assert records[("pypi", "good", "1.0.0")]["resolution"] == "resolved"
+    assert records[("pypi", "good", "1.0.0")]["versions_behind"] == 2
+    assert records[("pypi", "good", "1.0.0")]["advisories"] == 1
+    assert records[("pypi", "yanked", "9.9.9")]["resolution"] == "version_yanked"
+    assert records[("pypi", "typo", "1.0.0")]["resolution"] == "package_not_found"
+    assert records[("pypi", "good", ">=1.0")]["resolution"] == "unresolved_spec"
+    assert all(count == 1 for count in _DepsDev.hits.values())
+    assert resolver.stats.keys == 5 and resolver.stats.unique_keys == 4
+    assert resolver.stats.urls == 6 and resolver.stats.fetched == 6
+
+    # The same keys resolved one at a time, the old way, from the url_cache
+    for key, record in records.items():
+        serial = kdeps.depsdev_record(*key)
+        assert {k: v for k, v in serial.items() if k != "days_ago"} == \
+            {k: v for k, v in record.items() if k != "days_ago"}
+
+
+def test_second_resolve_is_served_from_url_cache(kdeps):
+    DepsDevResolver(kdeps, sleep=_no_sleep).resolve(KEYS)
+    hits = sum(_DepsDev.hits.values())
+
+    resolver = DepsDevResolver(kdeps, sleep=_no_sleep)
+    resolver.resolve([("pypi", "good", "1.0.0")])
+
+    assert sum(_DepsDev.hits.values()) == hits
+    assert resolver.stats.cache_hits == 2 and resolver.stats.fetched == 0
+
+
+def test_throttled_request_is_retried(kdeps):
+    _DepsDev.throttle[f"{ROOT}/good/versions/1.0.0"] = 2
+    slept = []
+    resolver = DepsDevResolver(kdeps, workers=2, sleep=slept.append)
+
+    records = resolver.resolve([("pypi", "good", "1.0.0")])
+
+    assert records[("pypi", "good", "1.0.0")]["resolution"] == "resolved"
+    assert _DepsDev.hits[f"{ROOT}/good/versions/1.0.0"] == 3
+    assert resolver.stats.retries == 2 and resolver.stats.failures == 0
+
+
+def test_retries_give_up_with_the_last_status(kdeps):
+    _DepsDev.throttle[f"{ROOT}/good/versions/1.0.0"] = 10
+    resolver = DepsDevResolver(kdeps, retries=1, sleep=_no_sleep)
+
+    records = resolver.resolve([("pypi", "good", "1.0.0")])
+
+    assert records[("pypi", "good", "1.0.0")]["resolution"] == "lookup_error"
+    assert _DepsDev.hits[f"{ROOT}/good/versions/1.0.0"] == 2
+
+
+def test_resolve_records_memoises_for_depsdev_record(kdeps):
+    kdeps.resolve_records(KEYS, workers=2)
+    hits = sum(_DepsDev.hits.values())
+    kdeps.kospex_query = None  # a lookup that reached HTTP now would fail
+
+    assert kdeps.depsdev_record("pypi", "good", "1.0.0")["resolution"] == "resolved"
+    assert sum(_DepsDev.hits.values()) == hits
+
+
+def test_progress_counts_answered_urls(kdeps):
+    seen = []
+    kdeps.progress = lambda done, total: seen.append((done, total))
+    kdeps.resolve_records(KEYS[:2])
+    kdeps.resolve_records(KEYS[:2])
+
+    first, second = seen[:-1], seen[-1]
+    assert [done for done, _ in first] == [0, 1, 2, 3, 4] and first[-1][1] == 4
+    assert second == (4, 4)  # all from url_cache
+
+
+def test_host_rate_limiter_spaces_requests_per_host():
+    now = [100.0]
+    slept = []
+    limiter = HostRateLimiter(rate=4, clock=lambda: now[0], sleep=slept.append)
+
+    for _ in range(3):
+        limiter.wait("api.deps.dev")
+    limiter.wait("pypi.org")
+
+    assert slept == [0.25, 0.5]
+
+
+def test_workers_must_be_positive(kdeps):
+    with pytest.raises(ValueError):
+        DepsDevResolver(kdeps, workers=0)
@@ -0,0 +1,164 @@
+"""Offline deps.dev snapshots: import, and resolving dependencies with no HTTP."""
+import json
+
+import pytest
+import requests
+from click.testing import CliRunner
+
+from kospex.depsdev_snapshot import KIND_PACKAGE, KIND_VERSION, DepsDevSnapshot
+
+DOCUMENTS = [
+    {"versionKey": {"system": "PYPI", "name": "requests", "version": "2.31.0"},
+     "publishedAt": "2023-05-22T15:12:44Z", "isDefault": False,
+     "links": [{"label": "SOURCE_REPO", "url": "https://github.com/psf/requests"}],
+     "advisoryKeys": [{"id": "GHSA-j8r2-6x86-q33q"}]},
+    {"packageKey": {"system": "PYPI", "name": "requests"},
+     "versions": [
+         {"versionKey": {"version": "2.32.3"}, "publishedAt": "2024-05-29T15:37:47Z", "isDefault": True},
+         {"versionKey": {"version": "2.32.0"}, "publishedAt": "2024-05-20T15:37:47Z", "isDefault": False},
+         {"versionKey": {"version": "2.31.0"}, "publishedAt": "2023-05-22T15:12:44Z", "isDefault": False},
+     ]},
+    {"packageKey": {"system": "NPM", "name": "left-pad"},
+     "versions": [{"versionKey": {"version": "1.3.0"}, "publishedAt": "2018-04-09T00:00:00Z",
+                   "isDefault": True}]},
+    {"nodes": [{"versionKey": {"system": "NPM", "name": "left-pad", "version": "1.3.0"}}],
+     "edges": []},
+    {"id": "PYSEC-2023-74", "affected": [
+        {"package": {"ecosystem": "PyPI", "name": "Requests"}, "versions": ["2.31.0", "2.30.0"]}]},
+    {"something": "else"},
+]
+
+
+@pytest.fixture
+def export(tmp_path):
+    path = tmp_path / "depsdev.jsonl"
+    path.write_text("\n".join(json.dumps(doc) for doc in DOCUMENTS) + "\n")
+    return path
+
+
+@pytest.fixture
+def kospex(tmp_path, monkeypatch):
+    from kospex.habitat_config import HabitatConfig
+    monkeypatch.setenv("KOSPEX_HOME", str(tmp_path))
+    HabitatConfig.reset_instance()
+    from kospex_core import Kospex
+    return Kospex()
+
+
+@pytest.fixture
+def no_http(monkeypatch):
+    def _blocked(*args, **kwargs):
+        raise AssertionError("no HTTP calls expected")
+    monkeypatch.setattr(requests, "get", _blocked)
+    monkeypatch.setattr(requests.Session, "get", _blocked)
+
+
+def _kdeps(kospex, offline=True):
+    from kospex_dependencies import KospexDependencies
+    return KospexDependencies(kospex_db=kospex.kospex_db, kospex_query=kospex.kospex_query,
+                              offline=offline)
+
+
+def test_import_counts_each_kind(kospex, export):
+    snapshot = DepsDevSnapshot(kospex.kospex_db)
+    assert not snapshot.available()
+
+    stats = snapshot.import_file(export)
+
+    assert (stats.documents, stats.versions, stats.packages, stats.dependencies,
+            stats.advisories, stats.skipped) == (6, 1, 2, 1, 2, 1)
+    assert snapshot.available()
+    assert snapshot.counts() == {"version": 1, "package": 2, "dependencies": 1, "advisories": 2}
+    # re-importing replaces rather than duplicates
+    snapshot.import_file(export)
+    assert snapshot.counts()["package"] == 2
+
+
+def test_lookups_normalise_system_and_pypi_names(kospex, export):
+    snapshot = DepsDevSnapshot(kospex.kospex_db)
+    snapshot.import_file(export)
+
+    assert snapshot.has(KIND_PACKAGE, "pypi", "Requests")
+    assert not snapshot.has(KIND_PACKAGE, "npm", "Left-Pad")
+    doc = snapshot.document(KIND_VERSION, "pypi", "requests", "2.31.0")
+    assert [key["id"] for key in doc["advisoryKeys"]] == ["GHSA-j8r2-6x86-q33q", "PYSEC-2023-74"]
+
+
+def test_offline_record_is_scored_from_the_snapshot(kospex, export, no_http):
+    DepsDevSnapshot(kospex.kospex_db).import_file(export)
+    kdeps = _kdeps(kospex)
+
+    record = kdeps.depsdev_record("pypi", "requests", "2.31.0")
+
+    assert record["resolution"] == "resolved"
+    assert record["published_at"] == "2023-05-22T15:12:44Z"
+    assert record["advisories"] == 2
+    assert record["versions_behind"] == 2
+    assert record["source_repo"] == "https://github.com/psf/requests"
+
+
+def test_offline_misses_are_not_found_without_http(kospex, export, no_http):
+    DepsDevSnapshot(kospex.kospex_db).import_file(export)
+    kdeps = _kdeps(kospex)
+
+    assert kdeps.depsdev_record("pypi", "requests", "9.9.9")["resolution"] == "version_yanked"
+    assert kdeps.depsdev_record("npm", "unknown", "1.0.0")["resolution"] == "package_not_found"
+    assert kdeps.package_dependencies("left-pad", "1.3.0", "npm")["nodes"][0]["advisories"] == 0
+
+
+def test_resolve_records_offline_makes_no_requests(kospex, export, no_http, capsys):
+    DepsDevSnapshot(kospex.kospex_db).import_file(export)
+    kdeps = _kdeps(kospex)
+
+    records = kdeps.resolve_records([("pypi", "requests", "2.31.0"), ("npm", "left-pad", "1.3.0")])
+
+    assert records[("pypi", "requests", "2.31.0")]["resolution"] == "resolved"
+    assert records[("npm", "left-pad", "1.3.0")]["resolution"] == "version_yanked"
+    # library code: the totals are logged and kept, not printed
+    assert capsys.readouterr().out == ""
+    assert (kdeps.resolver_stats.unique_keys, kdeps.resolver_stats.fetched) == (2, 0)
+
+
+def test_offline_pypi_assess_makes_no_requests(kospex, export, no_http, tmp_path):
+    DepsDevSnapshot(kospex.kospex_db).import_file(export)
+    requirements = tmp_path / "requirements.txt"
+    requirements.write_text("requests==2.31.0\nunknown-pkg==1.0.0\n")
+    kdeps = _kdeps(kospex)
+
+    records = kdeps.pypi_assess(str(requirements))
+
+    assert [r["source_repo"] for r in records] == ["https://github.com/psf/requests", None]
+    assert kdeps.get_pypi_package_info("unknown-pkg") is None
+
+
+def test_online_resolver_skips_urls_the_snapshot_answers(kospex, export):
+    from kospex.deps_resolver import DepsDevResolver
+    DepsDevSnapshot(kospex.kospex_db).import_file(export)
+    resolver = DepsDevResolver(_kdeps(kospex, offline=False))
+
+    assert resolver.urls_for(("pypi", "requests", "2.31.0")) == []
+    assert resolver.urls_for(("npm", "left-pad", "1.3.0")) == [
+        "https://api.deps.dev/v3alpha/systems/npm/packages/left-pad/versions/1.3.0"]
+
+
+def test_parquet_export(kospex, tmp_path):
+    duckdb = pytest.importorskip("duckdb")
+    path = tmp_path / "depsdev.parquet"
+    con = duckdb.connect()
+    con.execute("CREATE TABLE docs (document VARCHAR)")
+    con.executemany("INSERT INTO docs VALUES (?)", [[json.dumps(doc)] for doc in DOCUMENTS[:2]])
+    con.execute(f"COPY docs TO '{path}' (FORMAT PARQUET)")
+
+    stats = DepsDevSnapshot(kospex.kospex_db).import_file(path)
+
+    assert (stats.versions, stats.packages) == (1, 1)
+
+
+def test_depsdev_import_cli(kospex, export, monkeypatch):
+    import kospex_cli
+    monkeypatch.setattr(kospex_cli, "kospex", kospex)
+
+    result = CliRunner().invoke(kospex_cli.cli, ["depsdev-import", str(export)])
+
+    assert result.exit_code == 0, result.output
+    assert "Imported 6 documents" in result.output
@@ -0,0 +1,144 @@
+"""developer_stats folded in from each sync's new commits, via the activity_daily rollup."""
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from kospex.activity_rollup import CommitActivity
+from kospex.developer_stats import DeveloperStatsStore
+from kospex.git_log import CommitRecord, FileChange
+
+REPO_ID = "github.com~org~app"
+FIELDS = ("author_email", "total_commits", "additions", "deletions", "unique_files",
+          "first_commit", "last_commit", "commits_last_90_days", "additions_90_days",
+          "deletions_90_days", "unique_files_90_days", "pct_all_time", "pct_90_days")
+
+
+def _commit(n, author, days_ago, *files):
+    when = (datetime.now(timezone.utc) - timedelta(days=days_ago)).replace(microsecond=0)
+    return CommitRecord(
+        hash=f"h{n}", parents=(), author_when=when.isoformat(), committer_when=when.isoformat(),
+        author_name=author, author_email=f"{author}@x.com", committer_name=author,
+        committer_email=f"{author}@x.com", message=f"c{n}",
+        files=[FileChange(path, None, adds, dels, "py") for path, adds, dels in files],
+    )
+
+
+OLD = [
+    _commit(1, "ann", 400, ("a.py", 10, 0), ("b.py", 5, 0)),
+    _commit(2, "bob", 200, ("a.py", 3, 2)),
+    _commit(3, "ann", 30, ("a.py", 1, 1)),
+]
+NEW = [
+    _commit(4, "ann", 2, ("c.py", 7, 0)),
+    _commit(5, "cat", 1, ("a.py", 0, 4), ("img.png", 0, 0)),
+]
+
+
+@pytest.fixture
+def kospex(tmp_path, monkeypatch):
+    from kospex.habitat_config import HabitatConfig
+    monkeypatch.setenv("KOSPEX_HOME", str(tmp_path))
+    HabitatConfig.reset_instance()
+    from kospex_core import Kospex
+    kospex = Kospex()
+    kospex.git.set_remote_url("https://github.com/org/app.git")
+    return kospex
+
+
+def _sync(kospex, commits):
+    activity = CommitActivity()
+    kospex.write_commits(commits, progress=False, activity=activity)
+    kospex.kospex_query.sync_developer_stats(REPO_ID, activity)
+    return activity
+
+
+def _stats(kospex):
+    rows = kospex.kospex_db.execute(
+        f"SELECT {', '.join(FIELDS)} FROM developer_stats WHERE _repo_id = ? ORDER BY 1",
+        [REPO_ID]).fetchall()
+    return [dict(zip(FIELDS, row)) for row in rows]
+
+
+def test_incremental_syncs_match_a_rebuild(kospex):
+    _sync(kospex, OLD)
+    # a resync re-reads the last old commit, which must not be counted twice
+    activity = _sync(kospex, OLD[-1:] + NEW)
+    assert activity.commits == 2
+
+    incremental = _stats(kospex)
+    kospex.kospex_query.sync_developer_stats(REPO_ID)
+    assert _stats(kospex) == incremental
+
+    ann = incremental[0]
+    assert (ann["total_commits"], ann["additions"], ann["unique_files"]) == (3, 23, 3)
+    assert (ann["commits_last_90_days"], ann["additions_90_days"], ann["unique_files_90_days"]) == (
+        2, 8, 2)
+    assert ann["first_commit"] == OLD[0].author_when
+    assert ann["pct_all_time"] == 60.0
+
+
+def test_rollup_is_backfilled_for_repos_synced_before_it(kospex):
+    _sync(kospex, OLD)
+    kospex.kospex_db.execute("DELETE FROM activity_daily")
+    kospex.kospex_db.execute("DELETE FROM developer_files")
+
+    _sync(kospex, NEW)
+
+    assert [row["total_commits"] for row in _stats(kospex)] == [3, 1, 1]
+
+
+def _rollup_commits(kospex):
+    return kospex.kospex_db.execute(
+        "SELECT SUM(commits) FROM activity_daily WHERE _repo_id = ?", [REPO_ID]).fetchone()[0]
+
+
+def test_rollup_is_rebuilt_after_an_interrupted_sync(kospex):
+    _sync(kospex, OLD)
+    # the sync died after write_commits committed its rows, before the fold
+    kospex.write_commits(NEW[:1], progress=False)
+    assert _rollup_commits(kospex) == 3
+
+    _sync(kospex, NEW)
+
+    assert _rollup_commits(kospex) == 5
+    assert sum(row["total_commits"] for row in _stats(kospex)) == 5
+    assert [row["total_commits"] for row in _stats(kospex)] == [3, 1, 1]
+
+
+def test_rebuild_developer_stats(kospex):
+    _sync(kospex, OLD + NEW)
+    expected = _stats(kospex)
+    kospex.kospex_db.execute("DELETE FROM activity_daily")
+    kospex.kospex_db.execute("DELETE FROM developer_stats")
+
+    assert kospex.kospex_query.rebuild_developer_stats() == 1
+    assert _rollup_commits(kospex) == 5
+    assert _stats(kospex) == expected
+    assert kospex.kospex_query.rebuild_developer_stats(REPO_ID) == 1
+    assert _stats(kospex) == expected
+
+
+def test_every_field_of_a_full_history(kospex):
+    _sync(kospex, OLD + NEW)
+    ann, bob, cat = OLD[0], OLD[1], NEW[1]
+
+    assert _stats(kospex) == [
+        dict(zip(FIELDS, row)) for row in [
+            ("ann@x.com", 3, 23, 1, 3, ann.author_when, NEW[0].author_when,
+             2, 8, 1, 2, 60.0, 66.67),
+            ("bob@x.com", 1, 3, 2, 1, bob.author_when, bob.author_when,
+             0, 0, 0, 0, 20.0, 0.0),
+            ("cat@x.com", 1, 0, 4, 2, cat.author_when, cat.author_when,
+             1, 0, 4, 2, 20.0, 33.33),
+        ]
+    ]
+
+
+def test_ninety_day_fields_move_on_without_new_commits(kospex):
+    _sync(kospex, OLD)
+    store = DeveloperStatsStore(kospex.kospex_db,
+                                clock=lambda: datetime.now(timezone.utc) + timedelta(days=60))
+    store.refresh(REPO_ID)
+
+    assert [row["commits_last_90_days"] for row in _stats(kospex)] == [0, 0]
+
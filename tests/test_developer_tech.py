@@ -0,0 +1,99 @@
+"""developer_tech language summaries from the commit_files.language column."""
+from collections import defaultdict
+from pathlib import Path
+
+import panopticas as Panopticas
+import pytest
+
+from kospex.languages import file_language
+from kospex_utils import epoch_seconds
+
+FILES = [
+    # hash, repo, author, when, path
+    ("a1", "r1", "Ann@x.com", "2023-01-05T10:00:00+00:00", "src/app.py"),
+    ("a1", "r1", "Ann@x.com", "2023-01-05T10:00:00+00:00", "Makefile"),
+    ("a2", "r2", "ann@x.com", "2024-03-01T10:00:00+00:00", "lib/app.py"),
+    ("b1", "r1", "bob@x.com", "2023-06-01T10:00:00+00:00", "web/index.ts"),
+    ("b2", "r2", "bob@x.com", "2024-07-01T10:00:00+00:00", "notes.unknownext"),
+    ("b2", "r2", "bob@x.com", "2024-07-01T10:00:00+00:00", "src/app.py"),
+]
+
+
+@pytest.fixture
+def kquery(tmp_path, monkeypatch):
+    from kospex.habitat_config import HabitatConfig
+    monkeypatch.setenv("KOSPEX_HOME", str(tmp_path))
+    HabitatConfig.reset_instance()
+    from kospex_core import Kospex
+    kospex = Kospex()
+    db = kospex.kospex_db
+    commits = {}
+    for hash_, repo, author, when, path in FILES:
+        commits[(hash_, repo)] = {"hash": hash_, "_repo_id": repo, "author_email": author,
+                                  "committer_when": when,
+                                  "_committer_epoch": epoch_seconds(when)}
+        db["commit_files"].insert({"hash": hash_, "_repo_id": repo, "file_path": path,
+                                   "committer_when": when, "language": file_language(path)})
+    db["commits"].insert_all(commits.values())
+    return kospex.kospex_query
+
+
+def _reference(by_author, author_email=None, year=None):
+    """The per-row Python grouping developer_tech used to do."""
+    grouped = defaultdict(lambda: {"dates": [], "repos": set(), "files": set()})
+    for hash_, repo, author, when, path in FILES:
+        if author_email and author != author_email:
+            continue
+        if year and not when.startswith(str(year)):
+            continue
+        language = Panopticas.get_language(path, skip_shebang=True)
+        key = (author.lower(), language) if by_author else (language,)
+        grouped[key]["dates"].append(when)
+        grouped[key]["repos"].add(repo)
+        grouped[key]["files"].add(path)
+    return {
+        key: (min(v["dates"]).split("T")[0], max(v["dates"]).split("T")[0],
+              len(v["dates"]), len(v["repos"]), len(v["files"]))
+        for key, v in grouped.items()
+    }
+
+
+def _actual(rows, by_author):
+    return {
+        ((row["author_email"], row["language"]) if by_author else (row["language"],)):
+        (row["first_commit"], row["last_commit"], row["commits"], row["repos"], row["files"])
+        for row in rows
+    }
+
+
+def test_language_summary_matches_the_per_row_grouping(kquery):
+    rows = kquery.developer_tech()
+    assert _actual(rows, False) == _reference(False)
+    assert [row["language"] for row in rows] == sorted(row["language"] for row in rows)
+
+
+def test_developer_summary_matches_the_per_row_grouping(kquery):
+    assert _actual(kquery.developer_tech(developers=True), True) == _reference(True)
+    assert (_actual(kquery.developer_tech(author_email="bob@x.com"), True)
+            == _reference(True, author_email="bob@x.com"))
+    assert (_actual(kquery.developer_tech(developers=True, year=2024), True)
+            == _reference(True, year=2024))
+
+
+def test_file_language_matches_panopticas_on_full_paths():
+    for path in ["src/a/util.py", "go.mod", "deep/dir/Dockerfile", "x/y.unknownext", "README"]:
+        assert file_language(path) == Panopticas.get_language(path, skip_shebang=True)
+
+
+def test_backfill_fills_rows_synced_before_the_column(kquery):
+    from kospex.db.migrator import _load_python_module
+
+    db = kquery.kospex_db
+    db.execute("UPDATE commit_files SET language = NULL")
+    migrations = Path(__file__).resolve().parents[1] / "src" / "kospex" / "db" / "migrations"
+    module = _load_python_module(migrations / "0007_commit_files_language.py", "0007")
+
+    module.up(db)
+
+    rows = db.execute("SELECT file_path, language FROM commit_files").fetchall()
+    assert rows and all(language == file_language(path) for path, language in rows)
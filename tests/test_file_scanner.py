@@ -0,0 +1,85 @@
+"""kospex.file_scanner: one pruned pass serving every kind of file lookup."""
+import os
+
+import pytest
+
+import krunner_utils as KrunnerUtils
+from kospex import file_scanner
+from kospex.extractors.registry import Kind
+from kospex.file_scanner import find_files, scan, scan_groups, walk_files
+
+
+def _tree(root, paths):
+    for rel in paths:
+        path = root / rel
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text("x\n")
+
+
+@pytest.fixture
+def repos(tmp_path):
+    _tree(tmp_path / "api", [
+        "requirements.txt", "Dockerfile", "docs/index.html", "src/app.py",
+        "node_modules/left-pad/package.json", ".git/hooks/pre-commit.sample",
+        "vendor/github.com/x/go.mod",
+    ])
+    _tree(tmp_path / "web", [
+        "package.json", "pnpm-lock.yaml", "deploy/docker-compose.prod.yml",
+        ".venv/lib/site.html",
+    ])
+    return [str(tmp_path / "api"), str(tmp_path / "web")]
+
+
+def _names(paths, roots):
+    return sorted(os.path.relpath(p, os.path.dirname(roots[0])) for p in paths)
+
+
+def test_one_pass_serves_every_group(repos, monkeypatch):
+    scanned_dirs = []
+    real_scandir = os.scandir
+    monkeypatch.setattr(file_scanner.os, "scandir",
+                        lambda path: scanned_dirs.append(path) or real_scandir(path))
+
+    found = scan_groups(repos, ["docker", "dependencies", "html"])
+
+    assert _names(found["dependencies"], repos) == [
+        "api/requirements.txt", "web/package.json", "web/pnpm-lock.yaml"]
+    assert _names(found["docker"], repos) == ["api/Dockerfile", "web/deploy/docker-compose.prod.yml"]
+    assert _names(found["html"], repos) == ["api/docs/index.html"]
+    # every directory read once, and none of the pruned ones
+    assert len(scanned_dirs) == len(set(scanned_dirs)) == 5
+
+
+def test_matches_are_classified_against_the_registry(repos):
+    kinds = {os.path.basename(f.path): (f.groups, f.classification.kind)
+             for f in scan(repos, ["dependencies", "docker"])}
+
+    assert kinds["pnpm-lock.yaml"] == (("dependencies",), Kind.PACKAGE)
+    assert kinds["Dockerfile"] == (("docker",), Kind.CONTAINER)
+    assert kinds["docker-compose.prod.yml"] == (("docker",), Kind.UNKNOWN)
+
+
+def test_callers_keep_their_results(repos):
+    from kospex_dependencies import KospexDependencies
+
+    assert _names(KospexDependencies().find_dependency_files(repos[1]), repos) == [
+        "web/package.json", "web/pnpm-lock.yaml"]
+    assert _names(KrunnerUtils.find_dockerfiles_in_repos(repos), repos) == [
+        "api/Dockerfile", "web/deploy/docker-compose.prod.yml"]
+
+
+def test_prune_can_be_narrowed(repos):
+    found = find_files(repos[:1], "dependencies", prune={".git"})
+    assert _names(found, repos) == [
+        "api/node_modules/left-pad/package.json", "api/requirements.txt",
+        "api/vendor/github.com/x/go.mod"]
+
+
+def test_walk_lists_a_directorys_files_before_its_subdirectories(tmp_path):
+    _tree(tmp_path, ["b/inner.txt", "a.txt"])
+    assert [entry.name for entry in walk_files(str(tmp_path))] == ["a.txt", "inner.txt"]
+
+
+def test_unknown_group_is_an_error(repos):
+    with pytest.raises(ValueError, match="nope"):
+        list(scan(repos, ["nope"]))
@@ -0,0 +1,84 @@
+"""GitIngest._get_branch_info computes branch membership in one graph walk.
+
+The result must match what one `git log <branch>` per branch would report —
+the old implementation — for local and remote branches, merges and branches
+that share a tip.
+"""
+import os
+import subprocess
+
+import pytest
+
+from kospex.git_ingest import BranchMembership, GitIngest, propagate_branch_bits
+
+_GIT_ENV = {
+    "GIT_AUTHOR_NAME": "Test", "GIT_AUTHOR_EMAIL": "test@example.com",
+    "GIT_COMMITTER_NAME": "Test", "GIT_COMMITTER_EMAIL": "test@example.com",
+}
+
+
+def _git(repo, *args):
+    return subprocess.run(["git", "-C", str(repo), *args], check=True, capture_output=True,
+                          text=True, env={**os.environ, **_GIT_ENV}).stdout.strip()
+
+
+def test_bits_flow_from_children_to_parents():
+    # c3 (tip of bit 0) -> c2 -> c1 ; c4 (tip of bit 1) -> c1 ; m (bit 2) merges c3 and c4
+    lines = ["m c3 c4", "c4 c1", "c3 c2", "c2 c1", "c1"]
+    tips = {"m": 0b100, "c3": 0b001, "c4": 0b010}
+
+    bits = propagate_branch_bits(lines, tips)
+
+    assert bits == {"m": 0b100, "c3": 0b101, "c4": 0b110, "c2": 0b101, "c1": 0b111}
+
+
+def test_equal_masks_share_one_object():
+    lines = [f"c{n} c{n + 1}" for n in range(5)] + ["c5"]
+    big = 1 << 300
+
+    bits = propagate_branch_bits(lines, {"c0": big})
+
+    assert len({id(mask) for mask in bits.values()}) == 1
+
+
+def test_membership_lookups():
+    membership = BranchMembership(["main", "dev", "origin/main"], {"a": 0b101, "b": 0b010})
+
+    assert membership.branches_of("a") == ["main", "origin/main"]
+    assert membership.get("b") == ["dev"]
+    assert membership.get("zzz", []) == []
+    assert "a" in membership and "zzz" not in membership
+    assert len(membership) == 2
+    assert membership.branch_count == 3
+
+
+@pytest.mark.integration
+def test_matches_a_per_branch_walk(tmp_path):
+    repo = tmp_path / "repo"
+    repo.mkdir()
+    _git(repo, "init", "-q", "-b", "main")
+    for n in range(3):
+        (repo / "f.txt").write_text(f"{n}\n")
+        _git(repo, "add", "-A")
+        _git(repo, "commit", "-q", "-m", f"main {n}")
+    _git(repo, "checkout", "-q", "-b", "feature", "HEAD~1")
+    (repo / "g.txt").write_text("g\n")
+    _git(repo, "add", "-A")
+    _git(repo, "commit", "-q", "-m", "feature")
+    _git(repo, "checkout", "-q", "main")
+    _git(repo, "merge", "-q", "--no-ff", "-m", "merge", "feature")
+    _git(repo, "branch", "same-as-main")
+    _git(repo, "branch", "old", "HEAD~2")
+    _git(repo, "update-ref", "refs/remotes/origin/main", _git(repo, "rev-parse", "HEAD~1"))
+
+    ingest = GitIngest(db=None)
+    ingest._set_repo(str(repo))
+    membership = ingest._get_branch_info()
+
+    expected = {}
+    for branch in _git(repo, "branch", "-a", "--format=%(refname:short)").splitlines():
+        for commit in _git(repo, "log", branch, "--format=%H").splitlines():
+            expected.setdefault(commit, set()).add(branch)
+
+    assert membership.branch_count == 5
+    assert {c: set(membership.branches_of(c)) for c in membership.bits} == expected
@@ -0,0 +1,213 @@
+"""Tests for kospex.git_log — the shared `git log --numstat -z` parser.
+
+The same parser feeds Kospex.sync_repo (SQLite) and GitIngest (DuckDB), so the
+token handling, rename rendering and extension conventions are pinned here
+against the output of a real git binary.
+"""
+import os
+import subprocess
+import sys
+import types
+
+import pytest
+
+from kospex.git_log import (
+    FIELD_SEP,
+    RECORD_SEP,
+    git_log_command,
+    parse_git_log,
+    read_git_log,
+    read_spooled_git_log,
+    rename_display,
+    spool_git_log,
+    stream_git_log,
+)
+
+
+def _header(commit_hash, email="Ann@Example.com", parents="p1"):
+    fields = [commit_hash, parents, "2025-01-02T00:00:00+00:00", "2025-01-02T00:00:00+00:00",
+              "Ann", email, "Ann", email.lower(), "subject # with hash"]
+    return RECORD_SEP + FIELD_SEP.join(fields)
+
+
+def test_commits_are_yielded_one_at_a_time():
+    tokens = [
+        _header("a1") + "\n3\t1\tsrc/app.py",
+        "-\t-\tlogo.png",
+        "",
+        _header("b2", parents="") + "\n1\t0\tREADME.md",
+        "",
+    ]
+
+    commits = parse_git_log(iter(tokens))
+    first = next(commits)
+
+    assert isinstance(commits, types.GeneratorType)
+    assert first.hash == "a1"
+    assert first.parents == ("p1",)
+    assert first.author_email == "ann@example.com"
+    assert first.message == "subject # with hash"
+    assert [(f.file_path, f.additions, f.deletions, f.ext) for f in first.files] == [
+        ("src/app.py", 3, 1, ".py"),
+        ("logo.png", 0, 0, ".png"),
+    ]
+    (second,) = list(commits)
+    assert second.parents == ()
+
+
+def test_an_empty_commit_has_no_files():
+    tokens = [_header("a1"), _header("b2") + "\n2\t2\tx.py"]
+
+    commits = list(parse_git_log(tokens))
+
+    assert [c.hash for c in commits] == ["a1", "b2"]
+    assert commits[0].files == []
+    assert commits[1].files[0].file_path == "x.py"
+
+
+def test_a_rename_keeps_the_new_path_and_gits_display_form():
+    tokens = [_header("a1") + "\n0\t0\t", "src/old/app.py", "src/new/app.py", "1\t0\tz.txt", ""]
+
+    (commit,) = parse_git_log(tokens)
+
+    assert commit.files[0].file_path == "src/new/app.py"
+    assert commit.files[0].path_change == "src/{old => new}/app.py"
+    assert commit.files[1].file_path == "z.txt"
+    assert commit.files[1].path_change is None
+
+
+def test_repeated_strings_are_interned():
+    tokens = [
+        _header("a1", email="Dev@Example.com") + "\n1\t0\ta/x.py", "",
+        _header("b2", email="dev@example.COM") + "\n1\t0\tb/x.py", "",
+    ]
+
+    first, second = parse_git_log(tokens)
+
+    assert first.author_email is second.author_email
+    assert first.files[0].ext is second.files[0].ext
+
+
+def test_a_custom_extension_function_is_used():
+    tokens = [_header("a1") + "\n1\t0\tMakefile", "1\t0\tlib/x.tar.gz", ""]
+
+    (commit,) = parse_git_log(tokens, ext_func=lambda p: os.path.splitext(p)[1].lstrip("."))
+
+    assert [f.ext for f in commit.files] == ["", "gz"]
+
+
+@pytest.mark.parametrize("old,new,expected", [
+    ("src/old/app.py", "src/new/app.py", "src/{old => new}/app.py"),
+    ("d/x.py", "d/z.py", "d/{x.py => z.py}"),
+    ("a/b/c/f.txt", "a/f.txt", "a/{b/c => }/f.txt"),
+    ("d/z.py", "x/y/z.py", "{d => x/y}/z.py"),
+    ("top.md", "a/b/top2.md", "top.md => a/b/top2.md"),
+])
+def test_rename_display_matches_git(old, new, expected):
+    assert rename_display(old, new) == expected
+
+
+def test_stream_splits_tokens_across_chunk_boundaries():
+    script = "import sys; sys.stdout.buffer.write(b'alpha\\0beta\\0\\0gamma')"
+    tokens = list(stream_git_log([sys.executable, "-c", script], chunk_size=3))
+    assert tokens == ["alpha", "beta", "", "gamma"]
+
+
+def test_undecodable_tokens_are_replaced_and_reported():
+    errors = []
+    script = "import sys; sys.stdout.buffer.write(b'caf\\xe9\\0ok')"
+
+    tokens = list(stream_git_log([sys.executable, "-c", script], on_decode_error=errors.append))
+
+    assert tokens == ["caf�", "ok"]
+    assert len(errors) == 1
+
+
+def test_stopping_early_does_not_leave_the_process_running():
+    script = "import sys\nfor i in range(10**6): sys.stdout.write(f'{i}\\0')"
+    tokens = stream_git_log([sys.executable, "-c", script])
+
+    assert next(tokens) == "0"
+    tokens.close()  # runs the cleanup; must not hang on a full pipe
+
+
+def test_check_raises_on_a_failing_command():
+    script = "import sys; sys.stderr.write('boom'); sys.exit(3)"
+    with pytest.raises(subprocess.CalledProcessError) as excinfo:
+        list(stream_git_log([sys.executable, "-c", script], check=True))
+    assert excinfo.value.returncode == 3
+
+
+def test_git_log_command_options():
+    cmd = git_log_command(since="2025-01-01", until="2025-02-01", limit=5, all_refs=True)
+    assert cmd[:2] == ["git", "log"]
+    assert {"--numstat", "-z", "--all", "--since=2025-01-01", "--until=2025-02-01"} <= set(cmd)
+    assert cmd[-2:] == ["-n", "5"]
+
+
+_GIT_ENV = {
+    "GIT_AUTHOR_NAME": "Test", "GIT_AUTHOR_EMAIL": "Test@Example.com",
+    "GIT_COMMITTER_NAME": "Test", "GIT_COMMITTER_EMAIL": "test@example.com",
+}
+
+
+def _git(repo, *args):
+    return subprocess.run(["git", "-C", str(repo), *args], check=True, capture_output=True,
+                          text=True, env={**os.environ, **_GIT_ENV}).stdout
+
+
+@pytest.fixture
+def renamed_repo(tmp_path):
+    repo = tmp_path / "repo"
+    (repo / "a" / "b" / "c").mkdir(parents=True)
+    _git(repo, "init", "-q")
+    (repo / "a" / "b" / "c" / "f.txt").write_text("f\n")
+    (repo / "top.md").write_text("t\n")
+    (repo / "spaced name.py").write_text("s\n")
+    (repo / "blob.bin").write_bytes(b"\0\1\2")
+    _git(repo, "add", "-A")
+    _git(repo, "commit", "-q", "-m", "one")
+    _git(repo, "commit", "-q", "--allow-empty", "-m", "empty")
+    _git(repo, "mv", "a/b/c/f.txt", "a/f.txt")
+    _git(repo, "mv", "top.md", "a/b/top2.md")
+    _git(repo, "commit", "-q", "-m", "renames")
+    return repo
+
+
+@pytest.mark.integration
+def test_read_git_log_agrees_with_plain_numstat(renamed_repo):
+    records = list(read_git_log(cwd=renamed_repo))
+    plain = _git(renamed_repo, "log", "--numstat", "--format=%H")
+    renames = [line.split("\t")[2] for line in plain.splitlines() if "=>" in line]
+
+    assert [len(r.files) for r in records] == [2, 0, 4]
+    assert [f.path_change for r in records for f in r.files if f.path_change] == renames
+    assert {f.file_path for f in records[-1].files} == {
+        "a/b/c/f.txt", "top.md", "spaced name.py", "blob.bin"
+    }
+    assert records[0].author_email == "test@example.com"
+
+
+@pytest.mark.integration
+def test_a_spooled_log_parses_the_same_as_a_streamed_one(renamed_repo, tmp_path):
+    spool = tmp_path / "log.z"
+    spool_git_log(spool, cwd=renamed_repo)
+
+    assert list(read_spooled_git_log(spool, chunk_size=7)) == list(read_git_log(cwd=renamed_repo))
+
+
+@pytest.mark.integration
+def test_git_ingest_extracts_rows_through_the_shared_parser(renamed_repo):
+    from kospex.git_ingest import GitIngest
+
+    ingest = GitIngest(db=None)
+    ingest._set_repo(str(renamed_repo))
+    commits, commit_files = ingest._extract_commits({})
+
+    assert [c["_files"] for c in commits] == [2, 0, 4]
+    assert commits[0]["message"] == "renames"
+    assert commits[-1]["parent_count"] == 0
+    renamed = {f["file_path"]: f for f in commit_files if f["path_change"]}
+    assert renamed["a/f.txt"]["path_change"] == "a/{b/c => }/f.txt"
+    assert renamed["a/f.txt"]["_ext"] == "txt"
+    assert {f["_ext"] for f in commit_files} >= {"md", "py", "bin"}
@@ -47,7 +47,8 @@ def _setup(tmp_path, monkeypatch):
     return work, bare, clone
 
 
-def test_kgit_pull_fast_forwards_stamps_and_syncs(tmp_path, monkeypatch):
+@pytest.mark.parametrize("workers", [1, 2])
+def test_kgit_pull_fast_forwards_stamps_and_syncs(tmp_path, monkeypatch, workers):
     work, bare, clone = _setup(tmp_path, monkeypatch)
 
     from kgit import cli, kospex as kgit_kospex
@@ -84,7 +85,7 @@ def test_kgit_pull_fast_forwards_stamps_and_syncs(tmp_path, monkeypatch):
     _git(work, "push", "-q", "origin", "main")
     upstream_head = _head(work)
 
-    result = CliRunner().invoke(cli, ["pull", "--all"])
+    result = CliRunner().invoke(cli, ["pull", "--all", "--workers", str(workers)])
     assert result.exit_code == 0, result.output
     assert "updated" in result.output.lower()
     assert _head(clone) == upstream_head              # clone fast-forwarded to c2
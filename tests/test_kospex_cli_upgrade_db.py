@@ -38,6 +38,10 @@ def test_shipped_0003_adds_repos_provenance_columns(tmp_path):
     db = sqlite_utils.Database(tmp_path / "kospex.db")
     db.execute(KospexSchema.SQL_CREATE_REPOS)
     db.execute(KospexSchema.SQL_CREATE_DEPENDENCY_DATA)
+    db.execute(KospexSchema.SQL_CREATE_COMMITS)          # indexed by 0006
+    db.execute(KospexSchema.SQL_CREATE_COMMIT_FILES)
+    db.execute(KospexSchema.SQL_CREATE_FILE_METADATA)
+    db.execute(KospexSchema.SQL_CREATE_URL_CACHE)        # extended by 0008
     db.execute(
         "CREATE TABLE schema_migrations ("
         "id TEXT PRIMARY KEY, sequence INTEGER NOT NULL, checksum TEXT NOT NULL, "
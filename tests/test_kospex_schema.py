@@ -63,6 +63,10 @@ def test_fresh_db_has_migrated_columns(tmp_path, monkeypatch):
     assert "last_panopticas_version" in repos    # 0003
     assert "last_scc_version" in repos           # 0003
     assert "resolution" in deps                  # 0005
+    files = [c[1] for c in db.execute("PRAGMA table_info(commit_files)").fetchall()]
+    assert "language" in files                   # 0007
+    cache = [c[1] for c in db.execute("PRAGMA table_info(url_cache)").fetchall()]
+    assert "status" in cache and "encoding" in cache  # 0008
 
 
 def test_fresh_db_records_migrations_as_applied(tmp_path, monkeypatch):
@@ -76,9 +80,18 @@ def test_fresh_db_records_migrations_as_applied(tmp_path, monkeypatch):
         "0003_repos_sync_provenance",
         "0004_repos_last_fetch",
         "0005_dependency_data_resolution",
+        "0006_hot_query_indexes",
+        "0007_commit_files_language",
+        "0008_url_cache_structured",
+        "0009_depsdev_snapshot",
+        "0010_dependency_data_file_index",
+        "0011_manifest_cache",
+        "0012_dependency_graph",
+        "0013_activity_rollup",
+        "0014_commit_epochs",
     ]
     assert KospexSchema.LAST_BOOTSTRAP["created"] is True
-    assert KospexSchema.LAST_BOOTSTRAP["migrations_applied"] == 3
+    assert KospexSchema.LAST_BOOTSTRAP["migrations_applied"] == 12
     assert KospexSchema.LAST_BOOTSTRAP["migration_error"] is None
 
 
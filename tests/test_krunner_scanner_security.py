@@ -14,6 +14,7 @@ from pathlib import Path
 
 import pytest
 
+from kospex.file_scanner import grep_exclude_args
 from kospex_core import Kospex
 
 
@@ -164,7 +165,8 @@ def test_grep_no_shell_injection(tmp_path, monkeypatch):
     result = CliRunner().invoke(krunner.cli, ["grep", "-keyword", evil, str(tmp_path)])
 
     assert result.exit_code == 0
-    assert captured["argv"] == ["grep", "-Rn", "-e", evil, "."]  # keyword inert, one element
+    # keyword inert, one element. The excludes are file_scanner's pruned dirs.
+    assert captured["argv"] == ["grep", "-Rn", *grep_exclude_args(), "-e", evil, "."]
     assert captured["kwargs"].get("cwd") == str(repo)
     assert captured["kwargs"].get("shell") in (None, False)
 
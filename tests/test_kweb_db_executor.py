@@ -0,0 +1,142 @@
+"""kweb_db_executor - blocking DB work runs on a thread pool, not the event loop.
+
+A slow query in one request must not stall other requests on the same
+uvicorn worker, and a query that overruns its timeout answers 504.
+"""
+import asyncio
+import inspect
+import threading
+import time
+from typing import Optional
+
+import httpx
+import pytest
+from fastapi import FastAPI, Request
+
+from kweb_db_executor import DBExecutor
+
+
+def _app(executor):
+    app = FastAPI()
+    release = threading.Event()
+
+    @app.get("/slow")
+    @executor.route
+    def slow():
+        release.wait(5)
+        return {"slow": True}
+
+    @app.get("/fast/{name}")
+    @executor.route
+    def fast(request: Request, name: str, days: Optional[int] = None):
+        return {"name": name, "days": days}
+
+    return app, release
+
+
+def _client(app):
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://t")
+
+
+def test_route_keeps_the_wrapped_signature():
+    app, _ = _app(DBExecutor(max_workers=2, timeout=5))
+    route = next(r for r in app.routes if getattr(r, "path", "") == "/fast/{name}")
+
+    assert inspect.iscoroutinefunction(route.endpoint)
+    assert list(inspect.signature(route.endpoint).parameters) == ["request", "name", "days"]
+
+
+def test_a_slow_query_does_not_block_other_requests():
+    executor = DBExecutor(max_workers=2, timeout=5)
+    app, release = _app(executor)
+
+    async def scenario():
+        async with _client(app) as client:
+            slow = asyncio.create_task(client.get("/slow"))
+            await asyncio.sleep(0.05)
+            start = time.perf_counter()
+            fast = await client.get("/fast/x", params={"days": 7})
+            fast_seconds = time.perf_counter() - start
+            release.set()
+            return fast, fast_seconds, await slow
+
+    fast, fast_seconds, slow = asyncio.run(scenario())
+    executor.shutdown()
+
+    assert fast.json() == {"name": "x", "days": 7}
+    assert fast_seconds < 1
+    assert slow.json() == {"slow": True}
+
+
+def test_an_overrunning_query_answers_504():
+    executor = DBExecutor(max_workers=1, timeout=0.1)
+    app, release = _app(executor)
+
+    async def scenario():
+        async with _client(app) as client:
+            return await client.get("/slow")
+
+    response = asyncio.run(scenario())
+    release.set()
+    executor.shutdown()
+
+    assert response.status_code == 504
+    assert executor.stats()["timeouts"] == 1
+
+
+def test_settings_come_from_habitat_config(monkeypatch):
+    from kospex.habitat_config import HabitatConfig
+    monkeypatch.setenv("KOSPEX_WEB_DB_WORKERS", "3")
+    monkeypatch.setenv("KOSPEX_WEB_QUERY_TIMEOUT", "nonsense")
+    HabitatConfig.reset_instance()
+
+    executor = DBExecutor()
+
+    assert executor.max_workers == 3
+    assert executor.timeout == 30.0
+
+
+def test_kweb_routes_run_on_the_pool(tmp_path, monkeypatch):
+    from kospex.habitat_config import HabitatConfig
+    monkeypatch.setenv("KOSPEX_HOME", str(tmp_path))
+    HabitatConfig.reset_instance()
+    import kweb2
+    import kospex_schema as KospexSchema
+    KospexSchema.connect_or_create_kospex_db()
+
+    before = kweb2.db_executor.completed
+
+    async def scenario():
+        async with _client(kweb2.app) as client:
+            return await client.get("/api/servers/"), await client.get("/health")
+
+    servers, health = asyncio.run(scenario())
+
+    assert servers.status_code == 200
+    assert kweb2.db_executor.completed == before + 1
+    assert health.json()["db_executor"]["timeouts"] == 0
+
+
+def test_supply_chain_runs_off_the_db_pool(tmp_path, monkeypatch):
+    from kospex.habitat_config import HabitatConfig
+    monkeypatch.setenv("KOSPEX_HOME", str(tmp_path))
+    HabitatConfig.reset_instance()
+    import kweb2
+    import kospex_schema as KospexSchema
+    KospexSchema.connect_or_create_kospex_db()
+
+    db_before = kweb2.db_executor.completed
+    network_before = kweb2.network_executor.completed
+
+    async def scenario():
+        async with _client(kweb2.app) as client:
+            return await client.get("/supply-chain/"), await client.get("/health")
+
+    page, health = asyncio.run(scenario())
+
+    assert page.status_code == 200
+    assert kweb2.db_executor.completed == db_before
+    assert kweb2.network_executor.completed == network_before + 1
+    network = health.json()["network_executor"]
+    assert (network["workers"], network["read_pool"]) == (2, None)
+    assert network["timeout_seconds"] > kweb2.db_executor.timeout
@@ -0,0 +1,70 @@
+"""The /package-check/ background job queue: reuse, expiry and eviction."""
+import threading
+
+from kweb_package_jobs import DONE, PackageCheckJobs
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+def _finish(jobs, job):
+    jobs._pool.shutdown(wait=True)
+    jobs._pool = None
+    assert job.status == DONE
+
+
+def test_finished_results_are_reused_until_the_ttl(tmp_path):
+    clock = _Clock()
+    paths = []
+
+    def assess(path, progress):
+        paths.append(path)
+        progress(1, 1)
+        return [{"package_name": "requests"}]
+
+    jobs = PackageCheckJobs(assess, ttl=60, clock=clock)
+    job, reused = jobs.submit("requirements.txt", b"requests\n")
+    _finish(jobs, job)
+    assert not reused and (job.done, job.total) == (1, 1)
+
+    assert jobs.submit("requirements.txt", b"requests\n") == (job, True)
+    # a different name picks a different parser, so it is a different job
+    other, reused = jobs.submit("requirements-dev.txt", b"requests\n")
+    _finish(jobs, other)
+    assert not reused
+
+    clock.now += 60
+    fresh, reused = jobs.submit("requirements.txt", b"requests\n")
+    _finish(jobs, fresh)
+    assert not reused and fresh.id != job.id
+    assert len(paths) == 3
+    assert jobs.stats()["reused"] == 1
+
+
+def test_running_job_is_shared():
+    release = threading.Event()
+    jobs = PackageCheckJobs(lambda path, progress: release.wait(5) and [])
+
+    first, _ = jobs.submit("package.json", b"{}")
+    second, reused = jobs.submit("package.json", b"{}")
+    release.set()
+    _finish(jobs, first)
+
+    assert reused and second is first
+
+
+def test_oldest_finished_jobs_are_evicted():
+    jobs = PackageCheckJobs(lambda path, progress: [], max_jobs=2)
+    submitted = []
+    for n in range(3):
+        job, _ = jobs.submit("package.json", f'{{"n": {n}}}'.encode())
+        _finish(jobs, job)
+        submitted.append(job)
+
+    assert jobs.get(submitted[0].id) is None
+    assert [jobs.get(job.id) for job in submitted[1:]] == submitted[1:]
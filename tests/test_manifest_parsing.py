@@ -0,0 +1,141 @@
+"""krunner osi's manifest parsing stage: registry dispatch and the process pool."""
+import json
+from pathlib import Path
+
+import pytest
+import sqlite_utils
+
+import kospex.manifest_parsing as manifest_parsing
+from kospex.manifest_parsing import ManifestCache, ManifestTask, parse_manifest, parse_manifests
+
+MIGRATIONS = Path(__file__).resolve().parents[1] / "src" / "kospex" / "db" / "migrations"
+
+PNPM_LOCK = """lockfileVersion: '9.0'
+packages:
+  left-pad@1.3.0:
+    resolution: {integrity: sha512-x}
+  '@scope/util@2.0.0':
+    resolution: {integrity: sha512-y}
+"""
+
+
+@pytest.fixture
+def repo(tmp_path):
+    (tmp_path / "requirements.txt").write_text("requests==2.31.0\n# comment\nclick>=8\n")
+    (tmp_path / "web").mkdir()
+    (tmp_path / "web" / "package.json").write_text(json.dumps(
+        {"dependencies": {"left-pad": "^1.3.0"}, "devDependencies": {"jest": "29.0.0"}}))
+    (tmp_path / "web" / "pnpm-lock.yaml").write_text(PNPM_LOCK)
+    (tmp_path / "pyproject.toml").write_text('[project]\ndependencies = ["rich>=13"]\n')
+    (tmp_path / "broken").mkdir()
+    (tmp_path / "broken" / "package.json").write_text("{not json")
+    (tmp_path / "go.mod").write_text("module example.com/m\n")
+    return tmp_path
+
+
+def _tasks(repo):
+    return [ManifestTask("github.com~o~r", str(repo), path, hash="abc123")
+            for path in ("requirements.txt", "web/package.json", "web/pnpm-lock.yaml",
+                         "pyproject.toml", "broken/package.json", "go.mod")]
+
+
+def test_records_carry_the_manifest_and_osi_defaults(repo):
+    parsed = parse_manifest(_tasks(repo)[0])
+
+    assert parsed.extractor == "pypi-requirements"
+    assert [r["package_name"] for r in parsed.records] == ["requests", "click"]
+    record = parsed.records[0]
+    assert (record["_repo_id"], record["file_path"], record["hash"]) == (
+        "github.com~o~r", "requirements.txt", "abc123")
+    assert (record["ecosystem"], record["requirements_type"], record["extras"]) == (
+        "PyPi", "direct", "")
+
+
+def test_bad_and_unsupported_files_do_not_raise(repo):
+    broken, gomod = (parse_manifest(task) for task in _tasks(repo)[4:])
+
+    assert broken.extractor == "npm-packagejson"
+    assert broken.error.startswith("JSONDecodeError")
+    assert broken.records == []
+    assert gomod.extractor is None  # go.mod is sca-only
+    assert gomod.records == []
+
+
+def test_pool_matches_inline_parsing_in_task_order(repo):
+    inline = list(parse_manifests(_tasks(repo), workers=1))
+    pooled = list(parse_manifests(_tasks(repo), workers=2))
+
+    assert [p.task.file_path for p in pooled] == [t.file_path for t in _tasks(repo)]
+    assert [p.records for p in pooled] == [p.records for p in inline]
+    assert [(p.extractor, len(p.records)) for p in pooled] == [
+        ("pypi-requirements", 2), ("npm-packagejson", 2), ("pnpm-lock", 2), ("pyproject", 1),
+        ("npm-packagejson", 0), (None, 0)]
+
+
+def test_workers_must_be_positive():
+    with pytest.raises(ValueError):
+        list(parse_manifests([], workers=0))
+
+
+@pytest.fixture
+def counted_parses(monkeypatch):
+    parsed = []
+
+    def _parse(task):
+        parsed.append(task.file_path)
+        return parse_manifest(task)
+
+    monkeypatch.setattr(manifest_parsing, "parse_manifest", _parse)
+    return parsed
+
+
+@pytest.fixture
+def cache():
+    db = sqlite_utils.Database(memory=True)
+    db.conn.executescript((MIGRATIONS / "0011_manifest_cache.sql").read_text())
+    return ManifestCache(db)
+
+
+def test_unchanged_manifests_are_not_parsed_again(repo, cache, counted_parses):
+    first = list(parse_manifests(_tasks(repo), workers=1, cache=cache))
+    assert len(counted_parses) == 6
+    counted_parses.clear()
+
+    second = list(parse_manifests(_tasks(repo), workers=1, cache=cache))
+
+    # the malformed and unsupported files are not cached, so they are retried
+    assert counted_parses == ["broken/package.json", "go.mod"]
+    assert [p.cached for p in second] == [True, True, True, True, False, False]
+    assert [p.records for p in second] == [p.records for p in first]
+    assert (cache.hits, cache.misses) == (4, 8)
+
+
+def test_a_new_hash_is_parsed_and_replaces_the_entry(repo, cache, counted_parses):
+    task = _tasks(repo)[0]
+    list(parse_manifests([task], workers=1, cache=cache))
+    (repo / "requirements.txt").write_text("flask==3.0.0\n")
+    task.hash = "def456"
+
+    (parsed,) = parse_manifests([task], workers=1, cache=cache)
+
+    assert not parsed.cached
+    assert [r["package_name"] for r in parsed.records] == ["flask"]
+    assert cache.kospex_db.execute("SELECT hash FROM manifest_cache").fetchall() == [("def456",)]
+
+
+def test_refresh_parses_everything(repo, cache, counted_parses):
+    list(parse_manifests(_tasks(repo)[:2], workers=1, cache=cache))
+    counted_parses.clear()
+
+    refresh = ManifestCache(cache.kospex_db, refresh=True)
+    assert not any(p.cached for p in parse_manifests(_tasks(repo)[:2], workers=1, cache=refresh))
+    assert len(counted_parses) == 2
+
+
+def test_cache_is_skipped_before_migration_0011(repo):
+    cache = ManifestCache(sqlite_utils.Database(memory=True))
+
+    parsed = list(parse_manifests(_tasks(repo)[:1], workers=1, cache=cache))
+
+    assert parsed[0].records and not parsed[0].cached
+    assert not cache.available()
@@ -0,0 +1,88 @@
+"""Orphaned repos from one aggregate query instead of a commits() call per repo."""
+import csv
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from click.testing import CliRunner
+
+from kospex.activity_rollup import ActivityRollup
+from kospex_utils import epoch_seconds
+
+
+def _when(days_ago):
+    return (datetime.now(timezone.utc) - timedelta(days=days_ago)).strftime("%Y-%m-%dT%H:%M:%S+00:00")
+
+
+# repo, author, committer, days ago
+COMMITS = [
+    ("svc", "ann@x.com", "ann@x.com", 10),        # ann is active
+    ("svc", "bob@x.com", "bob@x.com", 200),       # bob left, but committed in the window
+    ("old", "bob@x.com", "bob@x.com", 300),       # only bob: orphaned
+    ("old", "cat@x.com", "cat@x.com", 500),       # outside the window
+    ("web", "dan@x.com", "noreply@github.com", 5),  # web merge: committer is github
+    ("gone", "eve@x.com", "eve@x.com", 900),      # nothing in the window at all
+]
+
+
+@pytest.fixture
+def kospex(tmp_path, monkeypatch):
+    from kospex.habitat_config import HabitatConfig
+    monkeypatch.setenv("KOSPEX_HOME", str(tmp_path))
+    HabitatConfig.reset_instance()
+    from kospex_core import Kospex
+    kospex = Kospex()
+    kospex.kospex_db["commits"].insert_all(
+        {"hash": f"h{i}", "_repo_id": f"github.com~org~{repo}", "_git_server": "github.com",
+         "_git_owner": "org", "_git_repo": repo, "author_email": author,
+         "author_when": _when(days), "committer_email": committer, "committer_when": _when(days),
+         "_author_epoch": epoch_seconds(_when(days)), "_committer_epoch": epoch_seconds(_when(days))}
+        for i, (repo, author, committer, days) in enumerate(COMMITS)
+    )
+    # seeded around write_commits, so build the rollup repos() reads
+    ActivityRollup(kospex.kospex_db).rebuild()
+    return kospex
+
+
+def test_counts_match_the_per_repo_loop(kospex):
+    query = kospex.kospex_query
+    counts = query.orphan_counts(window=365, days=90)
+
+    from_date = (datetime.now(timezone.utc) - timedelta(days=365)).strftime("%Y-%m-%dT%H:%M:%S%z")
+    active = {dev["author"] for dev in kospex.active_developers(days=90)}
+    for repo in ("svc", "old", "web", "gone"):
+        committers = {c["committer_email"] for c in
+                      query.commits(repo_id=f"github.com~org~{repo}", after=from_date)}
+        expected = (len(committers), len(committers & active)) if committers else None
+        assert counts.get(f"github.com~org~{repo}") == expected
+
+    assert query.orphan_counts(email_column="author_email")["github.com~org~web"] == (1, 1)
+
+
+def test_cli_table_and_csv(kospex, tmp_path, monkeypatch):
+    import kospex_cli
+    monkeypatch.setattr(kospex_cli, "kospex", kospex)
+    out = tmp_path / "orphans.csv"
+
+    result = CliRunner().invoke(kospex_cli.cli, ["orphans", "-csv", str(out)])
+
+    assert result.exit_code == 0, result.output
+    assert "Orphaned: 3 | Working Knowledge: 1 | Total: 4" in result.output
+    with open(out, newline="") as f:
+        rows = sorted(csv.reader(f))
+    assert rows == [
+        ["_repo_id", "committers", "active", "Orphaned", "% Here"],
+        ["github.com~org~gone", "0", "0", "True", "0%"],
+        ["github.com~org~old", "1", "0", "True", "0%"],
+        ["github.com~org~svc", "2", "1", "False", "50.00%"],
+        ["github.com~org~web", "1", "0", "True", "0%"],
+    ]
+
+
+def test_get_orphans_rows(kospex):
+    rows = {row["_git_repo"]: row for row in kospex.kospex_query.get_orphans()}
+
+    assert rows["svc"] == {"_repo_id": "github.com~org~svc", "_git_repo": "svc",
+                           "committers": 2, "intersection": 1, "orphaned": False,
+                           "percentage": "50.00"}
+    assert (rows["web"]["orphaned"], rows["old"]["orphaned"], rows["gone"]["committers"]) == (
+        False, True, 0)
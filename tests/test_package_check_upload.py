@@ -15,9 +15,15 @@ The fix coalesces versions_behind/advisories to 0 before comparing, and
 additionally surfaces an honest status label for unresolved items instead of
 letting them silently read as "Current". Both the pure classification logic
 and the full endpoint round-trip are exercised here.
+
+The upload queues a background job (kweb_package_jobs), so the round-trips
+poll GET /package-check/jobs/{job_id} for the results.
 """
+import time
+
 import kweb2
 from kweb2 import UNRESOLVED_STATUS_LABELS, _classify_upload_status
+from kweb_package_jobs import PackageCheckJobs
 
 
 # ---------------------------------------------------------------------------
@@ -99,6 +105,26 @@ def client():
     return TestClient(kweb2.app)
 
 
+@pytest.fixture(autouse=True)
+def package_jobs(monkeypatch):
+    """A fresh job queue per test, so no upload reuses another test's job."""
+    jobs = PackageCheckJobs(kweb2._assess_upload)
+    monkeypatch.setattr(kweb2, "package_jobs", jobs)
+    return jobs
+
+
+def _wait_for_job(client, resp, timeout=10):
+    """Poll the job an upload response names until it finishes."""
+    assert resp.status_code == 202, resp.text
+    job = resp.json()
+    deadline = time.monotonic() + timeout
+    while job["status"] in ("queued", "running"):
+        assert time.monotonic() < deadline, "package check job did not finish"
+        time.sleep(0.02)
+        job = client.get(f"/package-check/jobs/{job['job_id']}").json()
+    return job
+
+
 def test_upload_endpoint_does_not_500_on_unresolved_dependency(client, monkeypatch):
     fake_results = [
         {
@@ -130,9 +156,9 @@ def test_upload_endpoint_does_not_500_on_unresolved_dependency(client, monkeypat
         files={"file": ("package.json", b'{"dependencies": {}}', "application/json")},
     )
 
-    assert resp.status_code == 200  # pre-fix this was a 500 (TypeError: '>' not supported)
-    body = resp.json()
-    by_name = {row["package_name"]: row for row in body}
+    job = _wait_for_job(client, resp)
+    assert job["status"] == "done"  # pre-fix this was a 500 (TypeError: '>' not supported)
+    by_name = {row["package_name"]: row for row in job["results"]}
 
     assert by_name["some-git-dep"]["status"] == "Unresolved spec"
     assert by_name["some-git-dep"]["status"] != "Current"
@@ -176,7 +202,7 @@ def test_upload_filename_with_traversal_stays_inside_temp_dir(client, monkeypatc
         files={"file": ("../pwned.json", b"{}", "application/json")},
     )
 
-    assert resp.status_code == 200
+    assert _wait_for_job(client, resp)["status"] == "done"
     assert "path" in captured, "assess was not reached"
     written = Path(captured["path"]).resolve()
     tempdir = Path(created["dir"]).resolve()
@@ -200,3 +226,44 @@ def test_upload_rejects_dot_dot_filename(client, monkeypatch):
     assert resp.status_code == 400
     # Pin the rejection to the filename sanitiser, not any incidental 400.
     assert resp.json()["detail"] == "Invalid filename"
+
+
+# ---------------------------------------------------------------------------
+# Background jobs: the upload returns at once, and a re-upload of the same
+# file reuses the finished results.
+# ---------------------------------------------------------------------------
+
+def test_reupload_of_the_same_file_reuses_the_results(client, monkeypatch):
+    calls = []
+
+    def fake_assess(self, filename, **kwargs):
+        calls.append(filename)
+        return [{"package_name": "requests", "versions_behind": 8, "resolution": "resolved"}]
+
+    monkeypatch.setattr("kospex_dependencies.KospexDependencies.assess", fake_assess)
+    upload = {"file": ("requirements.txt", b"requests==2.0.0\n", "text/plain")}
+
+    first = _wait_for_job(client, client.post("/package-check/upload", files=upload))
+    again = client.post("/package-check/upload", files=upload)
+
+    assert again.status_code == 202
+    body = again.json()
+    assert body["reused"] and body["job_id"] == first["job_id"]
+    assert body["results"][0]["status"] == "Outdated"
+    assert len(calls) == 1
+
+
+def test_failed_job_reports_the_error(client, monkeypatch):
+    def broken_assess(self, filename, **kwargs):
+        raise ValueError("unparseable manifest")
+
+    monkeypatch.setattr("kospex_dependencies.KospexDependencies.assess", broken_assess)
+    resp = client.post("/package-check/upload",
+                       files={"file": ("package.json", b"{", "application/json")})
+
+    job = _wait_for_job(client, resp)
+    assert job["status"] == "failed" and job["error"] == "unparseable manifest"
+
+
+def test_unknown_job_is_404(client):
+    assert client.get("/package-check/jobs/nope").status_code == 404
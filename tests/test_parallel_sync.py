@@ -0,0 +1,171 @@
+"""kospex.parallel_sync - repo extraction in a process pool, one DB writer.
+
+A parallel sync must leave the DB exactly as a serial sync_repo() loop would,
+report each repo as OK/SKIP/FAIL, and never let one bad repo stop the rest.
+"""
+import functools
+import os
+import shutil
+import subprocess
+import tempfile
+
+import pytest
+
+from kospex.parallel_sync import FAIL, OK, SKIP, ParallelSync
+
+pytestmark = pytest.mark.integration
+
+_GIT_ENV = {
+    "GIT_AUTHOR_NAME": "Test", "GIT_AUTHOR_EMAIL": "test@example.com",
+    "GIT_COMMITTER_NAME": "Test", "GIT_COMMITTER_EMAIL": "test@example.com",
+}
+
+
+def _git(repo, *args):
+    subprocess.run(["git", "-C", str(repo), *args], check=True, capture_output=True,
+                   env={**os.environ, **_GIT_ENV})
+
+
+def _make_repo(root, name, commits):
+    repo = root / name
+    repo.mkdir(parents=True)
+    _git(repo, "init", "-q")
+    _git(repo, "remote", "add", "origin", f"https://github.com/test/{name}.git")
+    for n in range(commits):
+        (repo / f"f{n}.py").write_text(f"x = {n}\n")
+        _git(repo, "add", "-A")
+        _git(repo, "commit", "-q", "-m", f"c{n}")
+    return repo
+
+
+def _kospex(tmp_path, monkeypatch, name):
+    home = tmp_path / name
+    home.mkdir()
+    monkeypatch.setenv("KOSPEX_HOME", str(home))
+    monkeypatch.setenv("KOSPEX_CODE", str(tmp_path / "code"))
+    monkeypatch.setenv("KOSPEX_DB", str(home / "kospex.db"))
+    from kospex.habitat_config import HabitatConfig
+    HabitatConfig.reset_instance()
+    from kospex_core import Kospex
+    return Kospex()
+
+
+def _snapshot(k):
+    db = k.kospex_db
+    return {
+        "commits": db.execute(
+            "SELECT _repo_id, hash, author_email, _files FROM commits ORDER BY 1, 2").fetchall(),
+        "files": db.execute(
+            "SELECT _repo_id, hash, file_path, additions FROM commit_files ORDER BY 1, 2, 3"
+        ).fetchall(),
+        "metadata": db.execute(
+            "SELECT _repo_id, Provider, latest FROM file_metadata ORDER BY 1, 2").fetchall(),
+        "repos": db.execute("SELECT _repo_id, file_path FROM repos ORDER BY 1").fetchall(),
+        "devs": db.execute(
+            "SELECT _repo_id, author_email, total_commits FROM developer_stats ORDER BY 1, 2"
+        ).fetchall(),
+    }
+
+
+@pytest.fixture
+def code(tmp_path):
+    code = tmp_path / "code"
+    for name, commits in (("alpha", 3), ("beta", 1), ("gamma", 4)):
+        _make_repo(code, name, commits)
+    return code
+
+
+def test_parallel_matches_a_serial_sync(tmp_path, monkeypatch, code):
+    repos = sorted(str(p) for p in code.iterdir())
+
+    serial = _kospex(tmp_path, monkeypatch, "serial")
+    for repo in repos:
+        serial.sync_repo(repo)
+    expected = _snapshot(serial)
+
+    parallel = _kospex(tmp_path, monkeypatch, "parallel")
+    cwd = os.getcwd()
+    results = list(ParallelSync(parallel, workers=2).run(repos))
+
+    assert os.getcwd() == cwd
+    assert sorted((r.directory, r.status, r.commits) for r in results) == [
+        (repos[0], OK, 3), (repos[1], OK, 1), (repos[2], OK, 4)
+    ]
+    assert _snapshot(parallel) == expected
+    assert expected["metadata"]
+
+
+def test_a_resync_only_reads_new_commits(tmp_path, monkeypatch, code):
+    k = _kospex(tmp_path, monkeypatch, "home")
+    repos = [str(code / "alpha")]
+    list(ParallelSync(k, workers=2).run(repos))
+
+    (code / "alpha" / "new.py").write_text("y = 1\n")
+    _git(code / "alpha", "add", "-A")
+    _git(code / "alpha", "commit", "-q", "-m", "new")
+    (result,) = ParallelSync(k, workers=2).run(repos)
+
+    # since= is inclusive, and test commits share a timestamp, so the
+    # upserts may re-read old commits - but never duplicate them.
+    assert result.status == OK
+    assert k.kospex_db.execute("SELECT COUNT(*) FROM commits").fetchone()[0] == 4
+    assert k.kospex_query.get_data_generation() == 2  # bumped once per sync
+
+
+def test_bad_repos_are_reported_without_stopping_the_run(tmp_path, monkeypatch, code):
+    k = _kospex(tmp_path, monkeypatch, "home")
+    k.sync_repo(str(code / "alpha"))
+    copy = tmp_path / "elsewhere" / "alpha"
+    shutil.copytree(code / "alpha", copy)
+    not_git = tmp_path / "plain"
+    not_git.mkdir()
+
+    from kospex_core import RepoPathConflict
+    scheduler = ParallelSync(
+        k, workers=2,
+        classify=lambda exc: SKIP if isinstance(exc, RepoPathConflict) else FAIL,
+    )
+    results = {r.directory: r for r in scheduler.run([str(copy), str(not_git), str(code / "beta")])}
+
+    assert results[str(copy)].status == SKIP
+    assert isinstance(results[str(copy)].error, RepoPathConflict)
+    assert results[str(not_git)].status == FAIL
+    assert results[str(code / "beta")].status == OK
+
+
+def test_git_log_spools_are_removed(tmp_path, monkeypatch, code):
+    spools = tmp_path / "spools"
+    spools.mkdir()
+    # workers inherit tempfile's cached directory when forked, TMPDIR when spawned
+    monkeypatch.setenv("TMPDIR", str(spools))
+    monkeypatch.setattr(tempfile, "tempdir", str(spools))
+    k = _kospex(tmp_path, monkeypatch, "home")
+    repos = sorted(str(p) for p in code.iterdir())
+
+    assert [r.status for r in ParallelSync(k, workers=2).run(repos)] == [OK, OK, OK]
+    assert list(spools.iterdir()) == []
+
+    # a caller that stops after the first result leaves none behind either
+    for _ in ParallelSync(k, workers=2, force=True).run(repos):
+        break
+    assert list(spools.iterdir()) == []
+
+
+def _refuse_to_pull(directory, reason):
+    return False, reason, 0
+
+
+def test_a_failed_pull_skips_the_repo(tmp_path, monkeypatch, code):
+    k = _kospex(tmp_path, monkeypatch, "home")
+    pull = functools.partial(_refuse_to_pull, reason="fetch failed: offline")
+
+    (result,) = ParallelSync(k, workers=1, pull=pull).run([str(code / "beta")])
+
+    assert result.status == SKIP
+    assert result.detail == "fetch failed: offline"
+    assert k.kospex_db.execute("SELECT COUNT(*) FROM commits").fetchone()[0] == 0
+
+
+def test_workers_must_be_positive(tmp_path, monkeypatch):
+    with pytest.raises(ValueError):
+        ParallelSync(kospex=None, workers=0)
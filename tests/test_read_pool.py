@@ -0,0 +1,112 @@
+"""kospex.db.read_pool - pooled read-only connections for kweb."""
+import asyncio
+import sqlite3
+import threading
+
+import httpx
+import pytest
+from sqlite_utils import Database
+
+from kospex.db.read_pool import PoolClosed, ReadConnectionPool
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    path = tmp_path / "kospex.db"
+    db = Database(path)
+    db["repos"].insert({"_repo_id": "github.com~o~r"})
+    db.conn.close()
+    return path
+
+
+def test_connections_are_read_only_and_tuned(db_path):
+    pool = ReadConnectionPool(db_path, size=1, mmap_size=1 << 20, cache_kib=2048)
+
+    with pool.connection() as db:
+        assert db.execute("PRAGMA query_only").fetchone()[0] == 1
+        assert db.execute("PRAGMA cache_size").fetchone()[0] == -2048
+        assert db.execute("PRAGMA temp_store").fetchone()[0] == 2
+        assert db.execute("SELECT COUNT(*) FROM repos").fetchone()[0] == 1
+        with pytest.raises(sqlite3.OperationalError):
+            db.execute("DELETE FROM repos")
+
+
+def test_connections_are_reused_and_bounded(db_path):
+    pool = ReadConnectionPool(db_path, size=1, checkout_timeout=0.05)
+    with pool.connection() as first:
+        pass
+
+    with pool.connection() as again:
+        assert again is first
+        errors = []
+
+        def other_thread():
+            try:
+                with pool.connection():
+                    pass
+            except TimeoutError as exc:
+                errors.append(exc)
+
+        thread = threading.Thread(target=other_thread)
+        thread.start()
+        thread.join()
+
+    assert len(errors) == 1
+    assert pool.stats() == {"size": 1, "open": 1, "idle": 1, "checkouts": 2}
+
+
+def test_a_connection_can_move_between_threads(db_path):
+    pool = ReadConnectionPool(db_path, size=1)
+    with pool.connection():
+        pass
+    counts = []
+
+    def read():
+        with pool.connection() as db:
+            counts.append(db.execute("SELECT COUNT(*) FROM repos").fetchone()[0])
+
+    thread = threading.Thread(target=read)
+    thread.start()
+    thread.join()
+
+    assert counts == [1]
+
+
+def test_a_closed_pool_refuses_checkouts(db_path):
+    pool = ReadConnectionPool(db_path, size=2)
+    with pool.connection():
+        pass
+    pool.close()
+
+    with pytest.raises(PoolClosed):
+        with pool.connection():
+            pass
+
+
+def test_kweb_requests_share_pooled_connections(tmp_path, monkeypatch):
+    from kospex.habitat_config import HabitatConfig
+    monkeypatch.setenv("KOSPEX_HOME", str(tmp_path))
+    HabitatConfig.reset_instance()
+    import kweb2
+    import kospex_utils as KospexUtils
+
+    init_calls = []
+    real_init = KospexUtils.init
+    monkeypatch.setattr(KospexUtils, "init", lambda *a, **k: init_calls.append(1) or real_init(*a, **k))
+
+    async def scenario():
+        async with kweb2.lifespan(kweb2.app):
+            pool = kweb2.db_executor.read_pool
+            transport = httpx.ASGITransport(app=kweb2.app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://t") as client:
+                responses = [await client.get(path) for path in
+                             ("/api/servers/", "/api/orgs/", "/org-graph/")]
+            return pool.stats(), responses
+
+    stats, responses = asyncio.run(scenario())
+
+    assert [r.status_code for r in responses] == [200, 200, 200]
+    assert stats["checkouts"] == 3
+    assert stats["open"] <= stats["size"]
+    assert init_calls == []
+    assert kweb2.db_executor.read_pool is None  # closed with the server
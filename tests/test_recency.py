@@ -0,0 +1,97 @@
+"""Recency fields computed in SQL agree with the KospexUtils functions they replace."""
+import sqlite3
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+import kospex_utils as KospexUtils
+from kospex.git_log import CommitRecord, FileChange
+from kospex.recency import days_ago_sql, days_between_sql, status_sql
+
+
+def _when(days_ago, offset=0):
+    when = datetime.now(timezone.utc) - timedelta(days=days_ago)
+    return when.astimezone(timezone(timedelta(hours=offset))).replace(microsecond=0).isoformat()
+
+
+# Clear of the 90/180/365 bucket edges, in assorted zones and forms
+WHENS = [_when(3, 10), _when(89.5, -7), _when(120), _when(300, 5),
+         _when(1000, -3), _when(30).replace("+00:00", "Z"), None]
+
+
+def _sql(expr, a, b=None):
+    db = sqlite3.connect(":memory:")
+    db.execute("CREATE TABLE t (a TEXT, b TEXT)")
+    db.execute("INSERT INTO t VALUES (?, ?)", (a, b))
+    return db.execute(f"SELECT {expr} FROM t").fetchone()[0]
+
+
+@pytest.mark.parametrize("when", WHENS)
+def test_days_ago_and_status(when):
+    assert _sql(days_ago_sql("a"), when) == pytest.approx(KospexUtils.days_ago(when), abs=0.011)
+    assert _sql(status_sql("a"), when) == KospexUtils.development_status(when)
+
+
+def test_naive_timestamps_are_utc():
+    # KospexUtils.days_ago raised TypeError on these
+    assert _sql(days_ago_sql("a"), _when(45)[:19]) == pytest.approx(45, abs=0.011)
+    assert _sql(status_sql("a"), _when(400)[:19]) == "Unmaintained"
+
+
+def test_status_limits():
+    when = _when(100)
+    assert _sql(status_sql("a", active_limit=120), when) == "Active"
+    assert _sql(status_sql("a", stale_limit=30, aging_limit=20, active_limit=10), when) == (
+        "Unmaintained")
+
+
+@pytest.mark.parametrize("first,last", [(WHENS[4], WHENS[0]), (WHENS[0], WHENS[3]),
+                                        (WHENS[1], WHENS[1])])
+def test_days_between(first, last):
+    for min_one in (False, True):
+        assert _sql(days_between_sql("a", "b", min_one), first, last) == (
+            KospexUtils.days_between_datetimes(first, last, min_one=min_one))
+
+
+@pytest.fixture
+def kospex(tmp_path, monkeypatch):
+    from kospex.habitat_config import HabitatConfig
+    monkeypatch.setenv("KOSPEX_HOME", str(tmp_path))
+    HabitatConfig.reset_instance()
+    from kospex_core import Kospex
+    kospex = Kospex()
+    kospex.git.set_remote_url("https://github.com/org/app.git")
+    commits = [
+        CommitRecord(hash=f"h{n}", parents=(), author_when=when, committer_when=when,
+                     author_name=author, author_email=f"{author}@x.com", committer_name=author,
+                     committer_email=f"{author}@x.com", message="m",
+                     files=[FileChange(f"f{n}.py", None, 1, 0, "py")])
+        for n, (author, when) in enumerate([("ann", WHENS[4]), ("ann", WHENS[1]),
+                                            ("bob", WHENS[3]), ("bob", WHENS[0])])
+    ]
+    kospex.write_commits(commits, progress=False)
+    kospex.kospex_query.sync_developer_stats(kospex.git.get_repo_id())
+    return kospex
+
+
+def test_query_methods_project_the_same_fields(kospex):
+    query = kospex.kospex_query
+
+    for dev in query.developers():
+        tenure = KospexUtils.days_between_datetimes(
+            dev["first_commit"], dev["last_commit"], min_one=True)
+        assert (dev["status"], dev["tenure"], dev["years_active"]) == (
+            KospexUtils.development_status(dev["last_commit"]), tenure, round(tenure / 365, 2))
+
+    for row in query.repos() + query.repos2():
+        assert row["days_ago"] == pytest.approx(KospexUtils.days_ago(row["last_commit"]), abs=0.011)
+        assert row["status"] == KospexUtils.development_status(row["last_commit"]) == "Active"
+
+    for row in query.authors() + query.active_devs_by_repo("github.com~org~app", days=400):
+        assert row["last_seen"] == pytest.approx(KospexUtils.days_ago(row["last_commit"]), abs=0.011)
+
+    for row in query.author_tech():
+        last_seen = KospexUtils.days_ago(row["last_commit"])
+        first_seen = KospexUtils.days_ago(row["first_commit"])
+        assert row["days_active"] == int(first_seen) - int(last_seen)
+        assert row["years_active"] == f"{row['days_active'] / 365:.3f}"
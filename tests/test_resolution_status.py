@@ -1,13 +1,19 @@
 """Tests for dependency resolution-status classification."""
 import json
+from pathlib import Path
+
 import sqlite_utils
 import kospex_schema as KospexSchema
 from kospex_query import KospexQuery
 
 
+MIGRATIONS = Path(__file__).resolve().parents[1] / "src" / "kospex" / "db" / "migrations"
+
+
 def _kq():
     db = sqlite_utils.Database(memory=True)
     db.execute(KospexSchema.SQL_CREATE_URL_CACHE)
+    db.conn.executescript((MIGRATIONS / "0008_url_cache_structured.sql").read_text())
     return KospexQuery(kospex_db=db)
 
 
@@ -0,0 +1,166 @@
+"""kospex_request_cache.ResultCache and kweb's use of the data generation."""
+import asyncio
+
+import httpx
+import pytest
+
+from kospex_request_cache import ResultCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_keys_ignore_parameter_order_and_none_values():
+    key = ResultCache.make_key
+    assert key("developers", {"days": 90, "org_key": None}) == key("developers", {"days": "90"})
+    assert key("developers", {"a": 1, "b": 2}) == key("developers", {"b": 2, "a": 1})
+    assert key("developers", {"days": 90}) != key("tenure", {"days": 90})
+    assert key("developers", None) == key("developers", {})
+
+
+def test_hits_are_served_without_recomputing():
+    cache = ResultCache()
+    calls = []
+
+    def compute():
+        calls.append(1)
+        return ["dev"]
+
+    first = cache.get_or_compute("developers", {"days": 90}, 1, compute)
+    again = cache.get_or_compute("developers", {"days": 90}, 1, compute)
+
+    assert first is again
+    assert calls == [1]
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 1
+
+
+def test_a_new_generation_invalidates_entries():
+    cache = ResultCache()
+    cache.get_or_compute("orgs", {}, 1, lambda: "old")
+
+    assert cache.get_or_compute("orgs", {}, 2, lambda: "new") == "new"
+    assert cache.get_or_compute("orgs", {}, 2, lambda: "newer") == "new"
+    assert cache.stats()["invalidations"] == 1
+
+
+def test_entries_expire_after_their_ttl():
+    clock = FakeClock()
+    cache = ResultCache(ttl=10, clock=clock)
+    cache.get_or_compute("orgs", {}, 1, lambda: "a")
+    cache.get_or_compute("tenure", {}, 1, lambda: "b", ttl=60)
+
+    clock.now += 11
+    assert cache.get_or_compute("orgs", {}, 1, lambda: "a2") == "a2"
+    assert cache.get_or_compute("tenure", {}, 1, lambda: "b2") == "b"
+    assert cache.stats()["expirations"] == 1
+
+
+def test_least_recently_used_entries_are_evicted():
+    cache = ResultCache(max_entries=2)
+    cache.get_or_compute("a", {}, 1, lambda: "a")
+    cache.get_or_compute("b", {}, 1, lambda: "b")
+    cache.get_or_compute("a", {}, 1, lambda: "unused")  # a is now most recent
+    cache.get_or_compute("c", {}, 1, lambda: "c")
+
+    assert cache.get(cache.make_key("b"), 1) is None
+    assert cache.get(cache.make_key("a"), 1) == "a"
+    stats = cache.stats()
+    assert stats["entries"] == 2
+    assert stats["evictions"] == 1
+
+
+def test_max_entries_must_be_positive():
+    with pytest.raises(ValueError):
+        ResultCache(max_entries=0)
+
+
+@pytest.fixture
+def kospex_env(tmp_path, monkeypatch):
+    from kospex.habitat_config import HabitatConfig
+    monkeypatch.setenv("KOSPEX_HOME", str(tmp_path))
+    HabitatConfig.reset_instance()
+    from kospex_core import Kospex
+    return Kospex()
+
+
+def test_data_generation_starts_at_zero_and_bumps(kospex_env):
+    query = kospex_env.kospex_query
+    assert query.get_data_generation() == 0
+    assert query.bump_data_generation() == 1
+    assert query.bump_data_generation() == 2
+    assert query.get_data_generation() == 2
+
+
+def test_kweb_pages_are_cached_until_the_generation_changes(kospex_env, monkeypatch):
+    import kweb2
+    from kospex_query import KospexQuery
+
+    calls = []
+    real_orgs = KospexQuery.orgs
+
+    def counting_orgs(self, *args, **kwargs):
+        calls.append(1)
+        return real_orgs(self, *args, **kwargs)
+
+    monkeypatch.setattr(KospexQuery, "orgs", counting_orgs)
+    kweb2.result_cache.clear()
+
+    async def get(paths):
+        async with kweb2.lifespan(kweb2.app):
+            transport = httpx.ASGITransport(app=kweb2.app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://t") as client:
+                return [await client.get(path) for path in paths]
+
+    responses = asyncio.run(get(["/orgs/", "/orgs/"]))
+    assert [r.status_code for r in responses] == [200, 200]
+    assert calls == [1]
+
+    kospex_env.kospex_query.bump_data_generation()
+    responses = asyncio.run(get(["/orgs/", "/health"]))
+    assert calls == [1, 1]
+    assert responses[1].json()["result_cache"]["invalidations"] >= 1
+
+
+def test_api_routes_are_cached_until_the_generation_changes(kospex_env, monkeypatch):
+    import kweb2
+    from kospex_query import KospexQuery
+
+    calls = []
+    for name in ("orgs", "summary", "authors", "tech_landscape"):
+        real = getattr(KospexQuery, name)
+
+        def counting(self, *args, _name=name, _real=real, **kwargs):
+            calls.append(_name)
+            return _real(self, *args, **kwargs)
+
+        monkeypatch.setattr(KospexQuery, name, counting)
+    kweb2.result_cache.clear()
+
+    paths = ["/api/orgs/", "/api/summary", "/api/developers/", "/api/tech-landscape"]
+
+    async def get(paths):
+        async with kweb2.lifespan(kweb2.app):
+            transport = httpx.ASGITransport(app=kweb2.app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://t") as client:
+                return [await client.get(path) for path in paths]
+
+    responses = asyncio.run(get(paths))
+    assert all(r.status_code == 200 for r in responses)
+    first = len(calls)
+    assert set(calls) == {"orgs", "summary", "authors", "tech_landscape"}
+
+    asyncio.run(get(paths))
+    assert len(calls) == first
+
+    asyncio.run(get(["/api/summary?days=30"]))
+    assert calls.count("summary") == 2
+
+    kospex_env.kospex_query.bump_data_generation()
+    asyncio.run(get(paths))
+    assert calls.count("authors") == calls.count("tech_landscape") == 2
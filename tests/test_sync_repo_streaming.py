@@ -0,0 +1,52 @@
+"""Kospex.sync_repo streams git log instead of buffering it.
+
+The shared kospex.git_log parser yields one commit at a time from a Popen pipe
+and sync_repo writes each commit through the batched writer as it arrives.
+Parser-level tests live in test_git_log.py.
+"""
+import os
+import subprocess
+
+import pytest
+
+
+_GIT_ENV = {
+    "GIT_AUTHOR_NAME": "Test", "GIT_AUTHOR_EMAIL": "test@example.com",
+    "GIT_COMMITTER_NAME": "Test", "GIT_COMMITTER_EMAIL": "test@example.com",
+}
+
+
+def _git(repo, *args):
+    subprocess.run(["git", "-C", str(repo), *args], check=True, capture_output=True,
+                   env={**os.environ, **_GIT_ENV})
+
+
+@pytest.mark.integration
+def test_sync_repo_writes_every_commit_with_a_tiny_batch(tmp_path, monkeypatch):
+    repo = tmp_path / "repo"
+    repo.mkdir()
+    _git(repo, "init", "-q")
+    _git(repo, "remote", "add", "origin", "https://github.com/test/stream.git")
+    for n in range(3):
+        (repo / f"f{n}.py").write_text(f"x = {n}\n")
+        (repo / "shared.txt").write_text(f"{n}\n")
+        _git(repo, "add", "-A")
+        _git(repo, "commit", "-q", "-m", f"c{n}")
+
+    home = tmp_path / "home"
+    home.mkdir()
+    monkeypatch.setenv("KOSPEX_HOME", str(home))
+    monkeypatch.setenv("KOSPEX_CODE", str(tmp_path))
+    monkeypatch.setenv("KOSPEX_DB", str(home / "kospex.db"))
+    from kospex.habitat_config import HabitatConfig
+    HabitatConfig.reset_instance()
+    from kospex_core import Kospex
+    k = Kospex()
+
+    synced = k.sync_repo(str(repo), no_scc=True, batch_size=1)
+
+    assert synced == 3
+    commits = k.kospex_db.execute("SELECT COUNT(*), SUM(_files) FROM commits").fetchone()
+    assert commits == (3, 6)
+    files = k.kospex_db.execute("SELECT COUNT(*) FROM commit_files").fetchone()[0]
+    assert files == 6
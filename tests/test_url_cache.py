@@ -0,0 +1,157 @@
+"""url_cache compression, negative caching, endpoint TTLs and stale-while-revalidate."""
+import threading
+from pathlib import Path
+
+import pytest
+import sqlite_utils
+from click.testing import CliRunner
+
+import kospex_schema as KospexSchema
+from kospex.url_cache import DAY, ENCODING_ZLIB, UrlCache
+
+MIGRATIONS = Path(__file__).resolve().parents[1] / "src" / "kospex" / "db" / "migrations"
+
+VERSION_URL = "https://api.deps.dev/v3alpha/systems/npm/packages/lodash/versions/4.17.21"
+PACKAGE_URL = "https://api.deps.dev/v3alpha/systems/npm/packages/lodash"
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 1_000_000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def db():
+    db = sqlite_utils.Database(memory=True)
+    db.execute(KospexSchema.SQL_CREATE_URL_CACHE)
+    db.conn.executescript((MIGRATIONS / "0008_url_cache_structured.sql").read_text())
+    return db
+
+
+@pytest.fixture
+def clock():
+    return _Clock()
+
+
+@pytest.fixture
+def cache(db, clock):
+    return UrlCache(db, negative_ttl=600, stale_seconds=300, clock=clock)
+
+
+def test_large_bodies_are_compressed(db, cache):
+    body = '{"versions": [' + ", ".join(['{"v": "1.0.0"}'] * 200) + "]}"
+    cache.store(PACKAGE_URL, body, 200)
+    cache.store(VERSION_URL, '{"small": true}', 200)
+
+    stored = dict(db.execute("SELECT url, encoding FROM url_cache").fetchall())
+    assert stored == {PACKAGE_URL: ENCODING_ZLIB, VERSION_URL: None}
+    size, stored_length = db.execute(
+        "SELECT size, length(content) FROM url_cache WHERE url = ?", [PACKAGE_URL]).fetchone()
+    assert size == len(body) and stored_length < len(body) / 10
+    assert cache.lookup(PACKAGE_URL).content == body
+
+
+def test_rows_from_before_0008_are_plain_successes(db, cache, clock):
+    db.execute("INSERT INTO url_cache (url, content, timestamp) VALUES (?, ?, ?)",
+               [PACKAGE_URL, "old", clock.now])
+    entry = cache.lookup(PACKAGE_URL)
+    assert entry.content == "old" and entry.status == 200 and not entry.stale
+
+
+def test_not_found_is_cached_with_its_own_ttl(cache, clock):
+    assert cache.store(PACKAGE_URL, None, 404)
+    assert not cache.store(VERSION_URL, None, 503)
+    assert not cache.store(VERSION_URL, None, None)
+
+    entry = cache.lookup(PACKAGE_URL, max_age=60)
+    assert entry.content is None and entry.status == 404 and not entry.stale
+    clock.now += 599
+    assert not cache.lookup(PACKAGE_URL, max_age=60).stale
+    clock.now += 301  # past the negative TTL and the stale window
+    assert cache.lookup(PACKAGE_URL) is None
+    assert cache.lookup(VERSION_URL) is None
+
+
+def test_version_documents_outlive_the_callers_ttl(cache, clock):
+    cache.store(VERSION_URL, "v", 200)
+    cache.store(PACKAGE_URL, "p", 200)
+    clock.now += 2 * 3600
+
+    assert not cache.lookup(VERSION_URL, max_age=3600).stale
+    assert cache.lookup(PACKAGE_URL, max_age=3600) is None
+    clock.now += 7 * DAY
+    assert cache.lookup(VERSION_URL, max_age=3600) is None
+
+
+def test_stale_entries_are_served_and_revalidated(db, cache, clock):
+    cache.store(PACKAGE_URL, "old", 200)
+    clock.now += 3600 + 100
+    fetched = threading.Event()
+
+    def fetch(url):
+        fetched.set()
+        return "new", 200
+
+    entry = cache.lookup(PACKAGE_URL, max_age=3600)
+    assert entry.content == "old" and entry.stale
+    cache.revalidate(PACKAGE_URL, fetch)
+    cache.revalidate(PACKAGE_URL, fetch)  # already in flight
+    cache.flush(wait=True)
+
+    assert fetched.is_set()
+    entry = cache.lookup(PACKAGE_URL, max_age=3600)
+    assert entry.content == "new" and not entry.stale
+    assert db.execute("SELECT fetches FROM url_cache").fetchone()[0] == 2
+
+
+def test_failed_revalidation_keeps_the_stale_entry(cache, clock):
+    cache.store(PACKAGE_URL, "old", 200)
+    clock.now += 3600 + 100
+    cache.revalidate(PACKAGE_URL, lambda url: (None, 503))
+    cache.flush(wait=True)
+
+    assert cache.lookup(PACKAGE_URL, max_age=3600).content == "old"
+
+
+def test_stats_and_prune(cache, clock):
+    cache.store(VERSION_URL, "v", 200)
+    cache.store(PACKAGE_URL, "p", 200)
+    cache.store("https://pypi.org/pypi/nope/json", None, 404)
+    cache.lookup(VERSION_URL)
+    cache.lookup(VERSION_URL)
+    cache.lookup(PACKAGE_URL)
+    clock.now += 3600 + 400  # package and 404 entries past their TTL and stale window
+
+    stats = {s["endpoint"]: s for s in cache.stats()}
+    assert stats["deps.dev version"]["hits"] == 2
+    assert stats["deps.dev version"]["hit_rate"] == pytest.approx(2 / 3)
+    assert stats["deps.dev package"]["expired"] == 1
+    assert stats["pypi project"]["negative"] == 1
+
+    assert cache.prune() == 2
+    assert {s["endpoint"] for s in cache.stats()} == {"deps.dev version"}
+    assert cache.prune(everything=True) == 1
+    assert cache.stats() == []
+
+
+def test_cache_cli(db, monkeypatch):
+    import kospex_cli
+    from kospex_query import KospexQuery
+
+    monkeypatch.setattr(kospex_cli.kospex, "kospex_db", db)
+    monkeypatch.setattr(kospex_cli.kospex, "kospex_query", KospexQuery(kospex_db=db))
+    monkeypatch.setattr(kospex_cli, "warn_if_behind", lambda *a, **k: None)
+    url_cache = kospex_cli.kospex.kospex_query.url_cache
+    url_cache.store(VERSION_URL, "v", 200)
+    url_cache.lookup(VERSION_URL)
+
+    result = CliRunner().invoke(kospex_cli.cli, ["cache", "stats"])
+    assert result.exit_code == 0, result.output
+    assert "url_cache" in result.output and "50%" in result.output  # 1 hit, 1 fetch
+
+    result = CliRunner().invoke(kospex_cli.cli, ["cache", "prune", "-all"])
+    assert result.exit_code == 0, result.output
+    assert "Deleted 1 url_cache entries" in result.output
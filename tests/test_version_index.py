@@ -0,0 +1,88 @@
+"""VersionIndex answers get_versions_behind() the way the linear scan did."""
+import json
+import random
+
+from kospex.version_index import VersionIndex, fuzzy_version_forms
+from kospex_dependencies import KospexDependencies
+
+
+def _linear_versions_behind(versions, version):
+    """The sort-and-scan get_versions_behind() used before VersionIndex."""
+    kd = KospexDependencies()
+    sorted_list = sorted(versions, key=lambda x: x["publishedAt"] or "", reverse=True)
+    keys_before_default = versions_behind = 0
+    found_default = False
+    for release in sorted_list:
+        if release["isDefault"]:
+            found_default = True
+        if kd.version_fuzzy_match(version, release["versionKey"]["version"]):
+            break
+        if not found_default:
+            keys_before_default += 1
+        else:
+            versions_behind += 1
+    return {"versions": len(sorted_list), "versions_before_default": keys_before_default,
+            "versions_behind": versions_behind}
+
+
+def _release(version, published, default=False):
+    return {"versionKey": {"version": version}, "publishedAt": published, "isDefault": default}
+
+
+def test_matches_the_linear_scan():
+    rng = random.Random(7)
+    for _ in range(200):
+        names = rng.sample(["1.0.0", "1.1.0", "1.2.0", "2.0.0", "2.0.1", "3.4.0", "2022.7.13",
+                            "3.0.0-rc1", "0.9.0", "4.0.0"], rng.randint(0, 10))
+        versions = [_release(name, rng.choice(["", f"2024-0{rng.randint(1, 9)}-01T00:00:00Z"]))
+                    for name in names]
+        if versions and rng.random() < 0.8:
+            rng.choice(versions)["isDefault"] = True
+        index = VersionIndex(versions)
+        for wanted in ["1.0.0", "2.0.1", "3.4", "2022.07.13", "3.0.0-rc1", "9.9.9", "4.0.0"]:
+            assert index.versions_behind(wanted) == _linear_versions_behind(versions, wanted), \
+                (versions, wanted)
+
+
+def test_fuzzy_forms_agree_with_version_fuzzy_match():
+    kd = KospexDependencies()
+    for wanted, candidate in [("3.4", "3.4.0"), ("2022.07.13", "2022.7.13"), ("1.0.0", "1.0.0"),
+                              ("1.0", "1.0.1"), ("01.2", "1.2.0")]:
+        assert (candidate in fuzzy_version_forms(wanted)) == kd.version_fuzzy_match(wanted, candidate)
+
+
+class _CountingQuery:
+    def __init__(self, body):
+        self.body = body
+        self.calls = 0
+
+    def url_request(self, url, **kw):
+        self.calls += 1
+        return self.body
+
+
+def test_package_history_is_fetched_once_per_package():
+    body = json.dumps({"versions": [
+        _release("2.0.0", "2024-03-01T00:00:00Z", default=True),
+        _release("1.1.0", "2024-02-01T00:00:00Z"),
+        _release("1.0.0", "2024-01-01T00:00:00Z"),
+    ]})
+    query = _CountingQuery(body)
+    kd = KospexDependencies(kospex_query=query)
+
+    behind = [kd.get_versions_behind("npm", "lodash", v)["versions_behind"]
+              for v in ["1.0.0", "1.1.0", "2.0.0", "1.0.0"]]
+
+    assert behind == [2, 1, 0, 2]
+    assert query.calls == 1
+    kd.get_versions_behind("npm", "other", "1.0.0")
+    assert query.calls == 2
+
+
+def test_failed_fetch_is_not_remembered():
+    query = _CountingQuery(None)
+    kd = KospexDependencies(kospex_query=query)
+
+    assert kd.get_versions_behind("npm", "gone", "1.0.0")["versions"] == 0
+    kd.get_versions_behind("npm", "gone", "1.0.0")
+    assert query.calls == 2